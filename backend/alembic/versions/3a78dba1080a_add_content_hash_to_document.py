@@ -0,0 +1,28 @@
+"""add content hash to document
+
+Revision ID: 3a78dba1080a
+Revises: b558f51620b4
+Create Date: 2025-08-20 10:12:41.503210
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3a78dba1080a"
+down_revision = "b558f51620b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("content_hash", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "content_hash")
@@ -0,0 +1,29 @@
+"""add chunk hashes to document
+
+Revision ID: 6f4e1c2d9b7a
+Revises: 3a78dba1080a
+Create Date: 2025-08-22 14:03:18.271934
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "6f4e1c2d9b7a"
+down_revision = "3a78dba1080a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("chunk_hashes", postgresql.JSONB(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "chunk_hashes")
@@ -0,0 +1,87 @@
+"""add analytics rollups
+
+Revision ID: 8b2f5d7c1e4a
+Revises: 6f4e1c2d9b7a
+Create Date: 2025-08-26 10:12:44.518903
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "8b2f5d7c1e4a"
+down_revision = "6f4e1c2d9b7a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # the tables start out empty and are backfilled by the analytics rollup task
+    op.create_table(
+        "analytics_daily_user_usage",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("like_count", sa.Integer(), nullable=False),
+        sa.Column("dislike_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("date", "user_id"),
+    )
+    op.create_table(
+        "analytics_daily_persona_usage",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("persona_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("date", "persona_id", "user_id"),
+    )
+    op.create_index(
+        "ix_analytics_daily_persona_usage_persona_date",
+        "analytics_daily_persona_usage",
+        ["persona_id", "date"],
+    )
+    op.create_table(
+        "analytics_onyxbot_session",
+        sa.Column("chat_session_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("session_date", sa.Date(), nullable=False),
+        sa.Column("first_answer_id", sa.Integer(), nullable=False),
+        sa.Column("negative_feedback", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("chat_session_id"),
+    )
+    op.create_index(
+        op.f("ix_analytics_onyxbot_session_session_date"),
+        "analytics_onyxbot_session",
+        ["session_date"],
+    )
+    op.create_index(
+        op.f("ix_analytics_onyxbot_session_first_answer_id"),
+        "analytics_onyxbot_session",
+        ["first_answer_id"],
+    )
+    op.create_table(
+        "analytics_rollup_watermark",
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("table_name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analytics_rollup_watermark")
+    op.drop_index(
+        op.f("ix_analytics_onyxbot_session_first_answer_id"),
+        table_name="analytics_onyxbot_session",
+    )
+    op.drop_index(
+        op.f("ix_analytics_onyxbot_session_session_date"),
+        table_name="analytics_onyxbot_session",
+    )
+    op.drop_table("analytics_onyxbot_session")
+    op.drop_index(
+        "ix_analytics_daily_persona_usage_persona_date",
+        table_name="analytics_daily_persona_usage",
+    )
+    op.drop_table("analytics_daily_persona_usage")
+    op.drop_table("analytics_daily_user_usage")
@@ -0,0 +1,28 @@
+"""add content hash search settings id to document
+
+Revision ID: d4a1e8c7f2b3
+Revises: 8b2f5d7c1e4a
+Create Date: 2025-08-27 16:41:09.118204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d4a1e8c7f2b3"
+down_revision = "8b2f5d7c1e4a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("content_hash_search_settings_id", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "content_hash_search_settings_id")
@@ -132,6 +132,7 @@ def autogenerate_usage_report_task(*, tenant_id: str) -> None:
 
 celery_app.autodiscover_tasks(
     [
+        "ee.onyx.background.celery.tasks.analytics",
         "ee.onyx.background.celery.tasks.doc_permission_syncing",
         "ee.onyx.background.celery.tasks.external_group_syncing",
         "ee.onyx.background.celery.tasks.cloud",
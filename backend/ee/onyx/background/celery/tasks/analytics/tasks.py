@@ -0,0 +1,27 @@
+from celery import shared_task
+
+from ee.onyx.db.analytics import update_analytics_rollups
+from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.db.engine.sql_engine import get_session_with_tenant
+from onyx.utils.logger import setup_logger
+
+
+logger = setup_logger()
+
+
+@shared_task(
+    name=OnyxCeleryTask.UPDATE_ANALYTICS_ROLLUPS_TASK,
+    ignore_result=True,
+    soft_time_limit=JOB_TIMEOUT,
+)
+def update_analytics_rollups_task(*, tenant_id: str) -> None:
+    """Adds the chat messages and feedback since the last run to the analytics
+    rollups. The first run backfills the whole chat history, one batch per
+    transaction."""
+    with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+        batches = 1
+        while update_analytics_rollups(db_session):
+            batches += 1
+
+    logger.info(f"Updated analytics rollups: {tenant_id=} {batches=}")
@@ -1,6 +1,7 @@
 from datetime import timedelta
 from typing import Any
 
+from ee.onyx.configs.app_configs import ANALYTICS_ROLLUP_FREQUENCY_IN_MINUTES
 from ee.onyx.configs.app_configs import CHECK_TTL_MANAGEMENT_TASK_FREQUENCY_IN_HOURS
 from onyx.background.celery.tasks.beat_schedule import (
     beat_cloud_tasks as base_beat_system_tasks,
@@ -30,6 +31,15 @@ ee_beat_task_templates: list[dict] = [
             "expires": BEAT_EXPIRES_DEFAULT,
         },
     },
+    {
+        "name": "update-analytics-rollups",
+        "task": OnyxCeleryTask.UPDATE_ANALYTICS_ROLLUPS_TASK,
+        "schedule": timedelta(minutes=ANALYTICS_ROLLUP_FREQUENCY_IN_MINUTES),
+        "options": {
+            "priority": OnyxCeleryPriority.MEDIUM,
+            "expires": BEAT_EXPIRES_DEFAULT,
+        },
+    },
     {
         "name": "check-ttl-management",
         "task": OnyxCeleryTask.CHECK_TTL_MANAGEMENT_TASK,
@@ -64,6 +74,15 @@ if not MULTI_TENANT:
                 "expires": BEAT_EXPIRES_DEFAULT,
             },
         },
+        {
+            "name": "update-analytics-rollups",
+            "task": OnyxCeleryTask.UPDATE_ANALYTICS_ROLLUPS_TASK,
+            "schedule": timedelta(minutes=ANALYTICS_ROLLUP_FREQUENCY_IN_MINUTES),
+            "options": {
+                "priority": OnyxCeleryPriority.MEDIUM,
+                "expires": BEAT_EXPIRES_DEFAULT,
+            },
+        },
         {
             "name": "check-ttl-management",
             "task": OnyxCeleryTask.CHECK_TTL_MANAGEMENT_TASK,
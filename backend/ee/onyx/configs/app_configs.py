@@ -122,6 +122,16 @@ SHAREPOINT_PERMISSION_GROUP_SYNC_FREQUENCY = int(
 CHECK_TTL_MANAGEMENT_TASK_FREQUENCY_IN_HOURS = float(
     os.environ.get("CHECK_TTL_MANAGEMENT_TASK_FREQUENCY_IN_HOURS") or 1
 )  # float for easier testing
+ANALYTICS_ROLLUP_FREQUENCY_IN_MINUTES = float(
+    os.environ.get("ANALYTICS_ROLLUP_FREQUENCY_IN_MINUTES") or 15
+)
+# chat messages added to the analytics rollups per transaction
+ANALYTICS_ROLLUP_BATCH_SIZE = int(
+    os.environ.get("ANALYTICS_ROLLUP_BATCH_SIZE") or 50_000
+)
+# chat messages are only added to the rollups once they are this old, see
+# `update_analytics_rollups`. Newer ones are counted live
+ANALYTICS_ROLLUP_LAG_MINUTES = int(os.environ.get("ANALYTICS_ROLLUP_LAG_MINUTES") or 10)
 
 
 STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY")
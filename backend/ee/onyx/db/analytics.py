@@ -1,5 +1,7 @@
 import datetime
+from collections import defaultdict
 from collections.abc import Sequence
+from typing import NamedTuple
 from uuid import UUID
 
 from sqlalchemy import and_
@@ -9,82 +11,498 @@ from sqlalchemy import Date
 from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import union_all
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import InstrumentedAttribute
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
 
+from ee.onyx.configs.app_configs import ANALYTICS_ROLLUP_BATCH_SIZE
+from ee.onyx.configs.app_configs import ANALYTICS_ROLLUP_LAG_MINUTES
 from onyx.configs.constants import MessageType
+from onyx.db.models import AnalyticsDailyPersonaUsage
+from onyx.db.models import AnalyticsDailyUserUsage
+from onyx.db.models import AnalyticsOnyxbotSession
+from onyx.db.models import AnalyticsRollupWatermark
 from onyx.db.models import ChatMessage
 from onyx.db.models import ChatMessageFeedback
 from onyx.db.models import ChatSession
 from onyx.db.models import Persona
 from onyx.db.models import User
 from onyx.db.models import UserRole
+from onyx.utils.batching import batch_generator
 
+# The admin dashboards are served from daily rollups that `update_analytics_rollups`
+# maintains incrementally: every chat message and feedback id up to the watermarks has
+# been added to the rollups, everything after them is aggregated live and merged in.
+# Date ranges are applied by day.
 
-def fetch_query_analytics(
-    start: datetime.datetime,
-    end: datetime.datetime,
-    db_session: Session,
-) -> Sequence[tuple[int, int, int, datetime.date]]:
-    stmt = (
+# stands in for the user of messages sent with auth disabled
+_NO_USER_ID = UUID(int=0)
+
+# rows or ids per statement, keeps the number of bind parameters well below Postgres' limit
+_STATEMENT_BATCH_SIZE = 1000
+
+_MESSAGE_WATERMARK = ChatMessage.__tablename__
+_FEEDBACK_WATERMARK = ChatMessageFeedback.__tablename__
+
+
+class _IdRanges(NamedTuple):
+    """Chat message and feedback ids in (after_id, up_to_id], None for no upper
+    bound"""
+
+    message_after_id: int
+    message_up_to_id: int | None
+    feedback_after_id: int
+    feedback_up_to_id: int | None
+
+
+def _id_filters(
+    column: InstrumentedAttribute[int], after_id: int, up_to_id: int | None
+) -> list[ColumnElement[bool]]:
+    filters = [column > after_id]
+    if up_to_id is not None:
+        filters.append(column <= up_to_id)
+    return filters
+
+
+def _message_filters(
+    id_ranges: _IdRanges, since: datetime.datetime | None
+) -> list[ColumnElement[bool]]:
+    filters = _id_filters(
+        ChatMessage.id, id_ranges.message_after_id, id_ranges.message_up_to_id
+    )
+    filters.append(ChatMessage.message_type == MessageType.ASSISTANT)
+    if since is not None:
+        filters.append(ChatMessage.time_sent >= since)
+    return filters
+
+
+def _feedback_filters(
+    id_ranges: _IdRanges, since: datetime.datetime | None
+) -> list[ColumnElement[bool]]:
+    filters = _id_filters(
+        ChatMessageFeedback.id,
+        id_ranges.feedback_after_id,
+        id_ranges.feedback_up_to_id,
+    )
+    filters.append(ChatMessage.message_type == MessageType.ASSISTANT)
+    if since is not None:
+        filters.append(ChatMessage.time_sent >= since)
+    return filters
+
+
+def _is_negative(is_positive: bool | None, required_followup: bool | None) -> bool:
+    return is_positive is False or required_followup is True
+
+
+def _user_usage_deltas(
+    db_session: Session, id_ranges: _IdRanges, since: datetime.datetime | None = None
+) -> dict[tuple[datetime.date, UUID], list[int]]:
+    """(date, user id) -> [messages, likes, dislikes]"""
+    message_date = cast(ChatMessage.time_sent, Date)
+    deltas: dict[tuple[datetime.date, UUID], list[int]] = defaultdict(lambda: [0, 0, 0])
+
+    message_counts = db_session.execute(
+        select(message_date, ChatSession.user_id, func.count(ChatMessage.id))
+        .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
+        .where(*_message_filters(id_ranges, since))
+        .group_by(message_date, ChatSession.user_id)
+    ).all()
+    for date, user_id, message_count in message_counts:
+        deltas[(date, user_id or _NO_USER_ID)][0] += message_count
+
+    feedback_counts = db_session.execute(
         select(
-            func.count(ChatMessage.id),
+            message_date,
+            ChatSession.user_id,
             func.sum(case((ChatMessageFeedback.is_positive, 1), else_=0)),
             func.sum(
                 case(
                     (ChatMessageFeedback.is_positive == False, 1), else_=0  # noqa: E712
                 )
             ),
-            cast(ChatMessage.time_sent, Date),
         )
-        .join(
-            ChatMessageFeedback,
-            ChatMessageFeedback.chat_message_id == ChatMessage.id,
-            isouter=True,
+        .select_from(ChatMessageFeedback)
+        .join(ChatMessage, ChatMessage.id == ChatMessageFeedback.chat_message_id)
+        .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
+        .where(*_feedback_filters(id_ranges, since))
+        .group_by(message_date, ChatSession.user_id)
+    ).all()
+    for date, user_id, like_count, dislike_count in feedback_counts:
+        counts = deltas[(date, user_id or _NO_USER_ID)]
+        counts[1] += like_count
+        counts[2] += dislike_count
+
+    return deltas
+
+
+def _persona_usage_deltas(
+    db_session: Session,
+    id_ranges: _IdRanges,
+    since: datetime.datetime | None = None,
+    persona_id: int | None = None,
+) -> dict[tuple[datetime.date, int, UUID], int]:
+    """(date, persona id, user id) -> messages"""
+    message_date = cast(ChatMessage.time_sent, Date)
+    alternate_assistant_filters: list[ColumnElement[bool]] = [
+        ChatMessage.alternate_assistant_id.is_not(None)
+    ]
+    session_persona_filters: list[ColumnElement[bool]] = [
+        ChatSession.persona_id.is_not(None),
+        # counted once if sent to the session's own persona
+        or_(
+            ChatMessage.alternate_assistant_id.is_(None),
+            ChatMessage.alternate_assistant_id != ChatSession.persona_id,
+        ),
+    ]
+    if persona_id is not None:
+        alternate_assistant_filters.append(
+            ChatMessage.alternate_assistant_id == persona_id
+        )
+        session_persona_filters.append(ChatSession.persona_id == persona_id)
+
+    stmt = union_all(
+        *(
+            select(message_date, persona_column, ChatSession.user_id, func.count())
+            .select_from(ChatMessage)
+            .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
+            .where(*_message_filters(id_ranges, since), *persona_filters)
+            .group_by(message_date, persona_column, ChatSession.user_id)
+            for persona_column, persona_filters in (
+                (ChatMessage.alternate_assistant_id, alternate_assistant_filters),
+                (ChatSession.persona_id, session_persona_filters),
+            )
+        )
+    )
+
+    deltas: dict[tuple[datetime.date, int, UUID], int] = defaultdict(int)
+    for date, row_persona_id, user_id, message_count in db_session.execute(stmt):
+        deltas[(date, row_persona_id, user_id or _NO_USER_ID)] += message_count
+    return deltas
+
+
+def _latest_onyxbot_feedback(
+    db_session: Session, feedback_filters: list[ColumnElement[bool]]
+) -> dict[int, bool]:
+    """chat message id -> whether the latest of the matching feedback on it is
+    negative"""
+    latest_feedback_ids = (
+        select(func.max(ChatMessageFeedback.id))
+        .join(ChatMessage, ChatMessage.id == ChatMessageFeedback.chat_message_id)
+        .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
+        .where(ChatSession.onyxbot_flow.is_(True), *feedback_filters)
+        .group_by(ChatMessageFeedback.chat_message_id)
+    )
+    rows = db_session.execute(
+        select(
+            ChatMessageFeedback.chat_message_id,
+            ChatMessageFeedback.is_positive,
+            ChatMessageFeedback.required_followup,
+        ).where(ChatMessageFeedback.id.in_(latest_feedback_ids))
+    ).all()
+    return {
+        chat_message_id: _is_negative(is_positive, required_followup)
+        for chat_message_id, is_positive, required_followup in rows
+    }
+
+
+class _OnyxbotDeltas(NamedTuple):
+    # chat session id -> (session date, first answer id, negative feedback), for
+    # sessions whose first answer is in the id range
+    new_sessions: dict[UUID, tuple[datetime.date, int, bool]]
+    # answer id -> negative feedback, for answers with feedback in the id range
+    feedback: dict[int, bool]
+
+
+def _onyxbot_deltas(
+    db_session: Session, id_ranges: _IdRanges, since: datetime.datetime | None = None
+) -> _OnyxbotDeltas:
+    session_date = cast(ChatSession.time_created, Date)
+    stmt = (
+        select(ChatSession.id, session_date, func.min(ChatMessage.id))
+        .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
+        .where(ChatSession.onyxbot_flow.is_(True), *_message_filters(id_ranges, None))
+        .group_by(ChatSession.id, session_date)
+    )
+    if since is not None:
+        stmt = stmt.where(ChatSession.time_created >= since)
+    # sessions that had an answer before the range are skipped when adding these
+    first_answers = db_session.execute(stmt).all()
+
+    # the latest feedback so far, given before or during the range
+    answer_feedback: dict[int, bool] = {}
+    for answer_id_batch in batch_generator(
+        [answer_id for _, _, answer_id in first_answers], _STATEMENT_BATCH_SIZE
+    ):
+        answer_feedback.update(
+            _latest_onyxbot_feedback(
+                db_session,
+                [
+                    ChatMessageFeedback.chat_message_id.in_(answer_id_batch),
+                    *_id_filters(
+                        ChatMessageFeedback.id, 0, id_ranges.feedback_up_to_id
+                    ),
+                ],
+            )
+        )
+    new_sessions = {
+        chat_session_id: (date, answer_id, answer_feedback.get(answer_id, False))
+        for chat_session_id, date, answer_id in first_answers
+    }
+
+    feedback = _latest_onyxbot_feedback(
+        db_session, _feedback_filters(id_ranges, since=None)
+    )
+    return _OnyxbotDeltas(new_sessions=new_sessions, feedback=feedback)
+
+
+def _apply_deltas(db_session: Session, id_ranges: _IdRanges) -> None:
+    user_usage = _user_usage_deltas(db_session, id_ranges)
+    for batch in batch_generator(user_usage.items(), _STATEMENT_BATCH_SIZE):
+        user_stmt = insert(AnalyticsDailyUserUsage).values(
+            [
+                {
+                    "date": date,
+                    "user_id": user_id,
+                    "message_count": message_count,
+                    "like_count": like_count,
+                    "dislike_count": dislike_count,
+                }
+                for (date, user_id), (message_count, like_count, dislike_count) in batch
+            ]
+        )
+        db_session.execute(
+            user_stmt.on_conflict_do_update(
+                index_elements=["date", "user_id"],
+                set_={
+                    "message_count": AnalyticsDailyUserUsage.message_count
+                    + user_stmt.excluded.message_count,
+                    "like_count": AnalyticsDailyUserUsage.like_count
+                    + user_stmt.excluded.like_count,
+                    "dislike_count": AnalyticsDailyUserUsage.dislike_count
+                    + user_stmt.excluded.dislike_count,
+                },
+            )
+        )
+
+    persona_usage = _persona_usage_deltas(db_session, id_ranges)
+    for persona_batch in batch_generator(persona_usage.items(), _STATEMENT_BATCH_SIZE):
+        persona_stmt = insert(AnalyticsDailyPersonaUsage).values(
+            [
+                {
+                    "date": date,
+                    "persona_id": persona_id,
+                    "user_id": user_id,
+                    "message_count": message_count,
+                }
+                for (date, persona_id, user_id), message_count in persona_batch
+            ]
+        )
+        db_session.execute(
+            persona_stmt.on_conflict_do_update(
+                index_elements=["date", "persona_id", "user_id"],
+                set_={
+                    "message_count": AnalyticsDailyPersonaUsage.message_count
+                    + persona_stmt.excluded.message_count
+                },
+            )
+        )
+
+    onyxbot = _onyxbot_deltas(db_session, id_ranges)
+    for negative_feedback in (True, False):
+        answer_ids = [
+            answer_id
+            for answer_id, negative in onyxbot.feedback.items()
+            if negative == negative_feedback
+        ]
+        for answer_id_batch in batch_generator(answer_ids, _STATEMENT_BATCH_SIZE):
+            db_session.execute(
+                update(AnalyticsOnyxbotSession)
+                .where(AnalyticsOnyxbotSession.first_answer_id.in_(answer_id_batch))
+                .values(negative_feedback=negative_feedback)
+            )
+    for session_batch in batch_generator(
+        onyxbot.new_sessions.items(), _STATEMENT_BATCH_SIZE
+    ):
+        db_session.execute(
+            insert(AnalyticsOnyxbotSession)
+            .values(
+                [
+                    {
+                        "chat_session_id": chat_session_id,
+                        "session_date": date,
+                        "first_answer_id": answer_id,
+                        "negative_feedback": negative,
+                    }
+                    for chat_session_id, (date, answer_id, negative) in session_batch
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["chat_session_id"])
+        )
+
+
+def _batch_end(
+    db_session: Session, column: InstrumentedAttribute[int], after_id: int
+) -> int | None:
+    """The id ANALYTICS_ROLLUP_BATCH_SIZE rows after `after_id`, None if there
+    aren't that many"""
+    return db_session.scalar(
+        select(column)
+        .where(column > after_id)
+        .order_by(column)
+        .offset(ANALYTICS_ROLLUP_BATCH_SIZE - 1)
+        .limit(1)
+    )
+
+
+def update_analytics_rollups(db_session: Session) -> bool:
+    """Adds the next batch of chat messages and feedback to the analytics rollups
+    and commits. Returns whether there is more to add."""
+    db_session.execute(
+        insert(AnalyticsRollupWatermark)
+        .values(
+            [
+                {"table_name": table_name, "last_id": 0}
+                for table_name in (_MESSAGE_WATERMARK, _FEEDBACK_WATERMARK)
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["table_name"])
+    )
+    # the rollups are incremented, so runs must not overlap
+    watermarks = {
+        watermark.table_name: watermark
+        for watermark in db_session.scalars(
+            select(AnalyticsRollupWatermark).with_for_update()
+        )
+    }
+    message_watermark = watermarks[_MESSAGE_WATERMARK]
+    feedback_watermark = watermarks[_FEEDBACK_WATERMARK]
+
+    # ids are handed out on insert, so a message can be committed after messages
+    # with larger ids. Skipping over recent messages keeps them from being missed
+    # while their transaction is still open
+    message_batch_end = _batch_end(
+        db_session, ChatMessage.id, message_watermark.last_id
+    )
+    message_up_to_id = db_session.scalar(
+        select(func.max(ChatMessage.id)).where(
+            *_id_filters(ChatMessage.id, message_watermark.last_id, message_batch_end),
+            ChatMessage.time_sent
+            < func.now() - datetime.timedelta(minutes=ANALYTICS_ROLLUP_LAG_MINUTES),
         )
-        .where(
-            ChatMessage.time_sent >= start,
+    )
+    # feedback is committed right away
+    feedback_batch_end = _batch_end(
+        db_session, ChatMessageFeedback.id, feedback_watermark.last_id
+    )
+    feedback_up_to_id = db_session.scalar(
+        select(func.max(ChatMessageFeedback.id)).where(
+            *_id_filters(
+                ChatMessageFeedback.id, feedback_watermark.last_id, feedback_batch_end
+            )
         )
-        .where(
-            ChatMessage.time_sent <= end,
+    )
+
+    id_ranges = _IdRanges(
+        message_after_id=message_watermark.last_id,
+        message_up_to_id=message_up_to_id or message_watermark.last_id,
+        feedback_after_id=feedback_watermark.last_id,
+        feedback_up_to_id=feedback_up_to_id or feedback_watermark.last_id,
+    )
+    _apply_deltas(db_session, id_ranges)
+    message_watermark.last_id = id_ranges.message_up_to_id or 0
+    feedback_watermark.last_id = id_ranges.feedback_up_to_id or 0
+    db_session.commit()
+
+    return (
+        message_batch_end is not None and message_up_to_id == message_batch_end
+    ) or feedback_batch_end is not None
+
+
+def _live_id_ranges(db_session: Session) -> _IdRanges:
+    """Everything that hasn't been added to the rollups yet"""
+    watermarks: dict[str, int] = {
+        table_name: last_id
+        for table_name, last_id in db_session.execute(
+            select(
+                AnalyticsRollupWatermark.table_name, AnalyticsRollupWatermark.last_id
+            )
         )
-        .where(ChatMessage.message_type == MessageType.ASSISTANT)
-        .group_by(cast(ChatMessage.time_sent, Date))
-        .order_by(cast(ChatMessage.time_sent, Date))
+    }
+    return _IdRanges(
+        message_after_id=watermarks.get(_MESSAGE_WATERMARK, 0),
+        message_up_to_id=None,
+        feedback_after_id=watermarks.get(_FEEDBACK_WATERMARK, 0),
+        feedback_up_to_id=None,
     )
 
-    return db_session.execute(stmt).all()  # type: ignore
 
+def _user_usage(
+    start: datetime.datetime, end: datetime.datetime, db_session: Session
+) -> dict[tuple[datetime.date, UUID], list[int]]:
+    start_date, end_date = start.date(), end.date()
+    usage: dict[tuple[datetime.date, UUID], list[int]] = defaultdict(lambda: [0, 0, 0])
+    live = _user_usage_deltas(db_session, _live_id_ranges(db_session), since=start)
+    for key, counts in live.items():
+        usage[key] = list(counts)
+    for date, user_id, message_count, like_count, dislike_count in db_session.execute(
+        select(
+            AnalyticsDailyUserUsage.date,
+            AnalyticsDailyUserUsage.user_id,
+            AnalyticsDailyUserUsage.message_count,
+            AnalyticsDailyUserUsage.like_count,
+            AnalyticsDailyUserUsage.dislike_count,
+        ).where(AnalyticsDailyUserUsage.date.between(start_date, end_date))
+    ):
+        counts = usage[(date, user_id)]
+        counts[0] += message_count
+        counts[1] += like_count
+        counts[2] += dislike_count
+
+    return {
+        (date, user_id): counts
+        for (date, user_id), counts in usage.items()
+        if start_date <= date <= end_date and any(counts)
+    }
 
-def fetch_per_user_query_analytics(
+
+def fetch_query_analytics(
     start: datetime.datetime,
     end: datetime.datetime,
     db_session: Session,
-) -> Sequence[tuple[int, int, int, datetime.date, UUID]]:
-    stmt = (
-        select(
-            func.count(ChatMessage.id),
-            func.sum(case((ChatMessageFeedback.is_positive, 1), else_=0)),
-            func.sum(
-                case(
-                    (ChatMessageFeedback.is_positive == False, 1), else_=0  # noqa: E712
-                )
-            ),
-            cast(ChatMessage.time_sent, Date),
-            ChatSession.user_id,
+) -> Sequence[tuple[int, int, int, datetime.date]]:
+    daily_usage: dict[datetime.date, list[int]] = defaultdict(lambda: [0, 0, 0])
+    for (date, _), counts in _user_usage(start, end, db_session).items():
+        for i, count in enumerate(counts):
+            daily_usage[date][i] += count
+
+    return [
+        (message_count, like_count, dislike_count, date)
+        for date, (message_count, like_count, dislike_count) in sorted(
+            daily_usage.items()
         )
-        .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
-        .where(
-            ChatMessage.time_sent >= start,
+    ]
+
+
+def fetch_per_user_query_analytics(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    db_session: Session,
+) -> Sequence[tuple[int, int, int, datetime.date, UUID | None]]:
+    return [
+        (
+            message_count,
+            like_count,
+            dislike_count,
+            date,
+            None if user_id == _NO_USER_ID else user_id,
         )
-        .where(
-            ChatMessage.time_sent <= end,
+        for (date, user_id), (message_count, like_count, dislike_count) in sorted(
+            _user_usage(start, end, db_session).items()
         )
-        .where(ChatMessage.message_type == MessageType.ASSISTANT)
-        .group_by(cast(ChatMessage.time_sent, Date), ChatSession.user_id)
-        .order_by(cast(ChatMessage.time_sent, Date), ChatSession.user_id)
-    )
-
-    return db_session.execute(stmt).all()  # type: ignore
+    ]
 
 
 def fetch_onyxbot_analytics(
@@ -98,82 +516,110 @@ def fetch_onyxbot_analytics(
     Number of instances of Negative feedback OR Needing additional help
         (only counting the last feedback)
     """
-    # Get every chat session in the time range which is a Onyxbot flow
-    # along with the first Assistant message which is the response to the user question.
-    # Generally there should not be more than one AI message per chat session of this type
-    subquery_first_ai_response = (
-        db_session.query(
-            ChatMessage.chat_session_id.label("chat_session_id"),
-            func.min(ChatMessage.id).label("chat_message_id"),
-        )
-        .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
-        .where(
-            ChatSession.time_created >= start,
-            ChatSession.time_created <= end,
-            ChatSession.onyxbot_flow.is_(True),
+    start_date, end_date = start.date(), end.date()
+    # date -> [sessions, negative answers]
+    daily_sessions: dict[datetime.date, list[int]] = defaultdict(lambda: [0, 0])
+    for date, session_count, negative_count in db_session.execute(
+        select(
+            AnalyticsOnyxbotSession.session_date,
+            func.count(AnalyticsOnyxbotSession.chat_session_id),
+            func.sum(case((AnalyticsOnyxbotSession.negative_feedback, 1), else_=0)),
         )
-        .where(
-            ChatMessage.message_type == MessageType.ASSISTANT,
+        .where(AnalyticsOnyxbotSession.session_date.between(start_date, end_date))
+        .group_by(AnalyticsOnyxbotSession.session_date)
+    ):
+        daily_sessions[date][0] += session_count
+        daily_sessions[date][1] += negative_count
+
+    live = _onyxbot_deltas(db_session, _live_id_ranges(db_session), since=start)
+    rolled_up_sessions = (
+        set(
+            db_session.scalars(
+                select(AnalyticsOnyxbotSession.chat_session_id).where(
+                    AnalyticsOnyxbotSession.chat_session_id.in_(live.new_sessions)
+                )
+            )
         )
-        .group_by(ChatMessage.chat_session_id)
-        .subquery()
+        if live.new_sessions
+        else set()
     )
-
-    # Get the chat message ids and most recent feedback for each of those chat messages,
-    # not including the messages that have no feedback
-    subquery_last_feedback = (
-        db_session.query(
-            ChatMessageFeedback.chat_message_id.label("chat_message_id"),
-            func.max(ChatMessageFeedback.id).label("max_feedback_id"),
-        )
-        .group_by(ChatMessageFeedback.chat_message_id)
-        .subquery()
+    for chat_session_id, (date, _, negative) in live.new_sessions.items():
+        if chat_session_id not in rolled_up_sessions:
+            daily_sessions[date][0] += 1
+            daily_sessions[date][1] += negative
+
+    if live.feedback:
+        # newer feedback on answers that have been rolled up
+        for date, answer_id, negative in db_session.execute(
+            select(
+                AnalyticsOnyxbotSession.session_date,
+                AnalyticsOnyxbotSession.first_answer_id,
+                AnalyticsOnyxbotSession.negative_feedback,
+            ).where(AnalyticsOnyxbotSession.first_answer_id.in_(live.feedback))
+        ):
+            daily_sessions[date][1] += live.feedback[answer_id] - negative
+
+    return [
+        (session_count, negative_count, date)
+        for date, (session_count, negative_count) in sorted(daily_sessions.items())
+        if start_date <= date <= end_date
+    ]
+
+
+def _persona_daily_users(
+    db_session: Session,
+    persona_id: int,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> dict[datetime.date, dict[UUID, int]]:
+    """date -> user id -> messages"""
+    start_date, end_date = start.date(), end.date()
+    daily_users: dict[datetime.date, dict[UUID, int]] = defaultdict(
+        lambda: defaultdict(int)
     )
-
-    results = (
-        db_session.query(
-            func.count(ChatSession.id).label("total_sessions"),
-            # Need to explicitly specify this as False to handle the NULL case so the cases without
-            # feedback aren't counted against Onyxbot
-            func.sum(
-                case(
-                    (
-                        or_(
-                            ChatMessageFeedback.is_positive.is_(False),
-                            ChatMessageFeedback.required_followup.is_(True),
-                        ),
-                        1,
-                    ),
-                    else_=0,
-                )
-            ).label("negative_answer"),
-            cast(ChatSession.time_created, Date).label("session_date"),
-        )
-        .join(
-            subquery_first_ai_response,
-            ChatSession.id == subquery_first_ai_response.c.chat_session_id,
-        )
-        # Combine the chat sessions with latest feedback to get the latest feedback for the first AI
-        # message of the chat session where the chat session is Onyxbot type and within the time
-        # range specified. Left/outer join used here to ensure that if no feedback, a null is used
-        # for the feedback id
-        .outerjoin(
-            subquery_last_feedback,
-            subquery_first_ai_response.c.chat_message_id
-            == subquery_last_feedback.c.chat_message_id,
-        )
-        # Join the actual feedback table to get the feedback info for the sums
-        # Outer join because the "last feedback" may be null
-        .outerjoin(
-            ChatMessageFeedback,
-            ChatMessageFeedback.id == subquery_last_feedback.c.max_feedback_id,
+    for date, user_id, message_count in db_session.execute(
+        select(
+            AnalyticsDailyPersonaUsage.date,
+            AnalyticsDailyPersonaUsage.user_id,
+            AnalyticsDailyPersonaUsage.message_count,
+        ).where(
+            AnalyticsDailyPersonaUsage.persona_id == persona_id,
+            AnalyticsDailyPersonaUsage.date.between(start_date, end_date),
         )
-        .group_by(cast(ChatSession.time_created, Date))
-        .order_by(cast(ChatSession.time_created, Date))
-        .all()
+    ):
+        daily_users[date][user_id] += message_count
+
+    live = _persona_usage_deltas(
+        db_session, _live_id_ranges(db_session), since=start, persona_id=persona_id
     )
+    for (date, _, user_id), message_count in live.items():
+        if start_date <= date <= end_date:
+            daily_users[date][user_id] += message_count
+
+    return daily_users
 
-    return [tuple(row) for row in results]
+
+def _persona_message_analytics(
+    db_session: Session,
+    persona_id: int,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> list[tuple[int, datetime.date]]:
+    daily_users = _persona_daily_users(db_session, persona_id, start, end)
+    return [(sum(users.values()), date) for date, users in sorted(daily_users.items())]
+
+
+def _persona_unique_users(
+    db_session: Session,
+    persona_id: int,
+    start: datetime.datetime,
+    end: datetime.datetime,
+) -> list[tuple[int, datetime.date]]:
+    daily_users = _persona_daily_users(db_session, persona_id, start, end)
+    return [
+        (len(users.keys() - {_NO_USER_ID}), date)
+        for date, users in sorted(daily_users.items())
+    ]
 
 
 def fetch_persona_message_analytics(
@@ -183,29 +629,7 @@ def fetch_persona_message_analytics(
     end: datetime.datetime,
 ) -> list[tuple[int, datetime.date]]:
     """Gets the daily message counts for a specific persona within the given time range."""
-    query = (
-        select(
-            func.count(ChatMessage.id),
-            cast(ChatMessage.time_sent, Date),
-        )
-        .join(
-            ChatSession,
-            ChatMessage.chat_session_id == ChatSession.id,
-        )
-        .where(
-            or_(
-                ChatMessage.alternate_assistant_id == persona_id,
-                ChatSession.persona_id == persona_id,
-            ),
-            ChatMessage.time_sent >= start,
-            ChatMessage.time_sent <= end,
-            ChatMessage.message_type == MessageType.ASSISTANT,
-        )
-        .group_by(cast(ChatMessage.time_sent, Date))
-        .order_by(cast(ChatMessage.time_sent, Date))
-    )
-
-    return [tuple(row) for row in db_session.execute(query).all()]
+    return _persona_message_analytics(db_session, persona_id, start, end)
 
 
 def fetch_persona_unique_users(
@@ -215,29 +639,7 @@ def fetch_persona_unique_users(
     end: datetime.datetime,
 ) -> list[tuple[int, datetime.date]]:
     """Gets the daily unique user counts for a specific persona within the given time range."""
-    query = (
-        select(
-            func.count(func.distinct(ChatSession.user_id)),
-            cast(ChatMessage.time_sent, Date),
-        )
-        .join(
-            ChatSession,
-            ChatMessage.chat_session_id == ChatSession.id,
-        )
-        .where(
-            or_(
-                ChatMessage.alternate_assistant_id == persona_id,
-                ChatSession.persona_id == persona_id,
-            ),
-            ChatMessage.time_sent >= start,
-            ChatMessage.time_sent <= end,
-            ChatMessage.message_type == MessageType.ASSISTANT,
-        )
-        .group_by(cast(ChatMessage.time_sent, Date))
-        .order_by(cast(ChatMessage.time_sent, Date))
-    )
-
-    return [tuple(row) for row in db_session.execute(query).all()]
+    return _persona_unique_users(db_session, persona_id, start, end)
 
 
 def fetch_assistant_message_analytics(
@@ -249,29 +651,7 @@ def fetch_assistant_message_analytics(
     """
     Gets the daily message counts for a specific assistant in the given time range.
     """
-    query = (
-        select(
-            func.count(ChatMessage.id),
-            cast(ChatMessage.time_sent, Date),
-        )
-        .join(
-            ChatSession,
-            ChatMessage.chat_session_id == ChatSession.id,
-        )
-        .where(
-            or_(
-                ChatMessage.alternate_assistant_id == assistant_id,
-                ChatSession.persona_id == assistant_id,
-            ),
-            ChatMessage.time_sent >= start,
-            ChatMessage.time_sent <= end,
-            ChatMessage.message_type == MessageType.ASSISTANT,
-        )
-        .group_by(cast(ChatMessage.time_sent, Date))
-        .order_by(cast(ChatMessage.time_sent, Date))
-    )
-
-    return [tuple(row) for row in db_session.execute(query).all()]
+    return _persona_message_analytics(db_session, assistant_id, start, end)
 
 
 def fetch_assistant_unique_users(
@@ -283,29 +663,7 @@ def fetch_assistant_unique_users(
     """
     Gets the daily unique user counts for a specific assistant in the given time range.
     """
-    query = (
-        select(
-            func.count(func.distinct(ChatSession.user_id)),
-            cast(ChatMessage.time_sent, Date),
-        )
-        .join(
-            ChatSession,
-            ChatMessage.chat_session_id == ChatSession.id,
-        )
-        .where(
-            or_(
-                ChatMessage.alternate_assistant_id == assistant_id,
-                ChatSession.persona_id == assistant_id,
-            ),
-            ChatMessage.time_sent >= start,
-            ChatMessage.time_sent <= end,
-            ChatMessage.message_type == MessageType.ASSISTANT,
-        )
-        .group_by(cast(ChatMessage.time_sent, Date))
-        .order_by(cast(ChatMessage.time_sent, Date))
-    )
-
-    return [tuple(row) for row in db_session.execute(query).all()]
+    return _persona_unique_users(db_session, assistant_id, start, end)
 
 
 def fetch_assistant_unique_users_total(
@@ -318,26 +676,10 @@ def fetch_assistant_unique_users_total(
     Gets the total number of distinct users who have sent or received messages from
     the specified assistant in the given time range.
     """
-    query = (
-        select(func.count(func.distinct(ChatSession.user_id)))
-        .select_from(ChatMessage)
-        .join(
-            ChatSession,
-            ChatMessage.chat_session_id == ChatSession.id,
-        )
-        .where(
-            or_(
-                ChatMessage.alternate_assistant_id == assistant_id,
-                ChatSession.persona_id == assistant_id,
-            ),
-            ChatMessage.time_sent >= start,
-            ChatMessage.time_sent <= end,
-            ChatMessage.message_type == MessageType.ASSISTANT,
-        )
-    )
-
-    result = db_session.execute(query).scalar()
-    return result if result else 0
+    daily_users = _persona_daily_users(db_session, assistant_id, start, end)
+    users = set().union(*daily_users.values())
+    users.discard(_NO_USER_ID)
+    return len(users)
 
 
 # Users can view assistant stats if they created the persona,
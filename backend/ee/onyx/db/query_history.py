@@ -1,11 +1,14 @@
 from collections.abc import Sequence
 from datetime import datetime
+from uuid import UUID
 
+from sqlalchemy import and_
 from sqlalchemy import asc
-from sqlalchemy import BinaryExpression
 from sqlalchemy import ColumnElement
 from sqlalchemy import desc
 from sqlalchemy import distinct
+from sqlalchemy import or_
+from sqlalchemy import Subquery
 from sqlalchemy.orm import contains_eager
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import Session
@@ -13,7 +16,6 @@ from sqlalchemy.sql import case
 from sqlalchemy.sql import func
 from sqlalchemy.sql import select
 from sqlalchemy.sql.expression import literal
-from sqlalchemy.sql.expression import UnaryExpression
 
 from ee.onyx.background.task_name_builders import QUERY_HISTORY_TASK_NAME_PREFIX
 from onyx.configs.constants import QAFeedbackType
@@ -90,28 +92,13 @@ def get_total_filtered_chat_sessions_count(
     return db_session.scalar(stmt) or 0
 
 
-def get_page_of_chat_sessions(
-    start_time: datetime | None,
-    end_time: datetime | None,
-    db_session: Session,
-    page_num: int,
-    page_size: int,
-    feedback_filter: QAFeedbackType | None = None,
+def _fetch_chat_sessions_eagerly(
+    db_session: Session, chat_session_ids: Subquery
 ) -> Sequence[ChatSession]:
-    conditions = _build_filter_conditions(start_time, end_time, feedback_filter)
-
-    subquery = (
-        select(ChatSession.id)
-        .filter(*conditions)
-        .order_by(desc(ChatSession.time_created), ChatSession.id)
-        .limit(page_size)
-        .offset(page_num * page_size)
-        .subquery()
-    )
-
+    """Newest first, with their messages in chronological order"""
     stmt = (
         select(ChatSession)
-        .join(subquery, ChatSession.id == subquery.c.id)
+        .join(chat_session_ids, ChatSession.id == chat_session_ids.c.id)
         .outerjoin(ChatMessage, ChatSession.id == ChatMessage.chat_session_id)
         .options(
             joinedload(ChatSession.user),
@@ -130,50 +117,60 @@ def get_page_of_chat_sessions(
     return db_session.scalars(stmt).unique().all()
 
 
-def fetch_chat_sessions_eagerly_by_time(
-    start: datetime,
-    end: datetime,
+def get_page_of_chat_sessions(
+    start_time: datetime | None,
+    end_time: datetime | None,
     db_session: Session,
-    limit: int | None = 500,
-    initial_time: datetime | None = None,
-) -> list[ChatSession]:
-    """Sorted by oldest to newest, then by message id"""
-
-    asc_time_order: UnaryExpression = asc(ChatSession.time_created)
-    message_order: UnaryExpression = asc(ChatMessage.id)
-
-    filters: list[ColumnElement | BinaryExpression] = [
-        ChatSession.time_created.between(start, end)
-    ]
-
-    if initial_time:
-        filters.append(ChatSession.time_created > initial_time)
+    page_num: int,
+    page_size: int,
+    feedback_filter: QAFeedbackType | None = None,
+) -> Sequence[ChatSession]:
+    conditions = _build_filter_conditions(start_time, end_time, feedback_filter)
 
     subquery = (
-        db_session.query(ChatSession.id, ChatSession.time_created)
-        .filter(*filters)
-        .order_by(asc_time_order)
-        .limit(limit)
+        select(ChatSession.id)
+        .filter(*conditions)
+        .order_by(desc(ChatSession.time_created), ChatSession.id)
+        .limit(page_size)
+        .offset(page_num * page_size)
         .subquery()
     )
 
-    query = (
-        db_session.query(ChatSession)
-        .join(subquery, ChatSession.id == subquery.c.id)
-        .outerjoin(ChatMessage, ChatSession.id == ChatMessage.chat_session_id)
-        .options(
-            joinedload(ChatSession.user),
-            joinedload(ChatSession.persona),
-            contains_eager(ChatSession.messages).joinedload(
-                ChatMessage.chat_message_feedbacks
-            ),
+    return _fetch_chat_sessions_eagerly(db_session, subquery)
+
+
+def get_chat_sessions_after(
+    start_time: datetime | None,
+    end_time: datetime | None,
+    db_session: Session,
+    page_size: int,
+    after: tuple[datetime, UUID] | None = None,
+) -> Sequence[ChatSession]:
+    """Same order as `get_page_of_chat_sessions`, but continues after the
+    (time_created, id) of the last session of the previous page instead of
+    skipping over all previous pages with an offset"""
+    conditions = _build_filter_conditions(start_time, end_time, None)
+    if after is not None:
+        after_time_created, after_id = after
+        conditions.append(
+            or_(
+                ChatSession.time_created < after_time_created,
+                and_(
+                    ChatSession.time_created == after_time_created,
+                    ChatSession.id > after_id,
+                ),
+            )
         )
-        .order_by(asc_time_order, message_order)
-    )
 
-    chat_sessions = query.all()
+    subquery = (
+        select(ChatSession.id)
+        .filter(*conditions)
+        .order_by(desc(ChatSession.time_created), ChatSession.id)
+        .limit(page_size)
+        .subquery()
+    )
 
-    return chat_sessions
+    return _fetch_chat_sessions_eagerly(db_session, subquery)
 
 
 def get_all_query_history_export_tasks(
@@ -2,90 +2,92 @@ import uuid
 from collections.abc import Generator
 from datetime import datetime
 from typing import IO
-from typing import Optional
 
 from fastapi_users_db_sqlalchemy import UUID_ID
 from sqlalchemy import cast
+from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Session
 
-from ee.onyx.db.query_history import fetch_chat_sessions_eagerly_by_time
 from ee.onyx.server.reporting.usage_export_models import ChatMessageSkeleton
 from ee.onyx.server.reporting.usage_export_models import FlowType
 from ee.onyx.server.reporting.usage_export_models import UsageReportMetadata
+from ee.onyx.server.reporting.usage_export_models import UserSkeleton
+from onyx.auth.schemas import UserRole
 from onyx.configs.constants import MessageType
+from onyx.db.models import ChatMessage
+from onyx.db.models import ChatSession
 from onyx.db.models import UsageReport
 from onyx.db.models import User
 from onyx.file_store.file_store import get_default_file_store
 
 
-# Gets skeletons of all messages in the given range
-def get_empty_chat_messages_entries__paginated(
-    db_session: Session,
-    period: tuple[datetime, datetime],
-    limit: int | None = 500,
-    initial_time: datetime | None = None,
-) -> tuple[Optional[datetime], list[ChatMessageSkeleton]]:
-    """Returns a tuple where:
-    first element is the most recent timestamp out of the sessions iterated
-    - this timestamp can be used to paginate forward in time
-    second element is a list of messages belonging to all the sessions iterated
-
-    Only messages of type USER are returned
-    """
-    chat_sessions = fetch_chat_sessions_eagerly_by_time(
-        start=period[0],
-        end=period[1],
-        db_session=db_session,
-        limit=limit,
-        initial_time=initial_time,
-    )
-
-    message_skeletons: list[ChatMessageSkeleton] = []
-    for chat_session in chat_sessions:
-        flow_type = FlowType.SLACK if chat_session.onyxbot_flow else FlowType.CHAT
-
-        for message in chat_session.messages:
-            # Only count user messages
-            if message.message_type != MessageType.USER:
-                continue
-
-            message_skeletons.append(
-                ChatMessageSkeleton(
-                    message_id=message.id,
-                    chat_session_id=chat_session.id,
-                    user_id=str(chat_session.user_id) if chat_session.user_id else None,
-                    flow_type=flow_type,
-                    time_sent=message.time_sent,
-                )
-            )
-    if len(chat_sessions) == 0:
-        return None, []
-
-    return chat_sessions[-1].time_created, message_skeletons
+# chat messages per query of the usage report
+_CHAT_MESSAGE_PAGE_SIZE = 10_000
+# users fetched per round trip from the server side cursor
+_USER_FETCH_SIZE = 1000
 
 
 def get_all_empty_chat_message_entries(
     db_session: Session,
     period: tuple[datetime, datetime],
+    page_size: int = _CHAT_MESSAGE_PAGE_SIZE,
 ) -> Generator[list[ChatMessageSkeleton], None, None]:
-    """period is the range of time over which to fetch messages."""
-    initial_time: Optional[datetime] = period[0]
+    """period is the range of time over which to fetch messages.
+
+    Yields skeletons of the USER messages of the chat sessions created in the
+    period, a page at a time in order of message id. Pages are fetched by message
+    id rather than offset and only select the columns needed, so each query is
+    cheap no matter how far into the history it is."""
+    last_message_id = 0
     while True:
-        # iterate from oldest to newest
-        time_created, message_skeletons = get_empty_chat_messages_entries__paginated(
-            db_session,
-            period,
-            initial_time=initial_time,
-        )
+        rows = db_session.execute(
+            select(
+                ChatMessage.id,
+                ChatMessage.chat_session_id,
+                ChatSession.user_id,
+                ChatSession.onyxbot_flow,
+                ChatMessage.time_sent,
+            )
+            .join(ChatSession, ChatSession.id == ChatMessage.chat_session_id)
+            .where(
+                ChatMessage.id > last_message_id,
+                ChatMessage.message_type == MessageType.USER,
+                ChatSession.time_created.between(period[0], period[1]),
+            )
+            .order_by(ChatMessage.id)
+            .limit(page_size)
+        ).all()
+        if not rows:
+            return
 
-        if not message_skeletons:
+        yield [
+            ChatMessageSkeleton(
+                message_id=message_id,
+                chat_session_id=chat_session_id,
+                user_id=str(user_id) if user_id else None,
+                flow_type=FlowType.SLACK if onyxbot_flow else FlowType.CHAT,
+                time_sent=time_sent,
+            )
+            for message_id, chat_session_id, user_id, onyxbot_flow, time_sent in rows
+        ]
+
+        if len(rows) < page_size:
             return
+        last_message_id = rows[-1][0]
 
-        yield message_skeletons
 
-        # Update initial_time for the next iteration
-        initial_time = time_created
+def get_all_user_skeletons(
+    db_session: Session,
+) -> Generator[UserSkeleton, None, None]:
+    """Same users as `get_all_users`, streamed from a server side cursor"""
+    result = db_session.execute(
+        select(User.id, User.is_active)  # type: ignore
+        .where(User.role != UserRole.EXT_PERM_USER)
+        .execution_options(yield_per=_USER_FETCH_SIZE)
+    )
+    for user_id, is_active in result:
+        yield UserSkeleton(user_id=str(user_id), is_active=is_active)
 
 
 def get_all_usage_reports(db_session: Session) -> list[UsageReportMetadata]:
@@ -48,6 +48,7 @@ from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.secondary_llm_flows.query_expansion import thread_based_query_rephrase
 from onyx.server.query_and_chat.models import ChatMessageDetail
 from onyx.server.query_and_chat.models import CreateChatMessageRequest
+from onyx.server.query_and_chat.token_limit import record_token_usage
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -373,6 +374,7 @@ def handle_send_message_simple_with_history(
     )
 
     chat_message = root_message
+    history_token_count = 0
     for msg in msg_history:
         chat_message = create_new_chat_message(
             chat_session_id=chat_session.id,
@@ -384,7 +386,11 @@ def handle_send_message_simple_with_history(
             db_session=db_session,
             commit=False,
         )
+        history_token_count += chat_message.token_count
     db_session.commit()
+    record_token_usage(
+        user_id=user_id, token_count=history_token_count, db_session=db_session
+    )
 
     history_str = combine_message_thread(
         messages=msg_history,
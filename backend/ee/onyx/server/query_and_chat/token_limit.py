@@ -22,8 +22,13 @@ from onyx.db.models import User
 from onyx.db.models import User__UserGroup
 from onyx.db.models import UserGroup
 from onyx.db.token_limit import fetch_all_user_token_rate_limits
-from onyx.server.query_and_chat.token_limit import _get_cutoff_time
-from onyx.server.query_and_chat.token_limit import _is_rate_limited
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_token_usage import RedisTokenUsage
+from onyx.redis.redis_token_usage import TokenUsageScope
+from onyx.server.query_and_chat.token_limit import (
+    _is_rate_limited_by_usage_counter,
+)
+from onyx.server.query_and_chat.token_limit import _record_token_usage as _record_global
 from onyx.server.query_and_chat.token_limit import _user_is_rate_limited_by_global
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 
@@ -47,6 +52,24 @@ def _check_token_rate_limits(user: User | None) -> None:
         )
 
 
+def _record_token_usage(
+    user_id: UUID | None, token_count: int, db_session: Session
+) -> None:
+    _record_global(user_id, token_count, db_session)
+    if user_id is None:
+        return
+
+    redis_client = get_redis_client()
+    RedisTokenUsage(redis_client, TokenUsageScope.USER, str(user_id)).record(
+        token_count
+    )
+    # only groups with rate limits are checked, so only those are counted
+    for user_group_id in _fetch_all_user_group_rate_limits(user_id, db_session):
+        RedisTokenUsage(
+            redis_client, TokenUsageScope.USER_GROUP, str(user_group_id)
+        ).record(token_count)
+
+
 """
 User rate limits
 """
@@ -59,10 +82,11 @@ def _user_is_rate_limited(user_id: UUID) -> None:
         )
 
         if user_rate_limits:
-            user_cutoff_time = _get_cutoff_time(user_rate_limits)
-            user_usage = _fetch_user_usage(user_id, user_cutoff_time, db_session)
-
-            if _is_rate_limited(user_rate_limits, user_usage):
+            if _is_rate_limited_by_usage_counter(
+                user_rate_limits,
+                RedisTokenUsage(get_redis_client(), TokenUsageScope.USER, str(user_id)),
+                lambda cutoff_time: _fetch_user_usage(user_id, cutoff_time, db_session),
+            ):
                 raise HTTPException(
                     status_code=429,
                     detail="Token budget exceeded for user. Try again later.",
@@ -73,7 +97,8 @@ def _fetch_user_usage(
     user_id: UUID, cutoff_time: datetime, db_session: Session
 ) -> Sequence[tuple[datetime, int]]:
     """
-    Fetch user usage within the cutoff time, grouped by minute
+    Fetch user usage within the cutoff time, grouped by minute. Only used to
+    rebuild the usage counters
     """
     result = db_session.execute(
         select(
@@ -98,23 +123,19 @@ def _user_is_rate_limited_by_group(user_id: UUID) -> None:
         group_rate_limits = _fetch_all_user_group_rate_limits(user_id, db_session)
 
         if group_rate_limits:
-            # Group cutoff time is the same for all groups.
-            # This could be optimized to only fetch the maximum cutoff time for
-            # a specific group, but seems unnecessary for now.
-            group_cutoff_time = _get_cutoff_time(
-                [e for sublist in group_rate_limits.values() for e in sublist]
-            )
-
-            user_group_ids = list(group_rate_limits.keys())
-            group_usage = _fetch_user_group_usage(
-                user_group_ids, group_cutoff_time, db_session
-            )
+            redis_client = get_redis_client()
 
             has_at_least_one_untriggered_limit = False
             for user_group_id, rate_limits in group_rate_limits.items():
-                usage = group_usage.get(user_group_id, [])
-
-                if not _is_rate_limited(rate_limits, usage):
+                if not _is_rate_limited_by_usage_counter(
+                    rate_limits,
+                    RedisTokenUsage(
+                        redis_client, TokenUsageScope.USER_GROUP, str(user_group_id)
+                    ),
+                    lambda cutoff_time: _fetch_user_group_usage(
+                        [user_group_id], cutoff_time, db_session
+                    ).get(user_group_id, []),
+                ):
                     has_at_least_one_untriggered_limit = True
                     break
 
@@ -161,7 +182,8 @@ def _fetch_user_group_usage(
     user_group_ids: list[int], cutoff_time: datetime, db_session: Session
 ) -> dict[int, list[Tuple[datetime, int]]]:
     """
-    Fetch user group usage within the cutoff time, grouped by minute
+    Fetch user group usage within the cutoff time, grouped by minute. Only used
+    to rebuild the usage counters
     """
     user_group_usage = db_session.execute(
         select(
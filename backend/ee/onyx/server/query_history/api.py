@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 
 from ee.onyx.background.task_name_builders import query_history_task_name
 from ee.onyx.db.query_history import get_all_query_history_export_tasks
+from ee.onyx.db.query_history import get_chat_sessions_after
 from ee.onyx.db.query_history import get_page_of_chat_sessions
 from ee.onyx.db.query_history import get_total_filtered_chat_sessions_count
 from ee.onyx.server.query_history.models import ChatSessionMinimal
@@ -81,14 +82,14 @@ def fetch_and_process_chat_session_history(
 ) -> Generator[ChatSessionSnapshot]:
     PAGE_SIZE = 100
 
-    page = 0
+    after: tuple[datetime, UUID] | None = None
     while True:
-        paged_chat_sessions = get_page_of_chat_sessions(
+        paged_chat_sessions = get_chat_sessions_after(
             start_time=start,
             end_time=end,
             db_session=db_session,
-            page_num=page,
             page_size=PAGE_SIZE,
+            after=after,
         )
 
         if not paged_chat_sessions:
@@ -114,7 +115,7 @@ def fetch_and_process_chat_session_history(
         if len(paged_chat_sessions) < PAGE_SIZE:
             break
 
-        page += 1
+        after = (paged_chat_sessions[-1].time_created, paged_chat_sessions[-1].id)
 
 
 def snapshot_from_chat_session(
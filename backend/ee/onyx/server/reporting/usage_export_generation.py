@@ -1,10 +1,12 @@
 import csv
+import io
 import tempfile
 import uuid
 import zipfile
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from typing import IO
 
 from fastapi_users_db_sqlalchemy import UUID_ID
 from sqlalchemy import cast
@@ -12,25 +14,20 @@ from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Session
 
 from ee.onyx.db.usage_export import get_all_empty_chat_message_entries
+from ee.onyx.db.usage_export import get_all_user_skeletons
 from ee.onyx.db.usage_export import write_usage_report
 from ee.onyx.server.reporting.usage_export_models import UsageReportMetadata
-from ee.onyx.server.reporting.usage_export_models import UserSkeleton
 from onyx.configs.constants import FileOrigin
 from onyx.db.models import User
-from onyx.db.users import get_all_users
 from onyx.file_store.constants import MAX_IN_MEMORY_SIZE
-from onyx.file_store.file_store import FileStore
 from onyx.file_store.file_store import get_default_file_store
 
 
-def generate_chat_messages_report(
+def write_chat_messages_csv(
     db_session: Session,
-    file_store: FileStore,
-    report_id: str,
+    csv_file: IO[str],
     period: tuple[datetime, datetime] | None,
-) -> str:
-    file_name = f"{report_id}_chat_sessions"
-
+) -> None:
     if period is None:
         period = (
             datetime.fromtimestamp(0, tz=timezone.utc),
@@ -44,66 +41,29 @@ def generate_chat_messages_report(
             period[1] + timedelta(days=1),
         )
 
-    with tempfile.SpooledTemporaryFile(
-        max_size=MAX_IN_MEMORY_SIZE, mode="w+"
-    ) as temp_file:
-        csvwriter = csv.writer(temp_file, delimiter=",")
-        csvwriter.writerow(["session_id", "user_id", "flow_type", "time_sent"])
-        for chat_message_skeleton_batch in get_all_empty_chat_message_entries(
-            db_session, period
-        ):
-            for chat_message_skeleton in chat_message_skeleton_batch:
-                csvwriter.writerow(
-                    [
-                        chat_message_skeleton.chat_session_id,
-                        chat_message_skeleton.user_id,
-                        chat_message_skeleton.flow_type,
-                        chat_message_skeleton.time_sent.isoformat(),
-                    ]
-                )
-
-        # after writing seek to beginning of buffer
-        temp_file.seek(0)
-        file_id = file_store.save_file(
-            content=temp_file,
-            display_name=file_name,
-            file_origin=FileOrigin.GENERATED_REPORT,
-            file_type="text/csv",
+    csvwriter = csv.writer(csv_file, delimiter=",")
+    csvwriter.writerow(["session_id", "user_id", "flow_type", "time_sent"])
+    for chat_message_skeleton_batch in get_all_empty_chat_message_entries(
+        db_session, period
+    ):
+        csvwriter.writerows(
+            [
+                chat_message_skeleton.chat_session_id,
+                chat_message_skeleton.user_id,
+                chat_message_skeleton.flow_type,
+                chat_message_skeleton.time_sent.isoformat(),
+            ]
+            for chat_message_skeleton in chat_message_skeleton_batch
         )
 
-    return file_id
-
 
-def generate_user_report(
-    db_session: Session,
-    file_store: FileStore,
-    report_id: str,
-) -> str:
-    file_name = f"{report_id}_users"
-
-    with tempfile.SpooledTemporaryFile(
-        max_size=MAX_IN_MEMORY_SIZE, mode="w+"
-    ) as temp_file:
-        csvwriter = csv.writer(temp_file, delimiter=",")
-        csvwriter.writerow(["user_id", "is_active"])
-
-        users = get_all_users(db_session)
-        for user in users:
-            user_skeleton = UserSkeleton(
-                user_id=str(user.id),
-                is_active=user.is_active,
-            )
-            csvwriter.writerow([user_skeleton.user_id, user_skeleton.is_active])
-
-        temp_file.seek(0)
-        file_id = file_store.save_file(
-            content=temp_file,
-            display_name=file_name,
-            file_origin=FileOrigin.GENERATED_REPORT,
-            file_type="text/csv",
-        )
-
-    return file_id
+def write_user_csv(db_session: Session, csv_file: IO[str]) -> None:
+    csvwriter = csv.writer(csv_file, delimiter=",")
+    csvwriter.writerow(["user_id", "is_active"])
+    csvwriter.writerows(
+        [user_skeleton.user_id, user_skeleton.is_active]
+        for user_skeleton in get_all_user_skeletons(db_session)
+    )
 
 
 def create_new_usage_report(
@@ -114,27 +74,17 @@ def create_new_usage_report(
     report_id = str(uuid.uuid4())
     file_store = get_default_file_store()
 
-    messages_file_id = generate_chat_messages_report(
-        db_session, file_store, report_id, period
-    )
-    users_file_id = generate_user_report(db_session, file_store, report_id)
-
+    # the CSVs are written straight into the zip as rows are fetched, which only
+    # spills to disk once it's large
     with tempfile.SpooledTemporaryFile(max_size=MAX_IN_MEMORY_SIZE) as zip_buffer:
-        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED) as zip_file:
-            # write messages
-            chat_messages_tmpfile = file_store.read_file(
-                messages_file_id, mode="b", use_tempfile=True
-            )
-            zip_file.writestr(
-                "chat_messages.csv",
-                chat_messages_tmpfile.read(),
-            )
-
-            # write users
-            users_tmpfile = file_store.read_file(
-                users_file_id, mode="b", use_tempfile=True
-            )
-            zip_file.writestr("users.csv", users_tmpfile.read())
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            with zip_file.open("chat_messages.csv", "w") as zip_entry:
+                with io.TextIOWrapper(zip_entry, newline="") as csv_file:
+                    write_chat_messages_csv(db_session, csv_file, period)
+
+            with zip_file.open("users.csv", "w") as zip_entry:
+                with io.TextIOWrapper(zip_entry, newline="") as csv_file:
+                    write_user_csv(db_session, csv_file)
 
         zip_buffer.seek(0)
 
@@ -143,7 +93,7 @@ def create_new_usage_report(
             f"{datetime.now(tz=timezone.utc).strftime('%Y-%m-%d')}"
             f"_{report_id}_usage_report.zip"
         )
-        file_store.save_file(
+        file_store.save_large_file(
             content=zip_buffer,
             display_name=report_name,
             file_origin=FileOrigin.GENERATED_REPORT,
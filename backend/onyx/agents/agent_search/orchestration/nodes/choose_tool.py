@@ -22,6 +22,7 @@ from onyx.configs.chat_configs import USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEAR
 from onyx.context.search.preprocessing.preprocessing import query_analysis
 from onyx.context.search.retrieval.search_runner import get_query_embedding
 from onyx.llm.factory import get_default_llms
+from onyx.llm.response_cache import llm_response_cache_flow
 from onyx.prompts.chat_prompts import QUERY_KEYWORD_EXPANSION_WITH_HISTORY_PROMPT
 from onyx.prompts.chat_prompts import QUERY_KEYWORD_EXPANSION_WITHOUT_HISTORY_PROMPT
 from onyx.prompts.chat_prompts import QUERY_SEMANTIC_EXPANSION_WITH_HISTORY_PROMPT
@@ -31,8 +32,8 @@ from onyx.tools.models import SearchToolOverrideKwargs
 from onyx.tools.tool import Tool
 from onyx.tools.tool_implementations.search.search_tool import SearchTool
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorTask
 from onyx.utils.threadpool_concurrency import run_in_background
-from onyx.utils.threadpool_concurrency import TimeoutThread
 from onyx.utils.threadpool_concurrency import wait_on_background
 from onyx.utils.timing import log_function_time
 from shared_configs.model_server_models import Embedding
@@ -54,6 +55,7 @@ def _create_history_str(prompt_builder: AnswerPromptBuilder) -> str:
     return "\n".join(history_segments)
 
 
+@llm_response_cache_flow("agent_query_expansion")
 def _expand_query(
     query: str,
     expansion_type: QueryExpansionType,
@@ -84,8 +86,8 @@ def _expand_query(
 
 
 def _expand_query_non_tool_calling_llm(
-    expanded_keyword_thread: TimeoutThread[str],
-    expanded_semantic_thread: TimeoutThread[str],
+    expanded_keyword_thread: ExecutorTask[str],
+    expanded_semantic_thread: ExecutorTask[str],
 ) -> QueryExpansions | None:
     keyword_expansion: str | None = wait_on_background(expanded_keyword_thread)
     semantic_expansion: str | None = wait_on_background(expanded_semantic_thread)
@@ -119,10 +121,10 @@ def choose_tool(
 
     force_use_tool = agent_config.tooling.force_use_tool
 
-    embedding_thread: TimeoutThread[Embedding] | None = None
-    keyword_thread: TimeoutThread[tuple[bool, list[str]]] | None = None
-    expanded_keyword_thread: TimeoutThread[str] | None = None
-    expanded_semantic_thread: TimeoutThread[str] | None = None
+    embedding_thread: ExecutorTask[Embedding] | None = None
+    keyword_thread: ExecutorTask[tuple[bool, list[str]]] | None = None
+    expanded_keyword_thread: ExecutorTask[str] | None = None
+    expanded_semantic_thread: ExecutorTask[str] | None = None
     # If we have override_kwargs, add them to the tool_args
     override_kwargs: SearchToolOverrideKwargs = (
         force_use_tool.override_kwargs or SearchToolOverrideKwargs()
@@ -1,9 +1,14 @@
+import threading
+import time
+from collections.abc import Callable
 from collections.abc import Iterable
 from datetime import datetime
+from enum import Enum
 from typing import cast
 
 from langchain_core.runnables.schema import CustomStreamEvent
 from langchain_core.runnables.schema import StreamEvent
+from langgraph.graph import StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
 from onyx.agents.agent_search.basic.graph_builder import basic_graph_builder
@@ -21,6 +26,13 @@ from onyx.agents.agent_search.deep_search.main.states import (
 from onyx.agents.agent_search.kb_search.graph_builder import kb_graph_builder
 from onyx.agents.agent_search.kb_search.states import MainInput as KBMainInput
 from onyx.agents.agent_search.models import GraphConfig
+from onyx.agents.agent_search.shared_graph_utils.metrics import graph_compile_seconds
+from onyx.agents.agent_search.shared_graph_utils.metrics import (
+    graph_first_packet_seconds,
+)
+from onyx.agents.agent_search.shared_graph_utils.metrics import (
+    GraphNodeTimingHandler,
+)
 from onyx.agents.agent_search.shared_graph_utils.utils import get_test_config
 from onyx.chat.models import AgentAnswerPiece
 from onyx.chat.models import AnswerPacket
@@ -32,6 +44,7 @@ from onyx.chat.models import StreamStopInfo
 from onyx.chat.models import SubQueryPiece
 from onyx.chat.models import SubQuestionPiece
 from onyx.chat.models import ToolResponse
+from onyx.configs.agent_configs import AGENT_MAX_CONCURRENT_BRANCHES
 from onyx.context.search.models import SearchRequest
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.llm.factory import get_default_llms
@@ -41,7 +54,25 @@ from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
-_COMPILED_GRAPH: CompiledStateGraph | None = None
+
+class AgentGraph(str, Enum):
+    BASIC = "basic"
+    AGENT_SEARCH = "agent_search"
+    KB_SEARCH = "kb_search"
+    DC_SEARCH_ANALYSIS = "dc_search_analysis"
+
+
+_GRAPH_BUILDERS: dict[AgentGraph, Callable[[], StateGraph]] = {
+    AgentGraph.BASIC: basic_graph_builder,
+    AgentGraph.AGENT_SEARCH: agent_search_graph_builder,
+    AgentGraph.KB_SEARCH: kb_graph_builder,
+    AgentGraph.DC_SEARCH_ANALYSIS: divide_and_conquer_graph_builder,
+}
+
+# Compiled graphs hold no per-run state, so each graph is compiled once per
+# process and shared by all requests.
+_COMPILED_GRAPHS: dict[AgentGraph, CompiledStateGraph] = {}
+_COMPILED_GRAPHS_LOCK = threading.Lock()
 
 
 def _parse_agent_event(
@@ -91,12 +122,22 @@ def manage_sync_streaming(
     compiled_graph: CompiledStateGraph,
     config: GraphConfig,
     graph_input: BasicInput | MainInput | DCMainInput | KBMainInput,
+    graph_name: str = "unknown",
 ) -> Iterable[StreamEvent]:
     message_id = config.persistence.message_id if config.persistence else None
     for event in compiled_graph.stream(
         stream_mode="custom",
         input=graph_input,
-        config={"metadata": {"config": config, "thread_id": str(message_id)}},
+        config={
+            "metadata": {"config": config, "thread_id": str(message_id)},
+            "callbacks": [GraphNodeTimingHandler(graph_name)],
+            # LangGraph keeps one thread of the pool busy while a step runs
+            "max_concurrency": (
+                AGENT_MAX_CONCURRENT_BRANCHES + 1
+                if AGENT_MAX_CONCURRENT_BRANCHES
+                else None
+            ),
+        },
     ):
         yield cast(CustomStreamEvent, event)
 
@@ -105,31 +146,55 @@ def run_graph(
     compiled_graph: CompiledStateGraph,
     config: GraphConfig,
     input: BasicInput | MainInput | DCMainInput | KBMainInput,
+    graph_name: str = "unknown",
 ) -> AnswerStream:
-
+    start_time = time.monotonic()
+    first_packet = True
     for event in manage_sync_streaming(
-        compiled_graph=compiled_graph, config=config, graph_input=input
+        compiled_graph=compiled_graph,
+        config=config,
+        graph_input=input,
+        graph_name=graph_name,
     ):
         if not (parsed_object := _parse_agent_event(event)):
             continue
 
+        if first_packet:
+            first_packet = False
+            graph_first_packet_seconds.labels(graph=graph_name).observe(
+                time.monotonic() - start_time
+            )
         yield parsed_object
 
 
-# It doesn't actually take very long to load the graph, but we'd rather
-# not compile it again on every request.
-def load_compiled_graph() -> CompiledStateGraph:
-    global _COMPILED_GRAPH
-    if _COMPILED_GRAPH is None:
-        graph = agent_search_graph_builder()
-        _COMPILED_GRAPH = graph.compile()
-    return _COMPILED_GRAPH
+def get_compiled_graph(graph: AgentGraph) -> CompiledStateGraph:
+    """Returns the compiled graph, compiling it on first use."""
+    compiled_graph = _COMPILED_GRAPHS.get(graph)
+    if compiled_graph is not None:
+        return compiled_graph
+
+    with _COMPILED_GRAPHS_LOCK:
+        compiled_graph = _COMPILED_GRAPHS.get(graph)
+        if compiled_graph is None:
+            start_time = time.monotonic()
+            compiled_graph = _GRAPH_BUILDERS[graph]().compile()
+            elapsed = time.monotonic() - start_time
+            graph_compile_seconds.labels(graph=graph.value).observe(elapsed)
+            logger.info(f"Compiled the {graph.value} graph in {elapsed:.2f}s")
+            _COMPILED_GRAPHS[graph] = compiled_graph
+    return compiled_graph
+
+
+def warm_up_compiled_graphs() -> None:
+    """Compiles every agent graph so that the first requests don't pay for it."""
+    for graph in AgentGraph:
+        get_compiled_graph(graph)
 
 
 def run_agent_search_graph(
     config: GraphConfig,
 ) -> AnswerStream:
-    compiled_graph = load_compiled_graph()
+    compiled_graph = get_compiled_graph(AgentGraph.AGENT_SEARCH)
 
     input = MainInput(log_messages=[])
     # Agent search is not a Tool per se, but this is helpful for the frontend
@@ -137,23 +202,23 @@ def run_agent_search_graph(
         tool_name="agent_search_0",
         tool_args={"query": config.inputs.prompt_builder.raw_user_query},
     )
-    yield from run_graph(compiled_graph, config, input)
+    yield from run_graph(
+        compiled_graph, config, input, graph_name=AgentGraph.AGENT_SEARCH.value
+    )
 
 
 def run_basic_graph(
     config: GraphConfig,
 ) -> AnswerStream:
-    graph = basic_graph_builder()
-    compiled_graph = graph.compile()
+    compiled_graph = get_compiled_graph(AgentGraph.BASIC)
     input = BasicInput(unused=True)
-    return run_graph(compiled_graph, config, input)
+    return run_graph(compiled_graph, config, input, graph_name=AgentGraph.BASIC.value)
 
 
 def run_kb_graph(
     config: GraphConfig,
 ) -> AnswerStream:
-    graph = kb_graph_builder()
-    compiled_graph = graph.compile()
+    compiled_graph = get_compiled_graph(AgentGraph.KB_SEARCH)
     input = KBMainInput(log_messages=[])
 
     yield ToolCallKickoff(
@@ -161,19 +226,22 @@ def run_kb_graph(
         tool_args={"query": config.inputs.prompt_builder.raw_user_query},
     )
 
-    yield from run_graph(compiled_graph, config, input)
+    yield from run_graph(
+        compiled_graph, config, input, graph_name=AgentGraph.KB_SEARCH.value
+    )
 
 
 def run_dc_graph(
     config: GraphConfig,
 ) -> AnswerStream:
-    graph = divide_and_conquer_graph_builder()
-    compiled_graph = graph.compile()
+    compiled_graph = get_compiled_graph(AgentGraph.DC_SEARCH_ANALYSIS)
     input = DCMainInput(log_messages=[])
     config.inputs.prompt_builder.raw_user_query = (
         config.inputs.prompt_builder.raw_user_query.strip()
     )
-    return run_graph(compiled_graph, config, input)
+    return run_graph(
+        compiled_graph, config, input, graph_name=AgentGraph.DC_SEARCH_ANALYSIS.value
+    )
 
 
 if __name__ == "__main__":
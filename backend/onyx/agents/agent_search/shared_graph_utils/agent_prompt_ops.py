@@ -1,7 +1,12 @@
+import hashlib
+import json
+from typing import cast
+
 from langchain.schema import AIMessage
 from langchain.schema import HumanMessage
 from langchain.schema import SystemMessage
 from langchain_core.messages.tool import ToolMessage
+from redis.exceptions import RedisError
 
 from onyx.agents.agent_search.models import GraphConfig
 from onyx.agents.agent_search.shared_graph_utils.models import (
@@ -13,6 +18,7 @@ from onyx.agents.agent_search.shared_graph_utils.utils import (
 )
 from onyx.agents.agent_search.shared_graph_utils.utils import remove_document_citations
 from onyx.agents.agent_search.shared_graph_utils.utils import summarize_history
+from onyx.configs.agent_configs import AGENT_HISTORY_SUMMARY_CACHE_TTL
 from onyx.configs.agent_configs import AGENT_MAX_STATIC_HISTORY_WORD_LENGTH
 from onyx.configs.constants import MessageType
 from onyx.context.search.models import InferenceSection
@@ -22,10 +28,13 @@ from onyx.natural_language_processing.utils import tokenizer_trim_content
 from onyx.prompts.agent_search import HISTORY_FRAMING_PROMPT
 from onyx.prompts.agent_search import SUB_QUESTION_RAG_PROMPT
 from onyx.prompts.prompt_utils import build_date_time_string
+from onyx.redis.redis_pool import get_redis_client
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+_HISTORY_SUMMARY_CACHE_KEY_PREFIX = "agent_history_summary"
+
 
 def build_sub_question_answer_prompt(
     question: str,
@@ -79,6 +88,61 @@ def trim_prompt_piece(config: LLMConfig, prompt_piece: str, reserved_str: str) -
     )
 
 
+def _get_summarized_history(
+    config: GraphConfig, history: str, question: str, persona_base: str | None
+) -> str:
+    """Summarizes the history with the fast LLM. The summary is cached per chat
+    session, as several nodes of a graph run ask for the same summary and the
+    history only changes between turns."""
+    fast_llm = config.tooling.fast_llm
+    if config.persistence is None:
+        return summarize_history(
+            history=history,
+            question=question,
+            persona_specification=persona_base,
+            llm=fast_llm,
+        )
+
+    cache_key = (
+        f"{_HISTORY_SUMMARY_CACHE_KEY_PREFIX}:{config.persistence.chat_session_id}"
+    )
+    inputs_hash = hashlib.sha256(
+        json.dumps(
+            [history, question, persona_base, fast_llm.config.model_name]
+        ).encode("utf-8")
+    ).hexdigest()
+
+    redis_client = get_redis_client()
+    try:
+        cached = cast(bytes | None, redis_client.get(cache_key))
+        if cached is not None:
+            cached_summary = json.loads(cached)
+            if cached_summary["inputs_hash"] == inputs_hash:
+                return cached_summary["summary"]
+    except RedisError:
+        logger.exception("Failed to read the cached history summary")
+
+    summary = summarize_history(
+        history=history,
+        question=question,
+        persona_specification=persona_base,
+        llm=fast_llm,
+    )
+    # on LLM errors the full history is returned, which should not be cached
+    if summary == history:
+        return summary
+
+    try:
+        redis_client.set(
+            cache_key,
+            json.dumps({"inputs_hash": inputs_hash, "summary": summary}),
+            ex=AGENT_HISTORY_SUMMARY_CACHE_TTL,
+        )
+    except RedisError:
+        logger.exception("Failed to cache the history summary")
+    return summary
+
+
 def build_history_prompt(config: GraphConfig, question: str) -> str:
     prompt_builder = config.inputs.prompt_builder
     persona_base = get_persona_agent_prompt_expressions(
@@ -113,11 +177,11 @@ def build_history_prompt(config: GraphConfig, question: str) -> str:
         history = "\n".join(history_components)
         history = remove_document_citations(history)
         if len(history.split()) > AGENT_MAX_STATIC_HISTORY_WORD_LENGTH:
-            history = summarize_history(
+            history = _get_summarized_history(
+                config=config,
                 history=history,
                 question=question,
-                persona_specification=persona_base,
-                llm=config.tooling.fast_llm,
+                persona_base=persona_base,
             )
 
     return HISTORY_FRAMING_PROMPT.format(history=history) if history else ""
@@ -0,0 +1,83 @@
+import time
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Histogram
+
+# compiling happens once per graph and process, usually at startup
+graph_compile_seconds = Histogram(
+    "onyx_agent_graph_compile_seconds",
+    "Time spent building and compiling an agent graph",
+    ["graph"],
+)
+
+graph_node_seconds = Histogram(
+    "onyx_agent_graph_node_seconds",
+    "Time spent in a single run of an agent graph node",
+    ["graph", "node"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+graph_first_packet_seconds = Histogram(
+    "onyx_agent_graph_first_packet_seconds",
+    "Time from starting an agent graph run until its first packet is streamed",
+    ["graph"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+
+
+class GraphNodeTimingHandler(BaseCallbackHandler):
+    """Records how long every node of a graph run takes. LangGraph tags the run
+    of each node (including the nodes of subgraphs) with a langgraph_node
+    metadata entry equal to the node's name, which is how node runs are told
+    apart from the runnables called within them."""
+
+    def __init__(self, graph_name: str) -> None:
+        self.graph_name = graph_name
+        self._node_starts: dict[UUID, tuple[str, float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        tags: list[str] | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is None or kwargs.get("name") != node:
+            return
+        self._node_starts[run_id] = (node, time.monotonic())
+
+    def _record(self, run_id: UUID) -> None:
+        node_start = self._node_starts.pop(run_id, None)
+        if node_start is None:
+            return
+        node, start = node_start
+        graph_node_seconds.labels(graph=self.graph_name, node=node).observe(
+            time.monotonic() - start
+        )
+
+    def on_chain_end(
+        self,
+        outputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._record(run_id)
+
+    def on_chain_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._record(run_id)
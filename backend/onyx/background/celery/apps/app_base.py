@@ -2,6 +2,7 @@ import logging
 import multiprocessing
 import os
 import time
+from contextvars import Token
 from typing import Any
 from typing import cast
 
@@ -28,6 +29,10 @@ from onyx.background.celery.tasks.vespa.document_sync import DOCUMENT_SYNC_PREFI
 from onyx.background.celery.tasks.vespa.document_sync import DOCUMENT_SYNC_TASKSET_KEY
 from onyx.configs.constants import ONYX_CLOUD_CELERY_TASK_PREFIX
 from onyx.configs.constants import OnyxRedisLocks
+from onyx.db.engine.query_profiler import QueryProfile
+from onyx.db.engine.query_profiler import reset_current_query_profile
+from onyx.db.engine.query_profiler import set_current_query_profile
+from onyx.db.engine.query_profiler import should_profile_queries
 from onyx.db.engine.sql_engine import get_sqlalchemy_engine
 from onyx.document_index.vespa.shared_utils.utils import wait_for_vespa_with_timeout
 from onyx.httpx.httpx_pool import HttpxPool
@@ -103,6 +108,47 @@ def on_task_prerun(
     LoggerContextVars.reset()
 
 
+# task id -> profile of the task and the token to unset it with. Entries are popped
+# by task_postrun, which isn't guaranteed to fire for every task_prerun, so the
+# oldest entries are dropped once there are too many of them
+_task_query_profiles: dict[str, tuple[QueryProfile, Token[QueryProfile | None]]] = {}
+_MAX_TASK_QUERY_PROFILES = 1000
+
+
+@task_prerun.connect
+def start_task_query_profile(
+    sender: Any | None = None,
+    task_id: str | None = None,
+    task: Task | None = None,
+    **other_kwargs: Any,
+) -> None:
+    # tasks are not sampled, every task is profiled when profiling is enabled
+    if not task_id or not task or not should_profile_queries(requested=True):
+        return
+
+    while len(_task_query_profiles) >= _MAX_TASK_QUERY_PROFILES:
+        stale_task_id = next(iter(_task_query_profiles))
+        _task_query_profiles.pop(stale_task_id, None)
+
+    profile = QueryProfile("celery", task.name)
+    _task_query_profiles[task_id] = (profile, set_current_query_profile(profile))
+
+
+@task_postrun.connect
+def report_task_query_profile(
+    sender: Any | None = None,
+    task_id: str | None = None,
+    **other_kwargs: Any,
+) -> None:
+    profile_and_token = _task_query_profiles.pop(task_id, None) if task_id else None
+    if profile_and_token is None:
+        return
+
+    profile, token = profile_and_token
+    reset_current_query_profile(token)
+    profile.report()
+
+
 def on_task_postrun(
     sender: Any | None = None,
     task_id: str | None = None,
@@ -11,6 +11,8 @@ from celery.signals import worker_ready
 from celery.signals import worker_shutdown
 
 import onyx.background.celery.apps.app_base as app_base
+from onyx.background.indexing.job_client import start_job_forkserver
+from onyx.configs.app_configs import DOCFETCHING_PROCESS_START_METHOD
 from onyx.configs.constants import POSTGRES_CELERY_WORKER_DOCFETCHING_APP_NAME
 from onyx.db.engine.sql_engine import SqlEngine
 from onyx.utils.logger import setup_logger
@@ -67,6 +69,10 @@ def on_worker_init(sender: Worker, **kwargs: Any) -> None:
     app_base.wait_for_db(sender, **kwargs)
     app_base.wait_for_vespa_or_shutdown(sender, **kwargs)
 
+    if DOCFETCHING_PROCESS_START_METHOD == "forkserver":
+        logger.info("Starting the docfetching forkserver.")
+        start_job_forkserver()
+
     # Less startup checks in multi-tenant case
     if MULTI_TENANT:
         return
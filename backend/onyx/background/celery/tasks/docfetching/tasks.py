@@ -22,6 +22,7 @@ from onyx.background.indexing.job_client import SimpleJob
 from onyx.background.indexing.job_client import SimpleJobClient
 from onyx.background.indexing.job_client import SimpleJobException
 from onyx.background.indexing.run_docfetching import run_docfetching_entrypoint
+from onyx.configs.app_configs import DOCFETCHING_PROCESS_START_METHOD
 from onyx.configs.constants import CELERY_INDEXING_WATCHDOG_CONNECTOR_TIMEOUT
 from onyx.configs.constants import OnyxCeleryTask
 from onyx.connectors.exceptions import ConnectorValidationError
@@ -405,7 +406,7 @@ def docfetching_proxy_task(
     if not self.request.id:
         task_logger.error("self.request.id is None!")
 
-    client = SimpleJobClient()
+    client = SimpleJobClient(start_method=DOCFETCHING_PROCESS_START_METHOD)
     task_logger.info(f"submitting docfetching_task with tenant_id={tenant_id}")
 
     job = client.submit(
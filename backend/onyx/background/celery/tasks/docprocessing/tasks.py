@@ -32,6 +32,8 @@ from onyx.background.indexing.checkpointing_utils import cleanup_checkpoint
 from onyx.background.indexing.checkpointing_utils import (
     get_index_attempts_with_old_checkpoints,
 )
+from onyx.configs.app_configs import INDEXING_REUSE_UNCHANGED_CHUNKS
+from onyx.configs.app_configs import INDEXING_SKIP_UNCHANGED_CONTENT
 from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
@@ -58,6 +60,7 @@ from onyx.db.engine.time_utils import get_db_current_time
 from onyx.db.enums import ConnectorCredentialPairStatus
 from onyx.db.enums import IndexingMode
 from onyx.db.enums import IndexingStatus
+from onyx.db.enums import IndexModelStatus
 from onyx.db.index_attempt import create_index_attempt_error
 from onyx.db.index_attempt import get_index_attempt
 from onyx.db.index_attempt import get_index_attempt_errors_for_cc_pair
@@ -1196,6 +1199,7 @@ def _docprocessing_task(
                 request_id=make_randomized_onyx_request_id("DIP"),
                 structured_id=f"{tenant_id}:{cc_pair_id}:{index_attempt_id}:{batch_num}",
                 batch_num=batch_num,
+                search_settings_id=index_attempt.search_settings.id,
             )
 
             # Process documents through indexing pipeline
@@ -1203,12 +1207,24 @@ def _docprocessing_task(
                 f"Processing {len(documents)} documents through indexing pipeline"
             )
 
+            # a reindex from the beginning or into a new index must rewrite everything
+            is_incremental_update = (
+                not index_attempt.from_beginning
+                and index_attempt.search_settings.status == IndexModelStatus.PRESENT
+            )
+
             # real work happens here!
             index_pipeline_result = run_indexing_pipeline(
                 embedder=embedding_model,
                 information_content_classification_model=information_content_classification_model,
                 document_index=document_index,
                 ignore_time_skip=True,  # Documents are already filtered during extraction
+                skip_unchanged_content=(
+                    INDEXING_SKIP_UNCHANGED_CONTENT and is_incremental_update
+                ),
+                reuse_unchanged_chunks=(
+                    INDEXING_REUSE_UNCHANGED_CHUNKS and is_incremental_update
+                ),
                 db_session=db_session,
                 tenant_id=tenant_id,
                 document_batch=documents,
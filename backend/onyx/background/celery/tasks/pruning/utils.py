@@ -0,0 +1,121 @@
+import heapq
+import json
+import tempfile
+from collections.abc import Iterable
+from collections.abc import Iterator
+from types import TracebackType
+from typing import IO
+
+from onyx.configs.app_configs import PRUNING_ID_SPILL_BATCH_SIZE
+
+
+class SortedIdSpiller:
+    """Collects document IDs with bounded memory.
+
+    IDs are buffered in memory until `max_ids_in_memory` is reached, at which point
+    the buffer is sorted and written to an anonymous temp file as a "run". Reading
+    back merges all runs lazily (k-way merge), yielding each ID once in ascending
+    codepoint order. This matches Postgres ordering under COLLATE "C", which allows
+    a streaming merge join against the IDs stored for a cc-pair."""
+
+    def __init__(
+        self,
+        max_ids_in_memory: int = PRUNING_ID_SPILL_BATCH_SIZE,
+        tmp_dir: str | None = None,
+    ) -> None:
+        if max_ids_in_memory <= 0:
+            raise ValueError("max_ids_in_memory must be positive")
+
+        self.max_ids_in_memory = max_ids_in_memory
+        self.tmp_dir = tmp_dir
+
+        self._buffer: set[str] = set()
+        self._runs: list[IO[str]] = []
+        self._num_added = 0
+
+    @property
+    def num_added(self) -> int:
+        """Number of IDs added, including duplicates across spilled runs."""
+        return self._num_added
+
+    @property
+    def num_runs(self) -> int:
+        return len(self._runs)
+
+    def add(self, ids: Iterable[str]) -> None:
+        for id in ids:
+            self._buffer.add(id)
+            self._num_added += 1
+            if len(self._buffer) >= self.max_ids_in_memory:
+                self._spill()
+
+    def _spill(self) -> None:
+        if not self._buffer:
+            return
+
+        # json encoding keeps IDs with embedded newlines on a single line
+        run = tempfile.TemporaryFile(mode="w+", encoding="utf-8", dir=self.tmp_dir)
+        for id in sorted(self._buffer):
+            run.write(json.dumps(id))
+            run.write("\n")
+        run.flush()
+        self._runs.append(run)
+        self._buffer = set()
+
+    @staticmethod
+    def _read_run(run: IO[str]) -> Iterator[str]:
+        run.seek(0)
+        for line in run:
+            yield json.loads(line)
+
+    def iter_sorted(self) -> Iterator[str]:
+        """Yields every distinct ID in ascending order. Can only be consumed while
+        the spiller is open."""
+        if not self._runs:
+            yield from sorted(self._buffer)
+            return
+
+        self._spill()
+
+        last: str | None = None
+        for id in heapq.merge(*(self._read_run(run) for run in self._runs)):
+            if id == last:
+                continue
+            last = id
+            yield id
+
+    def close(self) -> None:
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = set()
+
+    def __enter__(self) -> "SortedIdSpiller":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def iter_ids_missing_from_source(
+    indexed_ids: Iterable[str], source_ids: Iterable[str]
+) -> Iterator[str]:
+    """Merge join (anti join) over two ascending ID streams. Yields every ID in
+    `indexed_ids` that does not appear in `source_ids`.
+
+    Both inputs MUST be sorted in the same (codepoint / COLLATE "C") order.
+    Only one element of each stream is held at a time."""
+    source_iter = iter(source_ids)
+    current_source = next(source_iter, None)
+
+    for indexed_id in indexed_ids:
+        while current_source is not None and current_source < indexed_id:
+            current_source = next(source_iter, None)
+
+        if current_source is None or current_source != indexed_id:
+            yield indexed_id
@@ -0,0 +1,222 @@
+"""Compact encoding of the checkpoints saved during an index attempt.
+
+A checkpoint is stored as a compressed snapshot of the whole checkpoint plus the
+compressed changes made to it since the snapshot, each saved as its own file.
+Connectors like Google Drive keep growing sets of IDs in their checkpoints, so
+re-writing the whole checkpoint after every batch got more expensive the longer an
+attempt ran.
+
+Every file is a single frame, a 4 byte big-endian length followed by zlib
+compressed JSON. The snapshot holds the checkpoint and a generation ID, each delta
+holds the generation of the snapshot it applies to. The deltas are numbered from 1
+after every snapshot, replaying stops at the first missing delta or the first one
+left over from an older snapshot.
+"""
+
+import json
+import struct
+import types
+import typing
+import uuid
+import zlib
+from collections.abc import Iterable
+from collections.abc import Iterator
+from functools import lru_cache
+from typing import Any
+
+from onyx.connectors.models import ConnectorCheckpoint
+
+# a new snapshot is written after this many deltas, or once the deltas add up to half
+# the size of the snapshot
+SNAPSHOT_INTERVAL = 100
+
+_COMPRESSION_LEVEL = 1
+_FRAME_HEADER = struct.Struct(">I")
+
+
+@lru_cache(maxsize=None)
+def _set_field_names(checkpoint_type: type[ConnectorCheckpoint]) -> frozenset[str]:
+    """Fields holding sets of strings or ints. Their JSON order changes as they grow,
+    so they are diffed as sets rather than as lists."""
+    set_field_names = set()
+    for name, field in checkpoint_type.model_fields.items():
+        annotation = field.annotation
+        options = (
+            typing.get_args(annotation)
+            if typing.get_origin(annotation) in (typing.Union, types.UnionType)
+            else (annotation,)
+        )
+        if any(
+            typing.get_origin(option) in (set, frozenset)
+            and typing.get_args(option) in ((str,), (int,))
+            for option in options
+        ):
+            set_field_names.add(name)
+    return frozenset(set_field_names)
+
+
+def _encode_frame(value: Any) -> bytes:
+    data = zlib.compress(
+        json.dumps(value, separators=(",", ":")).encode("utf-8"), _COMPRESSION_LEVEL
+    )
+    return _FRAME_HEADER.pack(len(data)) + data
+
+
+def _decode_frames(data: bytes) -> Iterator[Any]:
+    offset = 0
+    while offset < len(data):
+        (length,) = _FRAME_HEADER.unpack_from(data, offset)
+        offset += _FRAME_HEADER.size
+        yield json.loads(zlib.decompress(data[offset : offset + length]))
+        offset += length
+
+
+def _to_json(value: Any) -> Any:
+    return list(value) if isinstance(value, set) else value
+
+
+def _diff(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """The changes turning `old` into `new`, values that are sets were JSON lists"""
+    delta: dict[str, Any] = {}
+    for key in old.keys() - new.keys():
+        delta.setdefault("remove", []).append(key)
+
+    for key, value in new.items():
+        if key not in old:
+            delta.setdefault("replace", {})[key] = _to_json(value)
+            continue
+
+        old_value = old[key]
+        if old_value == value:
+            continue
+
+        if isinstance(old_value, set) and isinstance(value, set):
+            if added := value - old_value:
+                delta.setdefault("set_add", {})[key] = list(added)
+            if removed := old_value - value:
+                delta.setdefault("set_remove", {})[key] = list(removed)
+        elif (
+            isinstance(old_value, list)
+            and isinstance(value, list)
+            and len(value) > len(old_value)
+            and value[: len(old_value)] == old_value
+        ):
+            delta.setdefault("append", {})[key] = value[len(old_value) :]
+        elif isinstance(old_value, dict) and isinstance(value, dict):
+            delta.setdefault("update", {})[key] = _diff(old_value, value)
+        else:
+            delta.setdefault("replace", {})[key] = _to_json(value)
+
+    return delta
+
+
+def _get_set_values(
+    content: dict[str, Any], key: str, set_values: dict[str, dict[Any, None]]
+) -> dict[Any, None]:
+    if key not in set_values:
+        set_values[key] = dict.fromkeys(content[key])
+    return set_values[key]
+
+
+def _apply(
+    content: dict[str, Any],
+    delta: dict[str, Any],
+    set_values: dict[str, dict[Any, None]],
+) -> None:
+    """Applies `delta` to `content`. The sets changed by deltas are kept in
+    `set_values` (as dicts, to keep their order) while replaying, rather than
+    rebuilding them for every delta."""
+    for key in delta.get("remove", []):
+        content.pop(key, None)
+        set_values.pop(key, None)
+    for key, value in delta.get("replace", {}).items():
+        content[key] = value
+        set_values.pop(key, None)
+    for key, items in delta.get("append", {}).items():
+        content[key].extend(items)
+    for key, nested_delta in delta.get("update", {}).items():
+        _apply(content[key], nested_delta, {})
+
+    for key, items in delta.get("set_remove", {}).items():
+        values = _get_set_values(content, key, set_values)
+        for item in items:
+            values.pop(item, None)
+    for key, items in delta.get("set_add", {}).items():
+        _get_set_values(content, key, set_values).update(dict.fromkeys(items))
+
+
+class CheckpointEncoder:
+    """Encodes the successive checkpoints of an index attempt, keeps the last one
+    around to diff the next one against"""
+
+    def __init__(self, snapshot_interval: int = SNAPSHOT_INTERVAL) -> None:
+        self.snapshot_interval = snapshot_interval
+
+        self._generation: str | None = None
+        self._content: dict[str, Any] | None = None
+        self._snapshot_size = 0
+        # the number of deltas saved since the snapshot, i.e. the number of the
+        # last one
+        self.delta_count = 0
+        self._deltas_size = 0
+
+    def encode(
+        self, checkpoint: ConnectorCheckpoint
+    ) -> tuple[bytes | None, bytes | None]:
+        """Returns the snapshot or the delta (number `delta_count`) to save, both
+        are None if the saved checkpoint is still up to date."""
+        set_field_names = _set_field_names(type(checkpoint))
+        content = checkpoint.model_dump(mode="json", exclude=set(set_field_names))
+        for key in set_field_names:
+            value = getattr(checkpoint, key)
+            # copied, connectors keep adding to the sets in their checkpoint
+            content[key] = set(value) if value is not None else None
+
+        if (
+            self._content is None
+            or self.delta_count >= self.snapshot_interval
+            or self._deltas_size * 2 > self._snapshot_size
+        ):
+            self._generation = uuid.uuid4().hex
+            snapshot = _encode_frame(
+                {
+                    "generation": self._generation,
+                    "checkpoint": {
+                        key: _to_json(value) for key, value in content.items()
+                    },
+                }
+            )
+            self._content = content
+            self._snapshot_size = len(snapshot)
+            # the deltas of the previous snapshot are ignored from now on
+            self.delta_count = 0
+            self._deltas_size = 0
+            return snapshot, None
+
+        delta = _diff(self._content, content)
+        self._content = content
+        if not delta:
+            return None, None
+
+        delta_frame = _encode_frame({"generation": self._generation, "delta": delta})
+        self.delta_count += 1
+        self._deltas_size += len(delta_frame)
+        return None, delta_frame
+
+
+def decode_checkpoint(snapshot: bytes, deltas: Iterable[bytes] = ()) -> str:
+    """The checkpoint JSON from a snapshot and the deltas saved after it, in order.
+    `deltas` is only consumed up to the first one of an older snapshot."""
+    snapshot_frame = next(_decode_frames(snapshot))
+    content = snapshot_frame["checkpoint"]
+
+    set_values: dict[str, dict[Any, None]] = {}
+    for delta in deltas:
+        delta_frame = next(_decode_frames(delta))
+        if delta_frame["generation"] != snapshot_frame["generation"]:
+            break
+        _apply(content, delta_frame["delta"], set_values)
+    for key, values in set_values.items():
+        content[key] = list(values)
+
+    return json.dumps(content)
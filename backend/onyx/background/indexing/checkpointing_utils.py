@@ -1,3 +1,5 @@
+import itertools
+from collections.abc import Iterator
 from datetime import datetime
 from datetime import timedelta
 from io import BytesIO
@@ -5,6 +7,8 @@ from io import BytesIO
 from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
+from onyx.background.indexing.checkpoint_store import CheckpointEncoder
+from onyx.background.indexing.checkpoint_store import decode_checkpoint
 from onyx.configs.constants import FileOrigin
 from onyx.connectors.interfaces import BaseConnector
 from onyx.connectors.interfaces import CheckpointedConnector
@@ -16,31 +20,65 @@ from onyx.db.models import IndexAttempt
 from onyx.db.models import IndexingStatus
 from onyx.file_store.file_store import get_default_file_store
 from onyx.utils.logger import setup_logger
-from onyx.utils.object_size_check import deep_getsizeof
 
 logger = setup_logger()
 
 _NUM_RECENT_ATTEMPTS_TO_CONSIDER = 50
 
+_CHECKPOINT_FILE_TYPE = "application/octet-stream"
+
+# the encoder of each index attempt saving checkpoints in this process, the deltas
+# it writes are relative to the checkpoint it saved last
+_checkpoint_encoders: dict[int, CheckpointEncoder] = {}
+
 
 def _build_checkpoint_pointer(index_attempt_id: int) -> str:
+    return f"checkpoint_{index_attempt_id}.snapshot"
+
+
+def _build_checkpoint_delta_id(index_attempt_id: int, delta_number: int) -> str:
+    return f"checkpoint_{index_attempt_id}.delta_{delta_number}"
+
+
+def _build_legacy_checkpoint_pointer(index_attempt_id: int) -> str:
+    """Checkpoints used to be saved as a single, uncompressed JSON file"""
     return f"checkpoint_{index_attempt_id}.json"
 
 
+def _save_checkpoint_file(file_id: str, content: bytes) -> None:
+    get_default_file_store().save_file(
+        content=BytesIO(content),
+        display_name=file_id,
+        file_origin=FileOrigin.INDEXING_CHECKPOINT,
+        file_type=_CHECKPOINT_FILE_TYPE,
+        file_id=file_id,
+    )
+
+
 def save_checkpoint(
     db_session: Session, index_attempt_id: int, checkpoint: ConnectorCheckpoint
 ) -> str:
-    """Save a checkpoint for a given index attempt to the file store"""
+    """Save a checkpoint for a given index attempt to the file store.
+
+    Saves a compressed snapshot of the checkpoint every so often, and in between
+    only the changes since the previous save, each in its own file."""
     checkpoint_pointer = _build_checkpoint_pointer(index_attempt_id)
 
-    file_store = get_default_file_store()
-    file_store.save_file(
-        content=BytesIO(checkpoint.model_dump_json().encode()),
-        display_name=checkpoint_pointer,
-        file_origin=FileOrigin.INDEXING_CHECKPOINT,
-        file_type="application/json",
-        file_id=checkpoint_pointer,
-    )
+    encoder = _checkpoint_encoders.setdefault(index_attempt_id, CheckpointEncoder())
+    try:
+        snapshot, delta = encoder.encode(checkpoint)
+        if delta is not None:
+            _save_checkpoint_file(
+                _build_checkpoint_delta_id(index_attempt_id, encoder.delta_count),
+                delta,
+            )
+        if snapshot is None:
+            return checkpoint_pointer
+        _save_checkpoint_file(checkpoint_pointer, snapshot)
+    except Exception:
+        # the next save must not write deltas against a checkpoint that wasn't saved
+        _checkpoint_encoders.pop(index_attempt_id, None)
+        raise
 
     index_attempt = get_index_attempt(db_session, index_attempt_id)
     if not index_attempt:
@@ -51,14 +89,38 @@ def save_checkpoint(
     return checkpoint_pointer
 
 
+def _read_checkpoint_deltas(index_attempt_id: int) -> Iterator[bytes]:
+    """The saved deltas in order, up to the first missing one"""
+    file_store = get_default_file_store()
+    for delta_number in itertools.count(1):
+        delta_id = _build_checkpoint_delta_id(index_attempt_id, delta_number)
+        if not file_store.has_file(
+            delta_id, FileOrigin.INDEXING_CHECKPOINT, _CHECKPOINT_FILE_TYPE
+        ):
+            return
+        yield file_store.read_file(delta_id, mode="rb").read()
+
+
 def load_checkpoint(
     index_attempt_id: int, connector: BaseConnector
 ) -> ConnectorCheckpoint:
     """Load a checkpoint for a given index attempt from the file store"""
     checkpoint_pointer = _build_checkpoint_pointer(index_attempt_id)
     file_store = get_default_file_store()
-    checkpoint_io = file_store.read_file(checkpoint_pointer, mode="rb")
-    checkpoint_data = checkpoint_io.read().decode("utf-8")
+
+    if file_store.has_file(
+        checkpoint_pointer, FileOrigin.INDEXING_CHECKPOINT, _CHECKPOINT_FILE_TYPE
+    ):
+        snapshot = file_store.read_file(checkpoint_pointer, mode="rb").read()
+        checkpoint_data = decode_checkpoint(
+            snapshot, _read_checkpoint_deltas(index_attempt_id)
+        )
+    else:
+        checkpoint_io = file_store.read_file(
+            _build_legacy_checkpoint_pointer(index_attempt_id), mode="rb"
+        )
+        checkpoint_data = checkpoint_io.read().decode("utf-8")
+
     if isinstance(connector, CheckpointedConnector):
         return connector.validate_checkpoint_json(checkpoint_data)
     return ConnectorCheckpoint.model_validate_json(checkpoint_data)
@@ -197,11 +259,22 @@ def cleanup_checkpoint(db_session: Session, index_attempt_id: int) -> None:
     if not index_attempt:
         raise RuntimeError(f"Index attempt {index_attempt_id} not found in DB.")
 
+    _checkpoint_encoders.pop(index_attempt_id, None)
+
     if not index_attempt.checkpoint_pointer:
         return None
 
     file_store = get_default_file_store()
     file_store.delete_file(index_attempt.checkpoint_pointer)
+    # deltas left over from older snapshots are numbered right after the current
+    # ones, so deleting up to the first missing one deletes all of them
+    for delta_number in itertools.count(1):
+        delta_id = _build_checkpoint_delta_id(index_attempt_id, delta_number)
+        if not file_store.has_file(
+            delta_id, FileOrigin.INDEXING_CHECKPOINT, _CHECKPOINT_FILE_TYPE
+        ):
+            break
+        file_store.delete_file(delta_id)
 
     index_attempt.checkpoint_pointer = None
     db_session.add(index_attempt)
@@ -211,8 +284,8 @@ def cleanup_checkpoint(db_session: Session, index_attempt_id: int) -> None:
 
 
 def check_checkpoint_size(checkpoint: ConnectorCheckpoint) -> None:
-    """Check if the checkpoint content size exceeds the limit (200MB)"""
-    content_size = deep_getsizeof(checkpoint.model_dump())
+    """Check if the serialized checkpoint size exceeds the limit (200MB)"""
+    content_size = len(checkpoint.model_dump_json())
     if content_size > 200_000_000:  # 200MB in bytes
         raise ValueError(
             f"Checkpoint content size ({content_size} bytes) exceeds 200MB limit"
@@ -7,10 +7,13 @@ https://github.com/celery/celery/issues/7007#issuecomment-1740139367"""
 
 import multiprocessing as mp
 import sys
+import threading
 import traceback
 from collections.abc import Callable
 from dataclasses import dataclass
-from multiprocessing.context import SpawnProcess
+from multiprocessing.context import ForkServerContext
+from multiprocessing.context import SpawnContext
+from multiprocessing.process import BaseProcess
 from typing import Any
 from typing import Literal
 from typing import Optional
@@ -24,6 +27,16 @@ from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
 
 logger = setup_logger()
 
+# imported once by the forkserver, so that processes forked from it start with the
+# connector stack (and everything docfetching needs) already loaded
+_FORKSERVER_PRELOAD_MODULES = [
+    "onyx.background.celery.tasks.docfetching.tasks",
+    "onyx.connectors.factory",
+]
+
+_forkserver_context: ForkServerContext | None = None
+_forkserver_context_lock = threading.Lock()
+
 
 class SimpleJobException(Exception):
     """lets us raise an exception that will return a specific error code"""
@@ -107,12 +120,45 @@ def _run_in_process(
     _initializer(func, queue, args, kwargs)
 
 
+def _get_forkserver_context() -> ForkServerContext:
+    global _forkserver_context
+
+    with _forkserver_context_lock:
+        if _forkserver_context is None:
+            ctx = mp.get_context("forkserver")
+            # must happen before the forkserver is started
+            ctx.set_forkserver_preload(_FORKSERVER_PRELOAD_MODULES)
+            _forkserver_context = ctx
+        return _forkserver_context
+
+
+def _get_context(start_method: str) -> ForkServerContext | SpawnContext:
+    if start_method == "forkserver":
+        return _get_forkserver_context()
+
+    if start_method != "spawn":
+        logger.warning(
+            f"Unsupported job process start method '{start_method}', using 'spawn'."
+        )
+    return mp.get_context("spawn")
+
+
+def start_job_forkserver() -> None:
+    """Starts the forkserver (and imports the preloaded modules in it) ahead of the
+    first job, instead of when the first job is submitted"""
+    _get_forkserver_context()
+    # the forkserver module is only importable where the start method is supported
+    from multiprocessing import forkserver
+
+    forkserver.ensure_running()
+
+
 @dataclass
 class SimpleJob:
     """Drop in replacement for `dask.distributed.Future`"""
 
     id: int
-    process: Optional["SpawnProcess"] = None
+    process: Optional[BaseProcess] = None
     queue: Optional[mp.Queue] = None
     _exception: Optional[str] = None
 
@@ -161,8 +207,13 @@ class SimpleJob:
 class SimpleJobClient:
     """Drop in replacement for `dask.distributed.Client`"""
 
-    def __init__(self, n_workers: int = 1) -> None:
+    def __init__(self, n_workers: int = 1, start_method: str = "spawn") -> None:
+        """`start_method` is either "spawn", which starts every job in a fresh
+        interpreter, or "forkserver", which forks jobs from a server process that
+        has the modules jobs need preloaded. Either way, each job runs in a
+        process of its own."""
         self.n_workers = n_workers
+        self.start_method = start_method
         self.job_id_counter = 0
         self.jobs: dict[int, SimpleJob] = {}
 
@@ -187,9 +238,9 @@ class SimpleJobClient:
         job_id = self.job_id_counter
         self.job_id_counter += 1
 
-        # this approach allows us to always "spawn" a new process regardless of
-        # get_start_method's current setting
-        ctx = mp.get_context("spawn")
+        # this approach allows us to always start a new process with the configured
+        # start method regardless of get_start_method's current setting
+        ctx = _get_context(self.start_method)
         queue = ctx.Queue()
         process = ctx.Process(
             target=_run_in_process, args=(func, queue, args), daemon=True
@@ -15,7 +15,9 @@ from onyx.background.indexing.checkpointing_utils import get_latest_valid_checkp
 from onyx.background.indexing.checkpointing_utils import save_checkpoint
 from onyx.background.indexing.memory_tracer import MemoryTracer
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
+from onyx.configs.app_configs import INDEXING_REUSE_UNCHANGED_CHUNKS
 from onyx.configs.app_configs import INDEXING_SIZE_WARNING_THRESHOLD
+from onyx.configs.app_configs import INDEXING_SKIP_UNCHANGED_CONTENT
 from onyx.configs.app_configs import INDEXING_TRACER_INTERVAL
 from onyx.configs.app_configs import INTEGRATION_TESTS_MODE
 from onyx.configs.app_configs import LEAVE_CONNECTOR_ACTIVE_ON_INITIALIZATION_FAILURE
@@ -414,6 +416,7 @@ def _run_indexing(
         attempt_id=index_attempt_id,
         connector_id=ctx.connector_id,
         credential_id=ctx.credential_id,
+        search_settings_id=index_attempt_start.search_settings_id,
     )
 
     total_failures = 0
@@ -566,6 +569,13 @@ def _run_indexing(
                 )
                 index_attempt_md.batch_num = batch_num + 1  # use 1-index for this
 
+                # a reindex from the beginning or into a new index must rewrite
+                # everything
+                is_incremental_update = (
+                    not ctx.from_beginning
+                    and ctx.search_settings_status == IndexModelStatus.PRESENT
+                )
+
                 # real work happens here!
                 index_pipeline_result = run_indexing_pipeline(
                     embedder=embedding_model,
@@ -575,6 +585,12 @@ def _run_indexing(
                         ctx.from_beginning
                         or (ctx.search_settings_status == IndexModelStatus.FUTURE)
                     ),
+                    skip_unchanged_content=(
+                        INDEXING_SKIP_UNCHANGED_CONTENT and is_incremental_update
+                    ),
+                    reuse_unchanged_chunks=(
+                        INDEXING_REUSE_UNCHANGED_CHUNKS and is_incremental_update
+                    ),
                     db_session=db_session,
                     tenant_id=tenant_id,
                     document_batch=doc_batch_cleaned,
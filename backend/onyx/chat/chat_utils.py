@@ -23,7 +23,7 @@ from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import RerankingDetails
 from onyx.context.search.models import RetrievalDetails
 from onyx.db.chat import create_chat_session
-from onyx.db.chat import get_chat_messages_by_session
+from onyx.db.chat import get_main_chain_chat_messages
 from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.kg_config import is_kg_config_settings_enabled_valid
 from onyx.db.llm import fetch_existing_doc_sets
@@ -162,23 +162,21 @@ def create_chat_chain(
     """Build the linear chain of messages without including the root message"""
     mainline_messages: list[ChatMessage] = []
 
-    all_chat_messages = get_chat_messages_by_session(
+    chain_messages = get_main_chain_chat_messages(
         chat_session_id=chat_session_id,
-        user_id=None,
         db_session=db_session,
-        skip_permission_check=True,
+        stop_at_message_id=stop_at_message_id,
         prefetch_tool_calls=prefetch_tool_calls,
     )
-    id_to_msg = {msg.id: msg for msg in all_chat_messages}
+    id_to_msg = {msg.id: msg for msg in chain_messages}
 
-    if not all_chat_messages:
+    if not chain_messages:
         raise RuntimeError("No messages in Chat Session")
 
-    root_message = all_chat_messages[0]
-    if root_message.parent_message is not None:
-        raise RuntimeError(
-            "Invalid root message, unable to fetch valid chat message sequence"
-        )
+    root_message = min(
+        (msg for msg in chain_messages if msg.parent_message is None),
+        key=lambda msg: msg.id,
+    )
 
     current_message: ChatMessage | None = root_message
     previous_message: ChatMessage | None = None
@@ -107,6 +107,7 @@ from onyx.llm.utils import litellm_exception_to_error_msg
 from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.server.query_and_chat.models import ChatMessageDetail
 from onyx.server.query_and_chat.models import CreateChatMessageRequest
+from onyx.server.query_and_chat.token_limit import record_token_usage
 from onyx.server.utils import get_json_line
 from onyx.tools.force import ForceUseTool
 from onyx.tools.models import SearchToolOverrideKwargs
@@ -704,6 +705,11 @@ def stream_chat_message_objects(
 
             # NOTE: do not commit user message - it will be committed when the
             # assistant message is successfully generated
+            record_token_usage(
+                user_id=user_id,
+                token_count=user_message.token_count,
+                db_session=db_session,
+            )
         else:
             # re-create linear history of messages
             final_msg, history_msgs = create_chat_chain(
@@ -845,7 +851,14 @@ def stream_chat_message_objects(
             error: str | None,
             tool_call: ToolCall | None,
         ) -> ChatMessage:
-            return create_new_chat_message(
+            # the reserved message is an empty placeholder, an existing assistant
+            # message has been counted already
+            previous_token_count = (
+                final_msg.token_count
+                if existing_assistant_message_id is not None
+                else 0
+            )
+            response_message = create_new_chat_message(
                 chat_session_id=chat_session_id,
                 parent_message=(
                     final_msg
@@ -869,6 +882,12 @@ def stream_chat_message_objects(
                 reserved_message_id=reserved_message_id,
                 is_agentic=new_msg_req.use_agentic_search,
             )
+            record_token_usage(
+                user_id=user_id,
+                token_count=token_count - previous_token_count,
+                db_session=db_session,
+            )
+            return response_message
 
         partial_response = create_response
 
@@ -1091,6 +1110,7 @@ def stream_chat_message_objects(
         llm_tokenizer_encode_func=llm_tokenizer_encode_func,
         db_session=db_session,
         chat_session_id=chat_session_id,
+        user_id=user_id,
         refined_answer_improvement=refined_answer_improvement,
     )
 
@@ -1103,6 +1123,7 @@ def _post_llm_answer_processing(
     llm_tokenizer_encode_func: Callable[[str], list[int]],
     db_session: Session,
     chat_session_id: UUID,
+    user_id: UUID | None,
     refined_answer_improvement: bool | None,
 ) -> Generator[ChatPacket, None, None]:
     """
@@ -1208,6 +1229,11 @@ def _post_llm_answer_processing(
                 refined_answer_improvement=refined_answer_improvement,
                 is_agentic=True,
             )
+            record_token_usage(
+                user_id=user_id,
+                token_count=next_answer_message.token_count,
+                db_session=db_session,
+            )
             agentic_message_ids.append(
                 AgentMessageIDInfo(level=next_level, message_id=next_answer_message.id)
             )
@@ -32,6 +32,14 @@ AGENT_DEFAULT_MAX_STATIC_HISTORY_WORD_LENGTH = 2000
 
 AGENT_ALLOW_REFINEMENT = os.environ.get("AGENT_ALLOW_REFINEMENT", "").lower() == "true"
 
+# Max number of graph branches (e.g. the sub-questions of the deep search graph) run
+# concurrently within a step. Unset uses LangGraph's default thread pool size.
+AGENT_MAX_CONCURRENT_BRANCHES = (
+    int(os.environ["AGENT_MAX_CONCURRENT_BRANCHES"])
+    if os.environ.get("AGENT_MAX_CONCURRENT_BRANCHES")
+    else None
+)
+
 AGENT_ANSWER_GENERATION_BY_FAST_LLM = (
     os.environ.get("AGENT_ANSWER_GENERATION_BY_FAST_LLM", "").lower() == "true"
 )
@@ -169,6 +177,12 @@ AGENT_MAX_STATIC_HISTORY_WORD_LENGTH = int(
     or AGENT_DEFAULT_MAX_STATIC_HISTORY_WORD_LENGTH
 )  # 2000
 
+# seconds a session's summarized history is cached for, it is reused for as long
+# as neither the history nor the question change
+AGENT_HISTORY_SUMMARY_CACHE_TTL = int(
+    os.environ.get("AGENT_HISTORY_SUMMARY_CACHE_TTL") or 24 * 60 * 60
+)
+
 
 AGENT_DEFAULT_TIMEOUT_CONNECT_LLM_ENTITY_TERM_EXTRACTION = 15  # in seconds
 AGENT_TIMEOUT_CONNECT_LLM_ENTITY_TERM_EXTRACTION = int(
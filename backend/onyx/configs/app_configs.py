@@ -516,7 +516,18 @@ LINEAR_CLIENT_SECRET = os.getenv("LINEAR_CLIENT_SECRET")
 
 # Slack specific configs
 SLACK_NUM_THREADS = int(os.getenv("SLACK_NUM_THREADS") or 8)
+# Bulk load workspace users via users.list (cached per workspace in redis) instead of
+# resolving each message author with its own users.info call
+SLACK_PREFETCH_USERS = os.environ.get("SLACK_PREFETCH_USERS", "true").lower() == "true"
 MAX_SLACK_QUERY_EXPANSIONS = int(os.environ.get("MAX_SLACK_QUERY_EXPANSIONS", "5"))
+# Seconds the threads fetched for federated Slack search results are cached
+SLACK_FEDERATED_THREAD_CACHE_TTL = int(
+    os.environ.get("SLACK_FEDERATED_THREAD_CACHE_TTL") or 60 * 10
+)
+# Seconds the names of the Slack users in federated Slack search results are cached
+SLACK_FEDERATED_USER_NAME_CACHE_TTL = int(
+    os.environ.get("SLACK_FEDERATED_USER_NAME_CACHE_TTL") or 60 * 60 * 24
+)
 
 DASK_JOB_CLIENT_ENABLED = (
     os.environ.get("DASK_JOB_CLIENT_ENABLED", "").lower() == "true"
@@ -542,6 +553,17 @@ MAX_PRUNING_DOCUMENT_RETRIEVAL_PER_MINUTE = int(
     os.environ.get("MAX_PRUNING_DOCUMENT_RETRIEVAL_PER_MINUTE", 0)
 )
 
+# Number of source document IDs a pruning job keeps in memory before spilling a
+# sorted run to disk. Keeps pruning memory flat for very large cc-pairs.
+PRUNING_ID_SPILL_BATCH_SIZE = int(
+    os.environ.get("PRUNING_ID_SPILL_BATCH_SIZE", 100_000)
+)
+
+# Number of deletion tasks emitted per batch while streaming the pruning diff
+PRUNING_TASK_GENERATION_BATCH_SIZE = int(
+    os.environ.get("PRUNING_TASK_GENERATION_BATCH_SIZE", 1000)
+)
+
 # comma delimited list of zendesk article labels to skip indexing for
 ZENDESK_CONNECTOR_SKIP_ARTICLE_LABELS = os.environ.get(
     "ZENDESK_CONNECTOR_SKIP_ARTICLE_LABELS", ""
@@ -606,12 +628,55 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
 
+# Skip chunking / embedding / index writes for documents whose content hash matches
+# the hash stored from the last successful indexing. Only applies to incremental
+# runs against the PRESENT index.
+INDEXING_SKIP_UNCHANGED_CONTENT = (
+    os.environ.get("INDEXING_SKIP_UNCHANGED_CONTENT", "true").lower() == "true"
+)
+
+# For documents that did change, only embed and write the chunks whose hash differs
+# from the one stored for the same position, and delete the removed trailing chunks.
+# Same restrictions as INDEXING_SKIP_UNCHANGED_CONTENT.
+INDEXING_REUSE_UNCHANGED_CHUNKS = (
+    os.environ.get("INDEXING_REUSE_UNCHANGED_CHUNKS", "true").lower() == "true"
+)
+
+# How the process each docfetching attempt runs in is started. "spawn" starts every
+# attempt in a fresh interpreter, which imports the whole connector stack before doing
+# any work. "forkserver" forks attempts from a server process (started with the
+# docfetching worker) that already imported it. Each attempt runs in its own process
+# either way.
+DOCFETCHING_PROCESS_START_METHOD = (
+    os.environ.get("DOCFETCHING_PROCESS_START_METHOD") or "spawn"
+).lower()
+
 # Maximum file size in a document to be indexed
 MAX_DOCUMENT_CHARS = int(os.environ.get("MAX_DOCUMENT_CHARS") or 5_000_000)
 MAX_FILE_SIZE_BYTES = int(
     os.environ.get("MAX_FILE_SIZE_BYTES") or 2 * 1024 * 1024 * 1024
 )  # 2GB in bytes
 
+# PDFs with at least this many pages have their text extracted by worker processes,
+# with each process handling a contiguous shard of pages
+FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES = int(
+    os.environ.get("FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES") or 64
+)
+# Number of worker processes used for sharded extraction, shared by the concurrent
+# extractions of a process. 0 or 1 disables sharded extraction.
+FILE_EXTRACTION_NUM_PROCESSES = int(
+    os.environ.get("FILE_EXTRACTION_NUM_PROCESSES") or min(os.cpu_count() or 1, 4)
+)
+# Wall clock budget for extracting the text of a single file. Text extracted before
+# the budget runs out is kept, the remainder of the file is skipped.
+FILE_EXTRACTION_TIMEOUT_SECONDS = int(
+    os.environ.get("FILE_EXTRACTION_TIMEOUT_SECONDS") or 600
+)
+# Address space limit applied to each extraction worker process. 0 disables the limit.
+FILE_EXTRACTION_WORKER_MAX_MEMORY_BYTES = int(
+    os.environ.get("FILE_EXTRACTION_WORKER_MAX_MEMORY_BYTES") or 0
+)
+
 # Use document summary for contextual rag
 USE_DOCUMENT_SUMMARY = os.environ.get("USE_DOCUMENT_SUMMARY", "true").lower() == "true"
 # Use chunk summary for contextual rag
@@ -623,6 +688,20 @@ AVERAGE_SUMMARY_EMBEDDINGS = (
 
 MAX_TOKENS_FOR_FULL_INCLUSION = 4096
 
+# Max concurrent contextual rag LLM calls to a provider, across all the documents
+# being indexed by a process
+CONTEXTUAL_RAG_MAX_CONCURRENT_LLM_CALLS = int(
+    os.environ.get("CONTEXTUAL_RAG_MAX_CONCURRENT_LLM_CALLS") or 8
+)
+# Times a rate limited contextual rag LLM call is tried before giving up on it
+CONTEXTUAL_RAG_RATE_LIMIT_TRIES = int(
+    os.environ.get("CONTEXTUAL_RAG_RATE_LIMIT_TRIES") or 5
+)
+# Seconds document summaries and chunk contexts are cached by a hash of their prompt
+CONTEXTUAL_RAG_CACHE_TTL = int(
+    os.environ.get("CONTEXTUAL_RAG_CACHE_TTL") or 60 * 60 * 24 * 7
+)
+
 
 #####
 # Tool Configs
@@ -664,6 +743,21 @@ LOG_POSTGRES_LATENCY = os.environ.get("LOG_POSTGRES_LATENCY", "").lower() == "tr
 LOG_POSTGRES_CONN_COUNTS = (
     os.environ.get("LOG_POSTGRES_CONN_COUNTS", "").lower() == "true"
 )
+# Per request / Celery task profiling of database usage (statement counts, time
+# spent in Postgres and waiting for a pooled connection, repeated statements),
+# reported as Prometheus metrics. An API request is profiled if it is sampled or
+# sends the X-Onyx-Profile-Queries header, every Celery task is profiled
+DB_QUERY_PROFILING_ENABLED = (
+    os.environ.get("DB_QUERY_PROFILING_ENABLED", "").lower() == "true"
+)
+DB_QUERY_PROFILING_SAMPLE_RATE = float(
+    os.environ.get("DB_QUERY_PROFILING_SAMPLE_RATE") or 0.0
+)
+# a statement executed more often than this in a single request / task is
+# reported as a likely N+1 query
+DB_QUERY_PROFILING_REPEAT_THRESHOLD = int(
+    os.environ.get("DB_QUERY_PROFILING_REPEAT_THRESHOLD") or 10
+)
 # Anonymous usage telemetry
 DISABLE_TELEMETRY = os.environ.get("DISABLE_TELEMETRY", "").lower() == "true"
 
@@ -671,6 +765,17 @@ TOKEN_BUDGET_GLOBALLY_ENABLED = (
     os.environ.get("TOKEN_BUDGET_GLOBALLY_ENABLED", "").lower() == "true"
 )
 
+# Token rate limit usage is counted in Redis in hourly buckets kept for this many
+# hours. Limits with longer periods are checked against Postgres directly
+TOKEN_RATE_LIMIT_USAGE_RETENTION_HOURS = int(
+    os.environ.get("TOKEN_RATE_LIMIT_USAGE_RETENTION_HOURS") or 24 * 7
+)
+# Seconds after which the Redis usage counters are rebuilt from Postgres, bounds
+# the drift from messages that were counted but never committed
+TOKEN_RATE_LIMIT_USAGE_RECONCILE_INTERVAL = int(
+    os.environ.get("TOKEN_RATE_LIMIT_USAGE_RECONCILE_INTERVAL") or 3600
+)
+
 # Defined custom query/answer conditions to validate the query and the LLM answer.
 # Format: list of strings
 CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
@@ -681,6 +786,17 @@ VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
 
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
+# Number of threads of the process-wide executors the parallel helpers of
+# onyx.utils.threadpool_concurrency run on (e.g. run_functions_tuples_in_parallel)
+SEARCH_EXECUTOR_MAX_WORKERS = int(os.environ.get("SEARCH_EXECUTOR_MAX_WORKERS") or 32)
+LLM_EXECUTOR_MAX_WORKERS = int(os.environ.get("LLM_EXECUTOR_MAX_WORKERS") or 32)
+IO_EXECUTOR_MAX_WORKERS = int(os.environ.get("IO_EXECUTOR_MAX_WORKERS") or 64)
+# Writes to the secondary index during a search settings swap (e.g. metadata syncs,
+# deletions) run on their own executor, concurrently with the writes to the primary
+SECONDARY_INDEX_EXECUTOR_MAX_WORKERS = int(
+    os.environ.get("SECONDARY_INDEX_EXECUTOR_MAX_WORKERS") or 8
+)
+
 PARSE_WITH_TRAFILATURA = os.environ.get("PARSE_WITH_TRAFILATURA", "").lower() == "true"
 
 # allow for custom error messages for different errors returned by litellm
@@ -80,6 +80,16 @@ NUM_PERSONA_PROMPT_GENERATION_CHUNKS = 5
 DISABLE_LLM_DOC_RELEVANCE = (
     os.environ.get("DISABLE_LLM_DOC_RELEVANCE", "").lower() == "true"
 )
+# Number of sections the LLM evaluates for usefulness in a single call
+LLM_DOC_RELEVANCE_BATCH_SIZE = int(os.environ.get("LLM_DOC_RELEVANCE_BATCH_SIZE") or 4)
+# Seconds the LLM usefulness evaluation may take. Sections that are not evaluated
+# by then are judged on their (re)ranking score instead
+LLM_DOC_RELEVANCE_TIMEOUT = float(os.environ.get("LLM_DOC_RELEVANCE_TIMEOUT") or 10)
+# (Re)ranking score at which a section that was not evaluated in time is relevant,
+# used when the LLM did not approve any of the sections it did evaluate
+LLM_DOC_RELEVANCE_FALLBACK_MIN_SCORE = float(
+    os.environ.get("LLM_DOC_RELEVANCE_FALLBACK_MIN_SCORE") or 0.5
+)
 
 # Stops streaming answers back to the UI if this pattern is seen:
 STOP_STREAM_PAT = os.environ.get("STOP_STREAM_PAT") or None
@@ -108,3 +118,15 @@ USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH = (
 )
 
 USE_DIV_CON_AGENT = os.environ.get("USE_DIV_CON_AGENT", "false").lower() == "true"
+
+# Whether to start an unfiltered (ACL only) retrieval while the LLM extracts the
+# time / source filters of the query, and filter its results once the filters are
+# known instead of retrieving again
+ENABLE_SPECULATIVE_RETRIEVAL = (
+    os.environ.get("ENABLE_SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+)
+# How many times the requested number of hits the speculative retrieval fetches, so
+# that enough of them are left after filtering
+SPECULATIVE_RETRIEVAL_HITS_MULTIPLIER = int(
+    os.environ.get("SPECULATIVE_RETRIEVAL_HITS_MULTIPLIER") or 3
+)
@@ -484,6 +484,7 @@ class OnyxCeleryTask:
     PERFORM_TTL_MANAGEMENT_TASK = "perform_ttl_management_task"
 
     AUTOGENERATE_USAGE_REPORT_TASK = "autogenerate_usage_report_task"
+    UPDATE_ANALYTICS_ROLLUPS_TASK = "update_analytics_rollups_task"
 
     EXPORT_QUERY_HISTORY_TASK = "export_query_history_task"
     EXPORT_QUERY_HISTORY_CLEANUP_TASK = "export_query_history_cleanup_task"
@@ -84,6 +84,30 @@ KG_METADATA_TRACKING_THRESHOLD: int = int(
     os.environ.get("KG_METADATA_TRACKING_THRESHOLD", "10")
 )
 
+# max concurrent deep extraction and classification LLM calls to a single provider,
+# shared by all the extractions running in a process
+KG_EXTRACTION_MAX_CONCURRENT_LLM_CALLS: int = int(
+    os.environ.get("KG_EXTRACTION_MAX_CONCURRENT_LLM_CALLS", "8")
+)
+
+# documents with at most this many characters of content are packed together into
+# deep extraction prompts, up to KG_EXTRACTION_PACKED_PROMPT_MAX_CHARS characters and
+# KG_EXTRACTION_PACKED_PROMPT_MAX_DOCUMENTS documents per prompt
+KG_EXTRACTION_PACKED_DOCUMENT_MAX_CHARS: int = int(
+    os.environ.get("KG_EXTRACTION_PACKED_DOCUMENT_MAX_CHARS", "2000")
+)
+KG_EXTRACTION_PACKED_PROMPT_MAX_CHARS: int = int(
+    os.environ.get("KG_EXTRACTION_PACKED_PROMPT_MAX_CHARS", "8000")
+)
+KG_EXTRACTION_PACKED_PROMPT_MAX_DOCUMENTS: int = int(
+    os.environ.get("KG_EXTRACTION_PACKED_PROMPT_MAX_DOCUMENTS", "8")
+)
+
+# seconds deep extraction results are cached by a hash of the extracted content
+KG_EXTRACTION_CACHE_TTL: int = int(
+    os.environ.get("KG_EXTRACTION_CACHE_TTL", str(60 * 60 * 24 * 7))
+)
+
 
 KG_DEFAULT_MAX_PARENT_RECURSION_DEPTH: int = int(
     os.environ.get("KG_DEFAULT_MAX_PARENT_RECURSION_DEPTH", "2")
@@ -125,6 +149,30 @@ KG_NORMALIZATION_RERANK_THRESHOLD: float = float(
     os.environ.get("KG_NORMALIZATION_RERANK_THRESHOLD", "0.3")
 )
 
+# seconds between incremental refreshes (entities updated since the last refresh)
+# of the in-memory entity index used for query time normalization
+KG_NORMALIZATION_INDEX_REFRESH_INTERVAL: float = float(
+    os.environ.get("KG_NORMALIZATION_INDEX_REFRESH_INTERVAL", "30")
+)
+
+# seconds between full reloads of the in-memory entity index, picks up renames
+# done by database triggers (which don't bump time_updated)
+KG_NORMALIZATION_INDEX_FULL_RELOAD_INTERVAL: float = float(
+    os.environ.get("KG_NORMALIZATION_INDEX_FULL_RELOAD_INTERVAL", "3600")
+)
+
+# the entity indexes of at most this many tenants are kept in memory, least
+# recently used first out
+KG_NORMALIZATION_INDEX_MAX_TENANTS: int = int(
+    os.environ.get("KG_NORMALIZATION_INDEX_MAX_TENANTS", "100")
+)
+
+# seconds after which the entity index of a tenant that hasn't normalized any
+# entities is dropped
+KG_NORMALIZATION_INDEX_IDLE_TTL: float = float(
+    os.environ.get("KG_NORMALIZATION_INDEX_IDLE_TTL", "3600")
+)
+
 
 KG_CLUSTERING_RETRIEVE_THRESHOLD: float = float(
     os.environ.get("KG_CLUSTERING_RETRIEVE_THRESHOLD", "0.6")
@@ -135,6 +183,12 @@ KG_CLUSTERING_THRESHOLD: float = float(
     os.environ.get("KG_CLUSTERING_THRESHOLD", "0.96")
 )
 
+# number of staged entities clustered together, candidate retrieval and the
+# resulting inserts / updates are done once per batch
+KG_CLUSTERING_ENTITY_BATCH_SIZE: int = int(
+    os.environ.get("KG_CLUSTERING_ENTITY_BATCH_SIZE", "1000")
+)
+
 KG_MAX_SEARCH_DOCUMENTS: int = int(os.environ.get("KG_MAX_SEARCH_DOCUMENTS", "15"))
 
 KG_MAX_DECOMPOSITION_SEGMENTS: int = int(
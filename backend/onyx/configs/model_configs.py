@@ -92,6 +92,22 @@ DISABLE_LITELLM_STREAMING = (
     os.environ.get("DISABLE_LITELLM_STREAMING") or "false"
 ).lower() == "true"
 
+# Cache of the responses of the temperature 0 LLM calls of the secondary flows that
+# opted in (e.g. query rephrasing, filter extraction), see onyx.llm.response_cache.
+# Responses are cached per tenant for LLM_RESPONSE_CACHE_TTL seconds, at most
+# LLM_RESPONSE_CACHE_MAX_ENTRIES of them, and only if they are shorter than
+# LLM_RESPONSE_CACHE_MAX_RESPONSE_CHARS
+LLM_RESPONSE_CACHE_ENABLED = (
+    os.environ.get("LLM_RESPONSE_CACHE_ENABLED", "").lower() == "true"
+)
+LLM_RESPONSE_CACHE_TTL = int(os.environ.get("LLM_RESPONSE_CACHE_TTL") or 60 * 60 * 24)
+LLM_RESPONSE_CACHE_MAX_ENTRIES = int(
+    os.environ.get("LLM_RESPONSE_CACHE_MAX_ENTRIES") or 10_000
+)
+LLM_RESPONSE_CACHE_MAX_RESPONSE_CHARS = int(
+    os.environ.get("LLM_RESPONSE_CACHE_MAX_RESPONSE_CHARS") or 10_000
+)
+
 # extra headers to pass to LiteLLM
 LITELLM_EXTRA_HEADERS: dict[str, str] | None = None
 _LITELLM_EXTRA_HEADERS_RAW = os.environ.get("LITELLM_EXTRA_HEADERS")
@@ -71,3 +71,21 @@ DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD = int(
 DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS = int(
     os.environ.get("DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS", "86400")
 )
+
+# Number of threads handling the Slack events of a single tenant, and the number of
+# events that can be waiting for one of them. Events arriving at a full queue are
+# dropped (they have already been acknowledged to Slack)
+DANSWER_BOT_TENANT_WORKERS = int(os.environ.get("DANSWER_BOT_TENANT_WORKERS") or 10)
+DANSWER_BOT_TENANT_QUEUE_SIZE = int(
+    os.environ.get("DANSWER_BOT_TENANT_QUEUE_SIZE") or 100
+)
+
+# Seconds the Slack bot caches bots and channel configs for. Admin edits invalidate
+# the cache right away, this only bounds how stale it can get if that signal is lost
+DANSWER_BOT_CONFIG_CACHE_TTL = int(
+    os.environ.get("DANSWER_BOT_CONFIG_CACHE_TTL") or 300
+)
+# Seconds the Slack bot caches channel names for, renames in Slack show up after this
+DANSWER_BOT_CHANNEL_NAME_CACHE_TTL = int(
+    os.environ.get("DANSWER_BOT_CHANNEL_NAME_CACHE_TTL") or 600
+)
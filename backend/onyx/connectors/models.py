@@ -315,6 +315,9 @@ class IndexAttemptMetadata(BaseModel):
     batch_num: int | None = None
     attempt_id: int | None = None
     request_id: str | None = None
+    # The search settings of the index being written to. Content hashes are only
+    # recorded (and used to skip unchanged documents) for runs that set it
+    search_settings_id: int | None = None
 
     # Work in progress: will likely contain metadata about cc pair / index attempt
     structured_id: str | None = None
@@ -2,6 +2,7 @@ import contextvars
 import copy
 import itertools
 import re
+import time
 from collections.abc import Callable
 from collections.abc import Generator
 from concurrent.futures import as_completed
@@ -31,6 +32,7 @@ from onyx.access.models import ExternalAccess
 from onyx.configs.app_configs import ENABLE_EXPENSIVE_EXPERT_CALLS
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
 from onyx.configs.app_configs import SLACK_NUM_THREADS
+from onyx.configs.app_configs import SLACK_PREFETCH_USERS
 from onyx.configs.constants import DocumentSource
 from onyx.connectors.exceptions import ConnectorValidationError
 from onyx.connectors.exceptions import CredentialExpiredError
@@ -64,6 +66,7 @@ from onyx.connectors.slack.utils import (
 from onyx.connectors.slack.utils import get_message_link
 from onyx.connectors.slack.utils import make_paginated_slack_api_call
 from onyx.connectors.slack.utils import SlackTextCleaner
+from onyx.connectors.slack.utils import SlackUserDirectory
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.redis.redis_pool import get_redis_client
 from onyx.utils.logger import setup_logger
@@ -461,6 +464,7 @@ def _get_all_doc_ids(
         [MessageType], SlackMessageFilterReason | None
     ] = default_msg_filter,
     callback: IndexingHeartbeatInterface | None = None,
+    user_cache: dict[str, BasicExpertInfo | None] | None = None,
 ) -> GenerateSlimDocumentOutput:
     """
     Get all document ids in the workspace, channel by channel
@@ -472,7 +476,8 @@ def _get_all_doc_ids(
     filtered_channels = filter_channels(
         all_channels, channels, channel_name_regex_enabled
     )
-    user_cache: dict[str, BasicExpertInfo | None] = {}
+    if user_cache is None:
+        user_cache = {}
 
     for channel in filtered_channels:
         channel_id = channel["id"]
@@ -620,6 +625,10 @@ class SlackConnector(
         # just used for efficiency
         self.text_cleaner: SlackTextCleaner | None = None
         self.user_cache: dict[str, BasicExpertInfo | None] = {}
+        # bulk load the workspace's users once per run instead of resolving
+        # them one users.info call at a time
+        self.prefetch_users = SLACK_PREFETCH_USERS
+        self._users_hydrated = False
         self.credentials_provider: CredentialsProviderInterface | None = None
         self.credential_prefix: str | None = None
         self.use_redis: bool = use_redis
@@ -638,6 +647,10 @@ class SlackConnector(
     def make_delay_key(prefix: str) -> str:
         return f"{prefix}:delay"
 
+    @staticmethod
+    def make_user_directory_key(prefix: str) -> str:
+        return f"{prefix}:user_directory"
+
     @staticmethod
     def make_slack_web_client(
         prefix: str, token: str, max_retry_count: int, r: Redis
@@ -732,6 +745,39 @@ class SlackConnector(
         self.text_cleaner = SlackTextCleaner(client=self.client)
         self.credentials_provider = credentials_provider
 
+    def _hydrate_users(self) -> None:
+        """Fills the user cache and text cleaner from a single users.list pass
+        (or the workspace's cached copy in redis). Users not found there are
+        still resolved lazily via users.info."""
+        if not self.prefetch_users or self._users_hydrated or self.client is None:
+            return
+
+        # only attempt this once per run, even on failure
+        self._users_hydrated = True
+
+        r: Redis | None = None
+        redis_key: str | None = None
+        if self.use_redis and self.credential_prefix:
+            r = self.redis
+            redis_key = SlackConnector.make_user_directory_key(self.credential_prefix)
+
+        start = time.monotonic()
+        try:
+            num_users = SlackUserDirectory(
+                client=self.client, r=r, redis_key=redis_key
+            ).hydrate(self.user_cache, self.text_cleaner)
+        except Exception:
+            logger.exception(
+                "Failed to bulk load Slack users. Falling back to per user lookups."
+            )
+            return
+
+        logger.info(
+            f"Slack user directory loaded: "
+            f"users={num_users} "
+            f"elapsed={time.monotonic() - start:.2f}s"
+        )
+
     def retrieve_all_slim_documents(
         self,
         start: SecondsSinceUnixEpoch | None = None,
@@ -741,11 +787,14 @@ class SlackConnector(
         if self.client is None:
             raise ConnectorMissingCredentialError("Slack")
 
+        self._hydrate_users()
+
         return _get_all_doc_ids(
             client=self.client,
             channels=self.channels,
             channel_name_regex_enabled=self.channel_regex_enabled,
             callback=callback,
+            user_cache=self.user_cache,
         )
 
     def _load_from_checkpoint(
@@ -774,6 +823,8 @@ class SlackConnector(
 
         checkpoint = cast(SlackCheckpoint, copy.deepcopy(checkpoint))
 
+        self._hydrate_users()
+
         # if this is the very first time we've called this, need to
         # get all relevant channels and save them into the checkpoint
         if checkpoint.channel_ids is None:
@@ -859,6 +910,21 @@ class SlackConnector(
 
             num_threads_start = len(seen_thread_ts)
 
+            # thread broadcasts and replies share their parent's thread_ts. Only
+            # submit one message per thread so each thread is fetched once per batch.
+            messages_to_process: list[MessageType] = []
+            batch_thread_or_message_ts: set[str] = set()
+            for message in message_batch:
+                thread_or_message_ts = message.get("thread_ts") or message["ts"]
+                if (
+                    thread_or_message_ts in batch_thread_or_message_ts
+                    or thread_or_message_ts in seen_thread_ts
+                ):
+                    continue
+
+                batch_thread_or_message_ts.add(thread_or_message_ts)
+                messages_to_process.append(message)
+
             # Process messages in parallel using ThreadPoolExecutor
             with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
                 # NOTE(rkuo): this seems to be assuming the slack sdk is thread safe.
@@ -866,7 +932,7 @@ class SlackConnector(
                 # yet, but likely not correct to rely on.
 
                 futures: list[Future[ProcessedSlackMessage]] = []
-                for message in message_batch:
+                for message in messages_to_process:
                     # Capture the current context so that the thread gets the current tenant ID
                     current_context = contextvars.copy_context()
                     futures.append(
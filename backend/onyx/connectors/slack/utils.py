@@ -1,3 +1,4 @@
+import json
 import re
 from collections.abc import Callable
 from collections.abc import Generator
@@ -6,6 +7,7 @@ from functools import wraps
 from typing import Any
 from typing import cast
 
+from redis import Redis
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web import SlackResponse
@@ -27,6 +29,9 @@ ONYX_SLACK_LOCK_TTL = 1800  # how long the lock is allowed to idle before it exp
 ONYX_SLACK_LOCK_BLOCKING_TIMEOUT = 60  # how long to wait for the lock per wait attempt
 ONYX_SLACK_LOCK_TOTAL_BLOCKING_TIMEOUT = 3600  # how long to wait for the lock in total
 
+# how long a workspace's bulk loaded user directory is reused across runs
+ONYX_SLACK_USER_CACHE_TTL = 60 * 60 * 24
+
 
 @lru_cache()
 def get_base_url(token: str) -> str:
@@ -148,6 +153,22 @@ def _make_slack_api_call_paginated(
 #     return _make_slack_api_call_paginated(basic_retry_wrapper(call))(**kwargs)
 
 
+def _expert_info_from_slack_user(user: dict[str, Any]) -> BasicExpertInfo:
+    profile = user.get("profile", {})
+    return BasicExpertInfo(
+        display_name=user.get("real_name") or profile.get("display_name"),
+        first_name=profile.get("first_name"),
+        last_name=profile.get("last_name"),
+        email=profile.get("email"),
+    )
+
+
+def _slack_name_from_slack_user(user: dict[str, Any]) -> str:
+    profile = user.get("profile", {})
+    # prefer display name if set, since that is what is shown in Slack
+    return profile.get("display_name") or profile.get("real_name") or ""
+
+
 def expert_info_from_slack_id(
     user_id: str | None,
     client: WebClient,
@@ -166,20 +187,121 @@ def expert_info_from_slack_id(
         return None
 
     user: dict = cast(dict[Any, dict], response.data).get("user", {})
-    profile = user.get("profile", {})
-
-    expert = BasicExpertInfo(
-        display_name=user.get("real_name") or profile.get("display_name"),
-        first_name=profile.get("first_name"),
-        last_name=profile.get("last_name"),
-        email=profile.get("email"),
-    )
+    expert = _expert_info_from_slack_user(user)
 
     user_cache[user_id] = expert
 
     return expert
 
 
+class SlackUserDirectory:
+    """Bulk loads a workspace's users via users.list so that per-message user
+    resolution (users.info) is only needed for users created after the load.
+
+    When a redis client is supplied, the minimal user fields are persisted in a
+    redis hash per workspace so that subsequent runs (and other workers indexing
+    the same workspace) skip the users.list paging entirely until the TTL expires.
+    """
+
+    USERS_LIST_PAGE_LIMIT = 200
+
+    # the fields we need to build expert info and display names
+    _PROFILE_FIELDS = ("display_name", "real_name", "first_name", "last_name", "email")
+
+    def __init__(
+        self,
+        client: WebClient,
+        r: Redis | None = None,
+        redis_key: str | None = None,
+        ttl: int = ONYX_SLACK_USER_CACHE_TTL,
+    ) -> None:
+        self._client = client
+        self._redis = r
+        self._redis_key = redis_key
+        self._ttl = ttl
+
+    @classmethod
+    def _minimize(cls, user: dict[str, Any]) -> dict[str, Any]:
+        profile = user.get("profile", {})
+        return {
+            "real_name": user.get("real_name"),
+            "profile": {field: profile.get(field) for field in cls._PROFILE_FIELDS},
+        }
+
+    def _load_from_redis(self) -> dict[str, dict[str, Any]] | None:
+        if self._redis is None or not self._redis_key:
+            return None
+
+        raw = cast(dict[bytes, bytes], self._redis.hgetall(self._redis_key))
+        if not raw:
+            return None
+
+        return {
+            user_id.decode("utf-8"): json.loads(user_json)
+            for user_id, user_json in raw.items()
+        }
+
+    def _save_to_redis(self, users: dict[str, dict[str, Any]]) -> None:
+        if self._redis is None or not self._redis_key or not users:
+            return
+
+        pipe = self._redis.pipeline()
+        pipe.delete(self._redis_key)
+        pipe.hset(
+            self._redis_key,
+            mapping={user_id: json.dumps(user) for user_id, user in users.items()},
+        )
+        pipe.expire(self._redis_key, self._ttl)
+        pipe.execute()
+
+    def _fetch_from_slack(self) -> dict[str, dict[str, Any]]:
+        users: dict[str, dict[str, Any]] = {}
+        cursor: str | None = None
+        while True:
+            response = self._client.users_list(
+                cursor=cursor, limit=self.USERS_LIST_PAGE_LIMIT
+            )
+            response.validate()
+            for user in cast(list[dict[str, Any]], response.get("members", [])):
+                user_id = user.get("id")
+                if user_id:
+                    users[user_id] = self._minimize(user)
+
+            cursor = cast(dict[str, Any], response.get("response_metadata", {})).get(
+                "next_cursor", ""
+            )
+            if not cursor:
+                break
+
+        return users
+
+    def hydrate(
+        self,
+        user_cache: dict[str, BasicExpertInfo | None],
+        text_cleaner: "SlackTextCleaner | None" = None,
+    ) -> int:
+        """Fills user_cache (and the text cleaner's name map) in place.
+        Returns the number of users loaded."""
+        users = self._load_from_redis()
+        if users is None:
+            users = self._fetch_from_slack()
+            self._save_to_redis(users)
+
+        for user_id, user in users.items():
+            user_cache.setdefault(user_id, _expert_info_from_slack_user(user))
+
+        if text_cleaner:
+            text_cleaner.add_slack_names(
+                {
+                    user_id: name
+                    for user_id, user in users.items()
+                    if (name := _slack_name_from_slack_user(user))
+                }
+            )
+
+        return len(users)
+
+
 class SlackTextCleaner:
     """Utility class to replace user IDs with usernames in a message.
     Handles caching, so the same request is not made multiple times
@@ -206,6 +328,11 @@ class SlackTextCleaner:
 
         return self._id_to_name_map[user_id]
 
+    def add_slack_names(self, id_to_name_map: dict[str, str]) -> None:
+        """Seeds the name map, e.g. from a bulk users.list load"""
+        for user_id, name in id_to_name_map.items():
+            self._id_to_name_map.setdefault(user_id, name)
+
     def _replace_user_ids_with_names(self, message: str) -> str:
         # Find user IDs in the message
         user_ids = re.findall("<@(.*?)>", message)
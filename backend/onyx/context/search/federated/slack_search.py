@@ -1,6 +1,8 @@
+import json
 import re
 from datetime import datetime
 from datetime import timedelta
+from functools import lru_cache
 from typing import Any
 
 from langchain_core.messages import HumanMessage
@@ -10,6 +12,8 @@ from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
 from onyx.configs.app_configs import MAX_SLACK_QUERY_EXPANSIONS
+from onyx.configs.app_configs import SLACK_FEDERATED_THREAD_CACHE_TTL
+from onyx.configs.app_configs import SLACK_FEDERATED_USER_NAME_CACHE_TTL
 from onyx.configs.chat_configs import DOC_TIME_DECAY
 from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from onyx.connectors.models import IndexingDocument
@@ -23,21 +27,29 @@ from onyx.document_index.document_index_utils import (
     get_multipass_config,
 )
 from onyx.indexing.chunker import Chunker
-from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.models import DocAwareChunk
 from onyx.llm.factory import get_default_llms
 from onyx.llm.interfaces import LLM
 from onyx.llm.utils import message_to_string
+from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.prompts.federated_search import SLACK_QUERY_EXPANSION_PROMPT
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.call_cache import cache_values
+from onyx.utils.call_cache import get_cached_values
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from onyx.utils.timing import log_function_time
+from shared_configs.enums import EmbeddingProvider
 
 logger = setup_logger()
 
 HIGHLIGHT_START_CHAR = "\ue000"
 HIGHLIGHT_END_CHAR = "\ue001"
 
+_THREAD_CACHE_KEY_PREFIX = "federated_slack_thread"
+_USER_NAME_CACHE_KEY_PREFIX = "federated_slack_user_name"
+_USER_MENTION_PATTERN = re.compile(r"<@([A-Z0-9]+)>")
+
 
 def build_slack_queries(query: SearchQuery, llm: LLM) -> list[str]:
     # get time filter
@@ -187,26 +199,13 @@ def merge_slack_messages(
     return merged_messages, docid_to_message
 
 
-def get_contextualized_thread_text(message: SlackMessage, access_token: str) -> str:
-    """
-    Retrieves the initial thread message as well as the text following the message
-    and combines them into a single string. If the slack query fails, returns the
-    original message text.
+def _thread_cache_key(channel_id: str, thread_id: str) -> str:
+    return f"{_THREAD_CACHE_KEY_PREFIX}:{channel_id}:{thread_id}"
 
-    The idea is that the message (the one that actually matched the search), the
-    initial thread message, and the replies to the message are important in answering
-    the user's query.
-    """
-    channel_id = message.channel_id
-    thread_id = message.thread_id
-    message_id = message.message_id
-
-    # if it's not a thread, return the message text
-    if thread_id is None:
-        return message.text
 
-    # get the thread messages
-    slack_client = WebClient(token=access_token)
+def _fetch_thread_messages(
+    slack_client: WebClient, channel_id: str, thread_id: str
+) -> list[dict[str, str]] | None:
     try:
         response = slack_client.conversations_replies(
             channel=channel_id,
@@ -215,16 +214,121 @@ def get_contextualized_thread_text(message: SlackMessage, access_token: str) ->
         response.validate()
         messages: list[dict[str, Any]] = response.get("messages", [])
     except SlackApiError as e:
-        logger.error(f"Slack API error in get_contextualized_thread_text: {e}")
+        logger.error(f"Slack API error in _fetch_thread_messages: {e}")
+        return None
+
+    # only keep what is needed to build the thread text
+    return [
+        {
+            "ts": msg.get("ts", ""),
+            "user": msg.get("user", ""),
+            "text": msg.get("text", ""),
+        }
+        for msg in messages
+    ]
+
+
+def get_thread_messages(
+    slack_messages: list[SlackMessage], slack_client: WebClient
+) -> dict[tuple[str, str], list[dict[str, str]]]:
+    """
+    Retrieves the messages of the threads the slack messages are in, keyed by
+    (channel id, thread id). Each thread is only fetched once, even if several of
+    its messages matched the search.
+
+    Threads are cached for SLACK_FEDERATED_THREAD_CACHE_TTL along with the ts of
+    their latest reply. Search results don't tell the latest reply of their thread,
+    so a cached thread is only used if it already contains the matched message;
+    replies newer than the matched message are picked up once the cache expires.
+    Threads that could not be fetched are missing from the result.
+    """
+    # the latest matched message of each thread
+    thread_keys: dict[tuple[str, str], str] = {}
+    for message in slack_messages:
+        if message.thread_id is None:
+            continue
+        thread_key = (message.channel_id, message.thread_id)
+        latest_message_id = thread_keys.get(thread_key)
+        if latest_message_id is None or float(message.message_id) > float(
+            latest_message_id
+        ):
+            thread_keys[thread_key] = message.message_id
+    if not thread_keys:
+        return {}
+
+    threads: dict[tuple[str, str], list[dict[str, str]]] = {}
+    redis_client = get_redis_client()
+    cache_keys = [_thread_cache_key(*thread_key) for thread_key in thread_keys]
+    cached_threads = get_cached_values(redis_client, cache_keys, "slack threads")
+    for (thread_key, message_id), cached_thread in zip(
+        thread_keys.items(), cached_threads
+    ):
+        if cached_thread is None:
+            continue
+        thread = json.loads(cached_thread)
+        if float(message_id) <= float(thread["latest_reply"]):
+            threads[thread_key] = thread["messages"]
+
+    uncached_thread_keys = [
+        thread_key for thread_key in thread_keys if thread_key not in threads
+    ]
+    fetched_threads: list[list[dict[str, str]] | None] = (
+        run_functions_tuples_in_parallel(
+            [
+                (_fetch_thread_messages, (slack_client, *thread_key))
+                for thread_key in uncached_thread_keys
+            ]
+        )
+    )
+
+    threads_to_cache: dict[str, str] = {}
+    for thread_key, thread_messages in zip(uncached_thread_keys, fetched_threads):
+        if thread_messages is None:
+            continue
+        threads[thread_key] = thread_messages
+        latest_reply = max(
+            (float(msg["ts"]) for msg in thread_messages if msg["ts"]),
+            default=float(thread_key[1]),
+        )
+        threads_to_cache[_thread_cache_key(*thread_key)] = json.dumps(
+            {"latest_reply": latest_reply, "messages": thread_messages}
+        )
+    cache_values(
+        redis_client,
+        threads_to_cache,
+        SLACK_FEDERATED_THREAD_CACHE_TTL,
+        "slack threads",
+    )
+
+    return threads
+
+
+def get_contextualized_thread_text(
+    message: SlackMessage, thread_messages: list[dict[str, str]] | None
+) -> str:
+    """
+    Combines the initial thread message as well as the text following the message
+    into a single string. If the thread could not be retrieved, returns the
+    original message text. Senders are left as <@user id> mentions.
+
+    The idea is that the message (the one that actually matched the search), the
+    initial thread message, and the replies to the message are important in answering
+    the user's query.
+    """
+    thread_id = message.thread_id
+    message_id = message.message_id
+
+    # if it's not a thread, return the message text
+    if thread_id is None or thread_messages is None:
         return message.text
 
     # make sure we didn't get an empty response or a single message (not a thread)
-    if len(messages) <= 1:
+    if len(thread_messages) <= 1:
         return message.text
 
     # add the initial thread message
-    msg_text = messages[0].get("text", "")
-    msg_sender = messages[0].get("user", "")
+    msg_text = thread_messages[0].get("text", "")
+    msg_sender = thread_messages[0].get("user", "")
     thread_text = f"<@{msg_sender}>: {msg_text}"
 
     # add the message (unless it's the initial message)
@@ -233,20 +337,21 @@ def get_contextualized_thread_text(message: SlackMessage, access_token: str) ->
         message_id_idx = 0
     else:
         message_id_idx = next(
-            (i for i, msg in enumerate(messages) if msg.get("ts") == message_id), 0
+            (i for i, msg in enumerate(thread_messages) if msg.get("ts") == message_id),
+            0,
         )
         if not message_id_idx:
             return thread_text
 
         # add the message
         thread_text += "\n..." if message_id_idx > 1 else ""
-        msg_text = messages[message_id_idx].get("text", "")
-        msg_sender = messages[message_id_idx].get("user", "")
+        msg_text = thread_messages[message_id_idx].get("text", "")
+        msg_sender = thread_messages[message_id_idx].get("user", "")
         thread_text += f"\n<@{msg_sender}>: {msg_text}"
 
     # add the following replies to the thread text
     len_replies = 0
-    for msg in messages[message_id_idx + 1 :]:
+    for msg in thread_messages[message_id_idx + 1 :]:
         msg_text = msg.get("text", "")
         msg_sender = msg.get("user", "")
         reply = f"\n\n<@{msg_sender}>: {msg_text}"
@@ -258,24 +363,119 @@ def get_contextualized_thread_text(message: SlackMessage, access_token: str) ->
             thread_text += "\n..."
             break
 
-    # replace user ids with names in the thread text
-    userids: set[str] = set(re.findall(r"<@([A-Z0-9]+)>", thread_text))
-    for userid in userids:
-        try:
-            response = slack_client.users_profile_get(user=userid)
-            response.validate()
-            profile: dict[str, Any] = response.get("profile", {})
-            name: str | None = profile.get("real_name") or profile.get("email")
-        except SlackApiError as e:
-            logger.error(f"Slack API error in get_contextualized_thread_text: {e}")
-            continue
-        if not name:
-            continue
-        thread_text = thread_text.replace(f"<@{userid}>", name)
-
     return thread_text
 
 
+def _fetch_user_name(slack_client: WebClient, user_id: str) -> str | None:
+    try:
+        response = slack_client.users_profile_get(user=user_id)
+        response.validate()
+        profile: dict[str, Any] = response.get("profile", {})
+        return profile.get("real_name") or profile.get("email")
+    except SlackApiError as e:
+        logger.error(f"Slack API error in _fetch_user_name: {e}")
+        return None
+
+
+def get_user_names(user_ids: set[str], slack_client: WebClient) -> dict[str, str]:
+    """Names of the slack users, cached for SLACK_FEDERATED_USER_NAME_CACHE_TTL.
+    Users whose name could not be retrieved are missing from the result."""
+    if not user_ids:
+        return {}
+
+    sorted_user_ids = sorted(user_ids)
+    names: dict[str, str] = {}
+    redis_client = get_redis_client()
+    cached_names = get_cached_values(
+        redis_client,
+        [f"{_USER_NAME_CACHE_KEY_PREFIX}:{user_id}" for user_id in sorted_user_ids],
+        "slack user names",
+    )
+    for user_id, cached_name in zip(sorted_user_ids, cached_names):
+        if cached_name is not None:
+            names[user_id] = cached_name
+
+    uncached_user_ids = [user_id for user_id in sorted_user_ids if user_id not in names]
+    fetched_names: list[str | None] = run_functions_tuples_in_parallel(
+        [(_fetch_user_name, (slack_client, user_id)) for user_id in uncached_user_ids]
+    )
+    names_to_cache = {
+        user_id: name for user_id, name in zip(uncached_user_ids, fetched_names) if name
+    }
+    names.update(names_to_cache)
+    cache_values(
+        redis_client,
+        {
+            f"{_USER_NAME_CACHE_KEY_PREFIX}:{user_id}": name
+            for user_id, name in names_to_cache.items()
+        },
+        SLACK_FEDERATED_USER_NAME_CACHE_TTL,
+        "slack user names",
+    )
+
+    return names
+
+
+def contextualize_slack_messages(
+    slack_messages: list[SlackMessage], access_token: str
+) -> None:
+    """Replaces the text of the slack messages with the text of their thread (see
+    get_contextualized_thread_text), with user mentions replaced by the user names"""
+    slack_client = WebClient(token=access_token)
+    threads = get_thread_messages(slack_messages, slack_client)
+    thread_texts = [
+        get_contextualized_thread_text(
+            slack_message,
+            (
+                threads.get((slack_message.channel_id, slack_message.thread_id))
+                if slack_message.thread_id is not None
+                else None
+            ),
+        )
+        for slack_message in slack_messages
+    ]
+
+    # replace user ids with names in the thread texts
+    user_ids: set[str] = set()
+    for thread_text in thread_texts:
+        user_ids.update(_USER_MENTION_PATTERN.findall(thread_text))
+    names = get_user_names(user_ids, slack_client)
+
+    for slack_message, thread_text in zip(slack_messages, thread_texts):
+        slack_message.text = _USER_MENTION_PATTERN.sub(
+            lambda match: names.get(match.group(1), match.group(0)), thread_text
+        )
+
+
+@lru_cache(maxsize=8)
+def _get_chunker(
+    model_name: str,
+    provider_type: EmbeddingProvider | None,
+    enable_multipass: bool,
+    enable_large_chunks: bool,
+    enable_contextual_rag: bool,
+) -> Chunker:
+    """Chunkers are stateless between calls, so one is shared per search settings"""
+    return Chunker(
+        tokenizer=get_tokenizer(model_name=model_name, provider_type=provider_type),
+        enable_multipass=enable_multipass,
+        enable_large_chunks=enable_large_chunks,
+        enable_contextual_rag=enable_contextual_rag,
+    )
+
+
+def build_highlight_pattern(highlighted_texts: set[str]) -> re.Pattern[str] | None:
+    """A single pattern matching any of the highlighted texts, so that a chunk is
+    highlighted in one pass. Longer texts come first so that they win over the
+    texts they contain."""
+    sorted_highlighted_texts = sorted(
+        (text for text in highlighted_texts if text), key=len, reverse=True
+    )
+    if not sorted_highlighted_texts:
+        return None
+    return re.compile("|".join(map(re.escape, sorted_highlighted_texts)))
+
+
 def convert_slack_score(slack_score: float) -> float:
     """
     Convert slack score to a score between 0 and 1.
@@ -308,20 +508,14 @@ def slack_retrieval(
         return []
 
     # contextualize the slack messages
-    thread_texts: list[str] = run_functions_tuples_in_parallel(
-        [
-            (get_contextualized_thread_text, (slack_message, access_token))
-            for slack_message in slack_messages
-        ]
-    )
-    for slack_message, thread_text in zip(slack_messages, thread_texts):
-        slack_message.text = thread_text
+    contextualize_slack_messages(slack_messages, access_token)
 
-    # get the highlighted texts from shortest to longest
     highlighted_texts: set[str] = set()
     for slack_message in slack_messages:
         highlighted_texts.update(slack_message.highlighted_texts)
-    sorted_highlighted_texts = sorted(highlighted_texts, key=len)
+    highlight_pattern = build_highlight_pattern(highlighted_texts)
+    if highlight_pattern is None:
+        return []
 
     # convert slack messages to index documents
     index_docs: list[IndexingDocument] = []
@@ -345,18 +539,15 @@ def slack_retrieval(
     # chunk index docs into doc aware chunks
     # a single index doc can get split into multiple chunks
     search_settings = get_current_search_settings(db_session)
-    embedder = DefaultIndexingEmbedder.from_db_search_settings(
-        search_settings=search_settings
-    )
     multipass_config = get_multipass_config(search_settings)
-    enable_contextual_rag = (
-        search_settings.enable_contextual_rag or ENABLE_CONTEXTUAL_RAG
-    )
-    chunker = Chunker(
-        tokenizer=embedder.embedding_model.tokenizer,
+    chunker = _get_chunker(
+        model_name=search_settings.model_name,
+        provider_type=search_settings.provider_type,
         enable_multipass=multipass_config.multipass_indexing,
         enable_large_chunks=multipass_config.enable_large_chunks,
-        enable_contextual_rag=enable_contextual_rag,
+        enable_contextual_rag=(
+            search_settings.enable_contextual_rag or ENABLE_CONTEXTUAL_RAG
+        ),
     )
     chunks = chunker.chunk(index_docs)
 
@@ -364,14 +555,12 @@ def slack_retrieval(
     relevant_chunks: list[DocAwareChunk] = []
     chunkid_to_match_highlight: dict[str, str] = {}
     for chunk in chunks:
-        match_highlight = chunk.content
-        for highlight in sorted_highlighted_texts:  # faster than re sub
-            match_highlight = match_highlight.replace(
-                highlight, f"<hi>{highlight}</hi>"
-            )
+        match_highlight, num_highlights = highlight_pattern.subn(
+            r"<hi>\g<0></hi>", chunk.content
+        )
 
-        # if nothing got replaced, the chunk is irrelevant
-        if len(match_highlight) == len(chunk.content):
+        # if nothing got highlighted, the chunk is irrelevant
+        if not num_highlights:
             continue
 
         chunk_id = f"{chunk.source_document.id}__{chunk.chunk_id}"
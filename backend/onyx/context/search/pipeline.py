@@ -13,6 +13,8 @@ from onyx.chat.prune_and_merge import ChunkRange
 from onyx.chat.prune_and_merge import merge_chunk_intervals
 from onyx.chat.prune_and_merge import prune_and_merge_sections
 from onyx.configs.chat_configs import DISABLE_LLM_DOC_RELEVANCE
+from onyx.configs.chat_configs import ENABLE_SPECULATIVE_RETRIEVAL
+from onyx.configs.chat_configs import SPECULATIVE_RETRIEVAL_HITS_MULTIPLIER
 from onyx.context.search.enums import LLMEvaluationType
 from onyx.context.search.enums import QueryFlow
 from onyx.context.search.enums import SearchType
@@ -25,12 +27,19 @@ from onyx.context.search.models import SearchQuery
 from onyx.context.search.models import SearchRequest
 from onyx.context.search.postprocessing.postprocessing import cleanup_chunks
 from onyx.context.search.postprocessing.postprocessing import search_postprocessing
+from onyx.context.search.preprocessing.preprocessing import get_llm_filter_extraction
 from onyx.context.search.preprocessing.preprocessing import retrieval_preprocessing
+from onyx.context.search.retrieval.search_runner import report_retrieval_metrics
 from onyx.context.search.retrieval.search_runner import (
     retrieve_chunks,
 )
+from onyx.context.search.retrieval.speculative_retrieval import (
+    select_speculative_chunks,
+)
+from onyx.context.search.utils import get_query_embedding
 from onyx.context.search.utils import inference_section_from_chunks
 from onyx.context.search.utils import relevant_sections_to_indices
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.models import User
 from onyx.db.search_settings import get_current_search_settings
 from onyx.document_index.factory import get_default_document_index
@@ -38,10 +47,14 @@ from onyx.document_index.interfaces import VespaChunkRequest
 from onyx.llm.interfaces import LLM
 from onyx.secondary_llm_flows.agentic_evaluation import evaluate_inference_section
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorTask
 from onyx.utils.threadpool_concurrency import FunctionCall
 from onyx.utils.threadpool_concurrency import run_functions_in_parallel
+from onyx.utils.threadpool_concurrency import run_in_background
+from onyx.utils.threadpool_concurrency import wait_on_background
 from onyx.utils.timing import log_function_time
 from onyx.utils.variable_functionality import fetch_ee_implementation_or_noop
+from shared_configs.model_server_models import Embedding
 
 logger = setup_logger()
 
@@ -89,6 +102,12 @@ class SearchPipeline:
         self._search_query: SearchQuery | None = None
         self._predicted_search_type: SearchType | None = None
 
+        # Retrieval started without the LLM extracted filters, while they are extracted
+        self._speculative_query: SearchQuery | None = None
+        self._speculative_retrieval_thread: (
+            ExecutorTask[tuple[Embedding, list[InferenceChunk]]] | None
+        ) = None
+
         # Initial document index retrieval chunks
         self._retrieved_chunks: list[InferenceChunk] | None = None
         # Another call made to the document index to get surrounding sections
@@ -112,9 +131,58 @@ class SearchPipeline:
 
     """Pre-processing"""
 
+    def _run_speculative_retrieval(
+        self, speculative_query: SearchQuery
+    ) -> tuple[Embedding, list[InferenceChunk]]:
+        # runs alongside the preprocessing, which is using the pipeline's session
+        with get_session_with_current_tenant() as db_session:
+            query_embedding = (
+                speculative_query.precomputed_query_embedding
+                or get_query_embedding(speculative_query.query, db_session)
+            )
+            speculative_chunks = retrieve_chunks(
+                query=speculative_query.model_copy(
+                    update={
+                        "precomputed_query_embedding": query_embedding,
+                        "num_hits": speculative_query.num_hits
+                        * SPECULATIVE_RETRIEVAL_HITS_MULTIPLIER,
+                    }
+                ),
+                user_id=self.user.id if self.user else None,
+                document_index=self.document_index,
+                db_session=db_session,
+            )
+        return query_embedding, speculative_chunks
+
     def _run_preprocessing(self) -> None:
+        search_request = self.search_request
+        if ENABLE_SPECULATIVE_RETRIEVAL and any(
+            get_llm_filter_extraction(search_request)
+        ):
+            # embed the query and retrieve without the filters the LLM is about to
+            # extract, instead of waiting for them
+            self._speculative_query = retrieval_preprocessing(
+                search_request=search_request,
+                user=self.user,
+                llm=self.llm,
+                skip_query_analysis=self.skip_query_analysis,
+                db_session=self.db_session,
+                bypass_acl=self.bypass_acl,
+                skip_llm_filter_extraction=True,
+            )
+            self._speculative_retrieval_thread = run_in_background(
+                self._run_speculative_retrieval, self._speculative_query
+            )
+            # the query analysis already ran for the speculative query
+            search_request = search_request.model_copy(
+                update={
+                    "precomputed_is_keyword": self._speculative_query.search_type
+                    == SearchType.KEYWORD
+                }
+            )
+
         final_search_query = retrieval_preprocessing(
-            search_request=self.search_request,
+            search_request=search_request,
             user=self.user,
             llm=self.llm,
             skip_query_analysis=self.skip_query_analysis,
@@ -155,9 +223,40 @@ class SearchPipeline:
         if self._retrieved_chunks is not None:
             return self._retrieved_chunks
 
+        query = self.search_query
+        if (
+            self._speculative_query is not None
+            and self._speculative_retrieval_thread is not None
+        ):
+            try:
+                query_embedding, speculative_chunks = wait_on_background(
+                    self._speculative_retrieval_thread
+                )
+            except Exception:
+                logger.exception(
+                    "Speculative retrieval failed, retrieving with the final query"
+                )
+            else:
+                chunks = select_speculative_chunks(
+                    speculative_query=self._speculative_query,
+                    final_query=query,
+                    speculative_chunks=speculative_chunks,
+                )
+                if chunks is not None:
+                    report_retrieval_metrics(
+                        query, chunks, self.retrieval_metrics_callback
+                    )
+                    self._retrieved_chunks = chunks
+                    return chunks
+
+                # the query doesn't need to be embedded again
+                query = query.model_copy(
+                    update={"precomputed_query_embedding": query_embedding}
+                )
+
         # These chunks do not include large chunks and have been deduped
         self._retrieved_chunks = retrieve_chunks(
-            query=self.search_query,
+            query=query,
             user_id=self.user.id if self.user else None,
             document_index=self.document_index,
             db_session=self.db_session,
@@ -448,16 +547,8 @@ class SearchPipeline:
                 raise ValueError(
                     "Basic search evaluation operation called while DISABLE_LLM_DOC_RELEVANCE is enabled."
                 )
-            # NOTE: final_context_sections must be accessed before accessing self._postprocessing_generator
-            # since the property sets the generator. DO NOT REMOVE.
-            _ = self.final_context_sections
-
-            self._section_relevance = next(
-                cast(
-                    Iterator[list[SectionRelevancePiece]],
-                    self._postprocessing_generator,
-                )
-            )
+            for _ in self.stream_section_relevance():
+                pass
 
         else:
             # All other cases should have been handled above
@@ -467,6 +558,31 @@ class SearchPipeline:
 
         return self._section_relevance
 
+    def stream_section_relevance(
+        self,
+    ) -> Iterator[list[SectionRelevancePiece] | None]:
+        """Yields the relevance of the final sections every time the LLM evaluated
+        some more of them, the sections that weren't evaluated yet are not relevant.
+        The last one is the same as section_relevance."""
+        if (
+            self._section_relevance is not None
+            or self.search_query.evaluation_type != LLMEvaluationType.BASIC
+            or DISABLE_LLM_DOC_RELEVANCE
+        ):
+            yield self.section_relevance
+            return
+
+        # NOTE: final_context_sections must be accessed before accessing self._postprocessing_generator
+        # since the property sets the generator. DO NOT REMOVE.
+        _ = self.final_context_sections
+
+        section_relevance: list[SectionRelevancePiece] | None = None
+        for section_relevance in cast(
+            Iterator[list[SectionRelevancePiece]], self._postprocessing_generator
+        ):
+            yield section_relevance
+        self._section_relevance = section_relevance
+
     @property
     def section_relevance_list(self) -> list[bool]:
         return section_relevance_list_impl(
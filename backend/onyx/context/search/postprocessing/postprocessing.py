@@ -12,6 +12,7 @@ from onyx.chat.models import SectionRelevancePiece
 from onyx.configs.app_configs import BLURB_SIZE
 from onyx.configs.app_configs import IMAGE_ANALYSIS_SYSTEM_PROMPT
 from onyx.configs.chat_configs import DISABLE_LLM_DOC_RELEVANCE
+from onyx.configs.chat_configs import LLM_DOC_RELEVANCE_FALLBACK_MIN_SCORE
 from onyx.configs.constants import RETURN_SEPARATOR
 from onyx.configs.llm_configs import get_search_time_image_analysis_enabled
 from onyx.configs.model_configs import CROSS_ENCODER_RANGE_MAX
@@ -32,8 +33,9 @@ from onyx.file_store.file_store import get_default_file_store
 from onyx.llm.interfaces import LLM
 from onyx.llm.utils import message_to_string
 from onyx.natural_language_processing.search_nlp_models import RerankingModel
-from onyx.secondary_llm_flows.chunk_usefulness import llm_batch_eval_sections
+from onyx.secondary_llm_flows.chunk_usefulness import stream_llm_section_usefulness
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorName
 from onyx.utils.threadpool_concurrency import FunctionCall
 from onyx.utils.threadpool_concurrency import run_functions_in_parallel
 from onyx.utils.timing import log_function_time
@@ -353,6 +355,75 @@ def rerank_sections(
     return ordered_sections
 
 
+def _fall_back_to_ranking(
+    sections: list[InferenceSection], usefulness: list[bool | None]
+) -> list[bool]:
+    """The sections that were not evaluated within the latency budget fall back to the
+    (re)ranking: they are relevant if they scored at least as well as a section the
+    LLM approved. If the LLM approved none of the sections it evaluated, the ones
+    scoring at least LLM_DOC_RELEVANCE_FALLBACK_MIN_SCORE are, and if it did not get to
+    evaluate any section at all, all of them are."""
+    if all(useful is None for useful in usefulness):
+        return [True] * len(sections)
+
+    approved_scores = [
+        section.center_chunk.score or 0
+        for section, useful in zip(sections, usefulness)
+        if useful
+    ]
+    min_score = (
+        min(approved_scores)
+        if approved_scores
+        else LLM_DOC_RELEVANCE_FALLBACK_MIN_SCORE
+    )
+    return [
+        useful if useful is not None else (section.center_chunk.score or 0) >= min_score
+        for section, useful in zip(sections, usefulness)
+    ]
+
+
+def stream_section_usefulness(
+    query: SearchQuery,
+    sections_to_filter: list[InferenceSection],
+    llm: LLM,
+    # For cost saving, we may turn this on
+    use_chunk: bool = False,
+) -> Iterator[list[bool | None]]:
+    """Starts the LLM evaluation of whether each section is relevant to the query right
+    away. Yields the verdicts so far every time a batch of sections is evaluated, None
+    for the sections that weren't evaluated yet. The last list has a verdict for every
+    section, see _fall_back_to_ranking for the ones that weren't evaluated in time."""
+    contents = [
+        section.center_chunk.content if use_chunk else section.combined_content
+        for section in sections_to_filter
+    ]
+    metadata_list = [section.center_chunk.metadata for section in sections_to_filter]
+    titles = [
+        section.center_chunk.semantic_identifier for section in sections_to_filter
+    ]
+
+    verdicts = stream_llm_section_usefulness(
+        query=query.query,
+        section_contents=contents,
+        llm=llm,
+        titles=titles,
+        metadata_list=metadata_list,
+    )
+
+    def yield_usefulness() -> Iterator[list[bool | None]]:
+        usefulness: list[bool | None] = [None] * len(sections_to_filter)
+        for index, useful in verdicts:
+            usefulness[index] = useful
+            yield list(usefulness)
+
+        final_usefulness: list[bool | None] = list(
+            _fall_back_to_ranking(sections_to_filter, usefulness)
+        )
+        yield final_usefulness
+
+    return yield_usefulness()
+
+
 @log_function_time(print_only=True)
 def filter_sections(
     query: SearchQuery,
@@ -374,22 +445,11 @@ def filter_sections(
 
     sections_to_filter = sections_to_filter[: query.max_llm_filter_sections]
 
-    contents = [
-        section.center_chunk.content if use_chunk else section.combined_content
-        for section in sections_to_filter
-    ]
-    metadata_list = [section.center_chunk.metadata for section in sections_to_filter]
-    titles = [
-        section.center_chunk.semantic_identifier for section in sections_to_filter
-    ]
-
-    llm_chunk_selection = llm_batch_eval_sections(
-        query=query.query,
-        section_contents=contents,
-        llm=llm,
-        titles=titles,
-        metadata_list=metadata_list,
-    )
+    llm_chunk_selection: list[bool | None] = []
+    for llm_chunk_selection in stream_section_usefulness(
+        query=query, sections_to_filter=sections_to_filter, llm=llm, use_chunk=use_chunk
+    ):
+        pass
 
     return [
         section
@@ -398,6 +458,20 @@ def filter_sections(
     ]
 
 
+def _section_relevance_pieces(
+    sections: list[InferenceSection], relevant_section_ids: set[str]
+) -> list[SectionRelevancePiece]:
+    return [
+        SectionRelevancePiece(
+            document_id=section.center_chunk.document_id,
+            chunk_id=section.center_chunk.chunk_id,
+            relevant=section.center_chunk.unique_id in relevant_section_ids,
+            content="",
+        )
+        for section in sections
+    ]
+
+
 def search_postprocessing(
     search_query: SearchQuery,
     retrieved_sections: list[InferenceSection],
@@ -439,29 +513,23 @@ def search_postprocessing(
         yield retrieved_sections
         sections_yielded = True
 
-    llm_filter_task_id = None
+    section_usefulness: Iterator[list[bool | None]] | None = None
+    sections_to_filter = retrieved_sections[: search_query.max_llm_filter_sections]
     # Only add LLM filtering if not in SKIP mode and if LLM doc relevance is not disabled
     if not DISABLE_LLM_DOC_RELEVANCE and search_query.evaluation_type in [
         LLMEvaluationType.BASIC,
         LLMEvaluationType.UNSPECIFIED,
     ]:
-        logger.info("Adding LLM filtering task for document relevance evaluation")
-        post_processing_tasks.append(
-            FunctionCall(
-                filter_sections,
-                (
-                    search_query,
-                    retrieved_sections[: search_query.max_llm_filter_sections],
-                    llm,
-                ),
-            )
+        logger.info("Starting LLM filtering for document relevance evaluation")
+        # runs on the LLM executor alongside the reranking below
+        section_usefulness = stream_section_usefulness(
+            search_query, sections_to_filter, llm
         )
-        llm_filter_task_id = post_processing_tasks[-1].result_id
     elif DISABLE_LLM_DOC_RELEVANCE:
         logger.info("Skipping LLM filtering task because LLM doc relevance is disabled")
 
     post_processing_results = (
-        run_functions_in_parallel(post_processing_tasks)
+        run_functions_in_parallel(post_processing_tasks, executor=ExecutorName.SEARCH)
         if post_processing_tasks
         else {}
     )
@@ -485,21 +553,19 @@ def search_postprocessing(
 
             yield reranked_sections
 
-    llm_selected_section_ids = (
-        [
-            section.center_chunk.unique_id
-            for section in post_processing_results.get(str(llm_filter_task_id), [])
-        ]
-        if llm_filter_task_id
-        else []
-    )
+    # the relevance is yielded every time the LLM evaluated more of the sections,
+    # the last one is final
+    final_sections = reranked_sections or retrieved_sections
+    if section_usefulness is None:
+        yield _section_relevance_pieces(final_sections, set())
+        return
 
-    yield [
-        SectionRelevancePiece(
-            document_id=section.center_chunk.document_id,
-            chunk_id=section.center_chunk.chunk_id,
-            relevant=section.center_chunk.unique_id in llm_selected_section_ids,
-            content="",
+    for usefulness in section_usefulness:
+        yield _section_relevance_pieces(
+            final_sections,
+            {
+                section.center_chunk.unique_id
+                for section, useful in zip(sections_to_filter, usefulness)
+                if useful
+            },
         )
-        for section in (reranked_sections or retrieved_sections)
-    ]
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy.orm import Session
 
 from onyx.configs.chat_configs import BASE_RECENCY_DECAY
@@ -30,6 +32,7 @@ from onyx.natural_language_processing.search_nlp_models import QueryAnalysisMode
 from onyx.secondary_llm_flows.source_filter import extract_source_filter
 from onyx.secondary_llm_flows.time_filter import extract_time_filter
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorName
 from onyx.utils.threadpool_concurrency import FunctionCall
 from onyx.utils.threadpool_concurrency import run_functions_in_parallel
 from onyx.utils.timing import log_function_time
@@ -44,37 +47,31 @@ def query_analysis(query: str) -> tuple[bool, list[str]]:
     return analysis_model.predict(query)
 
 
-@log_function_time(print_only=True)
-def retrieval_preprocessing(
-    search_request: SearchRequest,
-    user: User | None,
-    llm: LLM,
-    skip_query_analysis: bool,
-    db_session: Session,
-    favor_recent_decay_multiplier: float = FAVOR_RECENT_DECAY_MULTIPLIER,
-    base_recency_decay: float = BASE_RECENCY_DECAY,
-    bypass_acl: bool = False,
-) -> SearchQuery:
-    """Logic is as follows:
-    Any global disables apply first
-    Then any filters or settings as part of the query are used
-    Then defaults to Persona settings if not specified by the query
-    """
-    query = search_request.query
-    limit = search_request.limit
-    offset = search_request.offset
-    persona = search_request.persona
-
+def _get_preset_filters(search_request: SearchRequest) -> BaseFilters:
     preset_filters = search_request.human_selected_filters or BaseFilters()
+    persona = search_request.persona
     if persona and persona.document_sets and preset_filters.document_set is None:
         preset_filters.document_set = [
             document_set.name for document_set in persona.document_sets
         ]
+    return preset_filters
+
 
+def _get_preset_time_filter(
+    search_request: SearchRequest, preset_filters: BaseFilters
+) -> datetime | None:
     time_filter = preset_filters.time_cutoff
-    if time_filter is None and persona:
-        time_filter = persona.search_start_date
+    if time_filter is None and search_request.persona:
+        time_filter = search_request.persona.search_start_date
+    return time_filter
 
+
+def get_llm_filter_extraction(search_request: SearchRequest) -> tuple[bool, bool]:
+    """Whether the time filter and the source filter of the query are extracted by
+    the LLM during the retrieval preprocessing"""
+    persona = search_request.persona
+    preset_filters = _get_preset_filters(search_request)
+    time_filter = _get_preset_time_filter(search_request, preset_filters)
     source_filter = preset_filters.source_type
 
     auto_detect_time_filter = True
@@ -101,6 +98,43 @@ def retrieval_preprocessing(
         logger.debug("Not extract source filter - already provided")
         auto_detect_source_filter = False
 
+    return auto_detect_time_filter, auto_detect_source_filter
+
+
+@log_function_time(print_only=True)
+def retrieval_preprocessing(
+    search_request: SearchRequest,
+    user: User | None,
+    llm: LLM,
+    skip_query_analysis: bool,
+    db_session: Session,
+    favor_recent_decay_multiplier: float = FAVOR_RECENT_DECAY_MULTIPLIER,
+    base_recency_decay: float = BASE_RECENCY_DECAY,
+    bypass_acl: bool = False,
+    skip_llm_filter_extraction: bool = False,
+) -> SearchQuery:
+    """Logic is as follows:
+    Any global disables apply first
+    Then any filters or settings as part of the query are used
+    Then defaults to Persona settings if not specified by the query
+
+    `skip_llm_filter_extraction` builds the query with only the filters known
+    without the LLM (used for speculative retrieval).
+    """
+    query = search_request.query
+    limit = search_request.limit
+    offset = search_request.offset
+    persona = search_request.persona
+
+    preset_filters = _get_preset_filters(search_request)
+    time_filter = _get_preset_time_filter(search_request, preset_filters)
+
+    auto_detect_time_filter, auto_detect_source_filter = (
+        (False, False)
+        if skip_llm_filter_extraction
+        else get_llm_filter_extraction(search_request)
+    )
+
     # Based on the query figure out if we should apply any hard time filters /
     # if we should bias more recent docs even more strongly
     run_time_filters = (
@@ -133,7 +167,9 @@ def retrieval_preprocessing(
         ]
         if filter_fn
     ]
-    parallel_results = run_functions_in_parallel(functions_to_run)
+    parallel_results = run_functions_in_parallel(
+        functions_to_run, executor=ExecutorName.LLM
+    )
 
     predicted_time_cutoff, predicted_favor_recent = (
         parallel_results[run_time_filters.result_id]
@@ -32,9 +32,10 @@ from onyx.federated_connectors.federated_retrieval import (
 )
 from onyx.secondary_llm_flows.query_expansion import multilingual_query_expansion
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorName
+from onyx.utils.threadpool_concurrency import ExecutorTask
+from onyx.utils.threadpool_concurrency import get_executor
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
-from onyx.utils.threadpool_concurrency import run_in_background
-from onyx.utils.threadpool_concurrency import TimeoutThread
 from onyx.utils.threadpool_concurrency import wait_on_background
 from onyx.utils.timing import log_function_time
 from shared_configs.model_server_models import Embedding
@@ -132,13 +133,14 @@ def doc_index_retrieval(
         query.query, db_session
     )
 
-    keyword_embeddings_thread: TimeoutThread[list[Embedding]] | None = None
-    semantic_embeddings_thread: TimeoutThread[list[Embedding]] | None = None
+    search_executor = get_executor(ExecutorName.SEARCH)
+    keyword_embeddings_thread: ExecutorTask[list[Embedding]] | None = None
+    semantic_embeddings_thread: ExecutorTask[list[Embedding]] | None = None
     top_base_chunks_standard_ranking_thread: (
-        TimeoutThread[list[InferenceChunkUncleaned]] | None
+        ExecutorTask[list[InferenceChunkUncleaned]] | None
     ) = None
 
-    top_semantic_chunks_thread: TimeoutThread[list[InferenceChunkUncleaned]] | None = (
+    top_semantic_chunks_thread: ExecutorTask[list[InferenceChunkUncleaned]] | None = (
         None
     )
 
@@ -148,7 +150,7 @@ def doc_index_retrieval(
     top_semantic_chunks: list[InferenceChunkUncleaned] | None = None
 
     # original retrieveal method
-    top_base_chunks_standard_ranking_thread = run_in_background(
+    top_base_chunks_standard_ranking_thread = search_executor.submit(
         document_index.hybrid_retrieval,
         query.query,
         query_embedding,
@@ -167,14 +169,14 @@ def doc_index_retrieval(
         and query.expanded_queries.semantic_expansions
     ):
 
-        keyword_embeddings_thread = run_in_background(
+        keyword_embeddings_thread = search_executor.submit(
             get_query_embeddings,
             query.expanded_queries.keywords_expansions,
             db_session,
         )
 
         if query.search_type == SearchType.SEMANTIC:
-            semantic_embeddings_thread = run_in_background(
+            semantic_embeddings_thread = search_executor.submit(
                 get_query_embeddings,
                 query.expanded_queries.semantic_expansions,
                 db_session,
@@ -189,7 +191,7 @@ def doc_index_retrieval(
         keyword_embeddings = [query_embedding]
 
         # Note: we generally prepped earlier for multiple expansions, but for now we only use one.
-        top_keyword_chunks_thread = run_in_background(
+        top_keyword_chunks_thread = search_executor.submit(
             document_index.hybrid_retrieval,
             query.expanded_queries.keywords_expansions[0],
             keyword_embeddings[0],
@@ -205,7 +207,7 @@ def doc_index_retrieval(
         if query.search_type == SearchType.SEMANTIC:
             assert semantic_embeddings is not None
 
-            top_semantic_chunks_thread = run_in_background(
+            top_semantic_chunks_thread = search_executor.submit(
                 document_index.hybrid_retrieval,
                 query.expanded_queries.semantic_expansions[0],
                 semantic_embeddings[0],
@@ -390,7 +392,9 @@ def retrieve_chunks(
                 (doc_index_retrieval, (q_copy, document_index, db_session))
             )
 
-    parallel_search_results = run_functions_tuples_in_parallel(run_queries)
+    parallel_search_results = run_functions_tuples_in_parallel(
+        run_queries, executor=ExecutorName.SEARCH
+    )
     top_chunks = combine_retrieval_results(parallel_search_results)
 
     if not top_chunks:
@@ -400,25 +404,34 @@ def retrieve_chunks(
         )
         return []
 
-    if retrieval_metrics_callback is not None:
-        chunk_metrics = [
-            ChunkMetric(
-                document_id=chunk.document_id,
-                chunk_content_start=chunk.content[:MAX_METRICS_CONTENT],
-                first_link=chunk.source_links[0] if chunk.source_links else None,
-                score=chunk.score if chunk.score is not None else 0,
-            )
-            for chunk in top_chunks
-        ]
-        retrieval_metrics_callback(
-            RetrievalMetricsContainer(
-                search_type=query.search_type, metrics=chunk_metrics
-            )
-        )
-
+    report_retrieval_metrics(query, top_chunks, retrieval_metrics_callback)
     return top_chunks
 
 
+def report_retrieval_metrics(
+    query: SearchQuery,
+    top_chunks: list[InferenceChunk],
+    retrieval_metrics_callback: (
+        Callable[[RetrievalMetricsContainer], None] | None
+    ) = None,
+) -> None:
+    if retrieval_metrics_callback is None:
+        return
+
+    chunk_metrics = [
+        ChunkMetric(
+            document_id=chunk.document_id,
+            chunk_content_start=chunk.content[:MAX_METRICS_CONTENT],
+            first_link=chunk.source_links[0] if chunk.source_links else None,
+            score=chunk.score if chunk.score is not None else 0,
+        )
+        for chunk in top_chunks
+    ]
+    retrieval_metrics_callback(
+        RetrievalMetricsContainer(search_type=query.search_type, metrics=chunk_metrics)
+    )
+
+
 def inference_sections_from_ids(
     doc_identifiers: list[tuple[str, int]],
     document_index: DocumentIndex,
@@ -0,0 +1,113 @@
+"""Retrieval started before the LLM finished extracting the filters of the query.
+
+The LLM filter extraction (time cutoff, sources) is a round trip to the LLM that
+retrieval used to wait on. The speculative retrieval runs the query with only the
+filters known upfront (ACL, persona / user selected filters) and fetches more hits
+than requested. Once the LLM filters are known, they are applied to the speculative
+results if enough of them are left, otherwise the filtered retrieval is run as
+before.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from enum import Enum
+
+from prometheus_client import Counter
+
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import SearchQuery
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# same as the Vespa time filter, documents without an update time are only kept if
+# the cutoff is older than this
+_UNTIMED_DOC_CUTOFF = timedelta(days=92)
+
+
+class SpeculativeRetrievalResult(str, Enum):
+    # the LLM extracted no filters, the speculative results are used as is
+    HIT = "hit"
+    # enough speculative results were left after applying the LLM filters
+    FILTERED_HIT = "filtered_hit"
+    # the filtered retrieval had to be run
+    MISS = "miss"
+
+
+speculative_retrieval_counter = Counter(
+    "onyx_speculative_retrieval",
+    "Speculative retrievals by whether their results were used (hit, filtered_hit) "
+    "or the filtered retrieval had to be run (miss)",
+    ["result"],
+)
+
+
+def _passes_time_cutoff(chunk: InferenceChunk, cutoff: datetime) -> bool:
+    if cutoff.tzinfo is None:
+        cutoff = cutoff.replace(tzinfo=timezone.utc)
+    if chunk.updated_at is None:
+        return datetime.now(timezone.utc) - _UNTIMED_DOC_CUTOFF > cutoff
+
+    updated_at = chunk.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at >= cutoff
+
+
+def select_speculative_chunks(
+    speculative_query: SearchQuery,
+    final_query: SearchQuery,
+    speculative_chunks: list[InferenceChunk],
+) -> list[InferenceChunk] | None:
+    """The chunks the final query would have retrieved, taken from the results of the
+    speculative query. None if they can't be told from the speculative results."""
+    result = SpeculativeRetrievalResult.MISS
+    chunks: list[InferenceChunk] | None = None
+
+    final_filters = final_query.filters
+    # only the filters extracted by the LLM may differ, anything else changes the
+    # ranking (e.g. favoring recent documents), not just which chunks are kept
+    comparable = (
+        final_filters.model_copy(
+            update={
+                "source_type": speculative_query.filters.source_type,
+                "time_cutoff": speculative_query.filters.time_cutoff,
+            }
+        )
+        == speculative_query.filters
+        and final_query.search_type == speculative_query.search_type
+        and final_query.hybrid_alpha == speculative_query.hybrid_alpha
+        and final_query.recency_bias_multiplier
+        == speculative_query.recency_bias_multiplier
+        and final_query.offset == speculative_query.offset
+    )
+
+    if not comparable:
+        pass
+    elif final_filters == speculative_query.filters:
+        result = SpeculativeRetrievalResult.HIT
+        chunks = speculative_chunks[: final_query.num_hits]
+    # with an offset, the filtered results would start at a different chunk
+    elif final_query.offset == 0:
+        source_types = (
+            set(final_filters.source_type) if final_filters.source_type else None
+        )
+        filtered_chunks = [
+            chunk
+            for chunk in speculative_chunks
+            if (source_types is None or chunk.source_type in source_types)
+            and (
+                final_filters.time_cutoff is None
+                or _passes_time_cutoff(chunk, final_filters.time_cutoff)
+            )
+        ]
+        # with fewer chunks left, the filtered retrieval may find chunks that were
+        # not in the speculative results
+        if len(filtered_chunks) >= final_query.num_hits:
+            result = SpeculativeRetrievalResult.FILTERED_HIT
+            chunks = filtered_chunks[: final_query.num_hits]
+
+    speculative_retrieval_counter.labels(result=result.value).inc()
+    logger.debug(f"Speculative retrieval result: {result.value}")
+    return chunks
@@ -16,6 +16,7 @@ from sqlalchemy import Row
 from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.exc import MultipleResultsFound
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import Session
 
@@ -563,6 +564,46 @@ def get_chat_messages_by_session(
     return list(result)
 
 
+def get_main_chain_chat_messages(
+    chat_session_id: UUID,
+    db_session: Session,
+    stop_at_message_id: int | None = None,
+    prefetch_tool_calls: bool = False,
+) -> list[ChatMessage]:
+    """Fetches only the messages on the main chain of a session: the root message
+    and the messages reached from it by following latest_child_message, up to and
+    including stop_at_message_id if given. Messages on other branches are never
+    loaded. Messages are returned in no particular order."""
+    root = select(ChatMessage.id, ChatMessage.latest_child_message).where(
+        ChatMessage.chat_session_id == chat_session_id,
+        ChatMessage.parent_message.is_(None),
+    )
+    chain = root.cte("main_chain", recursive=True)
+
+    child = aliased(ChatMessage)
+    next_messages = (
+        select(child.id, child.latest_child_message)
+        .join(chain, child.id == chain.c.latest_child_message)
+        .where(child.chat_session_id == chat_session_id)
+    )
+    if stop_at_message_id:
+        next_messages = next_messages.where(chain.c.id != stop_at_message_id)
+    # UNION (rather than UNION ALL) guards against pointer cycles
+    chain = chain.union(next_messages)
+
+    stmt = select(ChatMessage).join(chain, ChatMessage.id == chain.c.id)
+
+    if prefetch_tool_calls:
+        stmt = stmt.options(
+            joinedload(ChatMessage.tool_call),
+            joinedload(ChatMessage.sub_questions).joinedload(
+                AgentSubQuestion.sub_queries
+            ),
+        )
+        return list(db_session.scalars(stmt).unique().all())
+    return list(db_session.scalars(stmt).all())
+
+
 def get_or_create_root_message(
     chat_session_id: UUID,
     db_session: Session,
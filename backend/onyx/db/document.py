@@ -2,6 +2,7 @@ import contextlib
 import time
 from collections.abc import Generator
 from collections.abc import Iterable
+from collections.abc import Iterator
 from collections.abc import Sequence
 from datetime import datetime
 from datetime import timedelta
@@ -23,6 +24,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import null
 
 from onyx.agents.agent_search.kb_search.models import KGEntityDocInfo
+from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
 from onyx.configs.constants import DEFAULT_BOOST
 from onyx.configs.constants import DocumentSource
 from onyx.configs.kg_configs import KG_SIMPLE_ANSWER_MAX_DISPLAYED_SOURCES
@@ -163,6 +165,26 @@ def get_document_ids_for_connector_credential_pair(
     return list(db_session.execute(doc_ids_stmt).scalars().all())
 
 
+def iter_sorted_document_ids_for_connector_credential_pair(
+    db_session: Session, connector_id: int, credential_id: int
+) -> Iterator[str]:
+    """Streams the doc IDs of a cc-pair in bytewise (COLLATE "C") order using a
+    server side cursor so that memory stays flat regardless of document count.
+    The ordering matches Python's native str ordering, which allows merge joins
+    against sorted ID streams produced outside of Postgres."""
+    doc_ids_stmt = (
+        select(DocumentByConnectorCredentialPair.id)
+        .where(
+            and_(
+                DocumentByConnectorCredentialPair.connector_id == connector_id,
+                DocumentByConnectorCredentialPair.credential_id == credential_id,
+            )
+        )
+        .order_by(DocumentByConnectorCredentialPair.id.collate("C"))
+    )
+    yield from db_session.scalars(doc_ids_stmt).yield_per(DB_YIELD_PER_DEFAULT)
+
+
 def get_documents_for_connector_credential_pair_limited_columns(
     db_session: Session,
     connector_id: int,
@@ -442,11 +464,14 @@ def upsert_documents(
 
 def upsert_document_by_connector_credential_pair(
     db_session: Session, connector_id: int, credential_id: int, document_ids: list[str]
-) -> None:
-    """NOTE: this function is Postgres specific. Not all DBs support the ON CONFLICT clause."""
+) -> list[str]:
+    """Returns the ids of the documents that weren't linked to the cc pair before.
+
+    NOTE: this function is Postgres specific. Not all DBs support the ON CONFLICT clause.
+    """
     if not document_ids:
         logger.info("`document_ids` is empty. Skipping.")
-        return
+        return []
 
     insert_stmt = insert(DocumentByConnectorCredentialPair).values(
         [
@@ -464,9 +489,12 @@ def upsert_document_by_connector_credential_pair(
     # this must be `on_conflict_do_nothing` rather than `on_conflict_do_update`
     # since we don't want to update the `has_been_indexed` field for documents
     # that already exist
-    on_conflict_stmt = insert_stmt.on_conflict_do_nothing()
-    db_session.execute(on_conflict_stmt)
+    on_conflict_stmt = insert_stmt.on_conflict_do_nothing().returning(
+        DocumentByConnectorCredentialPair.id
+    )
+    new_document_ids = list(db_session.scalars(on_conflict_stmt).all())
     db_session.commit()
+    return new_document_ids
 
 
 def mark_document_as_indexed_for_cc_pair__no_commit(
@@ -502,6 +530,55 @@ def update_docs_updated_at__no_commit(
         document.doc_updated_at = ids_to_new_updated_at[document.id]
 
 
+def update_docs_content_hash__no_commit(
+    ids_to_content_hash: dict[str, str | None],
+    search_settings_id: int | None,
+    db_session: Session,
+) -> None:
+    """Records the content hashes for the index of the given search settings. Without
+    search settings, the hashes are cleared since they can't be trusted anymore."""
+    if not ids_to_content_hash:
+        return
+
+    documents_to_update = (
+        db_session.query(DbDocument)
+        .filter(DbDocument.id.in_(list(ids_to_content_hash.keys())))
+        .all()
+    )
+
+    for document in documents_to_update:
+        content_hash = ids_to_content_hash[document.id]
+        if search_settings_id is None or content_hash is None:
+            document.content_hash = None
+            document.content_hash_search_settings_id = None
+        else:
+            document.content_hash = content_hash
+            document.content_hash_search_settings_id = search_settings_id
+
+
+def update_docs_chunk_hashes__no_commit(
+    ids_to_chunk_hashes: dict[str, dict[str, str] | None],
+    search_settings_id: int | None,
+    db_session: Session,
+) -> None:
+    """Records the chunk hashes for the index of the given search settings, along with
+    the content hashes (see update_docs_content_hash__no_commit). Without search
+    settings, the hashes are cleared."""
+    if not ids_to_chunk_hashes:
+        return
+
+    documents_to_update = (
+        db_session.query(DbDocument)
+        .filter(DbDocument.id.in_(list(ids_to_chunk_hashes.keys())))
+        .all()
+    )
+
+    for document in documents_to_update:
+        document.chunk_hashes = (
+            ids_to_chunk_hashes[document.id] if search_settings_id is not None else None
+        )
+
+
 def update_docs_last_modified__no_commit(
     document_ids: list[str],
     db_session: Session,
@@ -991,6 +1068,24 @@ def update_document_kg_info(
     db_session.execute(stmt)
 
 
+def update_documents_kg_info(
+    db_session: Session, document_ids: list[str], kg_stage: KGStage
+) -> None:
+    """Batch version of update_document_kg_info."""
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(
+            kg_stage=kg_stage,
+            kg_processing_time=datetime.now(timezone.utc),
+        )
+    )
+    db_session.execute(stmt)
+
+
 def update_document_kg_stage(
     db_session: Session,
     document_id: str,
@@ -1058,6 +1153,20 @@ def get_document_updated_at(
     return db_session.execute(stmt).scalar_one_or_none()
 
 
+def get_documents_updated_at(
+    document_ids: list[str],
+    db_session: Session,
+) -> dict[str, datetime | None]:
+    """Batch version of get_document_updated_at, documents that don't exist are left out"""
+    stmt = select(DbDocument.id, DbDocument.doc_updated_at).where(
+        DbDocument.id.in_(document_ids)
+    )
+    return {
+        document_id: doc_updated_at
+        for document_id, doc_updated_at in db_session.execute(stmt).all()
+    }
+
+
 def reset_all_document_kg_stages(db_session: Session) -> int:
     """Reset the KG stage of all documents that are not in NOT_STARTED state to NOT_STARTED.
 
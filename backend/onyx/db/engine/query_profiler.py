@@ -0,0 +1,227 @@
+import random
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from contextvars import Token
+
+from prometheus_client import Counter as PrometheusCounter
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import ConnectionPoolEntry
+from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import QueuePool
+
+from onyx.configs.app_configs import DB_QUERY_PROFILING_ENABLED
+from onyx.configs.app_configs import DB_QUERY_PROFILING_REPEAT_THRESHOLD
+from onyx.configs.app_configs import DB_QUERY_PROFILING_SAMPLE_RATE
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+QUERY_PROFILING_HEADER = "X-Onyx-Profile-Queries"
+
+# distinct statements tracked per profile, long running tasks (e.g. vespa sync)
+# can issue an unbounded number of them
+_MAX_TRACKED_STATEMENTS = 1000
+_OTHER_STATEMENTS = "<other statements>"
+_STATEMENT_START_TIME_KEY = "query_profiler_start_time"
+
+_PARAMETER_LIST = re.compile(r"\(\s*(?:%\(\w+\)s|\?)(?:\s*,\s*(?:%\(\w+\)s|\?))*\s*\)")
+_PARAMETER = re.compile(r"%\(\w+\)s")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+db_statements_histogram = Histogram(
+    "onyx_db_statements_per_request",
+    "Number of statements executed by a profiled API request or Celery task",
+    ["source", "name"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+db_time_histogram = Histogram(
+    "onyx_db_time_per_request_seconds",
+    "Time spent executing statements by a profiled API request or Celery task",
+    ["source", "name"],
+)
+db_checkout_wait_histogram = Histogram(
+    "onyx_db_checkout_wait_per_request_seconds",
+    "Time a profiled API request or Celery task waited for pooled connections",
+    ["source", "name"],
+)
+db_repeated_statements_counter = PrometheusCounter(
+    "onyx_db_repeated_statements",
+    "Statements executed more than DB_QUERY_PROFILING_REPEAT_THRESHOLD times by a "
+    "single profiled API request or Celery task (likely N+1 queries)",
+    ["source", "name"],
+)
+
+
+def normalize_statement(statement: str) -> str:
+    """The shape of a statement: parameters and literals replaced by '?' so that
+    executions that only differ in their values are counted together"""
+    statement = _STRING_LITERAL.sub("?", statement)
+    # expanded IN lists differ in length between executions
+    statement = _PARAMETER_LIST.sub("(?)", statement)
+    statement = _PARAMETER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryProfile:
+    """Database usage of a single API request or Celery task. Statements can be
+    recorded from any thread the request hands work to."""
+
+    def __init__(self, source: str, name: str) -> None:
+        self.source = source
+        self.name = name
+
+        self._lock = threading.Lock()
+        self.statement_count = 0
+        self.statement_seconds = 0.0
+        self.checkout_count = 0
+        self.checkout_wait_seconds = 0.0
+        self.statement_counts: Counter[str] = Counter()
+
+    def record_statement(self, statement: str, seconds: float) -> None:
+        shape = normalize_statement(statement)
+        with self._lock:
+            self.statement_count += 1
+            self.statement_seconds += seconds
+            if (
+                shape not in self.statement_counts
+                and len(self.statement_counts) >= _MAX_TRACKED_STATEMENTS
+            ):
+                shape = _OTHER_STATEMENTS
+            self.statement_counts[shape] += 1
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkout_count += 1
+            self.checkout_wait_seconds += seconds
+
+    def repeated_statements(
+        self, threshold: int = DB_QUERY_PROFILING_REPEAT_THRESHOLD
+    ) -> list[tuple[str, int]]:
+        """Statements executed more than `threshold` times, most frequent first"""
+        with self._lock:
+            return [
+                (shape, count)
+                for shape, count in self.statement_counts.most_common()
+                if count > threshold and shape != _OTHER_STATEMENTS
+            ]
+
+    def report(self) -> None:
+        labels = {"source": self.source, "name": self.name}
+        db_statements_histogram.labels(**labels).observe(self.statement_count)
+        db_time_histogram.labels(**labels).observe(self.statement_seconds)
+        db_checkout_wait_histogram.labels(**labels).observe(self.checkout_wait_seconds)
+
+        summary = (
+            f"{self.source} {self.name}: {self.statement_count} statements, "
+            f"{self.statement_seconds:.3f}s in Postgres, "
+            f"{self.checkout_count} connection checkouts waiting "
+            f"{self.checkout_wait_seconds:.3f}s"
+        )
+        repeated_statements = self.repeated_statements()
+        if not repeated_statements:
+            logger.info(f"DB query profile of {summary}")
+            return
+
+        db_repeated_statements_counter.labels(**labels).inc(len(repeated_statements))
+        repeated = "\n".join(
+            f"{count}x {shape[:500]}" for shape, count in repeated_statements[:5]
+        )
+        logger.warning(
+            f"DB query profile of {summary}. Likely N+1 queries:\n{repeated}"
+        )
+
+
+_current_query_profile: ContextVar[QueryProfile | None] = ContextVar(
+    "current_query_profile", default=None
+)
+
+
+def should_profile_queries(requested: bool = False) -> bool:
+    return DB_QUERY_PROFILING_ENABLED and (
+        requested or random.random() < DB_QUERY_PROFILING_SAMPLE_RATE
+    )
+
+
+def get_current_query_profile() -> QueryProfile | None:
+    return _current_query_profile.get()
+
+
+def set_current_query_profile(
+    profile: QueryProfile | None,
+) -> Token[QueryProfile | None]:
+    return _current_query_profile.set(profile)
+
+
+def reset_current_query_profile(token: Token[QueryProfile | None]) -> None:
+    _current_query_profile.reset(token)
+
+
+@contextmanager
+def profile_queries(source: str, name: str) -> Iterator[QueryProfile]:
+    """Profiles the statements executed within the block, regardless of sampling"""
+    profile = QueryProfile(source, name)
+    token = set_current_query_profile(profile)
+    try:
+        yield profile
+    finally:
+        reset_current_query_profile(token)
+        profile.report()
+
+
+class _CheckoutTimingMixin:
+    """Records how long checking out a connection took (waiting for a free
+    connection or opening a new one) in the current query profile"""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        profile = _current_query_profile.get()
+        if profile is None:
+            return super()._do_get()  # type: ignore[misc]
+
+        start = time.monotonic()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        finally:
+            profile.record_checkout(time.monotonic() - start)
+
+
+class ProfiledQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class ProfiledNullPool(_CheckoutTimingMixin, NullPool):
+    pass
+
+
+def _start_statement_timer(  # type: ignore
+    conn, cursor, statement, parameters, context, executemany
+):
+    if _current_query_profile.get() is not None:
+        conn.info[_STATEMENT_START_TIME_KEY] = time.monotonic()
+
+
+def _record_statement(  # type: ignore
+    conn, cursor, statement, parameters, context, executemany
+):
+    profile = _current_query_profile.get()
+    start_time = conn.info.pop(_STATEMENT_START_TIME_KEY, None)
+    if profile is not None and start_time is not None:
+        profile.record_statement(statement, time.monotonic() - start_time)
+
+
+def add_query_profiling_listeners(target: type[Engine] | Engine) -> None:
+    event.listen(target, "before_cursor_execute", _start_statement_timer)
+    event.listen(target, "after_cursor_execute", _record_statement)
+
+
+if DB_QUERY_PROFILING_ENABLED:
+    add_query_profiling_listeners(Engine)
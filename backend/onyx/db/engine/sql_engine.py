@@ -13,6 +13,7 @@ from sqlalchemy.engine import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
+from onyx.configs.app_configs import DB_QUERY_PROFILING_ENABLED
 from onyx.configs.app_configs import DB_READONLY_PASSWORD
 from onyx.configs.app_configs import DB_READONLY_USER
 from onyx.configs.app_configs import LOG_POSTGRES_CONN_COUNTS
@@ -27,6 +28,8 @@ from onyx.configs.app_configs import POSTGRES_USE_NULL_POOL
 from onyx.configs.app_configs import POSTGRES_USER
 from onyx.configs.constants import POSTGRES_UNKNOWN_APP_NAME
 from onyx.db.engine.iam_auth import provide_iam_token
+from onyx.db.engine.query_profiler import ProfiledNullPool
+from onyx.db.engine.query_profiler import ProfiledQueuePool
 from onyx.server.utils import BasicAuthenticationError
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import MULTI_TENANT
@@ -174,7 +177,9 @@ class SqlEngine:
                 # cause the initialization to fail
                 final_engine_kwargs.update(extra_engine_kwargs)
 
-                final_engine_kwargs["poolclass"] = pool.NullPool
+                final_engine_kwargs["poolclass"] = (
+                    ProfiledNullPool if DB_QUERY_PROFILING_ENABLED else pool.NullPool
+                )
                 if "pool_size" in final_engine_kwargs:
                     del final_engine_kwargs["pool_size"]
                 if "max_overflow" in final_engine_kwargs:
@@ -184,6 +189,8 @@ class SqlEngine:
                 final_engine_kwargs["max_overflow"] = max_overflow
                 final_engine_kwargs["pool_pre_ping"] = POSTGRES_POOL_PRE_PING
                 final_engine_kwargs["pool_recycle"] = POSTGRES_POOL_RECYCLE
+                if DB_QUERY_PROFILING_ENABLED:
+                    final_engine_kwargs["poolclass"] = ProfiledQueuePool
 
                 # any passed in kwargs override the defaults
                 final_engine_kwargs.update(extra_engine_kwargs)
@@ -234,7 +241,9 @@ class SqlEngine:
                 # cause the initialization to fail
                 final_engine_kwargs.update(extra_engine_kwargs)
 
-                final_engine_kwargs["poolclass"] = pool.NullPool
+                final_engine_kwargs["poolclass"] = (
+                    ProfiledNullPool if DB_QUERY_PROFILING_ENABLED else pool.NullPool
+                )
                 if "pool_size" in final_engine_kwargs:
                     del final_engine_kwargs["pool_size"]
                 if "max_overflow" in final_engine_kwargs:
@@ -244,6 +253,8 @@ class SqlEngine:
                 final_engine_kwargs["max_overflow"] = max_overflow
                 final_engine_kwargs["pool_pre_ping"] = POSTGRES_POOL_PRE_PING
                 final_engine_kwargs["pool_recycle"] = POSTGRES_POOL_RECYCLE
+                if DB_QUERY_PROFILING_ENABLED:
+                    final_engine_kwargs["poolclass"] = ProfiledQueuePool
 
                 # any passed in kwargs override the defaults
                 final_engine_kwargs.update(extra_engine_kwargs)
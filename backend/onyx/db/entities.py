@@ -1,14 +1,24 @@
 import uuid
 from datetime import datetime
 from datetime import timezone
+from typing import Any
 from typing import List
 
+from sqlalchemy import Boolean
+from sqlalchemy import column
 from sqlalchemy import func
+from sqlalchemy import Integer
 from sqlalchemy import literal
+from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import String
+from sqlalchemy import text
+from sqlalchemy import true
 from sqlalchemy import update
+from sqlalchemy import values
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm import Session
 
 import onyx.db.document as dbdocument
@@ -20,6 +30,7 @@ from onyx.db.models import KGEntityType
 from onyx.kg.models import KGGroundingType
 from onyx.kg.models import KGStage
 from onyx.kg.utils.formatting_utils import make_entity_id
+from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA
 
 
 def upsert_staging_entity(
@@ -101,6 +112,83 @@ def upsert_staging_entity(
     return result
 
 
+def upsert_staging_entities_batch(
+    db_session: Session,
+    entities: list[dict[str, Any]],
+) -> dict[str, dict[str, Any]]:
+    """Batch version of upsert_staging_entity, adds or updates the staging entities in
+    a single statement. Entities with the same id_name are merged the way consecutive
+    upsert_staging_entity calls would be: the values of the first one are kept and the
+    occurrences are added up.
+
+    Args:
+        db_session: SQLAlchemy session
+        entities: upsert_staging_entity arguments for each entity (name, entity_type
+            and optionally document_id, occurrences, attributes and event_time)
+
+    Returns:
+        dict[str, dict[str, Any]]: Maps the id_name of each stored entity to its attributes
+    """
+    rows: dict[str, dict[str, Any]] = {}
+    for entity in entities:
+        entity_type = entity["entity_type"].upper()
+        name = entity["name"].title()
+        id_name = make_entity_id(entity_type, name)
+        occurrences = entity.get("occurrences", 1)
+        if id_name in rows:
+            rows[id_name]["occurrences"] += occurrences
+            continue
+
+        attributes = entity.get("attributes") or {}
+        rows[id_name] = dict(
+            id_name=id_name,
+            name=name,
+            entity_type_id_name=entity_type,
+            entity_key=attributes.get("key"),
+            parent_key=attributes.get("parent"),
+            document_id=entity.get("document_id"),
+            occurrences=occurrences,
+            attributes={
+                attr_key: attr_val
+                for attr_key, attr_val in attributes.items()
+                if attr_key not in ("key", "parent")
+            },
+            event_time=entity.get("event_time"),
+        )
+
+    if not rows:
+        return {}
+
+    stmt = pg_insert(KGEntityExtractionStaging).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id_name"],
+        set_=dict(
+            occurrences=KGEntityExtractionStaging.occurrences
+            + stmt.excluded.occurrences,
+        ),
+    ).returning(KGEntityExtractionStaging.id_name, KGEntityExtractionStaging.attributes)
+    stored_attributes = {
+        row.id_name: row.attributes for row in db_session.execute(stmt).all()
+    }
+
+    # Update the kg_stage of the entities' documents
+    document_ids = {
+        row["document_id"] for row in rows.values() if row["document_id"] is not None
+    }
+    if document_ids:
+        db_session.execute(
+            update(Document)
+            .where(Document.id.in_(document_ids))
+            .values(
+                kg_stage=KGStage.EXTRACTED,
+                kg_processing_time=datetime.now(timezone.utc),
+            )
+        )
+    db_session.flush()
+
+    return stored_attributes
+
+
 def transfer_entity(
     db_session: Session,
     entity: KGEntityExtractionStaging,
@@ -232,6 +320,167 @@ def merge_entities(
     return result
 
 
+def get_similar_entities_batch(
+    db_session: Session,
+    queries: list[tuple[str, str, bool]],
+    similarity_threshold: float,
+) -> list[list[KGEntity]]:
+    """Trigram candidate retrieval for a whole batch of names in a single query
+    (lateral join over the batch), using the GIN index on kg_entity.name.
+
+    Args:
+        db_session: SQLAlchemy session
+        queries: (name, entity_type_id_name, docless_only) per lookup. If docless_only
+            is set, only entities without a document_id are returned for that lookup.
+        similarity_threshold: pg_trgm similarity threshold
+
+    Returns:
+        list[list[KGEntity]]: The similar entities for each query, in query order
+    """
+    results: list[list[KGEntity]] = [[] for _ in queries]
+    if not queries:
+        return results
+
+    db_session.execute(
+        text("SET pg_trgm.similarity_threshold = " + str(similarity_threshold))
+    )
+
+    batch = values(
+        column("idx", Integer),
+        column("name", String),
+        column("entity_type_id_name", String),
+        column("docless_only", Boolean),
+        name="batch",
+    ).data(
+        [
+            (idx, name, entity_type_id_name, docless_only)
+            for idx, (name, entity_type_id_name, docless_only) in enumerate(queries)
+        ]
+    )
+    candidate = aliased(KGEntity)
+    matches = (
+        select(candidate.id_name)
+        .where(
+            candidate.entity_type_id_name == batch.c.entity_type_id_name,
+            or_(batch.c.docless_only.is_(False), candidate.document_id.is_(None)),
+            getattr(func, POSTGRES_DEFAULT_SCHEMA).similarity_op(
+                candidate.name, batch.c.name
+            ),
+        )
+        .correlate(batch)
+        .lateral("matches")
+    )
+    stmt = (
+        select(batch.c.idx, KGEntity)
+        .select_from(batch)
+        .join(matches, true())
+        .join(KGEntity, KGEntity.id_name == matches.c.id_name)
+    )
+    for idx, entity in db_session.execute(stmt).all():
+        results[idx].append(entity)
+
+    return results
+
+
+def insert_entities_batch(
+    db_session: Session,
+    entities: list[dict[str, Any]],
+) -> dict[str, str]:
+    """Insert new normalized entities in a single statement. Rows conflicting with an
+    existing entity (same name, type and document) are folded into the existing
+    entity, the same way transfer_entity does.
+
+    Args:
+        db_session: SQLAlchemy session
+        entities: column values for each entity, must include id_name. Must not
+            contain two entities with the same (entity_type_id_name, document_id)
+            for a non-null document_id.
+
+    Returns:
+        dict[str, str]: Maps the id_name passed in to the id_name of the stored entity
+    """
+    if not entities:
+        return {}
+
+    stmt = pg_insert(KGEntity).values(entities)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name", "entity_type_id_name", "document_id"],
+        set_=dict(
+            occurrences=KGEntity.occurrences + stmt.excluded.occurrences,
+            attributes=KGEntity.attributes.op("||")(stmt.excluded.attributes),
+            entity_key=func.coalesce(KGEntity.entity_key, stmt.excluded.entity_key),
+            parent_key=func.coalesce(KGEntity.parent_key, stmt.excluded.parent_key),
+            event_time=stmt.excluded.event_time,
+            time_updated=datetime.now(),
+        ),
+    ).returning(
+        KGEntity.id_name,
+        KGEntity.entity_type_id_name,
+        KGEntity.document_id,
+    )
+    rows = db_session.execute(stmt).all()
+
+    # only rows with a document_id can conflict (NULLs are distinct), and a
+    # document entity's name always comes from the document so the type and
+    # document id identify it
+    stored_id_names = {
+        (row.entity_type_id_name, row.document_id): row.id_name
+        for row in rows
+        if row.document_id is not None
+    }
+    return {
+        entity["id_name"]: (
+            stored_id_names[(entity["entity_type_id_name"], entity["document_id"])]
+            if entity["document_id"] is not None
+            else entity["id_name"]
+        )
+        for entity in entities
+    }
+
+
+def update_entities_batch(
+    db_session: Session,
+    entities: list[dict[str, Any]],
+) -> None:
+    """Bulk update normalized entities by primary key (id_name)."""
+    if not entities:
+        return
+
+    db_session.execute(update(KGEntity), entities)
+
+
+def get_entities_by_id_names(
+    db_session: Session, id_names: list[str]
+) -> list[KGEntity]:
+    """Get the normalized entities with the given id_names."""
+    if not id_names:
+        return []
+
+    return (
+        db_session.query(KGEntity)
+        .filter(KGEntity.id_name.in_(id_names))
+        .populate_existing()
+        .all()
+    )
+
+
+def mark_staging_entities_transferred(
+    db_session: Session,
+    staging_to_transferred_id_names: dict[str, str],
+) -> None:
+    """Bulk set transferred_id_name on staging entities."""
+    if not staging_to_transferred_id_names:
+        return
+
+    db_session.execute(
+        update(KGEntityExtractionStaging),
+        [
+            {"id_name": id_name, "transferred_id_name": transferred_id_name}
+            for id_name, transferred_id_name in staging_to_transferred_id_names.items()
+        ],
+    )
+
+
 def get_kg_entity_by_document(db: Session, document_id: str) -> KGEntity | None:
     """
     Check if a document_id exists in the kg_entities table and return its id_name if found.
@@ -339,3 +588,41 @@ def get_entity_stats_by_grounded_source_name(
         )
         for row in results
     }
+
+
+def get_entities_for_name_index(
+    db_session: Session,
+    updated_after: datetime | None = None,
+    entity_types: list[str] | None = None,
+) -> list[Any]:
+    """Get the columns needed to match entities by name, optionally only for
+    entities updated after the given time and / or of the given entity types.
+
+    Returns:
+        Rows with id_name, name, name_trigrams, entity_type_id_name, document_id,
+        subtype and time_updated
+    """
+    stmt = select(
+        KGEntity.id_name,
+        KGEntity.name,
+        KGEntity.name_trigrams,
+        KGEntity.entity_type_id_name,
+        KGEntity.document_id,
+        KGEntity.attributes["subtype"].astext.label("subtype"),
+        KGEntity.time_updated,
+    )
+    if updated_after is not None:
+        stmt = stmt.where(KGEntity.time_updated > updated_after)
+    if entity_types is not None:
+        stmt = stmt.where(KGEntity.entity_type_id_name.in_(entity_types))
+    return list(db_session.execute(stmt).all())
+
+
+def get_entity_counts_by_type(db_session: Session) -> dict[str, int]:
+    """Get the number of normalized entities of each entity type."""
+    rows = db_session.execute(
+        select(KGEntity.entity_type_id_name, func.count()).group_by(
+            KGEntity.entity_type_id_name
+        )
+    ).all()
+    return {entity_type: count for entity_type, count in rows}
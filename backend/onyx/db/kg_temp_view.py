@@ -210,3 +210,22 @@ def drop_views(
 
         db_drop_session.commit()
     return None
+
+
+def get_allowed_document_ids(
+    db_session: Session,
+    allowed_docs_view_name: str,
+    document_ids: list[str],
+) -> set[str]:
+    """Returns the subset of document_ids present in the allowed_docs view."""
+    if not document_ids:
+        return set()
+
+    rows = db_session.execute(
+        text(
+            f"SELECT allowed_doc_id FROM {allowed_docs_view_name} "
+            "WHERE allowed_doc_id = ANY(:document_ids)"
+        ),
+        {"document_ids": document_ids},
+    ).all()
+    return {row[0] for row in rows}
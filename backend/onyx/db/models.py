@@ -19,6 +19,7 @@ from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTableUUID
 from fastapi_users_db_sqlalchemy.access_token import SQLAlchemyBaseAccessTokenTableUUID
 from fastapi_users_db_sqlalchemy.generics import TIMESTAMPAware
 from sqlalchemy import Boolean
+from sqlalchemy import Date
 from sqlalchemy import DateTime
 from sqlalchemy import desc
 from sqlalchemy import Enum
@@ -562,6 +563,23 @@ class Document(Base):
     # Only null for documents indexed prior to this change
     chunk_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Hash of the document content as of the last successful indexing. Used to skip
+    # chunking / embedding / index writes when a connector re-yields an unchanged doc.
+    # Null for documents indexed prior to this change.
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+    # The search settings whose index the content hash describes. Every index is
+    # written separately (e.g. the secondary index during a search settings swap),
+    # so the hash is only valid for the index that last recorded it.
+    content_hash_search_settings_id: Mapped[int | None] = mapped_column(
+        Integer, nullable=True
+    )
+    # Hash of every chunk written for the document, keyed by its position in the
+    # document (see get_chunk_hash_key). Lets edits to large documents only
+    # re-embed and rewrite the chunks that actually changed.
+    chunk_hashes: Mapped[dict[str, str] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True
+    )
+
     # last time any vespa relevant row metadata or the doc changed.
     # does not include last_synced
     last_modified: Mapped[datetime.datetime | None] = mapped_column(
@@ -3223,6 +3241,63 @@ class UsageReport(Base):
     file = relationship("FileRecord")
 
 
+# Analytics rollups, maintained incrementally by the analytics rollup task (see
+# ee/onyx/db/analytics.py). Days are the database's dates of the messages
+
+
+class AnalyticsDailyUserUsage(Base):
+    """Assistant messages and the feedback given on them, per day and user"""
+
+    __tablename__ = "analytics_daily_user_usage"
+
+    date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    # not a foreign key, the history outlives deleted users. Messages sent without
+    # a user (auth disabled) are counted under the nil UUID
+    user_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0)
+    like_count: Mapped[int] = mapped_column(Integer, default=0)
+    dislike_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class AnalyticsDailyPersonaUsage(Base):
+    """Assistant messages per day, persona and user. A message counts towards both
+    the persona of its chat session and the alternate assistant it was sent to"""
+
+    __tablename__ = "analytics_daily_persona_usage"
+
+    date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    persona_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_analytics_daily_persona_usage_persona_date", "persona_id", "date"),
+    )
+
+
+class AnalyticsOnyxbotSession(Base):
+    """The first answer of each OnyxBot chat session and whether the latest
+    feedback on it was negative"""
+
+    __tablename__ = "analytics_onyxbot_session"
+
+    chat_session_id: Mapped[UUID] = mapped_column(
+        PGUUID(as_uuid=True), primary_key=True
+    )
+    session_date: Mapped[datetime.date] = mapped_column(Date, index=True)
+    first_answer_id: Mapped[int] = mapped_column(Integer, index=True)
+    negative_feedback: Mapped[bool] = mapped_column(Boolean, default=False)
+
+
+class AnalyticsRollupWatermark(Base):
+    """The last id of a table that has been added to the analytics rollups"""
+
+    __tablename__ = "analytics_rollup_watermark"
+
+    table_name: Mapped[str] = mapped_column(String, primary_key=True)
+    last_id: Mapped[int] = mapped_column(Integer, default=0)
+
+
 class InputPrompt(Base):
     __tablename__ = "inputprompt"
 
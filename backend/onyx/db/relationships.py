@@ -1,6 +1,8 @@
+from typing import Any
 from typing import List
 
 from sqlalchemy import or_
+from sqlalchemy import select
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
@@ -99,6 +101,90 @@ def upsert_staging_relationship(
     return result
 
 
+def upsert_staging_relationships_batch(
+    db_session: Session,
+    relationships: list[tuple[str, str | None]],
+) -> list[tuple[str, str | None]]:
+    """
+    Batch version of upsert_staging_relationship, adds or updates the staging
+    relationships in a single statement. Relationships between entities that are not
+    in the staging table are skipped.
+
+    Args:
+        db_session: SQLAlchemy database session
+        relationships: (relationship id name, source document id) of each occurrence
+    Returns:
+        The (relationship id name, source document id) pairs that were skipped
+    """
+    occurrences: dict[tuple[str, str | None], int] = {}
+    for relationship_id_name, source_document_id in relationships:
+        key = (format_relationship_id(relationship_id_name), source_document_id)
+        occurrences[key] = occurrences.get(key, 0) + 1
+
+    if not occurrences:
+        return []
+
+    node_id_names: set[str] = set()
+    for relationship_id_name, _ in occurrences:
+        source_entity_id_name, _, target_entity_id_name = split_relationship_id(
+            relationship_id_name
+        )
+        node_id_names.update((source_entity_id_name, target_entity_id_name))
+    staged_node_id_names = set(
+        db_session.scalars(
+            select(KGEntityExtractionStaging.id_name).where(
+                KGEntityExtractionStaging.id_name.in_(node_id_names)
+            )
+        ).all()
+    )
+
+    rows: list[dict[str, Any]] = []
+    skipped: list[tuple[str, str | None]] = []
+    for (relationship_id_name, source_document_id), count in occurrences.items():
+        (
+            source_entity_id_name,
+            relationship_string,
+            target_entity_id_name,
+        ) = split_relationship_id(relationship_id_name)
+        if (
+            source_entity_id_name not in staged_node_id_names
+            or target_entity_id_name not in staged_node_id_names
+        ):
+            skipped.append((relationship_id_name, source_document_id))
+            continue
+
+        rows.append(
+            {
+                "id_name": relationship_id_name,
+                "source_node": source_entity_id_name,
+                "target_node": target_entity_id_name,
+                "source_node_type": get_entity_type(source_entity_id_name),
+                "target_node_type": get_entity_type(target_entity_id_name),
+                "type": relationship_string.lower(),
+                "relationship_type_id_name": extract_relationship_type_id(
+                    relationship_id_name
+                ),
+                "source_document": source_document_id,
+                "occurrences": count,
+            }
+        )
+
+    if rows:
+        stmt = postgresql.insert(KGRelationshipExtractionStaging).values(rows)
+        db_session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["id_name", "source_document"],
+                set_=dict(
+                    occurrences=KGRelationshipExtractionStaging.occurrences
+                    + stmt.excluded.occurrences,
+                ),
+            )
+        )
+    db_session.flush()  # Flush to get any DB errors early
+
+    return skipped
+
+
 def upsert_relationship(
     db_session: Session,
     relationship_id_name: str,
@@ -280,6 +366,57 @@ def upsert_staging_relationship_type(
     return result
 
 
+def upsert_staging_relationship_types_batch(
+    db_session: Session,
+    relationship_types: list[tuple[str, str, str]],
+) -> None:
+    """
+    Batch version of upsert_staging_relationship_type, adds or updates the staging
+    relationship types (none of them definitions) in a single statement.
+
+    Args:
+        db_session: SQLAlchemy session
+        relationship_types: (source entity type, relationship type, target entity type)
+            of each occurrence
+    """
+    rows: dict[str, dict[str, Any]] = {}
+    for source_entity_type, relationship_type, target_entity_type in relationship_types:
+        id_name = make_relationship_type_id(
+            source_entity_type, relationship_type, target_entity_type
+        )
+        if id_name in rows:
+            rows[id_name]["occurrences"] += 1
+            continue
+
+        rows[id_name] = {
+            "id_name": id_name,
+            "name": relationship_type,
+            "source_entity_type_id_name": source_entity_type.upper(),
+            "target_entity_type_id_name": target_entity_type.upper(),
+            "definition": False,
+            "occurrences": 1,
+            "type": relationship_type,
+            "active": True,
+        }
+
+    if not rows:
+        return
+
+    stmt = postgresql.insert(KGRelationshipTypeExtractionStaging).values(
+        list(rows.values())
+    )
+    db_session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["id_name"],
+            set_=dict(
+                occurrences=KGRelationshipTypeExtractionStaging.occurrences
+                + stmt.excluded.occurrences,
+            ),
+        )
+    )
+    db_session.flush()  # Flush to get any DB errors early
+
+
 def upsert_relationship_type(
     db_session: Session,
     source_entity_type: str,
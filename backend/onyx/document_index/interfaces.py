@@ -108,6 +108,7 @@ class VespaDocumentFields:
     boost: float | None = None
     hidden: bool | None = None
     aggregated_chunk_boost_factor: float | None = None
+    doc_updated_at: datetime | None = None
 
 
 @dataclass
@@ -217,6 +218,10 @@ class Indexable(abc.ABC):
         no worry of receiving the first 0 through n chunks in one index call and the next n through
         m chunks of a docu in the next index call.
 
+        NOTE: When unchanged chunks are reused, only the new / changed chunks of a document are
+        passed in. Chunks are identified by their position, so positions below the document's
+        new chunk count (see IndexBatchParams) that are not passed in must be left untouched.
+
         NOTE: Due to some asymmetry between the primary and secondary indexing logic, this function
         only needs to index chunks into the PRIMARY index. Do not update the secondary index here,
         it is done automatically outside of this code.
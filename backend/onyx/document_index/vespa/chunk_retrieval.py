@@ -52,6 +52,7 @@ from onyx.document_index.vespa_constants import TENANT_ID
 from onyx.document_index.vespa_constants import TITLE
 from onyx.document_index.vespa_constants import YQL_BASE
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorName
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from shared_configs.configs import MULTI_TENANT
 
@@ -303,7 +304,7 @@ def parallel_visit_api_retrieval(
     ]
 
     parallel_results = run_functions_tuples_in_parallel(
-        functions_with_args, allow_failures=True
+        functions_with_args, allow_failures=True, executor=ExecutorName.SEARCH
     )
 
     # Any failures to retrieve would give a None, drop the Nones and empty lists
@@ -7,6 +7,7 @@ import re
 import time
 import urllib
 import zipfile
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
@@ -18,6 +19,7 @@ from uuid import UUID
 import httpx  # type: ignore
 import jinja2
 import requests  # type: ignore
+from prometheus_client import Counter
 from pydantic import BaseModel
 from retry import retry
 
@@ -64,6 +66,7 @@ from onyx.document_index.vespa_constants import ACCESS_CONTROL_LIST
 from onyx.document_index.vespa_constants import BATCH_SIZE
 from onyx.document_index.vespa_constants import BOOST
 from onyx.document_index.vespa_constants import CONTENT_SUMMARY
+from onyx.document_index.vespa_constants import DOC_UPDATED_AT
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import DOCUMENT_SETS
 from onyx.document_index.vespa_constants import HIDDEN
@@ -78,6 +81,9 @@ from onyx.key_value_store.factory import get_shared_kv_store
 from onyx.kg.utils.formatting_utils import split_relationship_id
 from onyx.utils.batching import batch_generator
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorName
+from onyx.utils.threadpool_concurrency import ExecutorTask
+from onyx.utils.threadpool_concurrency import get_executor
 from shared_configs.configs import MULTI_TENANT
 from shared_configs.model_server_models import Embedding
 
@@ -183,6 +189,39 @@ def add_ngrams_to_schema(schema_content: str) -> str:
     return schema_content
 
 
+secondary_index_writes_counter = Counter(
+    "onyx_secondary_index_writes",
+    "Writes of documents to the secondary index while search settings are being "
+    "swapped, by operation and whether they succeeded",
+    ["operation", "result"],
+)
+secondary_index_chunks_counter = Counter(
+    "onyx_secondary_index_chunks",
+    "Chunks written to the secondary index while search settings are being swapped",
+    ["operation"],
+)
+
+
+def _write_to_secondary_index(
+    operation: str,
+    write_to_index: Callable[[str, bool, httpx.Client], int],
+    index_name: str,
+    large_chunks_enabled: bool,
+    http_client: httpx.Client,
+) -> int:
+    try:
+        chunk_count = write_to_index(index_name, large_chunks_enabled, http_client)
+    except Exception:
+        secondary_index_writes_counter.labels(
+            operation=operation, result="failure"
+        ).inc()
+        raise
+
+    secondary_index_writes_counter.labels(operation=operation, result="success").inc()
+    secondary_index_chunks_counter.labels(operation=operation).inc(chunk_count)
+    return chunk_count
+
+
 class VespaIndex(DocumentIndex):
 
     VESPA_SCHEMA_JINJA_FILENAME = "danswer_chunk.sd.jinja"
@@ -765,6 +804,11 @@ class VespaIndex(DocumentIndex):
             if fields.hidden is not None:
                 update_dict["fields"][HIDDEN] = {"assign": fields.hidden}
 
+            if fields.doc_updated_at is not None:
+                update_dict["fields"][DOC_UPDATED_AT] = {
+                    "assign": int(fields.doc_updated_at.timestamp())
+                }
+
         if user_fields is not None:
             if user_fields.user_file_id is not None:
                 update_dict["fields"][USER_FILE] = {"assign": user_fields.user_file_id}
@@ -811,42 +855,38 @@ class VespaIndex(DocumentIndex):
         function will complete with no errors or exceptions.
         Handle other exceptions if you wish to implement retry behavior
         """
-        doc_chunk_count = 0
-
         doc_id = replace_invalid_doc_id_characters(doc_id)
 
-        with self.httpx_client_context as httpx_client:
-            for (
-                index_name,
-                large_chunks_enabled,
-            ) in self.index_to_large_chunks_enabled.items():
-                enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
-                    index_name=index_name,
-                    http_client=httpx_client,
-                    document_id=doc_id,
-                    previous_chunk_count=chunk_count,
-                    new_chunk_count=0,
-                )
+        def _update_index(
+            index_name: str, large_chunks_enabled: bool, httpx_client: httpx.Client
+        ) -> int:
+            enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
+                index_name=index_name,
+                http_client=httpx_client,
+                document_id=doc_id,
+                previous_chunk_count=chunk_count,
+                new_chunk_count=0,
+            )
 
-                doc_chunk_ids = get_document_chunk_ids(
-                    enriched_document_info_list=[enriched_doc_infos],
-                    tenant_id=tenant_id,
-                    large_chunks_enabled=large_chunks_enabled,
-                )
+            doc_chunk_ids = get_document_chunk_ids(
+                enriched_document_info_list=[enriched_doc_infos],
+                tenant_id=tenant_id,
+                large_chunks_enabled=large_chunks_enabled,
+            )
 
-                doc_chunk_count += len(doc_chunk_ids)
+            for doc_chunk_id in doc_chunk_ids:
+                self._update_single_chunk(
+                    doc_chunk_id,
+                    index_name,
+                    fields,
+                    user_fields,
+                    doc_id,
+                    httpx_client,
+                )
 
-                for doc_chunk_id in doc_chunk_ids:
-                    self._update_single_chunk(
-                        doc_chunk_id,
-                        index_name,
-                        fields,
-                        user_fields,
-                        doc_id,
-                        httpx_client,
-                    )
+            return len(doc_chunk_ids)
 
-        return doc_chunk_count
+        return self._write_to_indices("update", _update_index)
 
     def delete_single(
         self,
@@ -855,41 +895,34 @@ class VespaIndex(DocumentIndex):
         tenant_id: str,
         chunk_count: int | None,
     ) -> int:
-        total_chunks_deleted = 0
-
         doc_id = replace_invalid_doc_id_characters(doc_id)
 
         # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficial for
         # indexing / updates / deletes since we have to make a large volume of requests.
-        index_names = [self.index_name]
-        if self.secondary_index_name:
-            index_names.append(self.secondary_index_name)
-
-        with (
-            self.httpx_client_context as http_client,
-            concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
-        ):
-            for (
-                index_name,
-                large_chunks_enabled,
-            ) in self.index_to_large_chunks_enabled.items():
-                enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
-                    index_name=index_name,
-                    http_client=http_client,
-                    document_id=doc_id,
-                    previous_chunk_count=chunk_count,
-                    new_chunk_count=0,
-                )
-                chunks_to_delete = get_document_chunk_ids(
-                    enriched_document_info_list=[enriched_doc_infos],
-                    tenant_id=tenant_id,
-                    large_chunks_enabled=large_chunks_enabled,
-                )
+        def _delete_from_index(
+            index_name: str, large_chunks_enabled: bool, http_client: httpx.Client
+        ) -> int:
+            enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
+                index_name=index_name,
+                http_client=http_client,
+                document_id=doc_id,
+                previous_chunk_count=chunk_count,
+                new_chunk_count=0,
+            )
+            chunks_to_delete = get_document_chunk_ids(
+                enriched_document_info_list=[enriched_doc_infos],
+                tenant_id=tenant_id,
+                large_chunks_enabled=large_chunks_enabled,
+            )
 
+            chunks_deleted = 0
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=NUM_THREADS
+            ) as executor:
                 for doc_chunk_ids_batch in batch_generator(
                     chunks_to_delete, BATCH_SIZE
                 ):
-                    total_chunks_deleted += len(doc_chunk_ids_batch)
+                    chunks_deleted += len(doc_chunk_ids_batch)
                     delete_vespa_chunks(
                         doc_chunk_ids=doc_chunk_ids_batch,
                         index_name=index_name,
@@ -897,7 +930,59 @@ class VespaIndex(DocumentIndex):
                         executor=executor,
                     )
 
-        return total_chunks_deleted
+            return chunks_deleted
+
+        return self._write_to_indices("delete", _delete_from_index)
+
+    def _write_to_indices(
+        self,
+        operation: str,
+        write_to_index: Callable[[str, bool, httpx.Client], int],
+    ) -> int:
+        """
+        Runs write_to_index(index_name, large_chunks_enabled, http_client) on every
+        index and returns the total number of chunks written.
+
+        While search settings are being swapped, the write to the secondary index runs
+        on its own executor, concurrently with the write to the primary index. The
+        write to the primary never queues behind the writes to the secondary, if no
+        thread of that executor is free the secondary write runs in the calling thread
+        once the primary is done.
+        """
+        secondary_large_chunks_enabled = (
+            self.index_to_large_chunks_enabled.get(self.secondary_index_name)
+            if self.secondary_index_name
+            else None
+        )
+
+        with self.httpx_client_context as http_client:
+            secondary_task: ExecutorTask[int] | None = None
+            if self.secondary_index_name and secondary_large_chunks_enabled is not None:
+                secondary_task = get_executor(ExecutorName.SECONDARY_INDEX).submit(
+                    _write_to_secondary_index,
+                    operation,
+                    write_to_index,
+                    self.secondary_index_name,
+                    secondary_large_chunks_enabled,
+                    http_client,
+                )
+
+            try:
+                chunk_count = write_to_index(
+                    self.index_name,
+                    self.index_to_large_chunks_enabled[self.index_name],
+                    http_client,
+                )
+            except Exception:
+                # the client must outlive the secondary write if it already started
+                if secondary_task is not None and not secondary_task.cancel():
+                    secondary_task.wait()
+                raise
+
+            if secondary_task is not None:
+                chunk_count += secondary_task.result()
+
+        return chunk_count
 
     def id_based_retrieval(
         self,
@@ -2,6 +2,12 @@ import io
 import json
 import os
 import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import zipfile
 from collections.abc import Callable
 from collections.abc import Iterator
@@ -12,6 +18,7 @@ from enum import IntFlag
 from io import BytesIO
 from pathlib import Path
 from typing import Any
+from typing import cast
 from typing import IO
 from typing import NamedTuple
 from zipfile import BadZipFile
@@ -26,6 +33,10 @@ from PIL import Image
 from pypdf import PdfReader
 from pypdf.errors import PdfStreamError
 
+from onyx.configs.app_configs import FILE_EXTRACTION_NUM_PROCESSES
+from onyx.configs.app_configs import FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES
+from onyx.configs.app_configs import FILE_EXTRACTION_TIMEOUT_SECONDS
+from onyx.configs.app_configs import FILE_EXTRACTION_WORKER_MAX_MEMORY_BYTES
 from onyx.configs.constants import FileOrigin
 from onyx.configs.constants import ONYX_METADATA_FILENAME
 from onyx.configs.llm_configs import get_image_extraction_and_analysis_enabled
@@ -236,6 +247,197 @@ def read_text_file(
     return file_content_raw, metadata
 
 
+def _extraction_deadline() -> float:
+    # wall clock, since the deadline is shared with the extraction workers
+    return time.time() + FILE_EXTRACTION_TIMEOUT_SECONDS
+
+
+# how long workers get past the deadline to finish the page they are on
+_SHARD_GRACE_SECONDS = 10
+_PDF_PAGE_WORKER_PATH = str(Path(__file__).with_name("pdf_page_worker.py"))
+
+# worker processes currently extracting, across all extractions of this process
+_num_extraction_processes = 0
+_extraction_processes_lock = threading.Lock()
+
+
+def _acquire_extraction_processes(wanted: int) -> int:
+    """Reserves up to wanted worker processes, keeping the concurrent extractions of
+    this process to FILE_EXTRACTION_NUM_PROCESSES workers in total. Returns how many
+    were reserved."""
+    global _num_extraction_processes
+
+    with _extraction_processes_lock:
+        acquired = max(
+            min(wanted, FILE_EXTRACTION_NUM_PROCESSES - _num_extraction_processes), 0
+        )
+        _num_extraction_processes += acquired
+        return acquired
+
+
+def _release_extraction_processes(count: int) -> None:
+    global _num_extraction_processes
+
+    with _extraction_processes_lock:
+        _num_extraction_processes -= count
+
+
+def _pdf_reader_pages_to_text(
+    pdf_reader: PdfReader, start: int, end: int, deadline: float | None = None
+) -> list[str]:
+    page_texts: list[str] = []
+    for page_num in range(start, end):
+        if deadline is not None and time.time() > deadline:
+            logger.warning(
+                f"PDF extraction timed out after {FILE_EXTRACTION_TIMEOUT_SECONDS}s. "
+                f"Keeping {page_num - start} of {end - start} pages."
+            )
+            break
+        page_texts.append(pdf_reader.pages[page_num].extract_text())
+    return page_texts
+
+
+def _start_pdf_page_worker(
+    pdf_path: str,
+    output_path: str,
+    pdf_pass: str | None,
+    start: int,
+    end: int,
+    deadline: float,
+) -> subprocess.Popen:
+    worker = subprocess.Popen(
+        [
+            sys.executable,
+            _PDF_PAGE_WORKER_PATH,
+            pdf_path,
+            output_path,
+            str(start),
+            str(end),
+            str(deadline),
+            str(FILE_EXTRACTION_WORKER_MAX_MEMORY_BYTES),
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+    )
+    # the password is not passed as an argument since those are visible to every
+    # user of the host
+    try:
+        cast(IO[bytes], worker.stdin).write(json.dumps(pdf_pass).encode())
+        cast(IO[bytes], worker.stdin).close()
+    except BrokenPipeError:
+        # the worker already exited, which fails its shard
+        pass
+    return worker
+
+
+def _read_pdf_page_worker_output(
+    worker: subprocess.Popen, output_path: str
+) -> list[str] | None:
+    if worker.returncode != 0:
+        return None
+
+    try:
+        with open(output_path) as output_file:
+            return json.load(output_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _pdf_pages_to_text_parallel(
+    file: IO[Any], pdf_pass: str | None, num_pages: int
+) -> list[str] | None:
+    """Extracts page text with a contiguous shard of pages per worker process,
+    reassembled in page order. The workers belong to this extraction alone, so
+    stopping them doesn't affect other extractions. Returns None if no workers are
+    available so the caller can fall back to serial extraction.
+
+    Same as serial extraction cut short by the time budget, pages are kept up to the
+    first page that wasn't extracted: a shard whose worker timed out or died
+    truncates the text there rather than leaving a gap in it."""
+    if FILE_EXTRACTION_NUM_PROCESSES <= 1:
+        return None
+
+    num_processes = _acquire_extraction_processes(
+        min(num_pages, FILE_EXTRACTION_NUM_PROCESSES)
+    )
+    try:
+        if num_processes <= 1:
+            return None
+
+        shard_size = -(-num_pages // num_processes)
+        shard_bounds = [
+            (start, min(start + shard_size, num_pages))
+            for start in range(0, num_pages, shard_size)
+        ]
+
+        # the workers read the PDF from a temporary file and write the page texts
+        # to one of their own
+        with tempfile.TemporaryDirectory() as work_dir:
+            pdf_path = os.path.join(work_dir, "file.pdf")
+            with open(pdf_path, "wb") as pdf_file:
+                file.seek(0)
+                shutil.copyfileobj(file, pdf_file)
+            output_paths = [
+                os.path.join(work_dir, f"shard_{shard_num}.json")
+                for shard_num in range(len(shard_bounds))
+            ]
+
+            deadline = _extraction_deadline()
+            workers: list[subprocess.Popen] = []
+            try:
+                for (start, end), output_path in zip(shard_bounds, output_paths):
+                    workers.append(
+                        _start_pdf_page_worker(
+                            pdf_path, output_path, pdf_pass, start, end, deadline
+                        )
+                    )
+
+                # the workers stop at the deadline on their own, between pages
+                for worker in workers:
+                    try:
+                        worker.wait(
+                            timeout=max(deadline - time.time(), 0)
+                            + _SHARD_GRACE_SECONDS
+                        )
+                    except subprocess.TimeoutExpired:
+                        pass
+            except OSError:
+                logger.exception("Failed to start PDF extraction workers")
+                return None
+            finally:
+                # a worker stuck on a single page can only be stopped by killing it
+                for worker in workers:
+                    if worker.poll() is None:
+                        worker.kill()
+                        worker.wait()
+
+            page_texts: list[str] = []
+            for (start, end), worker, output_path in zip(
+                shard_bounds, workers, output_paths
+            ):
+                shard_texts = _read_pdf_page_worker_output(worker, output_path)
+                if shard_texts is None:
+                    logger.warning(
+                        f"PDF extraction worker for pages {start}-{end} failed "
+                        f"(exit code {worker.returncode}, timeout or memory limit?). "
+                        f"Keeping {len(page_texts)} of {num_pages} pages."
+                    )
+                    break
+
+                page_texts.extend(shard_texts)
+                if len(shard_texts) < end - start:
+                    logger.warning(
+                        "PDF extraction timed out after "
+                        f"{FILE_EXTRACTION_TIMEOUT_SECONDS}s. "
+                        f"Keeping {len(page_texts)} of {num_pages} pages."
+                    )
+                    break
+
+        return page_texts
+    finally:
+        _release_extraction_processes(num_processes)
+
+
 def pdf_to_text(file: IO[Any], pdf_pass: str | None = None) -> str:
     """
     Extract text from a PDF. For embedded images, a more complex approach is needed.
@@ -280,9 +482,19 @@ def read_pdf_file(
                 ):
                     metadata[clean_key] = ", ".join(value)
 
-        text = TEXT_SECTION_SEPARATOR.join(
-            page.extract_text() for page in pdf_reader.pages
-        )
+        num_pages = len(pdf_reader.pages)
+        page_texts: list[str] | None = None
+        if num_pages >= FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES:
+            page_texts = _pdf_pages_to_text_parallel(
+                file=file, pdf_pass=pdf_pass, num_pages=num_pages
+            )
+
+        if page_texts is None:
+            page_texts = _pdf_reader_pages_to_text(
+                pdf_reader, 0, num_pages, deadline=_extraction_deadline()
+            )
+
+        text = TEXT_SECTION_SEPARATOR.join(page_texts)
 
         if extract_images:
             for page_num, page in enumerate(pdf_reader.pages):
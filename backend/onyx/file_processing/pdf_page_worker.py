@@ -0,0 +1,53 @@
+"""Extracts the text of a shard of the pages of a PDF, see _pdf_pages_to_text_parallel
+in extract_file_text. Runs as a plain subprocess rather than a multiprocessing child,
+so that it can also be started from daemonic processes such as the docfetching
+workers, and only imports pypdf so that it starts quickly.
+
+Usage: pdf_page_worker.py PDF_PATH OUTPUT_PATH START END DEADLINE MAX_MEMORY_BYTES
+
+Extracts pages [START, END) until DEADLINE (seconds since the epoch) and writes the
+text of each extracted page to OUTPUT_PATH as a JSON list. The password of the PDF is
+read from stdin as JSON (null if there is none)."""
+
+import json
+import sys
+import time
+
+from pypdf import PdfReader
+
+
+def _limit_memory(max_memory_bytes: int) -> None:
+    """Caps the address space of the worker so that a pathological file kills the
+    worker (and fails its shard) instead of exhausting the memory of the host."""
+    if max_memory_bytes <= 0:
+        return
+
+    try:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory_bytes, max_memory_bytes))
+    except (ImportError, ValueError, OSError):
+        print("Unable to set memory limit for PDF page worker", file=sys.stderr)
+
+
+def main() -> None:
+    pdf_path, output_path, start, end, deadline, max_memory_bytes = sys.argv[1:]
+    pdf_pass: str | None = json.loads(sys.stdin.read())
+    _limit_memory(int(max_memory_bytes))
+
+    pdf_reader = PdfReader(pdf_path)
+    if pdf_reader.is_encrypted and pdf_pass is not None:
+        pdf_reader.decrypt(pdf_pass)
+
+    page_texts: list[str] = []
+    for page_num in range(int(start), int(end)):
+        if time.time() > float(deadline):
+            break
+        page_texts.append(pdf_reader.pages[page_num].extract_text())
+
+    with open(output_path, "w") as output_file:
+        json.dump(page_texts, output_file)
+
+
+if __name__ == "__main__":
+    main()
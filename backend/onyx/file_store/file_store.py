@@ -1,3 +1,4 @@
+import shutil
 import tempfile
 import uuid
 from abc import ABC
@@ -95,6 +96,26 @@ class FileStore(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def save_large_file(
+        self,
+        content: IO[bytes],
+        display_name: str | None,
+        file_origin: FileOrigin,
+        file_type: str,
+        file_metadata: dict[str, Any] | None = None,
+        file_id: str | None = None,
+    ) -> str:
+        """
+        Same as `save_file`, but uploads the content in parts as it is read rather
+        than reading it into memory first. Meant for files that may not fit in
+        memory, e.g. generated reports.
+
+        Returns:
+            The unique ID of the file that was saved.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def read_file(
         self, file_id: str, mode: str | None = None, use_tempfile: bool = False
@@ -336,6 +357,61 @@ class S3BackedFileStore(FileStore):
             ContentType=file_type,
         )
 
+        self._save_file_record(
+            file_id=file_id,
+            display_name=display_name,
+            file_origin=file_origin,
+            file_type=file_type,
+            s3_key=s3_key,
+            file_metadata=file_metadata,
+            db_session=db_session,
+        )
+        return file_id
+
+    def save_large_file(
+        self,
+        content: IO[bytes],
+        display_name: str | None,
+        file_origin: FileOrigin,
+        file_type: str,
+        file_metadata: dict[str, Any] | None = None,
+        file_id: str | None = None,
+        db_session: Session | None = None,
+    ) -> str:
+        if file_id is None:
+            file_id = str(uuid.uuid4())
+
+        s3_key = self._get_s3_key(file_id)
+        # a multipart upload once the content is large enough, only a few parts
+        # are held in memory at a time
+        self._get_s3_client().upload_fileobj(
+            content,
+            self._get_bucket_name(),
+            s3_key,
+            ExtraArgs={"ContentType": file_type},
+        )
+
+        self._save_file_record(
+            file_id=file_id,
+            display_name=display_name,
+            file_origin=file_origin,
+            file_type=file_type,
+            s3_key=s3_key,
+            file_metadata=file_metadata,
+            db_session=db_session,
+        )
+        return file_id
+
+    def _save_file_record(
+        self,
+        file_id: str,
+        display_name: str | None,
+        file_origin: FileOrigin,
+        file_type: str,
+        s3_key: str,
+        file_metadata: dict[str, Any] | None,
+        db_session: Session | None,
+    ) -> None:
         with get_session_with_current_tenant_if_none(db_session) as db_session:
             # Save metadata to database
             upsert_filerecord(
@@ -343,15 +419,13 @@ class S3BackedFileStore(FileStore):
                 display_name=display_name or file_id,
                 file_origin=file_origin,
                 file_type=file_type,
-                bucket_name=bucket_name,
+                bucket_name=self._get_bucket_name(),
                 object_key=s3_key,
                 db_session=db_session,
                 file_metadata=file_metadata,
             )
             db_session.commit()
 
-        return file_id
-
     def read_file(
         self,
         file_id: str,
@@ -373,16 +447,15 @@ class S3BackedFileStore(FileStore):
             logger.error(f"Failed to read file {file_id} from S3")
             raise
 
-        file_content = response["Body"].read()
-
         if use_tempfile:
             # Always open in binary mode for temp files since we're writing bytes
             temp_file = tempfile.NamedTemporaryFile(mode="w+b", delete=False)
-            temp_file.write(file_content)
+            # streamed so that large files never have to fit in memory
+            shutil.copyfileobj(response["Body"], temp_file)
             temp_file.seek(0)
             return temp_file
         else:
-            return BytesIO(file_content)
+            return BytesIO(response["Body"].read())
 
     def read_file_record(
         self, file_id: str, db_session: Session | None = None
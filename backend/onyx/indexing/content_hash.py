@@ -0,0 +1,101 @@
+import hashlib
+import json
+from typing import Any
+
+from onyx.access.models import ExternalAccess
+from onyx.connectors.models import BasicExpertInfo
+from onyx.connectors.models import Document
+from onyx.indexing.models import DocAwareChunk
+
+# bump this whenever the hashed representation changes so that stored hashes
+# from the previous version never match
+_CONTENT_HASH_VERSION = 1
+
+
+def _experts_to_hashable(
+    experts: list[BasicExpertInfo] | None,
+) -> list[dict[str, Any]] | None:
+    if experts is None:
+        return None
+    return [expert.model_dump() for expert in experts]
+
+
+def _external_access_to_hashable(
+    external_access: ExternalAccess | None,
+) -> dict[str, Any] | None:
+    if external_access is None:
+        return None
+    # sets have no stable iteration order across processes
+    return {
+        "external_user_emails": sorted(external_access.external_user_emails),
+        "external_user_group_ids": sorted(external_access.external_user_group_ids),
+        "is_public": external_access.is_public,
+    }
+
+
+def _hash_hashable(hashable: Any) -> str:
+    serialized = json.dumps(hashable, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def _document_to_hashable(document: Document, include_sections: bool) -> Any:
+    return {
+        "version": _CONTENT_HASH_VERSION,
+        "id": document.id,
+        "source": document.source.value,
+        "semantic_identifier": document.semantic_identifier,
+        "title": document.title,
+        "sections": (
+            [
+                [section.link, section.text, section.image_file_id]
+                for section in document.sections
+            ]
+            if include_sections
+            else None
+        ),
+        "metadata": document.metadata,
+        "doc_metadata": document.doc_metadata,
+        "primary_owners": _experts_to_hashable(document.primary_owners),
+        "secondary_owners": _experts_to_hashable(document.secondary_owners),
+        "from_ingestion_api": document.from_ingestion_api,
+        "external_access": _external_access_to_hashable(document.external_access),
+    }
+
+
+def compute_document_content_hash(document: Document) -> str:
+    """Stable hash over everything that ends up in the document index or the
+    document row for a document: title, sections, metadata, owners and access.
+
+    doc_updated_at is deliberately excluded, connectors often bump it without the
+    content changing (e.g. re-uploads, overlapping poll windows)."""
+    return _hash_hashable(_document_to_hashable(document, include_sections=True))
+
+
+def compute_document_metadata_hash(document: Document) -> str:
+    """Same as compute_document_content_hash, minus the sections. Every chunk
+    written to the index carries these document level fields.
+
+    doc_updated_at is left out here too, it is updated in place on the chunks that
+    are reused (see update_doc_updated_at_of_reused_chunks)."""
+    return _hash_hashable(_document_to_hashable(document, include_sections=False))
+
+
+def get_chunk_hash_key(chunk: DocAwareChunk) -> str:
+    """Position of the chunk within its document. Mirrors the chunk index used to
+    build the chunk's ID in the document index, so equal keys overwrite each other."""
+    if chunk.large_chunk_id is not None:
+        return f"large_{chunk.large_chunk_id}"
+    return str(chunk.chunk_id)
+
+
+def compute_chunk_content_hash(
+    chunk: DocAwareChunk, document_metadata_hash: str
+) -> str:
+    """Hash over everything that is embedded / written to the index for a chunk.
+    Truncated to 64 bits since it is only ever compared against the hash stored
+    for the same position of the same document."""
+    hashable = {
+        "document": document_metadata_hash,
+        "chunk": chunk.model_dump(exclude={"source_document"}),
+    }
+    return _hash_hashable(hashable)[:16]
@@ -0,0 +1,246 @@
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import HumanMessage
+
+from onyx.configs.app_configs import CONTEXTUAL_RAG_CACHE_TTL
+from onyx.configs.app_configs import CONTEXTUAL_RAG_MAX_CONCURRENT_LLM_CALLS
+from onyx.configs.app_configs import CONTEXTUAL_RAG_RATE_LIMIT_TRIES
+from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
+from onyx.configs.app_configs import USE_CHUNK_SUMMARY
+from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
+from onyx.indexing.models import DocAwareChunk
+from onyx.llm.chat_llm import LLMRateLimitError
+from onyx.llm.interfaces import LLM
+from onyx.llm.llm_provider_options import ANTHROPIC_PROVIDER_NAME
+from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.llm.utils import message_to_string
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import tokenizer_trim_middle
+from onyx.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT1
+from onyx.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT2
+from onyx.prompts.chat_prompts import DOCUMENT_SUMMARY_PROMPT
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.call_cache import cache_values
+from onyx.utils.call_cache import get_cached_values
+from onyx.utils.call_cache import get_llm_call_semaphore
+from onyx.utils.logger import setup_logger
+from onyx.utils.retry_wrapper import retry_builder
+from onyx.utils.threadpool_concurrency import ExecutorName
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+
+logger = setup_logger()
+
+_CACHE_KEY_PREFIX = "contextual_rag"
+
+# providers that only cache a prompt prefix when asked to. Others (e.g. OpenAI)
+# cache long prompt prefixes automatically.
+_EXPLICIT_PROMPT_CACHING_PROVIDERS = {ANTHROPIC_PROVIDER_NAME}
+
+# a prompt, and the document prefix it shares with the other prompts about the
+# same document (if any)
+ContextualRagCall = tuple[str | None, str]
+
+
+def _build_prompt(llm: LLM, call: ContextualRagCall) -> LanguageModelInput:
+    document_prefix, prompt = call
+    if document_prefix is None:
+        return prompt
+
+    # the document goes first so that the provider can reuse the processed prefix
+    # for all the chunks of the document
+    document_block: dict[str, Any] = {"type": "text", "text": document_prefix}
+    if llm.config.model_provider in _EXPLICIT_PROMPT_CACHING_PROVIDERS:
+        document_block["cache_control"] = {"type": "ephemeral"}
+    return [HumanMessage(content=[document_block, {"type": "text", "text": prompt}])]
+
+
+def _cache_key(llm: LLM, call: ContextualRagCall) -> str:
+    content_hash = hashlib.sha256(
+        json.dumps(
+            [str(llm.config.model_provider), str(llm.config.model_name), *call]
+        ).encode("utf-8")
+    ).hexdigest()
+    return f"{_CACHE_KEY_PREFIX}:{content_hash}"
+
+
+@retry_builder(
+    tries=CONTEXTUAL_RAG_RATE_LIMIT_TRIES,
+    delay=1,
+    backoff=2,
+    exceptions=LLMRateLimitError,
+)
+def _invoke_llm(llm: LLM, prompt: LanguageModelInput) -> str:
+    # rate limited calls back off outside of the semaphore, leaving the slot to
+    # calls that are not retrying
+    with get_llm_call_semaphore(
+        "contextual_rag", llm, CONTEXTUAL_RAG_MAX_CONCURRENT_LLM_CALLS
+    ):
+        return message_to_string(llm.invoke(prompt, max_tokens=MAX_CONTEXT_TOKENS))
+
+
+def _try_invoke_llm(llm: LLM, prompt: LanguageModelInput) -> str | None:
+    try:
+        return _invoke_llm(llm, prompt)
+    except Exception as e:
+        # Erroring during chunker is undesirable, so we log the error and continue
+        logger.exception(f"Error generating contextual rag summary: {e}")
+        return None
+
+
+def run_contextual_rag_calls(llm: LLM, calls: list[ContextualRagCall]) -> list[str]:
+    """Runs the calls not answered by the cache through the bounded pool of LLM
+    calls, and caches their answers. Calls that failed answer with an empty string."""
+    cache_keys = [_cache_key(llm, call) for call in calls]
+    redis_client = get_redis_client()
+    answers: dict[str, str] = {
+        cache_key: cached_answer
+        for cache_key, cached_answer in zip(
+            cache_keys,
+            get_cached_values(redis_client, cache_keys, "contextual rag summaries"),
+        )
+        if cached_answer is not None
+    }
+
+    # identical calls (e.g. duplicate chunks) are only made once
+    uncached_calls = {
+        cache_key: call
+        for cache_key, call in zip(cache_keys, calls)
+        if cache_key not in answers
+    }
+    new_answers = run_functions_tuples_in_parallel(
+        [
+            (_try_invoke_llm, (llm, _build_prompt(llm, call)))
+            for call in uncached_calls.values()
+        ],
+        max_workers=CONTEXTUAL_RAG_MAX_CONCURRENT_LLM_CALLS,
+        executor=ExecutorName.LLM,
+    )
+
+    answers_to_cache = {
+        cache_key: answer
+        for cache_key, answer in zip(uncached_calls.keys(), new_answers)
+        if answer is not None
+    }
+    answers.update(answers_to_cache)
+    cache_values(
+        redis_client,
+        answers_to_cache,
+        CONTEXTUAL_RAG_CACHE_TTL,
+        "contextual rag summaries",
+    )
+
+    return [answers.get(cache_key, "") for cache_key in cache_keys]
+
+
+def add_contextual_summaries(
+    chunks: list[DocAwareChunk],
+    llm: LLM,
+    tokenizer: BaseTokenizer,
+    chunk_token_limit: int,
+) -> list[DocAwareChunk]:
+    """
+    Adds Document summary and chunk-within-document context to the chunks
+    based on which environment variables are set.
+
+    Document summaries look at the entire document. Chunk summaries look at the chunk
+    as well as the entire document (or a summary, if the document is too long) and
+    describe how the chunk relates to the document. The calls for all the documents
+    of the batch are made together, first the document summaries then the chunk
+    summaries.
+    """
+    doc2chunks: dict[str, list[DocAwareChunk]] = defaultdict(list)
+    for chunk in chunks:
+        doc2chunks[chunk.source_document.id].append(chunk)
+
+    # this is value is the same for each chunk in the document; 0 indicates
+    # There is not enough space for contextual RAG (the chunk content
+    # and possibly metadata took up too much space)
+    doc2chunks = {
+        doc_id: chunks_by_doc
+        for doc_id, chunks_by_doc in doc2chunks.items()
+        if chunks_by_doc[0].contextual_rag_reserved_tokens != 0
+    }
+    if not doc2chunks or not (USE_DOCUMENT_SUMMARY or USE_CHUNK_SUMMARY):
+        return chunks
+
+    # The number of tokens allowed for the document when computing a document summary
+    trunc_doc_summary_tokens = llm.config.max_input_tokens - len(
+        tokenizer.encode(DOCUMENT_SUMMARY_PROMPT)
+    )
+
+    prompt_tokens = len(
+        tokenizer.encode(CONTEXTUAL_RAG_PROMPT1 + CONTEXTUAL_RAG_PROMPT2)
+    )
+    # The number of tokens allowed for the document when computing a
+    # "chunk in context of document" summary
+    trunc_doc_chunk_tokens = (
+        llm.config.max_input_tokens - prompt_tokens - chunk_token_limit
+    )
+
+    doc2tokens = {
+        doc_id: tokenizer.encode(chunks_by_doc[0].source_document.get_text_content())
+        for doc_id, chunks_by_doc in doc2chunks.items()
+    }
+
+    # chunk summaries of documents too long to include in full use the document
+    # summary, even if document summaries are turned off
+    summarized_doc_ids = [
+        doc_id
+        for doc_id, doc_tokens in doc2tokens.items()
+        if USE_DOCUMENT_SUMMARY
+        or (USE_CHUNK_SUMMARY and len(doc_tokens) > MAX_TOKENS_FOR_FULL_INCLUSION)
+    ]
+    doc_summaries = dict(
+        zip(
+            summarized_doc_ids,
+            run_contextual_rag_calls(
+                llm,
+                [
+                    (
+                        None,
+                        DOCUMENT_SUMMARY_PROMPT.format(
+                            document=tokenizer_trim_middle(
+                                doc2tokens[doc_id], trunc_doc_summary_tokens, tokenizer
+                            )
+                        ),
+                    )
+                    for doc_id in summarized_doc_ids
+                ],
+            ),
+        )
+    )
+    if USE_DOCUMENT_SUMMARY:
+        for doc_id, doc_summary in doc_summaries.items():
+            for chunk in doc2chunks[doc_id]:
+                chunk.doc_summary = doc_summary
+
+    if not USE_CHUNK_SUMMARY:
+        return chunks
+
+    summarized_chunks: list[DocAwareChunk] = []
+    chunk_calls: list[ContextualRagCall] = []
+    for doc_id, chunks_by_doc in doc2chunks.items():
+        doc_tokens = doc2tokens[doc_id]
+        doc_info = (
+            doc_summaries.get(doc_id)
+            if len(doc_tokens) > MAX_TOKENS_FOR_FULL_INCLUSION
+            else None
+        ) or tokenizer_trim_middle(doc_tokens, trunc_doc_chunk_tokens, tokenizer)
+
+        context_prompt1 = CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
+        for chunk in chunks_by_doc:
+            summarized_chunks.append(chunk)
+            chunk_calls.append(
+                (context_prompt1, CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content))
+            )
+
+    for chunk, chunk_context in zip(
+        summarized_chunks, run_contextual_rag_calls(llm, chunk_calls)
+    ):
+        chunk.chunk_context = chunk_context
+
+    return chunks
@@ -12,9 +12,6 @@ from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
-from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
-from onyx.configs.app_configs import USE_CHUNK_SUMMARY
-from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
 from onyx.configs.constants import DEFAULT_BOOST
 from onyx.configs.llm_configs import get_image_extraction_and_analysis_enabled
 from onyx.configs.model_configs import USE_INFORMATION_CONTENT_CLASSIFICATION
@@ -36,6 +33,8 @@ from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_indexed_for_cc_pair__no_commit
 from onyx.db.document import prepare_to_modify_documents
 from onyx.db.document import update_docs_chunk_count__no_commit
+from onyx.db.document import update_docs_chunk_hashes__no_commit
+from onyx.db.document import update_docs_content_hash__no_commit
 from onyx.db.document import update_docs_last_modified__no_commit
 from onyx.db.document import update_docs_updated_at__no_commit
 from onyx.db.document import upsert_document_by_connector_credential_pair
@@ -52,12 +51,19 @@ from onyx.document_index.document_index_utils import (
     get_multipass_config,
 )
 from onyx.document_index.interfaces import DocumentIndex
+from onyx.document_index.interfaces import DocumentInsertionRecord
 from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
+from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
 from onyx.file_store.file_store import get_default_file_store
 from onyx.file_store.utils import store_user_file_plaintext
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.content_hash import compute_chunk_content_hash
+from onyx.indexing.content_hash import compute_document_content_hash
+from onyx.indexing.content_hash import compute_document_metadata_hash
+from onyx.indexing.content_hash import get_chunk_hash_key
+from onyx.indexing.contextual_rag import add_contextual_summaries
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
 from onyx.indexing.models import DocAwareChunk
@@ -65,24 +71,16 @@ from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.indexing.models import IndexChunk
 from onyx.indexing.models import UpdatableChunkData
 from onyx.indexing.vector_db_insertion import write_chunks_to_vector_db_with_backoff
-from onyx.llm.chat_llm import LLMRateLimitError
 from onyx.llm.factory import get_default_llm_with_vision
 from onyx.llm.factory import get_default_llms
 from onyx.llm.factory import get_llm_for_contextual_rag
 from onyx.llm.interfaces import LLM
-from onyx.llm.utils import MAX_CONTEXT_TOKENS
-from onyx.llm.utils import message_to_string
 from onyx.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
 )
 from onyx.natural_language_processing.utils import BaseTokenizer
 from onyx.natural_language_processing.utils import get_tokenizer
-from onyx.natural_language_processing.utils import tokenizer_trim_middle
-from onyx.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT1
-from onyx.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT2
-from onyx.prompts.chat_prompts import DOCUMENT_SUMMARY_PROMPT
 from onyx.utils.logger import setup_logger
-from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from onyx.utils.timing import log_function_time
 from shared_configs.configs import (
     INDEXING_INFORMATION_CONTENT_CLASSIFICATION_CUTOFF_LENGTH,
@@ -96,6 +94,8 @@ class DocumentBatchPrepareContext(BaseModel):
     updatable_docs: list[Document]
     id_to_db_doc_map: dict[str, DBDocument]
     indexable_docs: list[IndexingDocument] = []
+    # content hashes of the updatable docs, persisted once they are indexed
+    id_to_content_hash: dict[str, str] = {}
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
@@ -108,10 +108,20 @@ class IndexingPipelineResult(BaseModel):
     total_docs: int
     # number of chunks that were inserted into Vespa
     total_chunks: int
+    # number of chunks left untouched in Vespa because their content did not change
+    reused_chunks: int = 0
 
     failures: list[ConnectorFailure]
 
 
+class ChunkDiff(BaseModel):
+    # chunks that are new or changed and need to be embedded + written
+    chunks_to_embed: list[DocAwareChunk]
+    # chunks that are already in the document index exactly as produced
+    reused_chunks: list[DocAwareChunk]
+    doc_id_to_chunk_hashes: dict[str, dict[str, str]]
+
+
 class IndexingPipelineProtocol(Protocol):
     def __call__(
         self,
@@ -248,6 +258,139 @@ def get_doc_ids_to_update(
     return updatable_docs
 
 
+def get_docs_with_changed_content(
+    documents: list[Document],
+    db_docs: list[DBDocument],
+    id_to_content_hash: dict[str, str],
+    search_settings_id: int | None,
+) -> list[Document]:
+    """Filters out documents whose content hash matches the hash stored at the end
+    of their last successful indexing into the index of the given search settings.
+    Documents that never finished indexing (no stored hash or chunk count), or that
+    were last recorded for another index, are always kept."""
+    if search_settings_id is None:
+        return documents
+
+    id_to_stored_hash = {
+        doc.id: doc.content_hash
+        for doc in db_docs
+        if doc.content_hash
+        and doc.content_hash_search_settings_id == search_settings_id
+        and doc.chunk_count is not None
+    }
+
+    return [
+        doc
+        for doc in documents
+        if id_to_stored_hash.get(doc.id) != id_to_content_hash[doc.id]
+    ]
+
+
+def diff_chunks_against_stored_hashes(
+    chunks: list[DocAwareChunk],
+    id_to_db_doc_map: dict[str, DBDocument],
+    reuse_unchanged_chunks: bool,
+    search_settings_id: int | None,
+) -> ChunkDiff:
+    """Hashes every chunk and, if enabled, splits out the chunks whose hash matches
+    the one stored for the same position at the end of the last successful indexing.
+
+    Chunk IDs in the document index are derived from the document ID and the chunk
+    position, so a reused chunk is simply not rewritten. Only documents with a
+    complete previous indexing (content hash, chunk count and chunk hashes all
+    recorded) into the index of the given search settings are eligible, the
+    chunker, large chunks and embedding model differ between indices."""
+    doc_id_to_metadata_hash: dict[str, str] = {}
+    doc_id_to_chunk_hashes: dict[str, dict[str, str]] = defaultdict(dict)
+    chunks_to_embed: list[DocAwareChunk] = []
+    reused_chunks: list[DocAwareChunk] = []
+
+    for chunk in chunks:
+        document = chunk.source_document
+        if document.id not in doc_id_to_metadata_hash:
+            doc_id_to_metadata_hash[document.id] = compute_document_metadata_hash(
+                document
+            )
+
+        chunk_key = get_chunk_hash_key(chunk)
+        chunk_hash = compute_chunk_content_hash(
+            chunk, doc_id_to_metadata_hash[document.id]
+        )
+        doc_id_to_chunk_hashes[document.id][chunk_key] = chunk_hash
+
+        db_doc = id_to_db_doc_map.get(document.id)
+        if (
+            reuse_unchanged_chunks
+            and search_settings_id is not None
+            and db_doc is not None
+            and db_doc.content_hash_search_settings_id == search_settings_id
+            and db_doc.content_hash is not None
+            and db_doc.chunk_count is not None
+            and db_doc.chunk_hashes is not None
+            and db_doc.chunk_hashes.get(chunk_key) == chunk_hash
+        ):
+            reused_chunks.append(chunk)
+        else:
+            chunks_to_embed.append(chunk)
+
+    return ChunkDiff(
+        chunks_to_embed=chunks_to_embed,
+        reused_chunks=reused_chunks,
+        doc_id_to_chunk_hashes=dict(doc_id_to_chunk_hashes),
+    )
+
+
+def update_doc_updated_at_of_reused_chunks(
+    document_index: DocumentIndex,
+    reused_chunks: list[DocAwareChunk],
+    id_to_db_doc_map: dict[str, DBDocument],
+    doc_id_to_new_chunk_cnt: dict[str, int],
+    tenant_id: str,
+) -> list[ConnectorFailure]:
+    """Reused chunks aren't rewritten, so they still carry the doc_updated_at of the
+    previous indexing. The chunk hashes leave doc_updated_at out since connectors bump
+    it with every edit, instead the docs whose doc_updated_at moved get it updated in
+    place on all of their chunks."""
+    documents = {
+        chunk.source_document.id: chunk.source_document for chunk in reused_chunks
+    }
+
+    failures: list[ConnectorFailure] = []
+    for doc_id, document in documents.items():
+        db_doc = id_to_db_doc_map.get(doc_id)
+        if document.doc_updated_at is None or (
+            db_doc is not None and db_doc.doc_updated_at == document.doc_updated_at
+        ):
+            continue
+
+        try:
+            document_index.update_single(
+                doc_id,
+                chunk_count=doc_id_to_new_chunk_cnt[doc_id],
+                tenant_id=tenant_id,
+                fields=VespaDocumentFields(doc_updated_at=document.doc_updated_at),
+                user_fields=None,
+            )
+        except Exception as e:
+            logger.exception(
+                f"Failed to update doc_updated_at of the reused chunks of '{doc_id}'"
+            )
+            failures.append(
+                ConnectorFailure(
+                    failed_document=DocumentFailure(
+                        document_id=doc_id,
+                        document_link=(
+                            document.sections[0].link if document.sections else None
+                        ),
+                    ),
+                    failure_message=str(e),
+                    exception=e,
+                )
+            )
+
+    return failures
+
+
 def index_doc_batch_with_handler(
     *,
     chunker: Chunker,
@@ -259,6 +402,8 @@ def index_doc_batch_with_handler(
     db_session: Session,
     tenant_id: str,
     ignore_time_skip: bool = False,
+    skip_unchanged_content: bool = False,
+    reuse_unchanged_chunks: bool = False,
     enable_contextual_rag: bool = False,
     llm: LLM | None = None,
 ) -> IndexingPipelineResult:
@@ -272,6 +417,8 @@ def index_doc_batch_with_handler(
             index_attempt_metadata=index_attempt_metadata,
             db_session=db_session,
             ignore_time_skip=ignore_time_skip,
+            skip_unchanged_content=skip_unchanged_content,
+            reuse_unchanged_chunks=reuse_unchanged_chunks,
             tenant_id=tenant_id,
             enable_contextual_rag=enable_contextual_rag,
             llm=llm,
@@ -312,6 +459,7 @@ def index_doc_batch_prepare(
     index_attempt_metadata: IndexAttemptMetadata,
     db_session: Session,
     ignore_time_skip: bool = False,
+    skip_unchanged_content: bool = False,
 ) -> DocumentBatchPrepareContext | None:
     """Sets up the documents in the relational DB (source of truth) for permissions, metadata, etc.
     This preceeds indexing it into the actual document index."""
@@ -338,6 +486,43 @@ def index_doc_batch_prepare(
             f"because they are up to date. Skipped doc IDs: {skipped_doc_ids}"
         )
 
+    # Connectors frequently re-yield documents whose content did not change
+    # (overlapping poll windows, bumped timestamps, retries). Compare against the
+    # hash stored at the end of the last successful indexing to avoid
+    # re-chunking / re-embedding them.
+    id_to_content_hash = {
+        doc.id: compute_document_content_hash(doc) for doc in updatable_docs
+    }
+    if skip_unchanged_content and updatable_docs:
+        changed_docs = get_docs_with_changed_content(
+            documents=updatable_docs,
+            db_docs=db_docs,
+            id_to_content_hash=id_to_content_hash,
+            search_settings_id=index_attempt_metadata.search_settings_id,
+        )
+        if len(changed_docs) != len(updatable_docs):
+            changed_doc_ids = {doc.id for doc in changed_docs}
+            unchanged_docs = [
+                doc for doc in updatable_docs if doc.id not in changed_doc_ids
+            ]
+            logger.info(
+                f"Skipping {len(unchanged_docs)} documents "
+                f"because their content is unchanged. "
+                f"Skipped doc IDs: {[doc.id for doc in unchanged_docs]}"
+            )
+
+            # keep the source's notion of when the doc was last updated current,
+            # so the time based skip above can catch these docs next time
+            update_docs_updated_at__no_commit(
+                ids_to_new_updated_at={
+                    doc.id: doc.doc_updated_at
+                    for doc in unchanged_docs
+                    if doc.doc_updated_at
+                },
+                db_session=db_session,
+            )
+            updatable_docs = changed_docs
+
     # for all updatable docs, upsert into the DB
     # Does not include doc_updated_at which is also used to indicate a successful update
     if updatable_docs:
@@ -353,20 +538,33 @@ def index_doc_batch_prepare(
     )
 
     # for all docs, upsert the document to cc pair relationship
-    upsert_document_by_connector_credential_pair(
+    newly_paired_doc_ids = upsert_document_by_connector_credential_pair(
         db_session,
         index_attempt_metadata.connector_id,
         index_attempt_metadata.credential_id,
         document_ids,
     )
 
+    # skipped docs that are new to this cc pair aren't reindexed, so flag them for
+    # the Vespa sync to pick up the access / document sets of the new cc pair
+    updatable_doc_ids_set = {doc.id for doc in updatable_docs}
+    newly_paired_skipped_doc_ids = [
+        doc_id for doc_id in newly_paired_doc_ids if doc_id not in updatable_doc_ids_set
+    ]
+    if newly_paired_skipped_doc_ids:
+        update_docs_last_modified__no_commit(
+            document_ids=newly_paired_skipped_doc_ids, db_session=db_session
+        )
+
     # No docs to process because the batch is empty or every doc was already indexed
     if not updatable_docs:
         return None
 
     id_to_db_doc_map = {doc.id: doc for doc in db_docs}
     return DocumentBatchPrepareContext(
-        updatable_docs=updatable_docs, id_to_db_doc_map=id_to_db_doc_map
+        updatable_docs=updatable_docs,
+        id_to_db_doc_map=id_to_db_doc_map,
+        id_to_content_hash=id_to_content_hash,
     )
 
 
@@ -537,142 +735,6 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
     return indexed_documents
 
 
-def add_document_summaries(
-    chunks_by_doc: list[DocAwareChunk],
-    llm: LLM,
-    tokenizer: BaseTokenizer,
-    trunc_doc_tokens: int,
-) -> list[int] | None:
-    """
-    Adds a document summary to a list of chunks from the same document.
-    Returns the number of tokens in the document.
-    """
-
-    doc_tokens = []
-    # this is value is the same for each chunk in the document; 0 indicates
-    # There is not enough space for contextual RAG (the chunk content
-    # and possibly metadata took up too much space)
-    if chunks_by_doc[0].contextual_rag_reserved_tokens == 0:
-        return None
-
-    doc_tokens = tokenizer.encode(chunks_by_doc[0].source_document.get_text_content())
-    doc_content = tokenizer_trim_middle(doc_tokens, trunc_doc_tokens, tokenizer)
-    summary_prompt = DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
-    doc_summary = message_to_string(
-        llm.invoke(summary_prompt, max_tokens=MAX_CONTEXT_TOKENS)
-    )
-
-    for chunk in chunks_by_doc:
-        chunk.doc_summary = doc_summary
-
-    return doc_tokens
-
-
-def add_chunk_summaries(
-    chunks_by_doc: list[DocAwareChunk],
-    llm: LLM,
-    tokenizer: BaseTokenizer,
-    trunc_doc_chunk_tokens: int,
-    doc_tokens: list[int] | None,
-) -> None:
-    """
-    Adds chunk summaries to the chunks grouped by document id.
-    Chunk summaries look at the chunk as well as the entire document (or a summary,
-    if the document is too long) and describe how the chunk relates to the document.
-    """
-    # all chunks within a document have the same contextual_rag_reserved_tokens
-    if chunks_by_doc[0].contextual_rag_reserved_tokens == 0:
-        return
-
-    # use values computed in above doc summary section if available
-    doc_tokens = doc_tokens or tokenizer.encode(
-        chunks_by_doc[0].source_document.get_text_content()
-    )
-    doc_content = tokenizer_trim_middle(doc_tokens, trunc_doc_chunk_tokens, tokenizer)
-
-    # only compute doc summary if needed
-    doc_info = (
-        doc_content
-        if len(doc_tokens) <= MAX_TOKENS_FOR_FULL_INCLUSION
-        else chunks_by_doc[0].doc_summary
-    )
-    if not doc_info:
-        # This happens if the document is too long AND document summaries are turned off
-        # In this case we compute a doc summary using the LLM
-        doc_info = message_to_string(
-            llm.invoke(
-                DOCUMENT_SUMMARY_PROMPT.format(document=doc_content),
-                max_tokens=MAX_CONTEXT_TOKENS,
-            )
-        )
-
-    context_prompt1 = CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
-
-    def assign_context(chunk: DocAwareChunk) -> None:
-        context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
-        try:
-            chunk.chunk_context = message_to_string(
-                llm.invoke(
-                    context_prompt1 + context_prompt2,
-                    max_tokens=MAX_CONTEXT_TOKENS,
-                )
-            )
-        except LLMRateLimitError as e:
-            # Erroring during chunker is undesirable, so we log the error and continue
-            # TODO: for v2, add robust retry logic
-            logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
-        except Exception as e:
-            logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
-
-    run_functions_tuples_in_parallel(
-        [(assign_context, (chunk,)) for chunk in chunks_by_doc]
-    )
-
-
-def add_contextual_summaries(
-    chunks: list[DocAwareChunk],
-    llm: LLM,
-    tokenizer: BaseTokenizer,
-    chunk_token_limit: int,
-) -> list[DocAwareChunk]:
-    """
-    Adds Document summary and chunk-within-document context to the chunks
-    based on which environment variables are set.
-    """
-    doc2chunks = defaultdict(list)
-    for chunk in chunks:
-        doc2chunks[chunk.source_document.id].append(chunk)
-
-    # The number of tokens allowed for the document when computing a document summary
-    trunc_doc_summary_tokens = llm.config.max_input_tokens - len(
-        tokenizer.encode(DOCUMENT_SUMMARY_PROMPT)
-    )
-
-    prompt_tokens = len(
-        tokenizer.encode(CONTEXTUAL_RAG_PROMPT1 + CONTEXTUAL_RAG_PROMPT2)
-    )
-    # The number of tokens allowed for the document when computing a
-    # "chunk in context of document" summary
-    trunc_doc_chunk_tokens = (
-        llm.config.max_input_tokens - prompt_tokens - chunk_token_limit
-    )
-    for chunks_by_doc in doc2chunks.values():
-        doc_tokens = None
-        if USE_DOCUMENT_SUMMARY:
-            doc_tokens = add_document_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens
-            )
-
-        if USE_CHUNK_SUMMARY:
-            add_chunk_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_chunk_tokens, doc_tokens
-            )
-
-    return chunks
-
-
 @log_function_time(debug_only=True)
 def index_doc_batch(
     *,
@@ -687,6 +749,8 @@ def index_doc_batch(
     enable_contextual_rag: bool = False,
     llm: LLM | None = None,
     ignore_time_skip: bool = False,
+    skip_unchanged_content: bool = False,
+    reuse_unchanged_chunks: bool = False,
     filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
 ) -> IndexingPipelineResult:
     """Takes different pieces of the indexing pipeline and applies it to a batch of documents
@@ -710,6 +774,7 @@ def index_doc_batch(
         documents=filtered_documents,
         index_attempt_metadata=index_attempt_metadata,
         ignore_time_skip=ignore_time_skip,
+        skip_unchanged_content=skip_unchanged_content,
         db_session=db_session,
     )
     if not ctx:
@@ -766,17 +831,38 @@ def index_doc_batch(
             chunk_token_limit=chunker.chunk_token_limit * 2,
         )
 
+    chunk_diff = diff_chunks_against_stored_hashes(
+        chunks=chunks,
+        id_to_db_doc_map=ctx.id_to_db_doc_map,
+        reuse_unchanged_chunks=reuse_unchanged_chunks,
+        search_settings_id=index_attempt_metadata.search_settings_id,
+    )
+
     logger.debug("Starting embedding")
     chunks_with_embeddings, embedding_failures = (
         embed_chunks_with_failure_handling(
-            chunks=chunks,
+            chunks=chunk_diff.chunks_to_embed,
             embedder=embedder,
             tenant_id=tenant_id,
             request_id=index_attempt_metadata.request_id,
         )
-        if chunks
+        if chunk_diff.chunks_to_embed
         else ([], [])
     )
+    embedding_failure_doc_ids = {
+        record.failed_document.document_id
+        for record in embedding_failures
+        if record.failed_document
+    }
+    # reused chunks of a doc that failed to embed are dropped along with the rest
+    # of the doc, same as if they had been embedded
+    reused_chunks = [
+        chunk
+        for chunk in chunk_diff.reused_chunks
+        if chunk.source_document.id not in embedding_failure_doc_ids
+    ]
+    # every chunk that will be in the document index for a doc after this batch
+    all_doc_chunks: list[DocAwareChunk] = [*chunks_with_embeddings, *reused_chunks]
 
     chunk_content_scores = (
         _get_aggregated_chunk_boost_factor(
@@ -831,7 +917,7 @@ def index_doc_batch(
             document_id: len(
                 [
                     chunk
-                    for chunk in chunks_with_embeddings
+                    for chunk in all_doc_chunks
                     if chunk.source_document.id == document_id
                 ]
             )
@@ -861,8 +947,9 @@ def index_doc_batch(
 
             document_chunks = [
                 chunk
-                for chunk in chunks_with_embeddings
+                for chunk in chunks
                 if chunk.source_document.id == document_id
+                and document_id not in embedding_failure_doc_ids
             ]
             if document_chunks:
                 combined_content = " ".join(
@@ -926,6 +1013,54 @@ def index_doc_batch(
             ),
         )
 
+        # docs with every remaining chunk reused have nothing written, but their
+        # stale trailing chunks are still cleaned up via the chunk counts above
+        written_doc_ids = {chunk.source_document.id for chunk in access_aware_chunks}
+        insertion_records.extend(
+            DocumentInsertionRecord(document_id=doc_id, already_existed=True)
+            for doc_id in {chunk.source_document.id for chunk in reused_chunks}
+            - written_doc_ids
+        )
+
+        # failed docs are retried in full, reused chunks included
+        vector_db_write_failure_doc_ids = {
+            record.failed_document.document_id
+            for record in vector_db_write_failures
+            if record.failed_document
+        }
+        vector_db_write_failures.extend(
+            update_doc_updated_at_of_reused_chunks(
+                document_index=document_index,
+                reused_chunks=[
+                    chunk
+                    for chunk in reused_chunks
+                    if chunk.source_document.id not in vector_db_write_failure_doc_ids
+                ],
+                id_to_db_doc_map=ctx.id_to_db_doc_map,
+                doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
+                tenant_id=tenant_id,
+            )
+        )
+
+        if reuse_unchanged_chunks:
+            doc_id_to_reused_chunk_cnt: dict[str, int] = defaultdict(int)
+            for chunk in reused_chunks:
+                doc_id_to_reused_chunk_cnt[chunk.source_document.id] += 1
+
+            for document_id in updatable_ids:
+                new_chunk_cnt = doc_id_to_new_chunk_cnt[document_id]
+                reused_chunk_cnt = doc_id_to_reused_chunk_cnt[document_id]
+                deleted_chunk_cnt = max(
+                    doc_id_to_previous_chunk_cnt.get(document_id, 0) - new_chunk_cnt,
+                    0,
+                )
+                logger.info(
+                    f"Chunk diff: doc={document_id} "
+                    f"reused={reused_chunk_cnt} "
+                    f"new={new_chunk_cnt - reused_chunk_cnt} "
+                    f"deleted={deleted_chunk_cnt}"
+                )
+
         all_returned_doc_ids = (
             {record.document_id for record in insertion_records}
             .union(
@@ -984,6 +1119,34 @@ def index_doc_batch(
             db_session=db_session,
         )
 
+        # only record hashes for docs that made it into the index. Failed docs
+        # have their hashes cleared so that they are retried in full next time
+        failed_doc_ids = {
+            record.failed_document.document_id
+            for record in vector_db_write_failures + embedding_failures
+            if record.failed_document
+        }
+        update_docs_content_hash__no_commit(
+            ids_to_content_hash={
+                doc_id: (None if doc_id in failed_doc_ids else content_hash)
+                for doc_id, content_hash in ctx.id_to_content_hash.items()
+            },
+            search_settings_id=index_attempt_metadata.search_settings_id,
+            db_session=db_session,
+        )
+        update_docs_chunk_hashes__no_commit(
+            ids_to_chunk_hashes={
+                doc_id: (
+                    None
+                    if doc_id in failed_doc_ids
+                    else chunk_diff.doc_id_to_chunk_hashes.get(doc_id)
+                )
+                for doc_id in updatable_ids
+            },
+            search_settings_id=index_attempt_metadata.search_settings_id,
+            db_session=db_session,
+        )
+
         update_user_file_token_count__no_commit(
             user_file_id_to_token_count=user_file_id_to_token_count,
             db_session=db_session,
@@ -1015,6 +1178,7 @@ def index_doc_batch(
         new_docs=len([r for r in insertion_records if not r.already_existed]),
         total_docs=len(filtered_documents),
         total_chunks=len(access_aware_chunks),
+        reused_chunks=len(reused_chunks),
         failures=vector_db_write_failures + embedding_failures,
     )
 
@@ -1032,6 +1196,8 @@ def run_indexing_pipeline(
     tenant_id: str,
     chunker: Chunker | None = None,
     ignore_time_skip: bool = False,
+    skip_unchanged_content: bool = False,
+    reuse_unchanged_chunks: bool = False,
 ) -> IndexingPipelineResult:
     """Builds a pipeline which takes in a list (batch) of docs and indexes them."""
     all_search_settings = get_active_search_settings(db_session)
@@ -1072,6 +1238,8 @@ def run_indexing_pipeline(
         document_batch=document_batch,
         index_attempt_metadata=index_attempt_metadata,
         ignore_time_skip=ignore_time_skip,
+        skip_unchanged_content=skip_unchanged_content,
+        reuse_unchanged_chunks=reuse_unchanged_chunks,
         db_session=db_session,
         tenant_id=tenant_id,
         enable_contextual_rag=enable_contextual_rag,
@@ -1,21 +1,30 @@
 import time
+import uuid
+from collections import defaultdict
 from collections.abc import Generator
+from datetime import datetime
+from typing import Any
 from typing import cast
 
+from pydantic import BaseModel
 from rapidfuzz.fuzz import ratio
+from rapidfuzz.process import extractOne
 from redis.lock import Lock as RedisLock
-from sqlalchemy import func
-from sqlalchemy import text
 
 from onyx.background.celery.tasks.kg_processing.utils import extend_lock
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.kg_configs import KG_CLUSTERING_ENTITY_BATCH_SIZE
 from onyx.configs.kg_configs import KG_CLUSTERING_RETRIEVE_THRESHOLD
 from onyx.configs.kg_configs import KG_CLUSTERING_THRESHOLD
+from onyx.db.document import update_documents_kg_info
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.entities import get_entities_by_id_names
+from onyx.db.entities import get_similar_entities_batch
+from onyx.db.entities import insert_entities_batch
 from onyx.db.entities import KGEntity
 from onyx.db.entities import KGEntityExtractionStaging
-from onyx.db.entities import merge_entities
-from onyx.db.entities import transfer_entity
+from onyx.db.entities import mark_staging_entities_transferred
+from onyx.db.entities import update_entities_batch
 from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.kg_config import validate_kg_settings
 from onyx.db.models import Document
@@ -31,36 +40,44 @@ from onyx.document_index.vespa.kg_interactions import (
 )
 from onyx.document_index.vespa.kg_interactions import update_kg_chunks_vespa_info
 from onyx.kg.models import KGGroundingType
+from onyx.kg.models import KGStage
+from onyx.kg.utils.formatting_utils import make_entity_id
 from onyx.kg.utils.formatting_utils import make_relationship_id
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
-from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA
 
 logger = setup_logger()
 
 
 def _get_batch_untransferred_grounded_entities(
     batch_size: int,
-) -> Generator[list[KGEntityExtractionStaging], None, None]:
+) -> Generator[list[tuple[KGEntityExtractionStaging, str | None]], None, None]:
+    """Yields batches of untransferred grounded staging entities along with the
+    semantic id of their document (if any). Entities must be transferred before
+    the next batch is requested."""
     while True:
         with get_session_with_current_tenant() as db_session:
-            batch = (
-                db_session.query(KGEntityExtractionStaging)
+            batch = cast(
+                list[tuple[KGEntityExtractionStaging, str | None]],
+                db_session.query(KGEntityExtractionStaging, Document.semantic_id)
                 .join(
                     KGEntityType,
                     KGEntityExtractionStaging.entity_type_id_name
                     == KGEntityType.id_name,
                 )
+                .outerjoin(
+                    Document, KGEntityExtractionStaging.document_id == Document.id
+                )
                 .filter(
                     KGEntityType.grounding == KGGroundingType.GROUNDED,
                     KGEntityExtractionStaging.transferred_id_name.is_(None),
                 )
                 .limit(batch_size)
-                .all()
+                .all(),
             )
             if not batch:
                 break
-            yield batch
+            yield [(entity, semantic_id) for entity, semantic_id in batch]
 
 
 def _get_batch_untransferred_relationship_types(
@@ -144,78 +161,335 @@ def _get_batch_kg_processed_documents(
             offset += batch_size
 
 
-def _cluster_one_grounded_entity(
-    entity: KGEntityExtractionStaging,
-) -> tuple[KGEntity, bool]:
-    """
-    Cluster a single grounded entity.
-    """
-    with get_session_with_current_tenant() as db_session:
-        # get entity name and filtering conditions
-        if entity.document_id is not None:
-            entity_name = cast(
-                str,
-                db_session.query(Document.semantic_id)
-                .filter(Document.id == entity.document_id)
-                .scalar(),
-            ).lower()
-            filtering = [KGEntity.document_id.is_(None)]
-        else:
-            entity_name = entity.name.lower()
-            filtering = []
+class _ClusterTarget(BaseModel):
+    """Planned state of a normalized entity that staged entities are clustered into"""
+
+    id_name: str
+    name: str
+    entity_type_id_name: str
+    document_id: str | None
+    alternative_names: list[str]
+    occurrences: int
+    attributes: dict[str, Any]
+    entity_key: str | None
+    parent_key: str | None
+    event_time: datetime | None = None
+    # not yet in the normalized table
+    is_new: bool
+    # changed after being loaded / created
+    is_modified: bool = False
+    # column values to insert for new targets, taken before any merges
+    insert_values: dict[str, Any] | None = None
+
+    def update_values(self) -> dict[str, Any]:
+        return {
+            "id_name": self.id_name,
+            "document_id": self.document_id,
+            "alternative_names": self.alternative_names,
+            "occurrences": self.occurrences,
+            "attributes": self.attributes,
+            "entity_key": self.entity_key,
+            "parent_key": self.parent_key,
+            "event_time": self.event_time,
+        }
+
+
+class _EntityClusteringPlan(BaseModel):
+    targets: list[_ClusterTarget]
+    # staging entity id_name -> target id_name
+    staging_to_target_id_names: dict[str, str]
+    # documents whose entity got normalized
+    normalized_document_ids: set[str]
+
+
+def _get_entity_match_name(
+    entity: KGEntityExtractionStaging, document_semantic_id: str | None
+) -> str:
+    # matches the name the kg_entity trigger stores for the entity
+    if entity.document_id is not None:
+        return (document_semantic_id or "").lower()
+    return entity.name.lower()
+
+
+def _target_from_entity(entity: KGEntity) -> _ClusterTarget:
+    return _ClusterTarget(
+        id_name=entity.id_name,
+        name=entity.name,
+        entity_type_id_name=entity.entity_type_id_name,
+        document_id=entity.document_id,
+        alternative_names=list(entity.alternative_names or []),
+        occurrences=entity.occurrences,
+        attributes=dict(entity.attributes or {}),
+        entity_key=entity.entity_key,
+        parent_key=entity.parent_key,
+        event_time=entity.event_time,
+        is_new=False,
+    )
+
+
+def _new_target_from_staging_entity(
+    entity: KGEntityExtractionStaging, match_name: str
+) -> _ClusterTarget:
+    """Same values as transfer_entity"""
+    target = _ClusterTarget(
+        id_name=make_entity_id(entity.entity_type_id_name, uuid.uuid4().hex[:20]),
+        name=match_name,
+        entity_type_id_name=entity.entity_type_id_name,
+        document_id=entity.document_id,
+        alternative_names=list(entity.alternative_names or []),
+        occurrences=entity.occurrences,
+        attributes=dict(entity.attributes or {}),
+        entity_key=entity.entity_key,
+        parent_key=entity.parent_key,
+        event_time=entity.event_time,
+        is_new=True,
+    )
+    target.insert_values = {
+        "id_name": target.id_name,
+        "name": entity.name.casefold(),
+        "entity_key": target.entity_key,
+        "parent_key": target.parent_key,
+        "alternative_names": list(target.alternative_names),
+        "entity_type_id_name": target.entity_type_id_name,
+        "document_id": target.document_id,
+        "occurrences": target.occurrences,
+        "attributes": dict(target.attributes),
+        "event_time": target.event_time,
+    }
+    return target
+
+
+def _merge_into_target(
+    target: _ClusterTarget, entity: KGEntityExtractionStaging
+) -> bool:
+    """Same semantics as merge_entities. Returns whether the target got its
+    document set by this merge."""
+    setting_doc = target.document_id is None and entity.document_id is not None
+    if setting_doc:
+        target.document_id = entity.document_id
+
+    alternative_names = set(target.alternative_names)
+    alternative_names.update(entity.alternative_names or [])
+    alternative_names.add(entity.name.lower())
+    alternative_names.discard(target.name)
+    target.alternative_names = sorted(alternative_names)
+
+    target.occurrences += entity.occurrences
+    target.attributes = target.attributes | (entity.attributes or {})
+    target.entity_key = target.entity_key or entity.entity_key
+    target.parent_key = target.parent_key or entity.parent_key
+    target.is_modified = True
+    return setting_doc
+
+
+def _fold_into_new_target(
+    target: _ClusterTarget, entity: KGEntityExtractionStaging
+) -> None:
+    """Same semantics as the conflict clause of transfer_entity"""
+    target.occurrences += entity.occurrences
+    target.attributes = target.attributes | (entity.attributes or {})
+    target.entity_key = target.entity_key or entity.entity_key
+    target.parent_key = target.parent_key or entity.parent_key
+    target.event_time = entity.event_time
+    target.is_modified = True
+
+
+def _resolved_target_update_values(
+    target: _ClusterTarget, stored_entity: KGEntity
+) -> dict[str, Any]:
+    """Update values that apply the changes planned on top of a new target to the
+    existing entity it resolved to. The conflict clause of the insert already
+    applied the target's insert values, the rest is applied on top of the stored
+    values as increments, so nothing the existing entity had is overwritten."""
+    insert_values = cast(dict[str, Any], target.insert_values)
+
+    alternative_names = set(stored_entity.alternative_names or [])
+    alternative_names.update(target.alternative_names)
+    alternative_names.discard(stored_entity.name)
+
+    return {
+        "id_name": stored_entity.id_name,
+        "document_id": stored_entity.document_id,
+        "alternative_names": sorted(alternative_names),
+        "occurrences": stored_entity.occurrences
+        + target.occurrences
+        - insert_values["occurrences"],
+        "attributes": dict(stored_entity.attributes or {}) | target.attributes,
+        "entity_key": stored_entity.entity_key or target.entity_key,
+        "parent_key": stored_entity.parent_key or target.parent_key,
+        "event_time": target.event_time,
+    }
+
+
+def _plan_entity_clustering(
+    entities: list[KGEntityExtractionStaging],
+    match_names: list[str],
+    similar_entities: list[list[KGEntity]],
+) -> _EntityClusteringPlan:
+    """Decides, for a batch of staged entities, which normalized entity each one is
+    merged into or whether it becomes a new one. Processes the batch in order and
+    gives the same result as clustering the entities one by one: entities created
+    or modified earlier in the batch are visible to later ones.
+
+    similar_entities holds the trigram candidates retrieved for each entity."""
+    targets: dict[str, _ClusterTarget] = {}
+    new_targets_by_type: dict[str, list[_ClusterTarget]] = defaultdict(list)
+    new_document_targets: dict[tuple[str, str], _ClusterTarget] = {}
+    staging_to_target_id_names: dict[str, str] = {}
+    normalized_document_ids: set[str] = set()
+
+    for entity, match_name, candidates in zip(entities, match_names, similar_entities):
+        best_target: _ClusterTarget | None = None
 
         # skip those with numbers so we don't cluster version1 and version2, etc.
-        similar_entities: list[KGEntity] = []
-        if not any(char.isdigit() for char in entity_name):
-            # find similar entities, uses GIN index, very efficient
-            db_session.execute(
-                text(
-                    "SET pg_trgm.similarity_threshold = "
-                    + str(KG_CLUSTERING_RETRIEVE_THRESHOLD)
-                )
-            )
-            similar_entities = (
-                db_session.query(KGEntity)
-                .filter(
-                    # find entities of the same type with a similar name
-                    *filtering,
-                    KGEntity.entity_type_id_name == entity.entity_type_id_name,
-                    getattr(func, POSTGRES_DEFAULT_SCHEMA).similarity_op(
-                        KGEntity.name, entity_name
-                    ),
-                )
-                .all()
+        if not any(char.isdigit() for char in match_name):
+            candidate_targets: dict[str, _ClusterTarget] = {}
+            for candidate in candidates:
+                if candidate.id_name not in targets:
+                    targets[candidate.id_name] = _target_from_entity(candidate)
+                candidate_targets[candidate.id_name] = targets[candidate.id_name]
+            for new_target in new_targets_by_type[entity.entity_type_id_name]:
+                candidate_targets.setdefault(new_target.id_name, new_target)
+
+            eligible_targets = [
+                target
+                for target in candidate_targets.values()
+                if not any(char.isdigit() for char in target.name)
+                and (entity.document_id is None or target.document_id is None)
+            ]
+            best_match = extractOne(
+                match_name,
+                [target.name for target in eligible_targets],
+                scorer=ratio,
+                score_cutoff=KG_CLUSTERING_THRESHOLD * 100,
             )
+            if best_match is not None:
+                best_target = eligible_targets[best_match[2]]
+
+        if best_target is not None:
+            logger.debug(f"Merged {entity.name} with {best_target.name}")
+            if _merge_into_target(best_target, entity) and entity.document_id:
+                normalized_document_ids.add(entity.document_id)
+        elif (
+            entity.document_id is not None
+            and (entity.entity_type_id_name, entity.document_id) in new_document_targets
+        ):
+            best_target = new_document_targets[
+                (entity.entity_type_id_name, entity.document_id)
+            ]
+            _fold_into_new_target(best_target, entity)
+        else:
+            best_target = _new_target_from_staging_entity(entity, match_name)
+            targets[best_target.id_name] = best_target
+            new_targets_by_type[entity.entity_type_id_name].append(best_target)
+            if entity.document_id is not None:
+                new_document_targets[
+                    (entity.entity_type_id_name, entity.document_id)
+                ] = best_target
+                normalized_document_ids.add(entity.document_id)
+
+        staging_to_target_id_names[entity.id_name] = best_target.id_name
+
+    return _EntityClusteringPlan(
+        targets=list(targets.values()),
+        staging_to_target_id_names=staging_to_target_id_names,
+        normalized_document_ids=normalized_document_ids,
+    )
+
+
+def _cluster_grounded_entity_batch(
+    batch: list[tuple[KGEntityExtractionStaging, str | None]],
+) -> None:
+    """Clusters a batch of grounded staging entities with a constant number of
+    statements: one candidate retrieval, one insert, one update of the modified
+    normalized entities, one update of the staging entities and one of the
+    documents."""
+    entities = [entity for entity, _ in batch]
+    match_names = [
+        _get_entity_match_name(entity, semantic_id) for entity, semantic_id in batch
+    ]
 
-    # find best match
-    best_score = -1.0
-    best_entity = None
-    for similar in similar_entities:
-        # skip those with numbers so we don't cluster version1 and version2, etc.
-        if any(char.isdigit() for char in similar.name):
-            continue
-        score = ratio(similar.name, entity_name)
-        if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
-            best_score = score
-            best_entity = similar
-
-    # if there is a match, update the entity, otherwise create a new one
     with get_session_with_current_tenant() as db_session:
-        if best_entity:
-            logger.debug(f"Merged {entity.name} with {best_entity.name}")
-            update_vespa = (
-                best_entity.document_id is None and entity.document_id is not None
-            )
-            transferred_entity = merge_entities(
-                db_session=db_session, parent=best_entity, child=entity
+        # only clusterable names need candidates; document entities can only be
+        # merged into entities that don't have a document yet
+        queries: list[tuple[str, str, bool]] = []
+        query_positions: list[int] = []
+        for i, (entity, match_name) in enumerate(zip(entities, match_names)):
+            if any(char.isdigit() for char in match_name):
+                continue
+            queries.append(
+                (
+                    match_name,
+                    entity.entity_type_id_name,
+                    entity.document_id is not None,
+                )
             )
-        else:
-            update_vespa = entity.document_id is not None
-            transferred_entity = transfer_entity(db_session=db_session, entity=entity)
+            query_positions.append(i)
+
+        similar_entities: list[list[KGEntity]] = [[] for _ in entities]
+        for position, candidates in zip(
+            query_positions,
+            get_similar_entities_batch(
+                db_session,
+                queries=queries,
+                similarity_threshold=KG_CLUSTERING_RETRIEVE_THRESHOLD,
+            ),
+        ):
+            similar_entities[position] = candidates
 
-        db_session.commit()
+        plan = _plan_entity_clustering(entities, match_names, similar_entities)
 
-    return transferred_entity, update_vespa
+        # insert the new entities, rows that conflict with an existing entity of
+        # the same document resolve to the existing entity
+        new_targets = [target for target in plan.targets if target.is_new]
+        resolved_id_names = insert_entities_batch(
+            db_session,
+            [cast(dict[str, Any], target.insert_values) for target in new_targets],
+        )
+
+        # changes planned on top of a new entity that turned out to already exist
+        # are applied on top of the existing entity's values. Its row is locked by
+        # the insert, so these are current
+        resolved_targets = {
+            resolved_id_names[target.id_name]: target
+            for target in new_targets
+            if target.is_modified
+            and resolved_id_names[target.id_name] != target.id_name
+        }
+        update_entities_batch(
+            db_session,
+            [
+                target.update_values()
+                for target in plan.targets
+                if target.is_modified
+                and resolved_id_names.get(target.id_name, target.id_name)
+                == target.id_name
+            ]
+            + [
+                _resolved_target_update_values(
+                    resolved_targets[stored_entity.id_name], stored_entity
+                )
+                for stored_entity in get_entities_by_id_names(
+                    db_session, list(resolved_targets)
+                )
+            ],
+        )
+
+        mark_staging_entities_transferred(
+            db_session,
+            {
+                staging_id_name: resolved_id_names.get(id_name, id_name)
+                for staging_id_name, id_name in plan.staging_to_target_id_names.items()
+            },
+        )
+
+        update_documents_kg_info(
+            db_session,
+            document_ids=sorted(plan.normalized_document_ids),
+            kg_stage=KGStage.NORMALIZED,
+        )
+
+        db_session.commit()
 
 
 def _create_one_parent_child_relationship(entity: KGEntityExtractionStaging) -> None:
@@ -319,24 +593,23 @@ def kg_clustering(
 
     last_lock_time = time.monotonic()
 
-    # Cluster and transfer grounded entities sequentially
+    # Cluster and transfer grounded entities, a batch at a time. Batches are
+    # processed sequentially as each batch can merge into entities from the last.
     start_time = time.monotonic()
-    i_batch = 0
-    for i_batch, untransferred_grounded_entities in enumerate(
-        _get_batch_untransferred_grounded_entities(
-            batch_size=processing_chunk_batch_size
-        )
+    num_entities = 0
+    for untransferred_grounded_entities in _get_batch_untransferred_grounded_entities(
+        batch_size=KG_CLUSTERING_ENTITY_BATCH_SIZE
     ):
-        for entity in untransferred_grounded_entities:
-            _cluster_one_grounded_entity(entity)
+        _cluster_grounded_entity_batch(untransferred_grounded_entities)
+        num_entities += len(untransferred_grounded_entities)
         last_lock_time = extend_lock(
             lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
         )
-        # logger.debug(f"Transferred entities batch {i}")
     # NOTE: we assume every entity is transferred, as we currently only have grounded entities
     time_delta = time.monotonic() - start_time
     logger.info(
-        f"Finished transferring {i_batch+1} entity batches in {time_delta:.2f}s"
+        f"Finished transferring {num_entities} entities in {time_delta:.2f}s "
+        f"({num_entities / max(time_delta, 1e-6):.1f} entities/s)"
     )
 
     # Create parent-child relationships in parallel
@@ -0,0 +1,301 @@
+import re
+import threading
+import time
+from collections import Counter
+from collections import defaultdict
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timedelta
+from operator import itemgetter
+from typing import Any
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from onyx.configs.kg_configs import KG_NORMALIZATION_INDEX_FULL_RELOAD_INTERVAL
+from onyx.configs.kg_configs import KG_NORMALIZATION_INDEX_IDLE_TTL
+from onyx.configs.kg_configs import KG_NORMALIZATION_INDEX_MAX_TENANTS
+from onyx.configs.kg_configs import KG_NORMALIZATION_INDEX_REFRESH_INTERVAL
+from onyx.db.engine.sql_engine import get_session_with_tenant
+from onyx.db.entities import get_entities_for_name_index
+from onyx.db.entities import get_entity_counts_by_type
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorName
+from onyx.utils.threadpool_concurrency import get_executor
+
+logger = setup_logger()
+
+
+# time_updated is set at transaction start, so rows committed shortly after a
+# refresh can carry an earlier timestamp. Re-reading an overlap is harmless as
+# applying an entity to the index is idempotent.
+_WATERMARK_OVERLAP = timedelta(minutes=5)
+
+_word_regex = re.compile(r"[^\W_]+")
+
+
+def get_name_trigrams(cleaned_name: str) -> set[str]:
+    """Same trigrams as pg_trgm's show_trgm, which the kg_entity trigger uses
+    to populate name_trigrams."""
+    trigrams: set[str] = set()
+    for word in _word_regex.findall(cleaned_name.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+class IndexedEntity(NamedTuple):
+    id_name: str
+    name: str
+    document_id: str | None
+    subtype: str | None
+    trigrams: frozenset[str]
+
+
+class EntityTypeNameIndex:
+    """Inverted trigram index over the names of the entities of one entity type"""
+
+    def __init__(self) -> None:
+        self.entities: dict[str, IndexedEntity] = {}
+        self.postings: dict[str, set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def upsert(self, entity: IndexedEntity) -> None:
+        self.remove(entity.id_name)
+        self.entities[entity.id_name] = entity
+        for trigram in entity.trigrams:
+            self.postings[trigram].add(entity.id_name)
+
+    def remove(self, id_name: str) -> None:
+        entity = self.entities.pop(id_name, None)
+        if entity is None:
+            return
+        for trigram in entity.trigrams:
+            posting = self.postings[trigram]
+            posting.discard(id_name)
+            if not posting:
+                del self.postings[trigram]
+
+    def search(
+        self, query_trigrams: set[str], subtype: str | None = None
+    ) -> list[tuple[IndexedEntity, float]]:
+        """Entities sharing at least one trigram with the query, scored by
+        | Q ∩ E | / min(|Q|, |E|) and sorted by descending score."""
+        overlaps: Counter[str] = Counter()
+        for trigram in query_trigrams:
+            overlaps.update(self.postings.get(trigram, ()))
+
+        num_query_trigrams = len(query_trigrams)
+        results: list[tuple[IndexedEntity, float]] = []
+        for id_name, overlap in overlaps.items():
+            entity = self.entities[id_name]
+            if subtype is not None and entity.subtype != subtype:
+                continue
+            score = overlap / min(num_query_trigrams, len(entity.trigrams))
+            results.append((entity, score))
+        results.sort(key=itemgetter(1), reverse=True)
+        return results
+
+
+def _row_to_indexed_entity(row: Any) -> IndexedEntity:
+    return IndexedEntity(
+        id_name=row.id_name,
+        name=row.name,
+        document_id=row.document_id,
+        subtype=row.subtype,
+        trigrams=frozenset(row.name_trigrams or ()),
+    )
+
+
+def _build_type_indexes(
+    rows: list[Any],
+    type_indexes: dict[str, EntityTypeNameIndex],
+    watermark: datetime | None,
+) -> datetime | None:
+    """Applies the rows to the type indexes, returns the new watermark"""
+    for row in rows:
+        if row.time_updated is not None and (
+            watermark is None or row.time_updated > watermark
+        ):
+            watermark = row.time_updated
+        type_index = type_indexes.setdefault(
+            row.entity_type_id_name, EntityTypeNameIndex()
+        )
+        type_index.upsert(_row_to_indexed_entity(row))
+    return watermark
+
+
+class KGEntityNameIndex:
+    """In-memory trigram index over all normalized entities of a tenant, used to
+    retrieve normalization candidates without a database round trip.
+
+    Kept up to date by periodically applying the entities updated since the
+    last refresh. Entity types whose entity count no longer matches the database
+    (e.g. after entities were deleted) are reloaded, and everything is reloaded
+    every KG_NORMALIZATION_INDEX_FULL_RELOAD_INTERVAL seconds. Reloaded entity
+    types are built aside and swapped in, searches only wait for the swap."""
+
+    def __init__(self) -> None:
+        # guards the type indexes, held by searches
+        self._lock = threading.Lock()
+        # serializes refreshes, held while loading from the database
+        self._refresh_lock = threading.Lock()
+        self._type_indexes: dict[str, EntityTypeNameIndex] = {}
+        self._watermark: datetime | None = None
+        self._last_refresh: float | None = None
+        self._last_full_reload: float | None = None
+        self.refresh_pending = False
+        self.last_used = time.monotonic()
+
+    def _full_reload(self, db_session: Session) -> None:
+        type_indexes: dict[str, EntityTypeNameIndex] = {}
+        watermark = _build_type_indexes(
+            get_entities_for_name_index(db_session), type_indexes, None
+        )
+        with self._lock:
+            self._type_indexes = type_indexes
+            self._watermark = watermark
+        self._last_full_reload = time.monotonic()
+
+    def _incremental_refresh(self, db_session: Session) -> None:
+        updated_after = (
+            self._watermark - _WATERMARK_OVERLAP if self._watermark else None
+        )
+        rows = get_entities_for_name_index(db_session, updated_after)
+        counts = get_entity_counts_by_type(db_session)
+        with self._lock:
+            self._watermark = _build_type_indexes(
+                rows, self._type_indexes, self._watermark
+            )
+            stale_types = [
+                entity_type
+                for entity_type in set(counts) | set(self._type_indexes)
+                if entity_type not in self._type_indexes
+                or counts.get(entity_type, 0) != len(self._type_indexes[entity_type])
+            ]
+        if not stale_types:
+            return
+
+        logger.debug(f"Reloading entity name index for types {stale_types}")
+        reloaded_indexes: dict[str, EntityTypeNameIndex] = {
+            entity_type: EntityTypeNameIndex() for entity_type in stale_types
+        }
+        watermark = _build_type_indexes(
+            get_entities_for_name_index(db_session, entity_types=stale_types),
+            reloaded_indexes,
+            self._watermark,
+        )
+        with self._lock:
+            for entity_type, type_index in reloaded_indexes.items():
+                if len(type_index):
+                    self._type_indexes[entity_type] = type_index
+                else:
+                    self._type_indexes.pop(entity_type, None)
+            self._watermark = watermark
+
+    def is_loaded(self) -> bool:
+        return self._last_refresh is not None
+
+    def is_refresh_due(self) -> bool:
+        return (
+            self._last_refresh is None
+            or time.monotonic() - self._last_refresh
+            >= KG_NORMALIZATION_INDEX_REFRESH_INTERVAL
+        )
+
+    def refresh(self, db_session: Session, force: bool = False) -> None:
+        """Brings the index up to date if the refresh interval has elapsed (or
+        force is set)."""
+        with self._refresh_lock:
+            if not force and not self.is_refresh_due():
+                return
+
+            now = time.monotonic()
+
+            if (
+                self._last_full_reload is None
+                or now - self._last_full_reload
+                >= KG_NORMALIZATION_INDEX_FULL_RELOAD_INTERVAL
+            ):
+                self._full_reload(db_session)
+            else:
+                self._incremental_refresh(db_session)
+            self._last_refresh = now
+
+            logger.debug(
+                f"Refreshed entity name index with "
+                f"{sum(len(index) for index in self._type_indexes.values())} "
+                f"entities in {time.monotonic() - now:.2f}s"
+            )
+
+    def search(
+        self, entity_type: str, cleaned_name: str, subtype: str | None = None
+    ) -> list[tuple[IndexedEntity, float]]:
+        """Entities of the given type whose names share trigrams with cleaned_name,
+        sorted by descending trigram overlap score."""
+        query_trigrams = get_name_trigrams(cleaned_name)
+        if not query_trigrams:
+            return []
+        with self._lock:
+            type_index = self._type_indexes.get(entity_type)
+            if type_index is None:
+                return []
+            return type_index.search(query_trigrams, subtype)
+
+
+# least recently used last
+_tenant_indexes: OrderedDict[str, KGEntityNameIndex] = OrderedDict()
+_tenant_indexes_lock = threading.Lock()
+
+
+def _evict_tenant_indexes() -> None:
+    """Drops the indexes of tenants that haven't normalized anything recently, and
+    the least recently used ones beyond KG_NORMALIZATION_INDEX_MAX_TENANTS.
+    Callers hold _tenant_indexes_lock."""
+    now = time.monotonic()
+    while _tenant_indexes:
+        tenant_id, index = next(iter(_tenant_indexes.items()))
+        if (
+            len(_tenant_indexes) <= KG_NORMALIZATION_INDEX_MAX_TENANTS
+            and now - index.last_used < KG_NORMALIZATION_INDEX_IDLE_TTL
+        ):
+            break
+        del _tenant_indexes[tenant_id]
+
+
+def _refresh_tenant_index(tenant_id: str, index: KGEntityNameIndex) -> None:
+    try:
+        with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+            index.refresh(db_session)
+    except Exception:
+        logger.exception(f"Failed to refresh the entity name index of {tenant_id}")
+    finally:
+        index.refresh_pending = False
+
+
+def get_kg_entity_name_index(tenant_id: str) -> KGEntityNameIndex:
+    """Returns the tenant's entity name index. The first call for a tenant loads
+    it, later ones refresh it in the background when a refresh is due and return
+    the current index right away."""
+    with _tenant_indexes_lock:
+        index = _tenant_indexes.get(tenant_id)
+        if index is None:
+            index = _tenant_indexes[tenant_id] = KGEntityNameIndex()
+        _tenant_indexes.move_to_end(tenant_id)
+        index.last_used = time.monotonic()
+        _evict_tenant_indexes()
+
+        refresh_in_background = (
+            index.is_loaded() and index.is_refresh_due() and not index.refresh_pending
+        )
+        if refresh_in_background:
+            index.refresh_pending = True
+
+    if refresh_in_background:
+        get_executor(ExecutorName.IO).submit(_refresh_tenant_index, tenant_id, index)
+    elif not index.is_loaded():
+        with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+            index.refresh(db_session)
+    return index
@@ -1,26 +1,20 @@
 import re
 from collections import defaultdict
-from typing import cast
 
 import numpy as np
 from nltk import ngrams  # type: ignore
 from rapidfuzz.distance.DamerauLevenshtein import normalized_similarity
-from sqlalchemy import desc
-from sqlalchemy import Float
-from sqlalchemy import func
-from sqlalchemy import MetaData
-from sqlalchemy import select
-from sqlalchemy import String
-from sqlalchemy import Table
-from sqlalchemy.dialects.postgresql import ARRAY
 
 from onyx.configs.kg_configs import KG_NORMALIZATION_RERANK_LEVENSHTEIN_WEIGHT
 from onyx.configs.kg_configs import KG_NORMALIZATION_RERANK_NGRAM_WEIGHTS
 from onyx.configs.kg_configs import KG_NORMALIZATION_RERANK_THRESHOLD
 from onyx.configs.kg_configs import KG_NORMALIZATION_RETRIEVE_ENTITIES_LIMIT
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
-from onyx.db.models import KGEntity
+from onyx.db.kg_temp_view import get_allowed_document_ids
 from onyx.db.relationships import get_relationships_for_entity_type_pairs
+from onyx.kg.clustering.entity_name_index import get_kg_entity_name_index
+from onyx.kg.clustering.entity_name_index import IndexedEntity
+from onyx.kg.clustering.entity_name_index import KGEntityNameIndex
 from onyx.kg.models import NormalizedEntities
 from onyx.kg.models import NormalizedRelationships
 from onyx.kg.utils.embeddings import encode_string_batch
@@ -32,8 +26,7 @@ from onyx.kg.utils.formatting_utils import make_relationship_id
 from onyx.kg.utils.formatting_utils import split_entity_id
 from onyx.kg.utils.formatting_utils import split_relationship_id
 from onyx.utils.logger import setup_logger
-from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
-from shared_configs.configs import POSTGRES_DEFAULT_SCHEMA
+from shared_configs.contextvars import get_current_tenant_id
 
 logger = setup_logger()
 
@@ -54,107 +47,104 @@ def _clean_name(entity_name: str) -> str:
     )
 
 
-def _normalize_one_entity(
+def _get_entity_candidates(
+    entity_name_index: KGEntityNameIndex,
     entity: str,
     attributes: dict[str, str],
-    allowed_docs_temp_view_name: str | None = None,
-) -> str | None:
+) -> list[IndexedEntity]:
     """
-    Matches a single entity to the best matching entity of the same type.
+    Finds entities of the same type (and subtype, if requested) whose names are
+    similar to the entity's name, best trigram overlap first.
     """
     entity_type, entity_name = split_entity_id(entity)
-    if entity_name == "*":
-        return entity
+    return [
+        candidate
+        for candidate, _ in entity_name_index.search(
+            entity_type, _clean_name(entity_name), attributes.get("subtype")
+        )
+    ]
 
-    cleaned_entity = _clean_name(entity_name)
 
-    # narrow filter to subtype if requested
-    type_filters = [KGEntity.entity_type_id_name == entity_type]
-    if "subtype" in attributes:
-        type_filters.append(
-            KGEntity.attributes.op("@>")({"subtype": attributes["subtype"]})
-        )
+def _filter_allowed_candidates(
+    candidate_lists: list[list[IndexedEntity]],
+    allowed_docs_temp_view_name: str | None,
+    limit: int = KG_NORMALIZATION_RETRIEVE_ENTITIES_LIMIT,
+) -> list[list[IndexedEntity]]:
+    """
+    Keeps the first `limit` candidates of each list that are either not tied to a
+    document or tied to a document the user has access to. Document access is
+    looked up a window of candidates at a time, for all lists at once.
+    """
+    if not candidate_lists:
+        return []
+    if allowed_docs_temp_view_name is None:
+        raise ValueError("allowed_docs_temp_view_name is not available")
+
+    allowed_candidate_lists: list[list[IndexedEntity]] = [[] for _ in candidate_lists]
+    positions = [0] * len(candidate_lists)
+    checked_doc_ids: set[str] = set()
+    allowed_doc_ids: set[str] = set()
 
-    # step 1: find entities containing the entity_name or something similar
     with get_session_with_current_tenant() as db_session:
+        while True:
+            doc_ids_to_check: set[str] = set()
+            for i, (candidates, allowed_candidates) in enumerate(
+                zip(candidate_lists, allowed_candidate_lists)
+            ):
+                # consume candidates until we hit a document we haven't checked yet
+                while len(allowed_candidates) < limit and positions[i] < len(
+                    candidates
+                ):
+                    candidate = candidates[positions[i]]
+                    if candidate.document_id is None:
+                        allowed_candidates.append(candidate)
+                    elif candidate.document_id not in checked_doc_ids:
+                        break
+                    elif candidate.document_id in allowed_doc_ids:
+                        allowed_candidates.append(candidate)
+                    positions[i] += 1
+
+                if len(allowed_candidates) < limit:
+                    doc_ids_to_check.update(
+                        candidate.document_id
+                        for candidate in candidates[positions[i] : positions[i] + limit]
+                        if candidate.document_id is not None
+                        and candidate.document_id not in checked_doc_ids
+                    )
 
-        # get allowed documents
-        metadata = MetaData()
-        if allowed_docs_temp_view_name is None:
-            raise ValueError("allowed_docs_temp_view_name is not available")
+            if not doc_ids_to_check:
+                break
 
-        effective_schema_allowed_docs_temp_view_name = (
-            allowed_docs_temp_view_name.split(".")[-1]
-        )
+            allowed_doc_ids.update(
+                get_allowed_document_ids(
+                    db_session, allowed_docs_temp_view_name, list(doc_ids_to_check)
+                )
+            )
+            checked_doc_ids.update(doc_ids_to_check)
 
-        allowed_docs_temp_view = Table(
-            effective_schema_allowed_docs_temp_view_name,
-            metadata,
-            autoload_with=db_session.get_bind(),
-        )
+    return allowed_candidate_lists
 
-        # generate trigrams of the queried entity Q
-        query_trigrams = db_session.query(
-            getattr(func, POSTGRES_DEFAULT_SCHEMA)
-            .show_trgm(cleaned_entity)
-            .cast(ARRAY(String(3)))
-            .label("trigrams")
-        ).cte("query")
-
-        candidates = cast(
-            list[tuple[str, str, float]],
-            db_session.query(
-                KGEntity.id_name,
-                KGEntity.name,
-                (
-                    # for each entity E, compute score = | Q ∩ E | / min(|Q|, |E|)
-                    func.cardinality(
-                        func.array(
-                            select(func.unnest(KGEntity.name_trigrams))
-                            .correlate(KGEntity)
-                            .intersect(
-                                select(
-                                    func.unnest(query_trigrams.c.trigrams)
-                                ).correlate(query_trigrams)
-                            )
-                            .scalar_subquery()
-                        )
-                    ).cast(Float)
-                    / func.least(
-                        func.cardinality(query_trigrams.c.trigrams),
-                        func.cardinality(KGEntity.name_trigrams),
-                    )
-                ).label("score"),
-            )
-            .select_from(KGEntity, query_trigrams)
-            .outerjoin(
-                allowed_docs_temp_view,
-                KGEntity.document_id == allowed_docs_temp_view.c.allowed_doc_id,
-            )
-            .filter(
-                *type_filters,
-                KGEntity.name_trigrams.overlap(query_trigrams.c.trigrams),
-                # Add filter for allowed docs - either document_id is NULL or it's in allowed_docs
-                (
-                    KGEntity.document_id.is_(None)
-                    | allowed_docs_temp_view.c.allowed_doc_id.isnot(None)
-                ),
-            )
-            .order_by(desc("score"))
-            .limit(KG_NORMALIZATION_RETRIEVE_ENTITIES_LIMIT)
-            .all(),
-        )
+
+def _rerank_entity_candidates(
+    entity: str, candidates: list[IndexedEntity]
+) -> str | None:
+    """
+    Picks the best matching candidate for a single entity, if any is good enough.
+    """
     if not candidates:
         return None
 
-    # step 2: do a weighted ngram analysis and damerau levenshtein distance to rerank
+    cleaned_entity = _clean_name(split_entity_id(entity)[1])
+    scored_candidates: list[tuple[str, float]] = []
+
+    # do a weighted ngram analysis and damerau levenshtein distance to rerank
     n1, n2, n3 = (
         set(ngrams(cleaned_entity, 1)),
         set(ngrams(cleaned_entity, 2)),
         set(ngrams(cleaned_entity, 3)),
     )
-    for i, (candidate_id_name, candidate_name, _) in enumerate(candidates):
-        cleaned_candidate = _clean_name(candidate_name)
+    for candidate in candidates:
+        cleaned_candidate = _clean_name(candidate.name)
         h_n1, h_n2, h_n3 = (
             set(ngrams(cleaned_candidate, 1)),
             set(ngrams(cleaned_candidate, 2)),
@@ -177,18 +167,20 @@ def _normalize_one_entity(
 
         # combine scores
         score = (1.0 - W_leven) * ngram_score + W_leven * leven_score
-        candidates[i] = (candidate_id_name, candidate_name, score)
-    candidates = list(
+        scored_candidates.append((candidate.id_name, score))
+    scored_candidates = list(
         sorted(
-            filter(lambda x: x[2] > KG_NORMALIZATION_RERANK_THRESHOLD, candidates),
-            key=lambda x: x[2],
+            filter(
+                lambda x: x[1] > KG_NORMALIZATION_RERANK_THRESHOLD, scored_candidates
+            ),
+            key=lambda x: x[1],
             reverse=True,
         )
     )
-    if not candidates:
+    if not scored_candidates:
         return None
 
-    return candidates[0][0]
+    return scored_candidates[0][0]
 
 
 def _get_existing_normalized_relationships(
@@ -248,12 +240,26 @@ def normalize_entities(
         get_attributes(attr_entity) for attr_entity in raw_entities_w_attributes
     ]
 
-    mapping: list[str | None] = run_functions_tuples_in_parallel(
+    # step 1: find entities with similar names in the in-memory entity name index,
+    # restricted to entities the user has access to
+    entity_name_index = get_kg_entity_name_index(get_current_tenant_id())
+    lookup_indices = [
+        i for i, entity in enumerate(raw_entities) if split_entity_id(entity)[1] != "*"
+    ]
+    allowed_candidate_lists = _filter_allowed_candidates(
         [
-            (_normalize_one_entity, (entity, attributes, allowed_docs_temp_view_name))
-            for entity, attributes in zip(raw_entities, entity_attributes)
-        ]
+            _get_entity_candidates(
+                entity_name_index, raw_entities[i], entity_attributes[i]
+            )
+            for i in lookup_indices
+        ],
+        allowed_docs_temp_view_name,
     )
+
+    # step 2: rerank the candidates of each entity
+    mapping: list[str | None] = list(raw_entities)
+    for i, candidates in zip(lookup_indices, allowed_candidate_lists):
+        mapping[i] = _rerank_entity_candidates(raw_entities[i], candidates)
     for entity, attributes, normalized_entity in zip(
         raw_entities, entity_attributes, mapping
     ):
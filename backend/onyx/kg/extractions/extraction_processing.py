@@ -6,13 +6,14 @@ from redis.lock import Lock as RedisLock
 from onyx.background.celery.tasks.kg_processing.utils import extend_lock
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.db.connector import get_kg_enabled_connectors
-from onyx.db.document import get_document_updated_at
+from onyx.db.document import get_documents_updated_at
 from onyx.db.document import get_skipped_kg_documents
 from onyx.db.document import get_unprocessed_kg_document_batch_for_connector
-from onyx.db.document import update_document_kg_info
 from onyx.db.document import update_document_kg_stage
+from onyx.db.document import update_documents_kg_info
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.entities import delete_from_kg_entities__no_commit
+from onyx.db.entities import upsert_staging_entities_batch
 from onyx.db.entities import upsert_staging_entity
 from onyx.db.entity_type import get_entity_types
 from onyx.db.kg_config import get_kg_config_settings
@@ -22,8 +23,9 @@ from onyx.db.models import KGStage
 from onyx.db.relationships import delete_from_kg_relationships__no_commit
 from onyx.db.relationships import upsert_staging_relationship
 from onyx.db.relationships import upsert_staging_relationship_type
+from onyx.db.relationships import upsert_staging_relationship_types_batch
+from onyx.db.relationships import upsert_staging_relationships_batch
 from onyx.kg.models import KGClassificationInstructions
-from onyx.kg.models import KGDocumentDeepExtractionResults
 from onyx.kg.models import KGEnhancedDocumentMetadata
 from onyx.kg.models import KGEntityTypeInstructions
 from onyx.kg.models import KGExtractionInstructions
@@ -36,12 +38,10 @@ from onyx.kg.utils.extraction_utils import kg_deep_extraction
 from onyx.kg.utils.extraction_utils import (
     kg_implied_extraction,
 )
-from onyx.kg.utils.formatting_utils import extract_relationship_type_id
 from onyx.kg.utils.formatting_utils import get_entity_type
 from onyx.kg.utils.formatting_utils import split_entity_id
 from onyx.kg.utils.formatting_utils import split_relationship_id
 from onyx.utils.logger import setup_logger
-from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 
 logger = setup_logger()
 
@@ -200,6 +200,121 @@ def _get_batch_documents_enhanced_metadata(
     return kg_document_meta_data_dict
 
 
+def _upsert_staging_entities(
+    staging_entities: list[dict[str, Any]],
+) -> dict[str, dict[str, Any]]:
+    """Upserts the staging entities in one statement. If that fails, they are upserted
+    one at a time, so that a bad entity doesn't lose the rest of the batch.
+    Returns the attributes of the upserted entities by id_name."""
+    try:
+        with get_session_with_current_tenant() as db_session:
+            upserted_entity_attributes = upsert_staging_entities_batch(
+                db_session, staging_entities
+            )
+            db_session.commit()
+        return upserted_entity_attributes
+    except Exception as e:
+        logger.warning(
+            f"Error adding {len(staging_entities)} entities, adding them one at a "
+            f"time. Error message: {e}"
+        )
+
+    upserted_entity_attributes = {}
+    for staging_entity in staging_entities:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                upserted_entity = upsert_staging_entity(
+                    db_session=db_session, **staging_entity
+                )
+                db_session.commit()
+                upserted_entity_attributes[upserted_entity.id_name] = (
+                    upserted_entity.attributes
+                )
+        except Exception as e:
+            logger.error(
+                f"Error adding entity {staging_entity['entity_type']}:"
+                f"{staging_entity['name']}. Error message: {e}"
+            )
+    return upserted_entity_attributes
+
+
+def _upsert_staging_relationship_types(
+    staging_relationship_types: list[tuple[str, str, str]],
+) -> None:
+    try:
+        with get_session_with_current_tenant() as db_session:
+            upsert_staging_relationship_types_batch(
+                db_session, staging_relationship_types
+            )
+            db_session.commit()
+        return
+    except Exception as e:
+        logger.warning(
+            f"Error adding {len(staging_relationship_types)} relationship types, "
+            f"adding them one at a time. Error message: {e}"
+        )
+
+    for source_entity_type, relationship_type, target_entity_type in set(
+        staging_relationship_types
+    ):
+        extraction_count = staging_relationship_types.count(
+            (source_entity_type, relationship_type, target_entity_type)
+        )
+        try:
+            with get_session_with_current_tenant() as db_session:
+                upsert_staging_relationship_type(
+                    db_session=db_session,
+                    source_entity_type=source_entity_type.upper(),
+                    relationship_type=relationship_type,
+                    target_entity_type=target_entity_type.upper(),
+                    definition=False,
+                    extraction_count=extraction_count,
+                )
+                db_session.commit()
+        except Exception as e:
+            logger.error(
+                f"Error adding relationship type {source_entity_type}__"
+                f"{relationship_type}__{target_entity_type} to the database: {e}"
+            )
+
+
+def _upsert_staging_relationships(
+    staging_relationships: list[tuple[str, str | None]],
+) -> None:
+    try:
+        with get_session_with_current_tenant() as db_session:
+            skipped_relationships = upsert_staging_relationships_batch(
+                db_session, staging_relationships
+            )
+            db_session.commit()
+        for relationship, _ in skipped_relationships:
+            logger.error(
+                f"Error adding relationship {relationship} to the database: "
+                "its entities were not added"
+            )
+        return
+    except Exception as e:
+        logger.warning(
+            f"Error adding {len(staging_relationships)} relationships, adding them "
+            f"one at a time. Error message: {e}"
+        )
+
+    for relationship, document_id in staging_relationships:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                upsert_staging_relationship(
+                    db_session=db_session,
+                    relationship_id_name=relationship,
+                    source_document_id=document_id,
+                    occurrences=1,
+                )
+                db_session.commit()
+        except Exception as e:
+            logger.error(
+                f"Error adding relationship {relationship} to the database: {e}"
+            )
+
+
 def kg_extraction(
     tenant_id: str,
     index_name: str,
@@ -386,26 +501,13 @@ def kg_extraction(
                         )
                     )
 
-            # 2. perform deep extraction and classification in parallel
-            batch_deep_extraction_func_calls = [
-                (
-                    kg_deep_extraction,
-                    (
-                        *arg,
-                        tenant_id,
-                        index_name,
-                        kg_config_settings,
-                    ),
-                )
-                for arg in batch_deep_extraction_args
-            ]
-            batch_deep_extractions: dict[str, KGDocumentDeepExtractionResults] = {
-                document_id: result
-                for document_id, result in zip(
-                    documents_to_process,
-                    run_functions_tuples_in_parallel(batch_deep_extraction_func_calls),
-                )
-            }
+            # 2. perform deep extraction and classification, batched across documents
+            batch_deep_extractions = kg_deep_extraction(
+                batch_deep_extraction_args,
+                tenant_id,
+                index_name,
+                kg_config_settings,
+            )
 
             # Collect entities and relationships to upsert
             batch_entities: list[tuple[str | None, str]] = []
@@ -445,6 +547,12 @@ def kg_extraction(
                 )
 
             # Populate the KG database with the extracted entities, relationships, and terms
+            with get_session_with_current_tenant() as db_session:
+                documents_updated_at = get_documents_updated_at(
+                    list(batch_implied_extraction), db_session
+                )
+
+            staging_entities: list[dict[str, Any]] = []
             for potential_document_id, entity in batch_entities:
                 # verify the entity is valid
                 parts = split_entity_id(entity)
@@ -461,58 +569,51 @@ def kg_extraction(
                 if entity_type not in active_entity_types:
                     continue
 
-                try:
-                    with get_session_with_current_tenant() as db_session:
-                        entity_attributes: dict[str, Any] = {}
-
-                        if potential_document_id:
-                            entity_attributes = (
-                                batch_metadata[potential_document_id].document_metadata
-                                or {}
-                            )
-
-                        # only keep selected attributes (and translate the attribute names)
-                        metadata_attributes = entity_metadata_conversion_instructions[
-                            entity_type
-                        ]
-                        keep_attributes = {
-                            metadata_attributes[attr_name].name: attr_val
-                            for attr_name, attr_val in entity_attributes.items()
-                            if (
-                                attr_name in metadata_attributes
-                                and metadata_attributes[attr_name].keep
-                            )
-                        }
-
-                        # add the classification result to the attributes
-                        if entity in entity_classification:
-                            keep_attributes["classification"] = entity_classification[
-                                entity
-                            ]
-
-                        event_time = None
-                        if potential_document_id:
-                            event_time = get_document_updated_at(
-                                potential_document_id, db_session
-                            )
-
-                        upserted_entity = upsert_staging_entity(
-                            db_session=db_session,
-                            name=entity_name,
-                            entity_type=entity_type,
-                            document_id=potential_document_id,
-                            occurrences=1,
-                            attributes=keep_attributes,
-                            event_time=event_time,
-                        )
-                        metadata_tracker.track_metadata(
-                            entity_type, upserted_entity.attributes
-                        )
+                entity_attributes: dict[str, Any] = {}
 
-                        db_session.commit()
-                except Exception as e:
-                    logger.error(f"Error adding entity {entity}. Error message: {e}")
+                if potential_document_id:
+                    entity_attributes = (
+                        batch_metadata[potential_document_id].document_metadata or {}
+                    )
+
+                # only keep selected attributes (and translate the attribute names)
+                metadata_attributes = entity_metadata_conversion_instructions[
+                    entity_type
+                ]
+                keep_attributes = {
+                    metadata_attributes[attr_name].name: attr_val
+                    for attr_name, attr_val in entity_attributes.items()
+                    if (
+                        attr_name in metadata_attributes
+                        and metadata_attributes[attr_name].keep
+                    )
+                }
+
+                # add the classification result to the attributes
+                if entity in entity_classification:
+                    keep_attributes["classification"] = entity_classification[entity]
+
+                staging_entities.append(
+                    dict(
+                        name=entity_name,
+                        entity_type=entity_type,
+                        document_id=potential_document_id,
+                        occurrences=1,
+                        attributes=keep_attributes,
+                        event_time=(
+                            documents_updated_at.get(potential_document_id)
+                            if potential_document_id
+                            else None
+                        ),
+                    )
+                )
 
+            upserted_entity_attributes = _upsert_staging_entities(staging_entities)
+            for id_name, attributes in upserted_entity_attributes.items():
+                metadata_tracker.track_metadata(get_entity_type(id_name), attributes)
+
+            staging_relationship_types: list[tuple[str, str, str]] = []
+            staging_relationships: list[tuple[str, str | None]] = []
             for document_id, relationship in batch_relationships:
                 relationship_split = split_relationship_id(relationship)
 
@@ -533,48 +634,22 @@ def kg_extraction(
                 ):
                     continue
 
-                relationship_type_id_name = extract_relationship_type_id(relationship)
-
-                with get_session_with_current_tenant() as db_session:
-                    try:
-                        upsert_staging_relationship_type(
-                            db_session=db_session,
-                            source_entity_type=source_entity_type.upper(),
-                            relationship_type=relationship_type,
-                            target_entity_type=target_entity_type.upper(),
-                            definition=False,
-                            extraction_count=1,
-                        )
-                        db_session.commit()
-                    except Exception as e:
-                        logger.error(
-                            f"Error adding relationship type {relationship_type_id_name} to the database: {e}"
-                        )
+                staging_relationship_types.append(
+                    (source_entity_type, relationship_type, target_entity_type)
+                )
+                staging_relationships.append((relationship, document_id))
 
-                    with get_session_with_current_tenant() as db_session:
-                        try:
-                            upsert_staging_relationship(
-                                db_session=db_session,
-                                relationship_id_name=relationship,
-                                source_document_id=document_id,
-                                occurrences=1,
-                            )
-                            db_session.commit()
-                        except Exception as e:
-                            logger.error(
-                                f"Error adding relationship {relationship} to the database: {e}"
-                            )
+            _upsert_staging_relationship_types(staging_relationship_types)
+            _upsert_staging_relationships(staging_relationships)
 
             # Populate the Documents table with the kg information for the documents
-
-            for processed_document in documents_to_process:
-                with get_session_with_current_tenant() as db_session:
-                    update_document_kg_info(
-                        db_session,
-                        processed_document,
-                        KGStage.EXTRACTED,
-                    )
-                    db_session.commit()
+            with get_session_with_current_tenant() as db_session:
+                update_documents_kg_info(
+                    db_session,
+                    documents_to_process,
+                    KGStage.EXTRACTED,
+                )
+                db_session.commit()
 
         # Update the the Skipped Docs back to Not Started
         with get_session_with_current_tenant() as db_session:
@@ -1,9 +1,17 @@
+import hashlib
 import json
+from collections.abc import Callable
+from typing import Any
 
 from langchain_core.messages import HumanMessage
 
 from onyx.configs.constants import DocumentSource
 from onyx.configs.constants import OnyxCallTypes
+from onyx.configs.kg_configs import KG_EXTRACTION_CACHE_TTL
+from onyx.configs.kg_configs import KG_EXTRACTION_MAX_CONCURRENT_LLM_CALLS
+from onyx.configs.kg_configs import KG_EXTRACTION_PACKED_DOCUMENT_MAX_CHARS
+from onyx.configs.kg_configs import KG_EXTRACTION_PACKED_PROMPT_MAX_CHARS
+from onyx.configs.kg_configs import KG_EXTRACTION_PACKED_PROMPT_MAX_DOCUMENTS
 from onyx.configs.kg_configs import KG_METADATA_TRACKING_THRESHOLD
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.entities import get_kg_entity_by_document
@@ -31,15 +39,25 @@ from onyx.kg.utils.formatting_utils import make_relationship_id
 from onyx.kg.utils.formatting_utils import make_relationship_type_id
 from onyx.kg.vespa.vespa_interactions import get_document_vespa_contents
 from onyx.llm.factory import get_default_llms
+from onyx.llm.interfaces import LLM
 from onyx.llm.utils import message_to_string
 from onyx.prompts.kg_prompts import CALL_CHUNK_PREPROCESSING_PROMPT
 from onyx.prompts.kg_prompts import CALL_DOCUMENT_CLASSIFICATION_PROMPT
 from onyx.prompts.kg_prompts import GENERAL_CHUNK_PREPROCESSING_PROMPT
 from onyx.prompts.kg_prompts import MASTER_EXTRACTION_PROMPT
+from onyx.prompts.kg_prompts import PACKED_DOCUMENTS_PREPROCESSING_PROMPT
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.call_cache import cache_values
+from onyx.utils.call_cache import get_cached_values
+from onyx.utils.call_cache import get_llm_call_semaphore
 from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import ExecutorName
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 
 logger = setup_logger()
 
+_DEEP_EXTRACTION_CACHE_KEY_PREFIX = "kg_deep_extraction"
+
 
 def get_entity_types_str(active: bool | None = None) -> str:
     """
@@ -323,61 +341,348 @@ def kg_implied_extraction(
     )
 
 
-def kg_deep_extraction(
-    document_id: str,
-    metadata: KGEnhancedDocumentMetadata,
+def _invoke_llm(llm: LLM, prompt: str) -> str:
+    with get_llm_call_semaphore(
+        "kg_extraction", llm, KG_EXTRACTION_MAX_CONCURRENT_LLM_CALLS
+    ):
+        return message_to_string(llm.invoke([HumanMessage(content=prompt)]))
+
+
+def _get_chunk_batches(
+    document_id: str, index_name: str, tenant_id: str
+) -> list[list[KGChunkFormat]]:
+    return list(get_document_vespa_contents(document_id, index_name, tenant_id))
+
+
+def _chunk_batch_extraction_context(
+    document_entity: str,
+    chunk_batch: list[KGChunkFormat],
     implied_extraction: KGImpliedExtractionResults,
+    kg_config_settings: KGConfigSettings,
+) -> tuple[str, bool]:
+    """The part of the extraction prompt describing the chunk batch, and whether it
+    can be packed with other documents into a single prompt"""
+    # currently, calls are treated differently
+    # TODO: either treat some other documents differently too, or ideally all the same way
+    entity_type = get_entity_type(document_entity)
+    is_call = entity_type in (call_type.value for call_type in OnyxCallTypes)
+
+    content = "\n".join(chunk.content for chunk in chunk_batch)
+
+    if is_call:
+        company_participants_str = "".join(
+            f" - {participant}\n"
+            for participant in implied_extraction.company_participant_emails
+        )
+        account_participants_str = "".join(
+            f" - {participant}\n"
+            for participant in implied_extraction.account_participant_emails
+        )
+        llm_context = CALL_CHUNK_PREPROCESSING_PROMPT.format(
+            participant_string=company_participants_str,
+            account_participant_string=account_participants_str,
+            vendor=kg_config_settings.KG_VENDOR,
+            content=content,
+        )
+        return llm_context, False
+
+    llm_context = GENERAL_CHUNK_PREPROCESSING_PROMPT.format(
+        vendor=kg_config_settings.KG_VENDOR,
+        content=content,
+    )
+    return llm_context, len(content) <= KG_EXTRACTION_PACKED_DOCUMENT_MAX_CHARS
+
+
+def _extraction_cache_key(
+    llm: LLM, entity_types_str: str, relationship_types_str: str, llm_context: str
+) -> str:
+    content_hash = hashlib.sha256(
+        json.dumps(
+            [
+                llm.config.model_name,
+                entity_types_str,
+                relationship_types_str,
+                llm_context,
+            ]
+        ).encode("utf-8")
+    ).hexdigest()
+    return f"{_DEEP_EXTRACTION_CACHE_KEY_PREFIX}:{content_hash}"
+
+
+def _parse_extraction(parsed_result: dict[str, Any]) -> KGDocumentDeepExtractionResults:
+    return KGDocumentDeepExtractionResults(
+        classification_result=None,
+        deep_extracted_entities=set(parsed_result.get("entities", [])),
+        deep_extracted_relationships={
+            rel.replace(" ", "_") for rel in parsed_result.get("relationships", [])
+        },
+    )
+
+
+def _extract_json_object(response: str) -> dict[str, Any]:
+    cleaned_response = (
+        response.replace("```json\n", "").replace("\n```", "").replace("\n", "")
+    )
+    first_bracket = cleaned_response.find("{")
+    last_bracket = cleaned_response.rfind("}")
+    cleaned_response = cleaned_response[first_bracket : last_bracket + 1]
+    try:
+        return json.loads(cleaned_response)
+    except json.JSONDecodeError:
+        # the formatting instructions use escaped braces, which are sometimes copied
+        return json.loads(cleaned_response.replace("{{", "{").replace("}}", "}"))
+
+
+def _extract_from_context(
+    llm: LLM,
+    llm_context: str,
+    entity_types_str: str,
+    relationship_types_str: str,
+) -> KGDocumentDeepExtractionResults | None:
+    prompt = MASTER_EXTRACTION_PROMPT.format(
+        entity_types=entity_types_str,
+        relationship_types=relationship_types_str,
+    ).replace("---content---", llm_context)
+
+    try:
+        return _parse_extraction(_extract_json_object(_invoke_llm(llm, prompt)))
+    except Exception as e:
+        logger.error(f"Failed to extract from content. Error: {str(e)}")
+    return None
+
+
+def _extract_from_contexts(
+    llm: LLM,
+    llm_contexts: list[str],
+    entity_types_str: str,
+    relationship_types_str: str,
+) -> list[KGDocumentDeepExtractionResults | None]:
+    """Extracts from several short documents with a single prompt. Documents missing
+    from the answer are extracted from on their own."""
+    if len(llm_contexts) == 1:
+        return [
+            _extract_from_context(
+                llm, llm_contexts[0], entity_types_str, relationship_types_str
+            )
+        ]
+
+    packed_context = PACKED_DOCUMENTS_PREPROCESSING_PROMPT.format(
+        num_documents=len(llm_contexts),
+        documents="\n\n".join(
+            f"DOCUMENT {i}\n{llm_context}"
+            for i, llm_context in enumerate(llm_contexts, start=1)
+        ),
+    )
+    prompt = MASTER_EXTRACTION_PROMPT.format(
+        entity_types=entity_types_str,
+        relationship_types=relationship_types_str,
+    ).replace("---content---", packed_context)
+
+    parsed_results: dict[str, Any] = {}
+    try:
+        parsed_results = _extract_json_object(_invoke_llm(llm, prompt))
+    except Exception as e:
+        logger.error(
+            f"Failed to extract from {len(llm_contexts)} packed documents, "
+            f"extracting from them one by one. Error: {str(e)}"
+        )
+
+    results: list[KGDocumentDeepExtractionResults | None] = []
+    for i, llm_context in enumerate(llm_contexts, start=1):
+        parsed_result = parsed_results.get(str(i))
+        if isinstance(parsed_result, dict):
+            results.append(_parse_extraction(parsed_result))
+        else:
+            results.append(
+                _extract_from_context(
+                    llm, llm_context, entity_types_str, relationship_types_str
+                )
+            )
+    return results
+
+
+def _pack_contexts(
+    llm_contexts: list[tuple[str, str]],
+) -> list[list[tuple[str, str]]]:
+    """Greedily packs (cache key, extraction context) pairs into prompts"""
+    packs: list[list[tuple[str, str]]] = []
+    pack_chars = 0
+    for cache_key, llm_context in llm_contexts:
+        if (
+            not packs
+            or len(packs[-1]) >= KG_EXTRACTION_PACKED_PROMPT_MAX_DOCUMENTS
+            or pack_chars + len(llm_context) > KG_EXTRACTION_PACKED_PROMPT_MAX_CHARS
+        ):
+            packs.append([])
+            pack_chars = 0
+        packs[-1].append((cache_key, llm_context))
+        pack_chars += len(llm_context)
+    return packs
+
+
+def kg_deep_extraction(
+    documents: list[tuple[str, KGEnhancedDocumentMetadata, KGImpliedExtractionResults]],
     tenant_id: str,
     index_name: str,
     kg_config_settings: KGConfigSettings,
-) -> KGDocumentDeepExtractionResults:
+) -> dict[str, KGDocumentDeepExtractionResults]:
     """
-    Perform deep extraction and classification on the document.
+    Perform deep extraction and classification on a batch of documents.
+
+    Short documents are packed together into a single extraction prompt. Chunk
+    batches that were extracted from before (with the same entity and relationship
+    types) are served from the cache instead of the LLM.
     """
-    result = KGDocumentDeepExtractionResults(
-        classification_result=None,
-        deep_extracted_entities=set(),
-        deep_extracted_relationships=set(),
-    )
+    results = {
+        document_id: KGDocumentDeepExtractionResults(
+            classification_result=None,
+            deep_extracted_entities=set(),
+            deep_extracted_relationships=set(),
+        )
+        for document_id, _, _ in documents
+    }
+    if not documents:
+        return results
 
     entity_types_str = get_entity_types_str(active=True)
     relationship_types_str = get_relationship_types_str(active=True)
+    _, fast_llm = get_default_llms()
 
-    for i, chunk_batch in enumerate(
-        get_document_vespa_contents(document_id, index_name, tenant_id)
+    document_chunk_batches: list[list[list[KGChunkFormat]]] = (
+        run_functions_tuples_in_parallel(
+            [
+                (_get_chunk_batches, (document_id, index_name, tenant_id))
+                for document_id, _, _ in documents
+            ]
+        )
+    )
+
+    # (document id, cache key, extraction context, can be packed) per chunk batch
+    chunk_batch_contexts: list[tuple[str, str, str, bool]] = []
+    classification_document_ids: list[str] = []
+    classification_calls: list[tuple[Callable[..., Any], tuple[Any, ...]]] = []
+    for (document_id, metadata, implied_extraction), chunk_batches in zip(
+        documents, document_chunk_batches
     ):
         # use first batch for classification
-        if i == 0 and metadata.classification_enabled:
+        if chunk_batches and metadata.classification_enabled:
             if not metadata.classification_instructions:
                 raise ValueError(
                     "Classification is enabled but no instructions are provided"
                 )
-            result.classification_result = kg_classify_document(
-                document_entity=implied_extraction.document_entity,
-                chunk_batch=chunk_batch,
-                implied_extraction=implied_extraction,
-                classification_instructions=metadata.classification_instructions,
-                kg_config_settings=kg_config_settings,
+            classification_document_ids.append(document_id)
+            classification_calls.append(
+                (
+                    kg_classify_document,
+                    (
+                        implied_extraction.document_entity,
+                        chunk_batches[0],
+                        implied_extraction,
+                        metadata.classification_instructions,
+                        kg_config_settings,
+                    ),
+                )
             )
 
-        # deep extract from this chunk batch
-        chunk_batch_results = kg_deep_extract_chunks(
-            document_entity=implied_extraction.document_entity,
-            chunk_batch=chunk_batch,
-            implied_extraction=implied_extraction,
-            kg_config_settings=kg_config_settings,
-            entity_types_str=entity_types_str,
-            relationship_types_str=relationship_types_str,
-        )
-        if chunk_batch_results is not None:
-            result.deep_extracted_entities.update(
-                chunk_batch_results.deep_extracted_entities
+        for chunk_batch in chunk_batches:
+            llm_context, packable = _chunk_batch_extraction_context(
+                implied_extraction.document_entity,
+                chunk_batch,
+                implied_extraction,
+                kg_config_settings,
+            )
+            cache_key = _extraction_cache_key(
+                fast_llm, entity_types_str, relationship_types_str, llm_context
+            )
+            # only documents that fit in a single chunk batch are packed
+            chunk_batch_contexts.append(
+                (
+                    document_id,
+                    cache_key,
+                    llm_context,
+                    packable and len(chunk_batches) == 1,
+                )
+            )
+
+    redis_client = get_redis_client(tenant_id=tenant_id)
+    cached_extractions = get_cached_values(
+        redis_client, [key for _, key, _, _ in chunk_batch_contexts], "KG extractions"
+    )
+
+    extractions: dict[str, KGDocumentDeepExtractionResults] = {}
+    unpacked_contexts: dict[str, str] = {}
+    packable_contexts: dict[str, str] = {}
+    for (_, cache_key, llm_context, packable), cached_extraction in zip(
+        chunk_batch_contexts, cached_extractions
+    ):
+        if cached_extraction is not None:
+            extractions[cache_key] = _parse_extraction(json.loads(cached_extraction))
+        elif packable:
+            packable_contexts[cache_key] = llm_context
+        else:
+            unpacked_contexts[cache_key] = llm_context
+
+    extraction_batches = [
+        [unpacked_context] for unpacked_context in unpacked_contexts.items()
+    ] + _pack_contexts(list(packable_contexts.items()))
+    call_results = run_functions_tuples_in_parallel(
+        classification_calls
+        + [
+            (
+                _extract_from_contexts,
+                (
+                    fast_llm,
+                    [llm_context for _, llm_context in extraction_batch],
+                    entity_types_str,
+                    relationship_types_str,
+                ),
             )
-            result.deep_extracted_relationships.update(
-                chunk_batch_results.deep_extracted_relationships
+            for extraction_batch in extraction_batches
+        ],
+        executor=ExecutorName.LLM,
+    )
+
+    for document_id, classification_result in zip(
+        classification_document_ids, call_results
+    ):
+        results[document_id].classification_result = classification_result
+
+    new_extractions: dict[str, KGDocumentDeepExtractionResults] = {}
+    for extraction_batch, batch_results in zip(
+        extraction_batches, call_results[len(classification_calls) :]
+    ):
+        for (cache_key, _), extraction in zip(extraction_batch, batch_results):
+            if extraction is not None:
+                new_extractions[cache_key] = extraction
+    extractions.update(new_extractions)
+
+    cache_values(
+        redis_client,
+        {
+            cache_key: json.dumps(
+                {
+                    "entities": sorted(extraction.deep_extracted_entities),
+                    "relationships": sorted(extraction.deep_extracted_relationships),
+                }
             )
+            for cache_key, extraction in new_extractions.items()
+        },
+        KG_EXTRACTION_CACHE_TTL,
+        "KG extractions",
+    )
+
+    for document_id, cache_key, _, _ in chunk_batch_contexts:
+        extraction = extractions.get(cache_key)
+        if extraction is None:
+            continue
+        results[document_id].deep_extracted_entities.update(
+            extraction.deep_extracted_entities
+        )
+        results[document_id].deep_extracted_relationships.update(
+            extraction.deep_extracted_relationships
+        )
 
-    return result
+    return results
 
 
 def kg_classify_document(
@@ -418,11 +723,9 @@ def kg_classify_document(
 
     # classify with LLM
     primary_llm, _ = get_default_llms()
-    msg = [HumanMessage(content=prompt)]
     try:
-        raw_classification_result = primary_llm.invoke(msg)
         classification_result = (
-            message_to_string(raw_classification_result)
+            _invoke_llm(primary_llm, prompt)
             .replace("```json", "")
             .replace("```", "")
             .strip()
@@ -443,80 +746,6 @@ def kg_classify_document(
     return None
 
 
-def kg_deep_extract_chunks(
-    document_entity: str,
-    chunk_batch: list[KGChunkFormat],
-    implied_extraction: KGImpliedExtractionResults,
-    kg_config_settings: KGConfigSettings,
-    entity_types_str: str,
-    relationship_types_str: str,
-) -> KGDocumentDeepExtractionResults | None:
-    # currently, calls are treated differently
-    # TODO: either treat some other documents differently too, or ideally all the same way
-    entity_type = get_entity_type(document_entity)
-    is_call = entity_type in (call_type.value for call_type in OnyxCallTypes)
-
-    content = "\n".join(chunk.content for chunk in chunk_batch)
-
-    # prepare prompt
-    if is_call:
-        company_participants_str = "".join(
-            f" - {participant}\n"
-            for participant in implied_extraction.company_participant_emails
-        )
-        account_participants_str = "".join(
-            f" - {participant}\n"
-            for participant in implied_extraction.account_participant_emails
-        )
-        llm_context = CALL_CHUNK_PREPROCESSING_PROMPT.format(
-            participant_string=company_participants_str,
-            account_participant_string=account_participants_str,
-            vendor=kg_config_settings.KG_VENDOR,
-            content=content,
-        )
-    else:
-        llm_context = GENERAL_CHUNK_PREPROCESSING_PROMPT.format(
-            vendor=kg_config_settings.KG_VENDOR,
-            content=content,
-        )
-    prompt = MASTER_EXTRACTION_PROMPT.format(
-        entity_types=entity_types_str,
-        relationship_types=relationship_types_str,
-    ).replace("---content---", llm_context)
-
-    # extract with LLM
-    _, fast_llm = get_default_llms()
-    msg = [HumanMessage(content=prompt)]
-    try:
-        raw_extraction_result = fast_llm.invoke(msg)
-        cleaned_response = (
-            message_to_string(raw_extraction_result)
-            .replace("{{", "{")
-            .replace("}}", "}")
-            .replace("```json\n", "")
-            .replace("\n```", "")
-            .replace("\n", "")
-        )
-        first_bracket = cleaned_response.find("{")
-        last_bracket = cleaned_response.rfind("}")
-        cleaned_response = cleaned_response[first_bracket : last_bracket + 1]
-        parsed_result = json.loads(cleaned_response)
-        return KGDocumentDeepExtractionResults(
-            classification_result=None,
-            deep_extracted_entities=set(parsed_result.get("entities", [])),
-            deep_extracted_relationships={
-                rel.replace(" ", "_") for rel in parsed_result.get("relationships", [])
-            },
-        )
-    except Exception as e:
-        failed_chunks = [chunk.chunk_id for chunk in chunk_batch]
-        logger.error(
-            f"Failed to process chunks {failed_chunks} "
-            f"from document {document_entity}. Error: {str(e)}"
-        )
-    return None
-
-
 def kg_process_person(
     email: str,
     document_entity_id: str,
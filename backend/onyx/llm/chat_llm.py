@@ -37,6 +37,10 @@ from onyx.configs.model_configs import LITELLM_EXTRA_BODY
 from onyx.llm.interfaces import LLM
 from onyx.llm.interfaces import LLMConfig
 from onyx.llm.interfaces import ToolChoiceOptions
+from onyx.llm.response_cache import build_llm_response_cache_key
+from onyx.llm.response_cache import cache_llm_response
+from onyx.llm.response_cache import get_cached_llm_response
+from onyx.llm.response_cache import get_llm_response_cache_flow
 from onyx.llm.utils import model_is_reasoning_model
 from onyx.server.utils import mask_string
 from onyx.utils.logger import setup_logger
@@ -407,11 +411,7 @@ class DefaultMultiLLM(LLM):
                 # streaming choice
                 stream=stream,
                 # model params
-                temperature=(
-                    1
-                    if self.config.model_name in ["gpt-5", "gpt-5-mini", "gpt-5-nano"]
-                    else self._temperature
-                ),
+                temperature=self._completion_temperature,
                 timeout=timeout_override or self._timeout,
                 # For now, we don't support parallel tool calls
                 # NOTE: we can't pass this in if tools are not specified
@@ -450,6 +450,14 @@ class DefaultMultiLLM(LLM):
 
             raise e
 
+    @property
+    def _completion_temperature(self) -> float:
+        return (
+            1
+            if self.config.model_name in ["gpt-5", "gpt-5-mini", "gpt-5-nano"]
+            else self._temperature
+        )
+
     @property
     def config(self) -> LLMConfig:
         credentials_file: str | None = (
@@ -482,6 +490,24 @@ class DefaultMultiLLM(LLM):
         if LOG_DANSWER_MODEL_INTERACTIONS:
             self.log_model_configs()
 
+        # only the responses of deterministic calls of the flows that opted in
+        # are cached
+        cache_flow = get_llm_response_cache_flow()
+        cache_key: str | None = None
+        if cache_flow is not None and not tools and self._completion_temperature == 0:
+            cache_key = build_llm_response_cache_key(
+                model_provider=self.config.model_provider,
+                model_name=self.config.deployment_name or self.config.model_name,
+                api_base=self._api_base,
+                messages=_prompt_to_dict(prompt),
+                temperature=self._completion_temperature,
+                max_tokens=max_tokens,
+                structured_response_format=structured_response_format,
+            )
+            cached_response = get_cached_llm_response(cache_flow, cache_key)
+            if cached_response is not None:
+                return AIMessage(content=cached_response)
+
         response = cast(
             litellm.ModelResponse,
             self._completion(
@@ -499,6 +525,12 @@ class DefaultMultiLLM(LLM):
             output = _convert_litellm_message_to_langchain_message(choice.message)
             if output:
                 self._record_result(prompt, output)
+            if (
+                cache_key is not None
+                and isinstance(output.content, str)
+                and not getattr(output, "tool_calls", None)
+            ):
+                cache_llm_response(cache_key, output.content)
             return output
         else:
             raise ValueError("Unexpected response choice type")
@@ -0,0 +1,159 @@
+"""Cache of the responses of the deterministic (temperature 0) LLM calls of the
+secondary flows, whose inputs repeat heavily across users (the same questions
+rephrased, the same filters extracted, ...).
+
+Flows opt in by being decorated with llm_response_cache_flow. The cache is then
+used by DefaultMultiLLM.invoke for the calls made within the flow, if
+LLM_RESPONSE_CACHE_ENABLED is set."""
+
+import contextvars
+import functools
+import hashlib
+import json
+import time
+from collections.abc import Callable
+from collections.abc import Sequence
+from typing import Any
+from typing import cast
+from typing import TypeVar
+
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+
+from onyx.configs.model_configs import LLM_RESPONSE_CACHE_ENABLED
+from onyx.configs.model_configs import LLM_RESPONSE_CACHE_MAX_ENTRIES
+from onyx.configs.model_configs import LLM_RESPONSE_CACHE_MAX_RESPONSE_CHARS
+from onyx.configs.model_configs import LLM_RESPONSE_CACHE_TTL
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_CACHE_KEY_PREFIX = "llm_response_cache"
+
+_current_flow: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "llm_response_cache_flow", default=None
+)
+
+llm_response_cache_counter = Counter(
+    "onyx_llm_response_cache",
+    "LLM calls of the flows using the response cache, by whether they were "
+    "answered from the cache (hit) or not (miss)",
+    ["flow", "result"],
+)
+
+
+def llm_response_cache_flow(flow: str) -> Callable[[F], F]:
+    """Caches the responses of the temperature 0 LLM calls made by the decorated
+    function. The flow names the function in the hit rate metrics."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _current_flow.set(flow)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_flow.reset(token)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def get_llm_response_cache_flow() -> str | None:
+    """The flow of the current LLM call if its response may be cached"""
+    if not LLM_RESPONSE_CACHE_ENABLED:
+        return None
+    return _current_flow.get()
+
+
+def _normalize_message(message: Any) -> Any:
+    if isinstance(message, dict) and isinstance(message.get("content"), str):
+        return {**message, "content": message["content"].strip()}
+    return message
+
+
+def build_llm_response_cache_key(
+    model_provider: str,
+    model_name: str,
+    api_base: str | None,
+    messages: Sequence[Any],
+    temperature: float,
+    max_tokens: int | None,
+    structured_response_format: dict | None,
+) -> str:
+    content_hash = hashlib.sha256(
+        json.dumps(
+            [
+                model_provider,
+                model_name,
+                api_base,
+                [_normalize_message(message) for message in messages],
+                temperature,
+                max_tokens,
+                structured_response_format,
+            ],
+            sort_keys=True,
+            default=str,
+        ).encode("utf-8")
+    ).hexdigest()
+    # the tenant is part of the key, mget and pipelines don't prefix the keys
+    # with the tenant of the redis client
+    return f"{_CACHE_KEY_PREFIX}:{get_current_tenant_id()}:{content_hash}"
+
+
+def _index_key() -> str:
+    return f"{_CACHE_KEY_PREFIX}:{get_current_tenant_id()}:index"
+
+
+def get_cached_llm_response(flow: str, cache_key: str) -> str | None:
+    cached_response: bytes | None = None
+    try:
+        cached_response = cast(
+            list[bytes | None], get_redis_client().mget([cache_key])
+        )[0]
+    except RedisError:
+        logger.exception("Failed to read the cached LLM response")
+
+    llm_response_cache_counter.labels(
+        flow=flow, result="miss" if cached_response is None else "hit"
+    ).inc()
+    return cached_response.decode("utf-8") if cached_response is not None else None
+
+
+def cache_llm_response(cache_key: str, response: str) -> None:
+    """Caches the response, evicting the oldest responses of the tenant beyond
+    LLM_RESPONSE_CACHE_MAX_ENTRIES"""
+    if len(response) > LLM_RESPONSE_CACHE_MAX_RESPONSE_CHARS:
+        return
+
+    now = time.time()
+    index_key = _index_key()
+    redis_client = get_redis_client()
+    try:
+        pipeline = redis_client.pipeline()
+        pipeline.set(cache_key, response, ex=LLM_RESPONSE_CACHE_TTL)
+        # the index orders the responses of the tenant by the time they were cached
+        pipeline.zadd(index_key, {cache_key: now})
+        pipeline.zremrangebyscore(index_key, "-inf", now - LLM_RESPONSE_CACHE_TTL)
+        pipeline.expire(index_key, LLM_RESPONSE_CACHE_TTL)
+        pipeline.zcard(index_key)
+        num_entries = cast(int, pipeline.execute()[-1])
+
+        if num_entries > LLM_RESPONSE_CACHE_MAX_ENTRIES:
+            evicted = cast(
+                list[tuple[bytes, float]],
+                redis_client.zpopmin(
+                    index_key, num_entries - LLM_RESPONSE_CACHE_MAX_ENTRIES
+                ),
+            )
+            if evicted:
+                pipeline = redis_client.pipeline()
+                pipeline.delete(*[key for key, _ in evicted])
+                pipeline.execute()
+    except RedisError:
+        logger.exception("Failed to cache the LLM response")
@@ -24,6 +24,7 @@ from sentry_sdk.integrations.starlette import StarletteIntegration
 from starlette.types import Lifespan
 
 from onyx import __version__
+from onyx.agents.agent_search.run_graph import warm_up_compiled_graphs
 from onyx.auth.schemas import UserCreate
 from onyx.auth.schemas import UserRead
 from onyx.auth.schemas import UserUpdate
@@ -35,6 +36,7 @@ from onyx.configs.app_configs import APP_HOST
 from onyx.configs.app_configs import APP_PORT
 from onyx.configs.app_configs import AUTH_RATE_LIMITING_ENABLED
 from onyx.configs.app_configs import AUTH_TYPE
+from onyx.configs.app_configs import DB_QUERY_PROFILING_ENABLED
 from onyx.configs.app_configs import DISABLE_GENERATIVE_AI
 from onyx.configs.app_configs import LOG_ENDPOINT_LATENCY
 from onyx.configs.app_configs import OAUTH_CLIENT_ID
@@ -89,6 +91,7 @@ from onyx.server.manage.search_settings import router as search_settings_router
 from onyx.server.manage.slack_bot import router as slack_bot_management_router
 from onyx.server.manage.users import router as user_router
 from onyx.server.middleware.latency_logging import add_latency_logging_middleware
+from onyx.server.middleware.query_profiling import add_query_profiling_middleware
 from onyx.server.middleware.rate_limiting import close_auth_limiter
 from onyx.server.middleware.rate_limiting import get_auth_rate_limiters
 from onyx.server.middleware.rate_limiting import setup_auth_limiter
@@ -249,6 +252,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # fill up Postgres connection pools
     await warm_up_connections()
 
+    # compile the agent graphs up front rather than on the first chat requests
+    warm_up_compiled_graphs()
+
     if not MULTI_TENANT:
         # We cache this at the beginning so there is no delay in the first telemetry
         CURRENT_TENANT_ID_CONTEXTVAR.set(POSTGRES_DEFAULT_SCHEMA)
@@ -464,6 +470,8 @@ def get_application(lifespan_override: Lifespan | None = None) -> FastAPI:
     )
     if LOG_ENDPOINT_LATENCY:
         add_latency_logging_middleware(application, logger)
+    if DB_QUERY_PROFILING_ENABLED:
+        add_query_profiling_middleware(application)
 
     add_onyx_request_id_middleware(application, "API", logger)
 
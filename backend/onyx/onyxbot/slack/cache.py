@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import cast
+from typing import Generic
+from typing import TypeVar
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+from slack_sdk import WebClient
+from sqlalchemy.orm import Session
+
+from onyx.configs.onyxbot_configs import DANSWER_BOT_CHANNEL_NAME_CACHE_TTL
+from onyx.configs.onyxbot_configs import DANSWER_BOT_CONFIG_CACHE_TTL
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.models import SlackChannelConfig
+from onyx.db.slack_bot import fetch_slack_bot
+from onyx.onyxbot.slack.config import get_slack_channel_config_for_bot_and_channel
+from onyx.onyxbot.slack.config import SLACK_BOT_CONFIG_VERSION_KEY
+from onyx.onyxbot.slack.utils import get_channel_name_from_id
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+# seconds between checks of the config version, i.e. how long it takes for an
+# admin edit to reach the Slack bot
+_VERSION_CHECK_INTERVAL = 1.0
+_MAX_CACHED_CHANNELS = 10_000
+
+_K = TypeVar("_K")
+_V = TypeVar("_V")
+
+
+class _ExpiringLRU(Generic[_K, _V]):
+    """Bounded mapping whose entries expire `ttl` seconds after being set. Not
+    thread safe, callers hold their own lock."""
+
+    def __init__(self, ttl: float, max_size: int = _MAX_CACHED_CHANNELS) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[_K, tuple[float, _V]] = OrderedDict()
+
+    def get(self, key: _K) -> tuple[bool, _V | None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: _K, value: _V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class CachedSlackChannelConfig(BaseModel):
+    id: int
+    channel_config: dict[str, Any]
+
+
+class SlackBotConfigCache:
+    """Caches what the Slack bot looks up for every incoming event of a tenant:
+    whether the bot is enabled, the channel config that applies to a channel and
+    the names of channels. Bots and channel configs are dropped whenever an admin
+    edits them (see `invalidate_slack_bot_config_cache`), channel names expire."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: bytes | None = None
+        self._version_checked_at = 0.0
+
+        # slack bot id -> enabled, None if the bot no longer exists
+        self._bots: _ExpiringLRU[int, bool | None] = _ExpiringLRU(
+            DANSWER_BOT_CONFIG_CACHE_TTL
+        )
+        self._channel_configs: _ExpiringLRU[
+            tuple[int, str | None], CachedSlackChannelConfig
+        ] = _ExpiringLRU(DANSWER_BOT_CONFIG_CACHE_TTL)
+        # keyed by slack bot id as well, the bots of a tenant may be installed in
+        # different workspaces
+        self._channel_names: _ExpiringLRU[tuple[int, str], tuple[str | None, bool]] = (
+            _ExpiringLRU(DANSWER_BOT_CHANNEL_NAME_CACHE_TTL)
+        )
+
+    def _check_version(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._version_checked_at < _VERSION_CHECK_INTERVAL:
+                return
+            self._version_checked_at = now
+
+        try:
+            version = cast(
+                bytes | None, get_redis_client().get(SLACK_BOT_CONFIG_VERSION_KEY)
+            )
+        except RedisError:
+            logger.warning("Unable to check the Slack bot config version")
+            return
+
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._bots.clear()
+                self._channel_configs.clear()
+
+    def is_slack_bot_enabled(self, slack_bot_id: int) -> bool | None:
+        """Returns None if the bot doesn't exist"""
+        self._check_version()
+        with self._lock:
+            found, enabled = self._bots.get(slack_bot_id)
+        if found:
+            return enabled
+
+        with get_session_with_current_tenant() as db_session:
+            try:
+                enabled = fetch_slack_bot(
+                    db_session=db_session, slack_bot_id=slack_bot_id
+                ).enabled
+            except ValueError:
+                enabled = None
+
+        with self._lock:
+            self._bots.set(slack_bot_id, enabled)
+        return enabled
+
+    def get_slack_channel_config(
+        self, slack_bot_id: int, channel_name: str | None
+    ) -> CachedSlackChannelConfig:
+        self._check_version()
+        with self._lock:
+            found, cached = self._channel_configs.get((slack_bot_id, channel_name))
+        if found and cached is not None:
+            return cached
+
+        with get_session_with_current_tenant() as db_session:
+            slack_channel_config = get_slack_channel_config_for_bot_and_channel(
+                db_session=db_session,
+                slack_bot_id=slack_bot_id,
+                channel_name=channel_name,
+            )
+            cached = CachedSlackChannelConfig(
+                id=slack_channel_config.id,
+                channel_config=dict(slack_channel_config.channel_config),
+            )
+
+        with self._lock:
+            self._channel_configs.set((slack_bot_id, channel_name), cached)
+        return cached
+
+    def get_channel_name(
+        self, client: WebClient, slack_bot_id: int, channel_id: str
+    ) -> tuple[str | None, bool]:
+        """Same as `get_channel_name_from_id`, returns the name and whether the
+        channel is a DM"""
+        with self._lock:
+            found, channel = self._channel_names.get((slack_bot_id, channel_id))
+        if found and channel is not None:
+            return channel
+
+        channel = get_channel_name_from_id(client=client, channel_id=channel_id)
+        with self._lock:
+            self._channel_names.set((slack_bot_id, channel_id), channel)
+        return channel
+
+
+_tenant_caches: dict[str, SlackBotConfigCache] = {}
+_tenant_caches_lock = threading.Lock()
+
+
+def get_slack_bot_config_cache(tenant_id: str | None = None) -> SlackBotConfigCache:
+    tenant_id = tenant_id or get_current_tenant_id()
+    with _tenant_caches_lock:
+        if tenant_id not in _tenant_caches:
+            _tenant_caches[tenant_id] = SlackBotConfigCache()
+        return _tenant_caches[tenant_id]
+
+
+def remove_slack_bot_config_cache(tenant_id: str) -> None:
+    with _tenant_caches_lock:
+        _tenant_caches.pop(tenant_id, None)
+
+
+def load_slack_channel_config(
+    db_session: Session, slack_bot_id: int, channel_name: str | None
+) -> SlackChannelConfig:
+    """Loads the channel config that applies to a channel into the session, using
+    the cached lookup of which config that is"""
+    cached = get_slack_bot_config_cache().get_slack_channel_config(
+        slack_bot_id=slack_bot_id, channel_name=channel_name
+    )
+    slack_channel_config = db_session.get(SlackChannelConfig, cached.id)
+    if slack_channel_config is None:
+        # deleted since it was cached
+        return get_slack_channel_config_for_bot_and_channel(
+            db_session=db_session,
+            slack_bot_id=slack_bot_id,
+            channel_name=channel_name,
+        )
+    return slack_channel_config
@@ -7,6 +7,7 @@ from onyx.db.slack_channel_config import (
     fetch_slack_channel_config_for_channel_or_default,
 )
 from onyx.db.slack_channel_config import fetch_slack_channel_configs
+from onyx.redis.redis_pool import get_redis_client
 
 VALID_SLACK_FILTERS = [
     "answerable_prefilter",
@@ -14,6 +15,10 @@ VALID_SLACK_FILTERS = [
     "questionmark_prefilter",
 ]
 
+# bumped on every admin edit of a Slack bot or channel config, the Slack bot drops
+# its cached configs when it changes
+SLACK_BOT_CONFIG_VERSION_KEY = "slack_bot_config_version"
+
 
 def get_slack_channel_config_for_bot_and_channel(
     db_session: Session,
@@ -31,6 +36,11 @@ def get_slack_channel_config_for_bot_and_channel(
     return slack_bot_config
 
 
+def invalidate_slack_bot_config_cache() -> None:
+    """Call after editing a Slack bot or channel config of the current tenant"""
+    get_redis_client().incr(SLACK_BOT_CONFIG_VERSION_KEY)
+
+
 def validate_channel_name(
     db_session: Session,
     current_slack_bot_id: int,
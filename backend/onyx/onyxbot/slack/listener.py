@@ -44,12 +44,13 @@ from onyx.db.engine.sql_engine import SqlEngine
 from onyx.db.engine.tenant_utils import get_all_tenant_ids
 from onyx.db.models import SlackBot
 from onyx.db.search_settings import get_current_search_settings
-from onyx.db.slack_bot import fetch_slack_bot
 from onyx.db.slack_bot import fetch_slack_bots
 from onyx.key_value_store.interface import KvKeyNotFoundError
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
 from onyx.natural_language_processing.search_nlp_models import warm_up_bi_encoder
-from onyx.onyxbot.slack.config import get_slack_channel_config_for_bot_and_channel
+from onyx.onyxbot.slack.cache import get_slack_bot_config_cache
+from onyx.onyxbot.slack.cache import load_slack_channel_config
+from onyx.onyxbot.slack.cache import remove_slack_bot_config_cache
 from onyx.onyxbot.slack.config import MAX_TENANTS_PER_POD
 from onyx.onyxbot.slack.config import TENANT_ACQUISITION_INTERVAL
 from onyx.onyxbot.slack.config import TENANT_HEARTBEAT_EXPIRATION
@@ -85,13 +86,14 @@ from onyx.onyxbot.slack.handlers.handle_message import schedule_feedback_reminde
 from onyx.onyxbot.slack.models import SlackMessageInfo
 from onyx.onyxbot.slack.utils import check_message_limit
 from onyx.onyxbot.slack.utils import decompose_action_id
-from onyx.onyxbot.slack.utils import get_channel_name_from_id
 from onyx.onyxbot.slack.utils import get_onyx_bot_auth_ids
 from onyx.onyxbot.slack.utils import read_slack_thread
 from onyx.onyxbot.slack.utils import remove_onyx_bot_tag
 from onyx.onyxbot.slack.utils import rephrase_slack_message
 from onyx.onyxbot.slack.utils import respond_in_thread_or_channel
 from onyx.onyxbot.slack.utils import TenantSocketModeClient
+from onyx.onyxbot.slack.work_queue import get_tenant_work_queue
+from onyx.onyxbot.slack.work_queue import shutdown_tenant_work_queue
 from onyx.redis.redis_pool import get_redis_client
 from onyx.server.manage.models import SlackBotTokens
 from onyx.utils.logger import setup_logger
@@ -447,6 +449,9 @@ class SlackbotHandler:
                     f"Stopped SocketModeClient for tenant: {t_id}, app: {slack_bot_id}"
                 )
 
+        shutdown_tenant_work_queue(tenant_id)
+        remove_slack_bot_config_cache(tenant_id)
+
         # Remove from active set
         if tenant_id in self.tenant_ids:
             self.tenant_ids.remove(tenant_id)
@@ -593,27 +598,25 @@ def prefilter_requests(req: SocketModeRequest, client: TenantSocketModeClient) -
 
     # skip cases where the bot is disabled in the web UI
     tenant_id = get_current_tenant_id()
+    config_cache = get_slack_bot_config_cache(tenant_id)
 
     bot_token_user_id, bot_token_bot_id = get_onyx_bot_auth_ids(
         tenant_id, client.web_client
     )
     logger.info(f"prefilter_requests: {bot_token_user_id=} {bot_token_bot_id=}")
 
-    with get_session_with_current_tenant() as db_session:
-        slack_bot = fetch_slack_bot(
-            db_session=db_session, slack_bot_id=client.slack_bot_id
+    slack_bot_enabled = config_cache.is_slack_bot_enabled(client.slack_bot_id)
+    if slack_bot_enabled is None:
+        logger.error(
+            f"Slack bot with ID '{client.slack_bot_id}' not found. Skipping request."
         )
-        if not slack_bot:
-            logger.error(
-                f"Slack bot with ID '{client.slack_bot_id}' not found. Skipping request."
-            )
-            return False
+        return False
 
-        if not slack_bot.enabled:
-            logger.info(
-                f"Slack bot with ID '{client.slack_bot_id}' is disabled. Skipping request."
-            )
-            return False
+    if not slack_bot_enabled:
+        logger.info(
+            f"Slack bot with ID '{client.slack_bot_id}' is disabled. Skipping request."
+        )
+        return False
 
     if req.type == "events_api":
         # Verify channel is valid
@@ -709,20 +712,19 @@ def prefilter_requests(req: SocketModeRequest, client: TenantSocketModeClient) -
             event.get("bot_profile") or event.get("subtype") == "bot_message"
         )
         if is_bot_message:
-            channel_name, _ = get_channel_name_from_id(
-                client=client.web_client, channel_id=channel
+            channel_name, _ = config_cache.get_channel_name(
+                client=client.web_client,
+                slack_bot_id=client.slack_bot_id,
+                channel_id=channel,
+            )
+            slack_channel_config = config_cache.get_slack_channel_config(
+                slack_bot_id=client.slack_bot_id,
+                channel_name=channel_name,
             )
-            with get_session_with_current_tenant() as db_session:
-                slack_channel_config = get_slack_channel_config_for_bot_and_channel(
-                    db_session=db_session,
-                    slack_bot_id=client.slack_bot_id,
-                    channel_name=channel_name,
-                )
 
             # If OnyxBot is not specifically tagged and the channel is not set to respond to bots, ignore the message
             if (not bot_token_user_id or bot_token_user_id not in msg) and (
-                not slack_channel_config
-                or not slack_channel_config.channel_config.get("respond_to_bots")
+                not slack_channel_config.channel_config.get("respond_to_bots")
             ):
                 channel_specific_logger.info(
                     "Ignoring message from bot since respond_to_bots is disabled"
@@ -940,6 +942,39 @@ def apologize_for_fail(
     )
 
 
+def notify_busy(req: SocketModeRequest, client: TenantSocketModeClient) -> None:
+    """Lets the user know that their question was dropped since too many events are
+    queued. Only questions aimed at the bot get this, so that a busy channel
+    doesn't get a reply to every message."""
+    if req.type != "events_api" and req.type != "slash_commands":
+        return
+
+    try:
+        if not prefilter_requests(req, client):
+            return
+
+        details = build_request_details(req, client)
+        if not details.bypass_filters and not details.is_bot_dm:
+            return
+
+        respond_in_thread_or_channel(
+            client=client.web_client,
+            channel=details.channel_to_respond,
+            thread_ts=details.msg_to_respond,
+            text=(
+                "Sorry, I'm handling too many questions right now, "
+                "please try again in a few minutes :hourglass_flowing_sand:"
+            ),
+            receiver_ids=(
+                [details.sender_id]
+                if details.is_slash_command and details.sender_id
+                else None
+            ),
+        )
+    except Exception:
+        logger.exception("Failed to notify the user that the Slack bot is busy")
+
+
 def process_message(
     req: SocketModeRequest,
     client: TenantSocketModeClient,
@@ -968,12 +1003,14 @@ def process_message(
 
     details = build_request_details(req, client)
     channel = details.channel_to_respond
-    channel_name, is_dm = get_channel_name_from_id(
-        client=client.web_client, channel_id=channel
+    channel_name, is_dm = get_slack_bot_config_cache(tenant_id).get_channel_name(
+        client=client.web_client,
+        slack_bot_id=client.slack_bot_id,
+        channel_id=channel,
     )
 
     with get_session_with_current_tenant() as db_session:
-        slack_channel_config = get_slack_channel_config_for_bot_and_channel(
+        slack_channel_config = load_slack_channel_config(
             db_session=db_session,
             slack_bot_id=client.slack_bot_id,
             channel_name=channel_name,
@@ -1050,6 +1087,19 @@ def view_routing(req: SocketModeRequest, client: TenantSocketModeClient) -> None
             return process_feedback(req, client)
 
 
+def handle_slack_event(client: TenantSocketModeClient, req: SocketModeRequest) -> None:
+    try:
+        if req.type == "interactive":
+            if req.payload.get("type") == "block_actions":
+                return action_routing(req, client)
+            elif req.payload.get("type") == "view_submission":
+                return view_routing(req, client)
+        elif req.type == "events_api" or req.type == "slash_commands":
+            return process_message(req, client)
+    except Exception:
+        logger.exception("Failed to process slack event")
+
+
 def create_process_slack_event() -> (
     Callable[[TenantSocketModeClient, SocketModeRequest], None]
 ):
@@ -1060,16 +1110,17 @@ def create_process_slack_event() -> (
         # it will assume the Bot is DEAD!!! :(
         acknowledge_message(req, client)
 
-        try:
-            if req.type == "interactive":
-                if req.payload.get("type") == "block_actions":
-                    return action_routing(req, client)
-                elif req.payload.get("type") == "view_submission":
-                    return view_routing(req, client)
-            elif req.type == "events_api" or req.type == "slash_commands":
-                return process_message(req, client)
-        except Exception:
-            logger.exception("Failed to process slack event")
+        # Handled by the tenant's workers so that a burst of events can't tie up
+        # the client's threads (delaying the acknowledgements above)
+        tenant_id = get_current_tenant_id()
+        if not get_tenant_work_queue(tenant_id).submit(
+            lambda: handle_slack_event(client, req)
+        ):
+            logger.warning(
+                f"Dropping Slack event, too many queued events: {tenant_id=} "
+                f"{req.type=} {req.envelope_id=}"
+            )
+            notify_busy(req, client)
 
     return process_slack_event
 
@@ -0,0 +1,98 @@
+import contextvars
+import queue
+import threading
+from collections.abc import Callable
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+
+from onyx.configs.onyxbot_configs import DANSWER_BOT_TENANT_QUEUE_SIZE
+from onyx.configs.onyxbot_configs import DANSWER_BOT_TENANT_WORKERS
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+queued_events_gauge = Gauge(
+    "slack_bot_queued_events",
+    "Number of Slack events waiting for a worker",
+)
+dropped_events_counter = Counter(
+    "slack_bot_dropped_events",
+    "Number of Slack events dropped since the tenant's work queue was full",
+)
+
+
+class TenantWorkQueue:
+    """Bounded queue of Slack events of a single tenant, handled by a fixed number of
+    worker threads. This keeps a burst of events from spawning an unbounded number
+    of concurrent handlers (and from piling up unbounded work in memory)."""
+
+    def __init__(
+        self,
+        tenant_id: str,
+        num_workers: int = DANSWER_BOT_TENANT_WORKERS,
+        max_size: int = DANSWER_BOT_TENANT_QUEUE_SIZE,
+    ) -> None:
+        self.tenant_id = tenant_id
+        self.max_size = max_size
+        # the bound is enforced in `submit` so that shutting down never blocks
+        self._queue: queue.Queue[
+            tuple[contextvars.Context, Callable[[], None]] | None
+        ] = queue.Queue()
+        self._workers = [
+            threading.Thread(
+                target=self._work,
+                name=f"slack-bot-{tenant_id}-{i}",
+                daemon=True,
+            )
+            for i in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            queued_events_gauge.dec()
+            context, func = item
+            try:
+                context.run(func)
+            except Exception:
+                logger.exception(f"Failed to handle Slack event: {self.tenant_id=}")
+
+    def submit(self, func: Callable[[], None]) -> bool:
+        """Queues `func` to run in the caller's context. Returns False if the queue is
+        full and the event was dropped."""
+        if self._queue.qsize() >= self.max_size:
+            dropped_events_counter.inc()
+            return False
+
+        queued_events_gauge.inc()
+        self._queue.put((contextvars.copy_context(), func))
+        return True
+
+    def shutdown(self) -> None:
+        """Lets the workers finish the queued events and exit"""
+        for _ in self._workers:
+            self._queue.put(None)
+
+
+_tenant_work_queues: dict[str, TenantWorkQueue] = {}
+_tenant_work_queues_lock = threading.Lock()
+
+
+def get_tenant_work_queue(tenant_id: str) -> TenantWorkQueue:
+    with _tenant_work_queues_lock:
+        if tenant_id not in _tenant_work_queues:
+            _tenant_work_queues[tenant_id] = TenantWorkQueue(tenant_id)
+        return _tenant_work_queues[tenant_id]
+
+
+def shutdown_tenant_work_queue(tenant_id: str) -> None:
+    with _tenant_work_queues_lock:
+        work_queue = _tenant_work_queues.pop(tenant_id, None)
+    if work_queue is not None:
+        work_queue.shutdown()
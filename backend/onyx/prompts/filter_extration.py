@@ -10,7 +10,7 @@ You are a tool to identify time filters to apply to a user query for a downstrea
 application. The downstream application is able to use a recency bias or apply a hard cutoff to \
 remove all documents before the cutoff. Identify the correct filters to apply for the user query.
 
-The current day and time is {current_day_time_str}.
+The current day is {current_day_str}.
 
 Always answer with ONLY a json which contains the keys "filter_type", "filter_value", \
 "value_multiple" and "date".
@@ -475,6 +475,18 @@ And here is the content:
 {content}
 """.strip()
 
+PACKED_DOCUMENTS_PREPROCESSING_PROMPT = """
+These are {num_documents} separate, unrelated documents that you need to extract information (entities, \
+relationships) from. Each document starts with a 'DOCUMENT <number>' line. Extract from each document on its own, \
+and never relate entities of different documents.
+
+Instead of a single extraction, answer with ONE JSON object that maps each document number to the extraction for \
+that document in the format above, like {{"1": <extraction for document 1>, "2": <extraction for document 2>}}. \
+Include every document number, with empty lists if there is nothing to extract from a document.
+
+{documents}
+""".strip()
+
 
 ### Source-specific prompts
 
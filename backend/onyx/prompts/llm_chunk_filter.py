@@ -28,6 +28,37 @@ Respond with EXACTLY AND ONLY: "{USEFUL_PAT}" or "{NONUSEFUL_PAT}"
 """.strip()
 
 
+# Same as above, for several sections evaluated in a single call
+BATCH_SECTION_FILTER_SECTION = """
+Section {number}:
+Title: {title}
+{optional_metadata}
+Reference Section:
+```
+{chunk_text}
+```
+""".strip()
+
+BATCH_SECTION_FILTER_PROMPT = """
+Determine which of the following sections are USEFUL for answering the user query.
+It is NOT enough for a section to be related to the query, \
+it must contain information that is USEFUL for answering the query.
+If a section contains ANY useful information, that is good enough, \
+it does not need to fully answer the every part of the user query.
+
+
+{sections}
+
+User Query:
+```
+{user_query}
+```
+
+Respond with EXACTLY AND ONLY a JSON list of the numbers of the useful sections, \
+e.g. [1, 3]. Respond with [] if none of the sections are useful.
+""".strip()
+
+
 # Use the following for easy viewing of prompts
 if __name__ == "__main__":
     print(SECTION_FILTER_PROMPT)
@@ -24,11 +24,15 @@ _BASIC_TIME_STR = "The current date is {datetime_info}."
 
 
 def get_current_llm_day_time(
-    include_day_of_week: bool = True, full_sentence: bool = True
+    include_day_of_week: bool = True,
+    full_sentence: bool = True,
+    include_time: bool = True,
 ) -> str:
     current_datetime = datetime.now()
-    # Format looks like: "October 16, 2023 14:30"
-    formatted_datetime = current_datetime.strftime("%B %d, %Y %H:%M")
+    # Format looks like: "October 16, 2023 14:30" (or "October 16, 2023")
+    formatted_datetime = current_datetime.strftime(
+        "%B %d, %Y %H:%M" if include_time else "%B %d, %Y"
+    )
     day_of_week = current_datetime.strftime("%A")
     if full_sentence:
         return f"The current day and time is {day_of_week} {formatted_datetime}"
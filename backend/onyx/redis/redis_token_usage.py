@@ -0,0 +1,189 @@
+import math
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from enum import Enum
+from typing import Any
+from typing import cast
+
+import redis
+
+from onyx.configs.app_configs import TOKEN_RATE_LIMIT_USAGE_RECONCILE_INTERVAL
+from onyx.configs.app_configs import TOKEN_RATE_LIMIT_USAGE_RETENTION_HOURS
+
+
+class TokenUsageScope(str, Enum):
+    GLOBAL = "global"
+    USER = "user"
+    USER_GROUP = "user_group"
+
+
+def _to_minute(time: datetime) -> int:
+    return int(time.timestamp()) // 60
+
+
+class RedisTokenUsage:
+    """Sliding window token usage counters for a single rate limit scope (the
+    whole tenant, a user or a user group).
+
+    Usage is kept in one hash per hour, holding the tokens used in each minute of
+    that hour as well as the hour's total. A window is summed with a single round
+    trip: the minutes of the hour the window starts in and the totals of the
+    hours after it.
+
+    The counters only hold usage recorded since `tracked_since`. Windows starting
+    before that have to be rebuilt from Postgres first, which also happens every
+    TOKEN_RATE_LIMIT_USAGE_RECONCILE_INTERVAL as the marker expires."""
+
+    PREFIX = "token_usage"
+    TOTAL_FIELD = "total"
+
+    # hour buckets outlive the retention by an hour so that the first, partial
+    # hour of the longest window is still around
+    BUCKET_TTL = (TOKEN_RATE_LIMIT_USAGE_RETENTION_HOURS + 1) * 3600
+
+    def __init__(
+        self, redis: redis.Redis, scope: TokenUsageScope, scope_id: str = ""
+    ) -> None:
+        self.redis = redis
+        self.scope = scope
+        self.scope_id = scope_id
+
+        self.key_prefix = f"{self.PREFIX}_{scope.value}_{scope_id}"
+        self.tracked_since_key = f"{self.key_prefix}_tracked_since"
+
+    def _hour_key(self, hour: int) -> str:
+        return f"{self.key_prefix}_{hour}"
+
+    def record(self, token_count: int, time: datetime | None = None) -> None:
+        minute = _to_minute(time or datetime.now(tz=timezone.utc))
+        hour_key = self._hour_key(minute // 60)
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(hour_key, str(minute), token_count)
+        pipe.hincrby(hour_key, self.TOTAL_FIELD, token_count)
+        pipe.expire(hour_key, self.BUCKET_TTL)
+        pipe.execute()
+
+    def get_usage(self, cutoff_times: Sequence[datetime]) -> list[int] | None:
+        """Returns the tokens used since each of the cutoff times, or None if the
+        counters don't go back far enough and need to be rebuilt."""
+        now = datetime.now(tz=timezone.utc)
+        earliest = min(cutoff_times)
+
+        # same as the Postgres aggregation, a minute counts if it starts at or
+        # after the cutoff
+        cutoff_minutes = [math.ceil(time.timestamp() / 60) for time in cutoff_times]
+        boundary_hours = {minute // 60 for minute in cutoff_minutes}
+        hours = range(min(boundary_hours), _to_minute(now) // 60 + 1)
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(self.tracked_since_key)
+        for hour in hours:
+            if hour in boundary_hours:
+                pipe.hgetall(self._hour_key(hour))
+            else:
+                pipe.hget(self._hour_key(hour), self.TOTAL_FIELD)
+        tracked_since, *buckets = pipe.execute()
+
+        if tracked_since is None or float(tracked_since) > earliest.timestamp():
+            return None
+
+        hour_totals: dict[int, int] = {}
+        minute_usage: dict[int, int] = {}
+        for hour, bucket in zip(hours, buckets):
+            if hour not in boundary_hours:
+                hour_totals[hour] = int(bucket or 0)
+                continue
+
+            bucket = cast(dict[bytes, bytes], bucket)
+            hour_totals[hour] = 0
+            for field, value in bucket.items():
+                if field.decode() == self.TOTAL_FIELD:
+                    hour_totals[hour] = int(value)
+                else:
+                    minute_usage[int(field)] = int(value)
+
+        usage: list[int] = []
+        for cutoff_minute in cutoff_minutes:
+            cutoff_hour = cutoff_minute // 60
+            usage.append(
+                sum(
+                    token_count
+                    for minute, token_count in minute_usage.items()
+                    if minute // 60 == cutoff_hour and minute >= cutoff_minute
+                )
+                + sum(
+                    total for hour, total in hour_totals.items() if hour > cutoff_hour
+                )
+            )
+        return usage
+
+    def rebuild(
+        self,
+        usage: Sequence[tuple[datetime, int]],
+        since: datetime,
+        until: datetime | None = None,
+    ) -> None:
+        """Replaces the counters of the minutes from `since` up to `until` (when
+        the usage was aggregated) with the per minute usage aggregated from
+        Postgres. Minutes from `until` on keep their live counts, so that usage
+        recorded while aggregating isn't lost."""
+        now = datetime.now(tz=timezone.utc)
+        until_minute = _to_minute(until or now)
+
+        minute_usage: dict[int, int] = defaultdict(int)
+        for time_sent, token_count in usage:
+            minute = _to_minute(time_sent)
+            if minute < until_minute:
+                minute_usage[minute] += token_count
+
+        first_hour = _to_minute(since) // 60
+        last_hour = _to_minute(now) // 60
+        # only these can hold minutes recorded after the aggregation
+        live_hour_keys = [
+            self._hour_key(hour)
+            for hour in range(min(until_minute // 60, last_hour), last_hour + 1)
+        ]
+
+        def _merge(pipe: redis.client.Pipeline) -> None:
+            live_buckets = [
+                cast(dict[bytes, bytes], pipe.hgetall(hour_key))
+                for hour_key in live_hour_keys
+            ]
+            merged_usage = dict(minute_usage)
+            for live_bucket in live_buckets:
+                for field, value in live_bucket.items():
+                    if field.decode() == self.TOTAL_FIELD:
+                        continue
+                    minute = int(field)
+                    if minute >= until_minute:
+                        merged_usage[minute] = int(value)
+
+            hour_buckets: dict[int, dict[str, int]] = defaultdict(
+                lambda: {self.TOTAL_FIELD: 0}
+            )
+            for minute, token_count in merged_usage.items():
+                bucket = hour_buckets[minute // 60]
+                bucket[str(minute)] = token_count
+                bucket[self.TOTAL_FIELD] += token_count
+
+            pipe.multi()
+            pipe.delete(
+                *[self._hour_key(hour) for hour in range(first_hour, last_hour + 1)]
+            )
+            for hour, bucket in hour_buckets.items():
+                hour_key = self._hour_key(hour)
+                pipe.hset(hour_key, mapping=cast(dict[Any, Any], bucket))
+                pipe.expire(hour_key, self.BUCKET_TTL)
+            pipe.set(
+                self.tracked_since_key,
+                since.timestamp(),
+                ex=timedelta(seconds=TOKEN_RATE_LIMIT_USAGE_RECONCILE_INTERVAL),
+            )
+
+        # retried if usage is recorded between reading the live counts and
+        # replacing the counters
+        self.redis.transaction(_merge, *live_hour_keys)
@@ -4,6 +4,7 @@ from onyx.configs.model_configs import GEN_AI_HISTORY_CUTOFF
 from onyx.db.models import ChatMessage
 from onyx.db.search_settings import get_multilingual_expansion
 from onyx.llm.interfaces import LLM
+from onyx.llm.response_cache import llm_response_cache_flow
 from onyx.llm.utils import dict_based_prompt_to_langchain_prompt
 from onyx.llm.utils import message_to_string
 from onyx.prompts.chat_prompts import CHAT_NAMING
@@ -12,6 +13,7 @@ from onyx.utils.logger import setup_logger
 logger = setup_logger()
 
 
+@llm_response_cache_flow("chat_session_naming")
 def get_renamed_conversation_name(
     full_history: list[ChatMessage],
     llm: LLM,
@@ -1,17 +1,38 @@
-from collections.abc import Callable
+import queue
+import re
+import time
+from collections.abc import Iterator
 
 from onyx.configs.chat_configs import DISABLE_LLM_DOC_RELEVANCE
+from onyx.configs.chat_configs import LLM_DOC_RELEVANCE_BATCH_SIZE
+from onyx.configs.chat_configs import LLM_DOC_RELEVANCE_TIMEOUT
 from onyx.llm.interfaces import LLM
+from onyx.llm.response_cache import llm_response_cache_flow
 from onyx.llm.utils import dict_based_prompt_to_langchain_prompt
 from onyx.llm.utils import message_to_string
+from onyx.prompts.llm_chunk_filter import BATCH_SECTION_FILTER_PROMPT
+from onyx.prompts.llm_chunk_filter import BATCH_SECTION_FILTER_SECTION
 from onyx.prompts.llm_chunk_filter import NONUSEFUL_PAT
 from onyx.prompts.llm_chunk_filter import SECTION_FILTER_PROMPT
 from onyx.utils.logger import setup_logger
-from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+from onyx.utils.threadpool_concurrency import ExecutorName
+from onyx.utils.threadpool_concurrency import get_executor
 
 logger = setup_logger()
 
 
+def _get_metadata_str(metadata: dict[str, str | list[str]]) -> str:
+    if not metadata:
+        return ""
+
+    metadata_str = "\nMetadata:\n"
+    for key, value in metadata.items():
+        value_str = ", ".join(value) if isinstance(value, list) else value
+        metadata_str += f"{key} - {value_str}\n"
+    return metadata_str
+
+
+@llm_response_cache_flow("chunk_usefulness")
 def llm_eval_section(
     query: str,
     section_content: str,
@@ -19,15 +40,7 @@ def llm_eval_section(
     title: str,
     metadata: dict[str, str | list[str]],
 ) -> bool:
-    def _get_metadata_str(metadata: dict[str, str | list[str]]) -> str:
-        metadata_str = "\nMetadata:\n"
-        for key, value in metadata.items():
-            value_str = ", ".join(value) if isinstance(value, list) else value
-            metadata_str += f"{key} - {value_str}\n"
-        return metadata_str
-
     def _get_usefulness_messages() -> list[dict[str, str]]:
-        metadata_str = _get_metadata_str(metadata) if metadata else ""
         messages = [
             {
                 "role": "user",
@@ -35,7 +48,7 @@ def llm_eval_section(
                     title=title.replace("\n", " "),
                     chunk_text=section_content,
                     user_query=query,
-                    optional_metadata=metadata_str,
+                    optional_metadata=_get_metadata_str(metadata),
                 ),
             },
         ]
@@ -59,45 +72,162 @@ def llm_eval_section(
     return _extract_usefulness(model_output)
 
 
-def llm_batch_eval_sections(
+@llm_response_cache_flow("chunk_usefulness")
+def llm_eval_sections(
     query: str,
     section_contents: list[str],
     llm: LLM,
     titles: list[str],
     metadata_list: list[dict[str, str | list[str]]],
-    use_threads: bool = True,
 ) -> list[bool]:
-    answer: list[bool]
+    """Evaluates the usefulness of several sections in a single LLM call"""
+    sections_str = "\n\n".join(
+        BATCH_SECTION_FILTER_SECTION.format(
+            number=i + 1,
+            title=title.replace("\n", " "),
+            chunk_text=section_content,
+            optional_metadata=_get_metadata_str(metadata),
+        )
+        for i, (section_content, title, metadata) in enumerate(
+            zip(section_contents, titles, metadata_list)
+        )
+    )
+    messages = [
+        {
+            "role": "user",
+            "content": BATCH_SECTION_FILTER_PROMPT.format(
+                sections=sections_str, user_query=query
+            ),
+        },
+    ]
+    model_output = message_to_string(
+        llm.invoke(dict_based_prompt_to_langchain_prompt(messages))
+    )
 
+    # Default useful if the LLM doesn't answer with a list of section numbers, it's
+    # better to trust the (re)ranking if LLM fails
+    useful_list = re.search(r"\[[\d\s,]*\]", model_output)
+    if useful_list is None:
+        return [True] * len(section_contents)
+
+    useful_numbers = {int(number) for number in re.findall(r"\d+", useful_list[0])}
+    return [i + 1 in useful_numbers for i in range(len(section_contents))]
+
+
+def stream_llm_section_usefulness(
+    query: str,
+    section_contents: list[str],
+    llm: LLM,
+    titles: list[str],
+    metadata_list: list[dict[str, str | list[str]]],
+    batch_size: int = LLM_DOC_RELEVANCE_BATCH_SIZE,
+    timeout: float | None = LLM_DOC_RELEVANCE_TIMEOUT,
+) -> Iterator[tuple[int, bool]]:
+    """
+    Starts evaluating the sections right away, in batches of batch_size sections per
+    LLM call, and yields (index of the section, whether it is useful) as the batches
+    finish. Sections of batches that failed are useful.
+
+    Stops once timeout seconds have passed, the sections that were not evaluated
+    by then are not yielded.
+    """
     if DISABLE_LLM_DOC_RELEVANCE:
         raise RuntimeError(
             "LLM Doc Relevance is globally disabled, "
             "this should have been caught upstream."
         )
 
-    if use_threads:
-        functions_with_args: list[tuple[Callable, tuple]] = [
-            (llm_eval_section, (query, section_content, llm, title, metadata))
-            for section_content, title, metadata in zip(
-                section_contents, titles, metadata_list
-            )
-        ]
-
-        logger.debug(
-            "Running LLM usefulness eval in parallel (following logging may be out of order)"
-        )
-        parallel_results = run_functions_tuples_in_parallel(
-            functions_with_args, allow_failures=True
-        )
+    batches = [
+        list(range(start, min(start + batch_size, len(section_contents))))
+        for start in range(0, len(section_contents), max(batch_size, 1))
+    ]
+    verdicts: queue.Queue[tuple[list[int], list[bool] | None]] = queue.Queue()
+
+    def evaluate_batch(indices: list[int]) -> None:
+        usefulness: list[bool] | None = None
+        try:
+            if len(indices) == 1:
+                usefulness = [
+                    llm_eval_section(
+                        query,
+                        section_contents[indices[0]],
+                        llm,
+                        titles[indices[0]],
+                        metadata_list[indices[0]],
+                    )
+                ]
+            else:
+                usefulness = llm_eval_sections(
+                    query,
+                    [section_contents[i] for i in indices],
+                    llm,
+                    [titles[i] for i in indices],
+                    [metadata_list[i] for i in indices],
+                )
+        except Exception as e:
+            logger.exception(f"Failed to evaluate the usefulness of sections: {e}")
+        finally:
+            verdicts.put((indices, usefulness))
+
+    executor = get_executor(ExecutorName.LLM)
+    tasks = [executor.submit(evaluate_batch, indices) for indices in batches]
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def yield_verdicts() -> Iterator[tuple[int, bool]]:
+        try:
+            for _ in batches:
+                if deadline is None:
+                    # run a batch that no thread has started yet rather than wait on it
+                    while verdicts.empty() and any(
+                        task.run_if_pending() for task in tasks
+                    ):
+                        pass
+
+                batch_verdicts: tuple[list[int], list[bool] | None]
+                try:
+                    batch_verdicts = verdicts.get(
+                        timeout=(
+                            max(deadline - time.monotonic(), 0)
+                            if deadline is not None
+                            else None
+                        )
+                    )
+                except queue.Empty:
+                    logger.warning(
+                        "LLM usefulness evaluation did not finish within "
+                        f"{timeout} seconds"
+                    )
+                    return
+
+                indices, usefulness = batch_verdicts
+                for index, useful in zip(indices, usefulness or [True] * len(indices)):
+                    yield index, useful
+        finally:
+            # the batches that haven't started are not needed anymore
+            for task in tasks:
+                task.cancel()
+
+    return yield_verdicts()
 
-        # In case of failure/timeout, don't throw out the section
-        answer = [True if item is None else item for item in parallel_results]
-        return answer
 
-    answer = [
-        llm_eval_section(query, section_content, llm, title, metadata)
-        for section_content, title, metadata in zip(
-            section_contents, titles, metadata_list
-        )
-    ]
+def llm_batch_eval_sections(
+    query: str,
+    section_contents: list[str],
+    llm: LLM,
+    titles: list[str],
+    metadata_list: list[dict[str, str | list[str]]],
+    timeout: float | None = LLM_DOC_RELEVANCE_TIMEOUT,
+) -> list[bool | None]:
+    """Whether each section is useful, None for the sections that were not evaluated
+    within timeout seconds"""
+    answer: list[bool | None] = [None] * len(section_contents)
+    for index, useful in stream_llm_section_usefulness(
+        query=query,
+        section_contents=section_contents,
+        llm=llm,
+        titles=titles,
+        metadata_list=metadata_list,
+        timeout=timeout,
+    ):
+        answer[index] = useful
     return answer
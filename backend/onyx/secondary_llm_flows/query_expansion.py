@@ -8,17 +8,20 @@ from onyx.llm.exceptions import GenAIDisabledException
 from onyx.llm.factory import get_default_llms
 from onyx.llm.interfaces import LLM
 from onyx.llm.models import PreviousMessage
+from onyx.llm.response_cache import llm_response_cache_flow
 from onyx.llm.utils import dict_based_prompt_to_langchain_prompt
 from onyx.llm.utils import message_to_string
 from onyx.prompts.chat_prompts import HISTORY_QUERY_REPHRASE
 from onyx.prompts.miscellaneous_prompts import LANGUAGE_REPHRASE_PROMPT
 from onyx.utils.logger import setup_logger
 from onyx.utils.text_processing import count_punctuation
+from onyx.utils.threadpool_concurrency import ExecutorName
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 
 logger = setup_logger()
 
 
+@llm_response_cache_flow("multilingual_query_expansion")
 def llm_multilingual_query_expansion(query: str, language: str) -> str:
     def _get_rephrase_messages() -> list[dict[str, str]]:
         messages = [
@@ -60,7 +63,9 @@ def multilingual_query_expansion(
             for language in languages
         ]
 
-        query_rephrases = run_functions_tuples_in_parallel(functions_with_args)
+        query_rephrases = run_functions_tuples_in_parallel(
+            functions_with_args, executor=ExecutorName.LLM
+        )
         return query_rephrases
 
     else:
@@ -87,6 +92,7 @@ def get_contextual_rephrase_messages(
     return messages
 
 
+@llm_response_cache_flow("history_based_query_rephrase")
 def history_based_query_rephrase(
     query: str,
     history: list[ChatMessage] | list[PreviousMessage],
@@ -131,6 +137,7 @@ def history_based_query_rephrase(
     return rephrased_query
 
 
+@llm_response_cache_flow("thread_based_query_rephrase")
 def thread_based_query_rephrase(
     user_query: str,
     history_str: str,
@@ -6,6 +6,7 @@ from onyx.chat.models import OnyxAnswerPiece
 from onyx.chat.models import StreamingError
 from onyx.llm.exceptions import GenAIDisabledException
 from onyx.llm.factory import get_default_llms
+from onyx.llm.response_cache import llm_response_cache_flow
 from onyx.llm.utils import dict_based_prompt_to_langchain_prompt
 from onyx.llm.utils import message_generator_to_string_generator
 from onyx.llm.utils import message_to_string
@@ -45,6 +46,7 @@ def extract_answerability_bool(model_raw: str) -> bool:
     return answerable
 
 
+@llm_response_cache_flow("query_validation")
 def get_query_answerability(
     user_query: str, skip_check: bool = False
 ) -> tuple[str, bool]:
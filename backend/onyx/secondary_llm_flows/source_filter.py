@@ -8,6 +8,7 @@ from onyx.configs.constants import DocumentSource
 from onyx.db.connector import fetch_unique_document_sources
 from onyx.db.engine.sql_engine import get_sqlalchemy_engine
 from onyx.llm.interfaces import LLM
+from onyx.llm.response_cache import llm_response_cache_flow
 from onyx.llm.utils import dict_based_prompt_to_langchain_prompt
 from onyx.llm.utils import message_to_string
 from onyx.natural_language_processing.search_nlp_models import (
@@ -66,6 +67,7 @@ def _sample_documents_using_custom_connector_classifier(
     return strings_to_document_sources(connectors) if connectors else None
 
 
+@llm_response_cache_flow("source_filter")
 def extract_source_filter(
     query: str, llm: LLM, db_session: Session
 ) -> list[DocumentSource] | None:
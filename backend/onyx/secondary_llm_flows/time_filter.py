@@ -6,6 +6,7 @@ from datetime import timezone
 from dateutil.parser import parse
 
 from onyx.llm.interfaces import LLM
+from onyx.llm.response_cache import llm_response_cache_flow
 from onyx.llm.utils import dict_based_prompt_to_langchain_prompt
 from onyx.llm.utils import message_to_string
 from onyx.prompts.filter_extration import TIME_FILTER_PROMPT
@@ -40,6 +41,7 @@ def best_match_time(time_str: str) -> datetime | None:
         return None
 
 
+@llm_response_cache_flow("time_filter")
 def extract_time_filter(query: str, llm: LLM) -> tuple[datetime | None, bool]:
     """Returns a datetime if a hard time filter should be applied for the given query
     Additionally returns a bool, True if more recently updated Documents should be
@@ -49,8 +51,12 @@ def extract_time_filter(query: str, llm: LLM) -> tuple[datetime | None, bool]:
         messages = [
             {
                 "role": "system",
+                # only the day, the time of day would change the prompt (and
+                # with it the response cache key) every minute
                 "content": TIME_FILTER_PROMPT.format(
-                    current_day_time_str=get_current_llm_day_time()
+                    current_day_str=get_current_llm_day_time(
+                        full_sentence=False, include_time=False
+                    )
                 ),
             },
             {
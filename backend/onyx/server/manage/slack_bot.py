@@ -21,6 +21,7 @@ from onyx.db.slack_channel_config import fetch_slack_channel_configs
 from onyx.db.slack_channel_config import insert_slack_channel_config
 from onyx.db.slack_channel_config import remove_slack_channel_config
 from onyx.db.slack_channel_config import update_slack_channel_config
+from onyx.onyxbot.slack.config import invalidate_slack_bot_config_cache
 from onyx.onyxbot.slack.config import validate_channel_name
 from onyx.server.manage.models import SlackBot
 from onyx.server.manage.models import SlackBotCreationRequest
@@ -146,6 +147,7 @@ def create_slack_channel_config(
         standard_answer_category_ids=slack_channel_config_creation_request.standard_answer_categories,
         enable_auto_filters=slack_channel_config_creation_request.enable_auto_filters,
     )
+    invalidate_slack_bot_config_cache()
     return SlackChannelConfig.from_model(slack_channel_config_model)
 
 
@@ -209,6 +211,7 @@ def patch_slack_channel_config(
         enable_auto_filters=slack_channel_config_creation_request.enable_auto_filters,
         disabled=slack_channel_config_creation_request.disabled,
     )
+    invalidate_slack_bot_config_cache()
     return SlackChannelConfig.from_model(slack_channel_config_model)
 
 
@@ -223,6 +226,7 @@ def delete_slack_channel_config(
         slack_channel_config_id=slack_channel_config_id,
         user=user,
     )
+    invalidate_slack_bot_config_cache()
 
 
 @router.get("/admin/slack-app/channel")
@@ -299,6 +303,7 @@ def patch_bot(
         bot_token=slack_bot_creation_request.bot_token,
         app_token=slack_bot_creation_request.app_token,
     )
+    invalidate_slack_bot_config_cache()
     return SlackBot.from_model(slack_bot_model)
 
 
@@ -312,6 +317,7 @@ def delete_bot(
         db_session=db_session,
         slack_bot_id=slack_bot_id,
     )
+    invalidate_slack_bot_config_cache()
 
 
 @router.get("/admin/slack-app/bots/{slack_bot_id}")
@@ -0,0 +1,60 @@
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi import Response
+from starlette.routing import Match
+
+from onyx.db.engine.query_profiler import QUERY_PROFILING_HEADER
+from onyx.db.engine.query_profiler import QueryProfile
+from onyx.db.engine.query_profiler import reset_current_query_profile
+from onyx.db.engine.query_profiler import set_current_query_profile
+from onyx.db.engine.query_profiler import should_profile_queries
+
+
+def _route_name(request: Request) -> str:
+    """The path template of the matched route, keeps the metric labels bounded"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return f"{request.method} {getattr(route, 'path', request.url.path)}"
+    return f"{request.method} <unmatched>"
+
+
+def add_query_profiling_middleware(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def profile_queries(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        requested = request.headers.get(QUERY_PROFILING_HEADER, "").lower() == "true"
+        if not should_profile_queries(requested):
+            return await call_next(request)
+
+        # the endpoint (and any threads it hands work to) sees the profile through
+        # a copy of this context
+        profile = QueryProfile("api", _route_name(request))
+        token = set_current_query_profile(profile)
+        try:
+            response = await call_next(request)
+        finally:
+            reset_current_query_profile(token)
+
+        body_iterator: AsyncIterator[bytes] | None = getattr(
+            response, "body_iterator", None
+        )
+        if body_iterator is None:
+            profile.report()
+            return response
+
+        # streamed responses (e.g. chat) keep querying until the body is sent
+        async def _report_when_sent() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                profile.report()
+
+        response.body_iterator = _report_when_sent()  # type: ignore[attr-defined]
+        return response
@@ -1,30 +1,58 @@
+import gzip
+import io
+import traceback
+from collections.abc import Iterator
 from datetime import datetime
 from datetime import timezone
+from typing import BinaryIO
+from typing import cast
+from uuid import uuid4
 
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import UploadFile
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from onyx.auth.users import api_key_dep
+from onyx.background.celery.tasks.docprocessing.heartbeat import start_heartbeat
+from onyx.background.celery.tasks.docprocessing.heartbeat import stop_heartbeat
+from onyx.background.celery.versioned_apps.client import app as client_app
+from onyx.background.indexing.run_docfetching import strip_null_characters
+from onyx.configs.app_configs import INDEX_BATCH_SIZE
 from onyx.configs.constants import DEFAULT_CC_PAIR_ID
 from onyx.configs.constants import DocumentSource
+from onyx.configs.constants import OnyxCeleryPriority
+from onyx.configs.constants import OnyxCeleryQueues
+from onyx.configs.constants import OnyxCeleryTask
 from onyx.connectors.models import Document
+from onyx.connectors.models import DocumentBase
 from onyx.connectors.models import IndexAttemptMetadata
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.document import get_documents_by_cc_pair
 from onyx.db.document import get_ingestion_documents
 from onyx.db.engine.sql_engine import get_session
+from onyx.db.index_attempt import get_index_attempt
+from onyx.db.index_attempt import mark_attempt_canceled
+from onyx.db.index_attempt import mark_attempt_failed
+from onyx.db.index_attempt import mark_attempt_in_progress
+from onyx.db.indexing_coordination import IndexingCoordination
 from onyx.db.models import User
 from onyx.db.search_settings import get_active_search_settings
+from onyx.db.search_settings import get_active_search_settings_list
 from onyx.db.search_settings import get_current_search_settings
 from onyx.db.search_settings import get_secondary_search_settings
 from onyx.document_index.factory import get_default_document_index
+from onyx.file_store.document_batch_storage import get_document_batch_storage
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import run_indexing_pipeline
 from onyx.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
 )
+from onyx.server.onyx_api.models import BulkIngestionError
+from onyx.server.onyx_api.models import BulkIngestionJob
+from onyx.server.onyx_api.models import BulkIngestionJobStatus
 from onyx.server.onyx_api.models import DocMinimalInfo
 from onyx.server.onyx_api.models import IngestionDocument
 from onyx.server.onyx_api.models import IngestionResult
@@ -36,6 +64,37 @@ logger = setup_logger()
 # not using /api to avoid confusion with nginx api path routing
 router = APIRouter(prefix="/onyx-api")
 
+# the index attempts of bulk ingestion jobs have no docfetching task, this marks
+# them instead
+_BULK_INGESTION_TASK_ID_PREFIX = "bulk_ingestion_"
+_MAX_REPORTED_INVALID_DOCUMENTS = 100
+
+
+def _to_ingestion_document(document_base: DocumentBase) -> Document:
+    document_base.from_ingestion_api = True
+
+    if document_base.doc_updated_at is None:
+        document_base.doc_updated_at = datetime.now(tz=timezone.utc)
+
+    document = Document.from_base(document_base)
+
+    # TODO once the frontend is updated with this enum, remove this logic
+    if document.source == DocumentSource.INGESTION_API:
+        document.source = DocumentSource.FILE
+
+    return document
+
+
+def _read_lines(file: BinaryIO) -> Iterator[str]:
+    """Reads the lines of the file one at a time, decompressing it if it's gzip'd"""
+    is_gzipped = file.read(2) == b"\x1f\x8b"
+    file.seek(0)
+
+    stream: BinaryIO = (
+        cast(BinaryIO, gzip.GzipFile(fileobj=file, mode="rb")) if is_gzipped else file
+    )
+    yield from io.TextIOWrapper(stream, encoding="utf-8")
+
 
 @router.get("/connector-docs/{cc_pair_id}")
 def get_docs_by_connector_credential_pair(
@@ -78,16 +137,7 @@ def upsert_ingestion_doc(
 ) -> IngestionResult:
     tenant_id = get_current_tenant_id()
 
-    doc_info.document.from_ingestion_api = True
-
-    if doc_info.document.doc_updated_at is None:
-        doc_info.document.doc_updated_at = datetime.now(tz=timezone.utc)
-
-    document = Document.from_base(doc_info.document)
-
-    # TODO once the frontend is updated with this enum, remove this logic
-    if document.source == DocumentSource.INGESTION_API:
-        document.source = DocumentSource.FILE
+    document = _to_ingestion_document(doc_info.document)
 
     cc_pair = get_connector_credential_pair_from_id(
         db_session=db_session,
@@ -163,3 +213,186 @@ def upsert_ingestion_doc(
         document_id=document.id,
         already_existed=indexing_pipeline_result.new_docs > 0,
     )
+
+
+@router.post("/ingestion/bulk")
+def bulk_ingest_docs(
+    file: UploadFile,
+    cc_pair_id: int | None = None,
+    _: User | None = Depends(api_key_dep),
+    db_session: Session = Depends(get_session),
+) -> BulkIngestionJob:
+    """Queues the documents of an NDJSON upload (one document per line, optionally
+    gzip'd) for the docprocessing workers, which embed and index them in batches.
+
+    Invalid lines are skipped. Returns once every document is queued, the progress
+    of the job can then be polled with its ID."""
+    tenant_id = get_current_tenant_id()
+
+    cc_pair = get_connector_credential_pair_from_id(
+        db_session=db_session,
+        cc_pair_id=cc_pair_id or DEFAULT_CC_PAIR_ID,
+    )
+    if cc_pair is None:
+        raise HTTPException(
+            status_code=400, detail="Connector-Credential Pair specified does not exist"
+        )
+
+    # Need to index for both the primary and secondary index if possible, through an
+    # index attempt for each. The index attempt of the primary index is the job
+    celery_task_id = f"{_BULK_INGESTION_TASK_ID_PREFIX}{uuid4()}"
+    index_attempt_ids: list[int] = []
+    for search_settings in get_active_search_settings_list(db_session):
+        index_attempt_id = IndexingCoordination.try_create_index_attempt(
+            db_session=db_session,
+            cc_pair_id=cc_pair.id,
+            search_settings_id=search_settings.id,
+            celery_task_id=celery_task_id,
+        )
+        if index_attempt_id is None:
+            for created_index_attempt_id in index_attempt_ids:
+                mark_attempt_canceled(
+                    created_index_attempt_id,
+                    db_session,
+                    reason="Indexing already in progress",
+                )
+            raise HTTPException(
+                status_code=409,
+                detail="Indexing is already in progress for this Connector-Credential Pair",
+            )
+        index_attempt_ids.append(index_attempt_id)
+
+    for index_attempt_id in index_attempt_ids:
+        index_attempt = get_index_attempt(db_session, index_attempt_id)
+        if index_attempt is None:
+            raise RuntimeError(f"Index attempt {index_attempt_id} not found")
+        mark_attempt_in_progress(index_attempt, db_session)
+
+    storages = [
+        get_document_batch_storage(cc_pair.id, index_attempt_id)
+        for index_attempt_id in index_attempt_ids
+    ]
+
+    def _queue_batch(documents: list[Document], batch_num: int) -> None:
+        cleaned_documents = strip_null_characters(documents)
+        for index_attempt_id, storage in zip(index_attempt_ids, storages):
+            storage.store_batch(batch_num, cleaned_documents)
+            client_app.send_task(
+                OnyxCeleryTask.DOCPROCESSING_TASK,
+                kwargs={
+                    "index_attempt_id": index_attempt_id,
+                    "cc_pair_id": cc_pair.id,
+                    "tenant_id": tenant_id,
+                    "batch_num": batch_num,
+                },
+                queue=OnyxCeleryQueues.DOCPROCESSING,
+                priority=OnyxCeleryPriority.MEDIUM,
+            )
+
+    invalid_documents: list[BulkIngestionError] = []
+    num_invalid_documents = 0
+    documents_queued = 0
+    batch_num = 0
+
+    # the attempts must look alive while the upload is being queued
+    heartbeats = [
+        start_heartbeat(index_attempt_id) for index_attempt_id in index_attempt_ids
+    ]
+    try:
+        document_batch: list[Document] = []
+        for line_num, line in enumerate(_read_lines(file.file), start=1):
+            if not line.strip():
+                continue
+
+            document: Document
+            try:
+                document = _to_ingestion_document(
+                    DocumentBase.model_validate_json(line)
+                )
+            except ValidationError as e:
+                num_invalid_documents += 1
+                if len(invalid_documents) < _MAX_REPORTED_INVALID_DOCUMENTS:
+                    invalid_documents.append(
+                        BulkIngestionError(line_num=line_num, error=str(e))
+                    )
+                continue
+
+            document_batch.append(document)
+            if len(document_batch) >= INDEX_BATCH_SIZE:
+                _queue_batch(document_batch, batch_num)
+                documents_queued += len(document_batch)
+                batch_num += 1
+                document_batch = []
+
+        if document_batch:
+            _queue_batch(document_batch, batch_num)
+            documents_queued += len(document_batch)
+            batch_num += 1
+
+        # Signals the monitoring of the index attempts that everything was queued
+        for index_attempt_id in index_attempt_ids:
+            IndexingCoordination.set_total_batches(
+                db_session=db_session,
+                index_attempt_id=index_attempt_id,
+                total_batches=batch_num,
+            )
+    except Exception as e:
+        for index_attempt_id, storage in zip(index_attempt_ids, storages):
+            mark_attempt_failed(
+                index_attempt_id,
+                db_session,
+                failure_reason=f"Failed to queue the bulk ingestion: {e}",
+                full_exception_trace=traceback.format_exc(),
+            )
+            storage.cleanup_all_batches()
+
+        if isinstance(e, (UnicodeDecodeError, gzip.BadGzipFile, EOFError)):
+            raise HTTPException(
+                status_code=400, detail=f"Failed to read the upload: {e}"
+            )
+        raise
+    finally:
+        for heartbeat_thread, stop_event in heartbeats:
+            stop_heartbeat(heartbeat_thread, stop_event)
+
+    logger.info(
+        f"Queued bulk ingestion: "
+        f"job={index_attempt_ids[0]} "
+        f"cc_pair={cc_pair.id} "
+        f"docs={documents_queued} "
+        f"batches={batch_num} "
+        f"invalid_docs={num_invalid_documents}"
+    )
+
+    return BulkIngestionJob(
+        job_id=index_attempt_ids[0],
+        documents_queued=documents_queued,
+        batches_queued=batch_num,
+        invalid_documents=invalid_documents,
+        num_invalid_documents=num_invalid_documents,
+    )
+
+
+@router.get("/ingestion/bulk/{job_id}")
+def get_bulk_ingestion_job_status(
+    job_id: int,
+    _: User | None = Depends(api_key_dep),
+    db_session: Session = Depends(get_session),
+) -> BulkIngestionJobStatus:
+    index_attempt = get_index_attempt(db_session, job_id)
+    if index_attempt is None or not (index_attempt.celery_task_id or "").startswith(
+        _BULK_INGESTION_TASK_ID_PREFIX
+    ):
+        raise HTTPException(status_code=404, detail="Bulk ingestion job not found")
+
+    coordination_status = IndexingCoordination.get_coordination_status(
+        db_session, job_id
+    )
+    return BulkIngestionJobStatus(
+        job_id=job_id,
+        status=index_attempt.status,
+        total_batches=coordination_status.total_batches,
+        completed_batches=coordination_status.completed_batches,
+        total_docs=coordination_status.total_docs,
+        total_failures=coordination_status.total_failures,
+    )
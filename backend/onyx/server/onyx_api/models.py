@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 
 from onyx.connectors.models import DocumentBase
+from onyx.db.enums import IndexingStatus
 
 
 class IngestionDocument(BaseModel):
@@ -17,3 +18,26 @@ class DocMinimalInfo(BaseModel):
     document_id: str
     semantic_id: str
     link: str | None = None
+
+
+class BulkIngestionError(BaseModel):
+    line_num: int
+    error: str
+
+
+class BulkIngestionJob(BaseModel):
+    job_id: int
+    documents_queued: int
+    batches_queued: int
+    # the first invalid lines of the upload, which were skipped
+    invalid_documents: list[BulkIngestionError]
+    num_invalid_documents: int
+
+
+class BulkIngestionJobStatus(BaseModel):
+    job_id: int
+    status: IndexingStatus
+    total_batches: int | None
+    completed_batches: int
+    total_docs: int
+    total_failures: int
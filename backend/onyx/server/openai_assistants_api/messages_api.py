@@ -21,6 +21,7 @@ from onyx.db.chat import get_or_create_root_message
 from onyx.db.engine.sql_engine import get_session
 from onyx.db.models import User
 from onyx.llm.utils import check_number_of_tokens
+from onyx.server.query_and_chat.token_limit import record_token_usage
 
 router = APIRouter(prefix="")
 
@@ -101,6 +102,11 @@ def create_message(
         ),
         db_session=db_session,
     )
+    record_token_usage(
+        user_id=user_id,
+        token_count=new_message.token_count,
+        db_session=db_session,
+    )
 
     return Message(
         id=str(new_message.id),
@@ -93,6 +93,7 @@ from onyx.server.query_and_chat.models import SearchFeedbackRequest
 from onyx.server.query_and_chat.models import UpdateChatSessionTemperatureRequest
 from onyx.server.query_and_chat.models import UpdateChatSessionThreadRequest
 from onyx.server.query_and_chat.token_limit import check_token_rate_limits
+from onyx.server.query_and_chat.token_limit import record_token_usage
 from onyx.utils.file_types import UploadMimeTypes
 from onyx.utils.headers import get_custom_tool_additional_request_headers
 from onyx.utils.logger import setup_logger
@@ -622,6 +623,8 @@ def seed_chat(
             message_type=MessageType.USER,
             db_session=db_session,
         )
+        # the chat session is unassigned, only counts towards the global limits
+        record_token_usage(user_id=None, token_count=token_count, db_session=db_session)
 
     return ChatSeedResponse(
         redirect_url=f"{WEB_DOMAIN}/chat?chatId={new_chat_session.id}&seeded=true"
@@ -1,23 +1,30 @@
+from collections.abc import Callable
 from collections.abc import Sequence
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 from functools import lru_cache
+from uuid import UUID
 
 from dateutil import tz
 from fastapi import Depends
 from fastapi import HTTPException
+from redis.exceptions import RedisError
 from sqlalchemy import func
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from onyx.auth.users import current_chat_accessible_user
+from onyx.configs.app_configs import TOKEN_RATE_LIMIT_USAGE_RETENTION_HOURS
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.models import ChatMessage
 from onyx.db.models import ChatSession
 from onyx.db.models import TokenRateLimit
 from onyx.db.models import User
 from onyx.db.token_limit import fetch_all_global_token_rate_limits
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_token_usage import RedisTokenUsage
+from onyx.redis.redis_token_usage import TokenUsageScope
 from onyx.utils.logger import setup_logger
 from onyx.utils.variable_functionality import fetch_versioned_implementation
 
@@ -46,6 +53,32 @@ def _check_token_rate_limits(_: User | None) -> None:
     _user_is_rate_limited_by_global()
 
 
+def record_token_usage(
+    user_id: UUID | None, token_count: int, db_session: Session
+) -> None:
+    """Counts the tokens of a newly created chat message towards the token rate
+    limits, keeps the rate limit checks from aggregating chat messages on every
+    request."""
+    if not token_count or not any_rate_limit_exists():
+        return
+
+    versioned_record_token_usage = fetch_versioned_implementation(
+        "onyx.server.query_and_chat.token_limit", _record_token_usage.__name__
+    )
+    try:
+        versioned_record_token_usage(user_id, token_count, db_session)
+    except RedisError:
+        # the counters are rebuilt from Postgres periodically, a missed update
+        # only delays enforcement until then
+        logger.exception("Failed to record token usage")
+
+
+def _record_token_usage(
+    user_id: UUID | None, token_count: int, db_session: Session
+) -> None:
+    RedisTokenUsage(get_redis_client(), TokenUsageScope.GLOBAL).record(token_count)
+
+
 """
 Global rate limits
 """
@@ -58,10 +91,11 @@ def _user_is_rate_limited_by_global() -> None:
         )
 
         if global_rate_limits:
-            global_cutoff_time = _get_cutoff_time(global_rate_limits)
-            global_usage = _fetch_global_usage(global_cutoff_time, db_session)
-
-            if _is_rate_limited(global_rate_limits, global_usage):
+            if _is_rate_limited_by_usage_counter(
+                global_rate_limits,
+                RedisTokenUsage(get_redis_client(), TokenUsageScope.GLOBAL),
+                lambda cutoff_time: _fetch_global_usage(cutoff_time, db_session),
+            ):
                 raise HTTPException(
                     status_code=429,
                     detail="Token budget exceeded for organization. Try again later.",
@@ -72,7 +106,8 @@ def _fetch_global_usage(
     cutoff_time: datetime, db_session: Session
 ) -> Sequence[tuple[datetime, int]]:
     """
-    Fetch global token usage within the cutoff time, grouped by minute
+    Fetch global token usage within the cutoff time, grouped by minute. Only used
+    to rebuild the usage counters
     """
     result = db_session.execute(
         select(
@@ -119,6 +154,49 @@ def _is_rate_limited(
     return False
 
 
+def _is_rate_limited_by_usage_counter(
+    rate_limits: Sequence[TokenRateLimit],
+    usage_counter: RedisTokenUsage,
+    fetch_usage: Callable[[datetime], Sequence[tuple[datetime, int]]],
+) -> bool:
+    """
+    If at least one rate limit is exceeded, return True. Usage is read from the
+    Redis counters, `fetch_usage` aggregates it from Postgres when the counters
+    need to be rebuilt or aren't available
+    """
+    cutoff_time = _get_cutoff_time(rate_limits)
+    if max(rate_limit.period_hours for rate_limit in rate_limits) > (
+        TOKEN_RATE_LIMIT_USAGE_RETENTION_HOURS
+    ):
+        return _is_rate_limited(rate_limits, fetch_usage(cutoff_time))
+
+    now = datetime.now(tz=timezone.utc)
+    try:
+        tokens_used = usage_counter.get_usage(
+            [
+                now - timedelta(hours=rate_limit.period_hours)
+                for rate_limit in rate_limits
+            ]
+        )
+    except RedisError:
+        logger.exception("Failed to read token usage, falling back to Postgres")
+        return _is_rate_limited(rate_limits, fetch_usage(cutoff_time))
+
+    if tokens_used is not None:
+        return any(
+            used >= rate_limit.token_budget * TOKEN_BUDGET_UNIT
+            for rate_limit, used in zip(rate_limits, tokens_used)
+        )
+
+    fetched_at = datetime.now(tz=timezone.utc)
+    usage = fetch_usage(cutoff_time)
+    try:
+        usage_counter.rebuild(usage, since=cutoff_time, until=fetched_at)
+    except RedisError:
+        logger.exception("Failed to rebuild token usage counters")
+    return _is_rate_limited(rate_limits, usage)
+
+
 @lru_cache()
 def any_rate_limit_exists() -> bool:
     """Checks if any rate limit exists in the database. Is cached, so that if no rate limits
@@ -2,6 +2,7 @@ import copy
 import json
 from collections.abc import Callable
 from collections.abc import Generator
+from collections.abc import Iterator
 from typing import Any
 from typing import cast
 from typing import TypeVar
@@ -427,6 +428,7 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
             search_query_info=search_query_info,
             get_section_relevance=lambda: search_pipeline.section_relevance,
             search_tool=self,
+            stream_section_relevance=search_pipeline.stream_section_relevance,
         )
 
     def final_result(self, *args: ToolResponse) -> JSON_ro:
@@ -472,6 +474,9 @@ def yield_search_responses(
     search_query_info: SearchQueryInfo,
     get_section_relevance: Callable[[], list[SectionRelevancePiece] | None],
     search_tool: SearchTool,
+    stream_section_relevance: (
+        Callable[[], Iterator[list[SectionRelevancePiece] | None]] | None
+    ) = None,
 ) -> Generator[ToolResponse, None, None]:
     yield ToolResponse(
         id=SEARCH_RESPONSE_SUMMARY_ID,
@@ -485,11 +490,18 @@ def yield_search_responses(
         ),
     )
 
-    section_relevance = get_section_relevance()
-    yield ToolResponse(
-        id=SECTION_RELEVANCE_LIST_ID,
-        response=section_relevance,
-    )
+    # when streamed, the relevance is sent every time the LLM evaluated more of the
+    # sections, each list replacing the previous one
+    section_relevance: list[SectionRelevancePiece] | None = None
+    for section_relevance in (
+        stream_section_relevance()
+        if stream_section_relevance is not None
+        else [get_section_relevance()]
+    ):
+        yield ToolResponse(
+            id=SECTION_RELEVANCE_LIST_ID,
+            response=section_relevance,
+        )
 
     final_context_sections = get_final_context_sections()
 
@@ -0,0 +1,66 @@
+"""Helpers for the flows that fan out many slow calls (LLM calls, Slack API calls)
+and cache their results in Redis: contextual RAG, KG extraction and federated Slack
+search."""
+
+import threading
+from typing import cast
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from onyx.llm.interfaces import LLM
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# (flow, LLM provider) -> semaphore
+_llm_call_semaphores: dict[tuple[str, str], threading.BoundedSemaphore] = {}
+_llm_call_semaphores_lock = threading.Lock()
+
+
+def get_llm_call_semaphore(
+    flow: str, llm: LLM, max_concurrent_calls: int
+) -> threading.BoundedSemaphore:
+    """Bounds the concurrent calls of a flow to an LLM provider across everything
+    running the flow in this process"""
+    key = (flow, llm.config.model_provider)
+    with _llm_call_semaphores_lock:
+        if key not in _llm_call_semaphores:
+            _llm_call_semaphores[key] = threading.BoundedSemaphore(max_concurrent_calls)
+        return _llm_call_semaphores[key]
+
+
+def get_cached_values(
+    redis_client: Redis, keys: list[str], description: str
+) -> list[str | None]:
+    """The cached values of the keys in a single round trip, None for the ones that
+    aren't cached. Everything is a miss if Redis is unavailable."""
+    if not keys:
+        return []
+
+    try:
+        cached_values = cast(list[bytes | None], redis_client.mget(keys))
+    except RedisError:
+        logger.exception(f"Failed to read the cached {description}")
+        return [None] * len(keys)
+
+    return [
+        cached_value.decode("utf-8") if cached_value is not None else None
+        for cached_value in cached_values
+    ]
+
+
+def cache_values(
+    redis_client: Redis, values: dict[str, str], ttl: int, description: str
+) -> None:
+    """Caches the values by key in a single round trip, failing to is only logged"""
+    if not values:
+        return
+
+    try:
+        pipeline = redis_client.pipeline()
+        for key, value in values.items():
+            pipeline.set(key, value, ex=ttl)
+        pipeline.execute()
+    except RedisError:
+        logger.exception(f"Failed to cache the {description}")
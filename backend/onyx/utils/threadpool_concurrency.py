@@ -1,17 +1,21 @@
 import collections.abc
 import contextvars
 import copy
+import itertools
+import os
 import threading
+import time
 import uuid
 from collections.abc import Callable
 from collections.abc import Iterator
 from collections.abc import MutableMapping
 from collections.abc import Sequence
-from concurrent.futures import as_completed
+from concurrent.futures import CancelledError
 from concurrent.futures import FIRST_COMPLETED
 from concurrent.futures import Future
 from concurrent.futures import ThreadPoolExecutor
 from concurrent.futures import wait
+from enum import Enum
 from typing import Any
 from typing import cast
 from typing import Generic
@@ -19,9 +23,15 @@ from typing import overload
 from typing import Protocol
 from typing import TypeVar
 
+from prometheus_client import Gauge
+from prometheus_client import Histogram
 from pydantic import GetCoreSchemaHandler
 from pydantic_core import core_schema
 
+from onyx.configs.app_configs import IO_EXECUTOR_MAX_WORKERS
+from onyx.configs.app_configs import LLM_EXECUTOR_MAX_WORKERS
+from onyx.configs.app_configs import SEARCH_EXECUTOR_MAX_WORKERS
+from onyx.configs.app_configs import SECONDARY_INDEX_EXECUTOR_MAX_WORKERS
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -174,10 +184,282 @@ class CallableProtocol(Protocol):
     def __call__(self, *args: Any, **kwargs: Any) -> Any: ...
 
 
+class ExecutorName(str, Enum):
+    # retrieval and the other steps of a search (e.g. reranking)
+    SEARCH = "search"
+    # calls to LLM providers
+    LLM = "llm"
+    # everything else, mostly waiting on other services (e.g. file store, connectors)
+    IO = "io"
+    # writes to the secondary index while search settings are being swapped
+    SECONDARY_INDEX = "secondary_index"
+
+
+_EXECUTOR_MAX_WORKERS = {
+    ExecutorName.SEARCH: SEARCH_EXECUTOR_MAX_WORKERS,
+    ExecutorName.LLM: LLM_EXECUTOR_MAX_WORKERS,
+    ExecutorName.IO: IO_EXECUTOR_MAX_WORKERS,
+    ExecutorName.SECONDARY_INDEX: SECONDARY_INDEX_EXECUTOR_MAX_WORKERS,
+}
+
+executor_queue_depth_gauge = Gauge(
+    "onyx_executor_queue_depth",
+    "Number of tasks submitted to a shared executor that have not started yet",
+    ["executor"],
+)
+executor_wait_seconds_histogram = Histogram(
+    "onyx_executor_wait_seconds",
+    "Time between a task being submitted to a shared executor and starting",
+    ["executor"],
+)
+
+
+class ExecutorTask(Generic[R]):
+    """
+    A function submitted to a BoundedExecutor, run in a copy of the context of the
+    thread that submitted it.
+
+    A task that no thread of the executor has started yet can be run by the thread
+    waiting on it instead. Tasks waiting on other tasks of the same executor (e.g.
+    nested calls to run_functions_tuples_in_parallel) then can't deadlock it once
+    all of its threads are busy.
+    """
+
+    def __init__(
+        self,
+        executor: "BoundedExecutor",
+        func: Callable[..., R],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ):
+        self.executor = executor
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.submitted_at = time.monotonic()
+        self._context = contextvars.copy_context()
+        self._claim_lock = threading.Lock()
+        self._claimed = False
+        self._done = threading.Event()
+        self._result: R | None = None
+        self._exception: Exception | None = None
+        self._future: Future[None] | None = None
+
+    def _claim(self) -> bool:
+        with self._claim_lock:
+            if self._claimed:
+                return False
+            self._claimed = True
+
+        self.executor.queue_depth.dec()
+        return True
+
+    def _run(self) -> None:
+        self.executor.wait_seconds.observe(time.monotonic() - self.submitted_at)
+        try:
+            self._result = self._context.run(self.func, *self.args, **self.kwargs)
+        except Exception as e:
+            self._exception = e
+        finally:
+            self._done.set()
+
+    def _run_from_executor(self) -> None:
+        if self._claim():
+            self._run()
+
+    def run_if_pending(self) -> bool:
+        """Runs the task in the calling thread if no thread has started it yet"""
+        if not self._claim():
+            return False
+
+        if self._future is not None:
+            self._future.cancel()
+        self._run()
+        return True
+
+    def cancel(self) -> bool:
+        """Cancels the task if no thread has started it yet. A running task can't be
+        interrupted."""
+        if not self._claim():
+            return False
+
+        if self._future is not None:
+            self._future.cancel()
+        self._exception = CancelledError()
+        self._done.set()
+        return True
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits for the task to finish, returns whether it did"""
+        return self._done.wait(timeout)
+
+    def result(self, timeout: float | None = None) -> R:
+        """
+        Waits for the task and returns its result, or raises its exception. Without a
+        timeout, a task that no thread has started yet is run in the calling thread.
+        """
+        if timeout is None:
+            self.run_if_pending()
+
+        if not self._done.wait(timeout):
+            raise TimeoutError(
+                f"Function {getattr(self.func, '__name__', self.func)} timed out "
+                f"after {timeout} seconds"
+            )
+        if self._exception is not None:
+            raise self._exception
+        return cast(R, self._result)
+
+
+class BoundedExecutor:
+    """
+    A pool of a bounded number of threads shared by the whole process, use
+    get_executor to get one. Submitting work never starts a new thread beyond the
+    bound, tasks are queued until a thread (or the thread waiting on them) is free.
+    """
+
+    def __init__(self, name: ExecutorName, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.queue_depth = executor_queue_depth_gauge.labels(executor=name.value)
+        self.wait_seconds = executor_wait_seconds_histogram.labels(executor=name.value)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"onyx-{name.value}"
+        )
+
+    def submit(
+        self, func: Callable[..., R], *args: Any, **kwargs: Any
+    ) -> ExecutorTask[R]:
+        task = ExecutorTask(self, func, args, kwargs)
+        self.queue_depth.inc()
+        task._future = self._pool.submit(task._run_from_executor)
+        return task
+
+
+_executors: dict[ExecutorName, BoundedExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _reset_executors_after_fork() -> None:
+    # the threads of the parent's executors don't exist in the child
+    global _executors_lock
+    _executors_lock = threading.Lock()
+    _executors.clear()
+
+
+os.register_at_fork(after_in_child=_reset_executors_after_fork)
+
+
+def get_executor(name: ExecutorName = ExecutorName.IO) -> BoundedExecutor:
+    """The process-wide executor of the given name, created on first use"""
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = BoundedExecutor(name, _EXECUTOR_MAX_WORKERS[name])
+        return _executors[name]
+
+
+def _run_calls_in_parallel(
+    calls: list[tuple[Callable[..., Any], tuple[Any, ...], dict[str, Any]]],
+    call_names: list[str],
+    allow_failures: bool,
+    max_workers: int | None,
+    executor_name: ExecutorName,
+    timeout: float | None,
+) -> list[Any]:
+    """
+    Runs the calls on at most max_workers threads of the executor. Each of those
+    threads keeps taking the next call that hasn't started until none are left, the
+    calling thread runs them too if no thread of the executor is free.
+
+    A failed call (or, if the calls are not done within timeout seconds, every
+    unfinished call) results in None. Unless failures are allowed, the first failure
+    (or a TimeoutError) is raised once the running calls are done, and the calls
+    that haven't started are skipped.
+    """
+    executor = get_executor(executor_name)
+    workers = min(
+        len(calls),
+        max_workers if max_workers is not None else len(calls),
+        executor.max_workers,
+    )
+    if workers <= 0:
+        return []
+
+    # The primary reason for propagating contextvars is to allow acquiring a db session
+    # that respects tenant id. Context.run is expected to be low-overhead, but if we later
+    # find that it is increasing latency we can make using it optional.
+    contexts = [contextvars.copy_context() for _ in calls]
+    results: list[Any] = [None] * len(calls)
+    finished = [False] * len(calls)
+    failures: list[Exception] = []
+    stop = threading.Event()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    # next() on a count is atomic, each call is taken by a single thread
+    next_index = itertools.count()
+
+    def run_calls() -> None:
+        while not stop.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+
+            index = next(next_index)
+            if index >= len(calls):
+                return
+
+            func, args, kwargs = calls[index]
+            try:
+                results[index] = contexts[index].run(func, *args, **kwargs)
+            except Exception as e:
+                logger.exception(f"{call_names[index]} failed due to {e}")
+                failures.append(e)
+                if not allow_failures:
+                    stop.set()
+            finished[index] = True
+
+    tasks = [executor.submit(run_calls) for _ in range(workers)]
+
+    timed_out = False
+    for task in tasks:
+        if deadline is None:
+            task.run_if_pending()
+            task.wait()
+        elif not task.wait(max(deadline - time.monotonic(), 0)):
+            timed_out = True
+            break
+
+    if timed_out:
+        stop.set()
+        for task in tasks:
+            task.cancel()
+
+        num_unfinished = finished.count(False)
+        message = (
+            f"{num_unfinished} of {len(calls)} functions did not finish "
+            f"within {timeout} seconds"
+        )
+        if not allow_failures:
+            raise TimeoutError(message)
+        logger.warning(message)
+
+    if failures and not allow_failures:
+        raise failures[0]
+
+    # calls still running after a timeout must not change the returned results
+    return [
+        result if is_finished else None
+        for result, is_finished in zip(results, finished)
+    ]
+
+
 def run_functions_tuples_in_parallel(
     functions_with_args: Sequence[tuple[CallableProtocol, tuple[Any, ...]]],
     allow_failures: bool = False,
     max_workers: int | None = None,
+    executor: ExecutorName = ExecutorName.IO,
+    timeout: float | None = None,
 ) -> list[Any]:
     """
     Executes multiple functions in parallel and returns a list of the results for each function.
@@ -188,43 +470,23 @@ def run_functions_tuples_in_parallel(
         functions_with_args: List of tuples each containing the function callable and a tuple of arguments.
         allow_failures: if set to True, then the function result will just be None
         max_workers: Max number of worker threads
+        executor: the shared executor the functions run on
+        timeout: seconds after which the functions that haven't started are cancelled
+            and TimeoutError is raised (or, if failures are allowed, the results of
+            the unfinished functions are None)
 
     Returns:
         list: A list of results from each function, in the same order as the input functions.
     """
-    workers = (
-        min(max_workers, len(functions_with_args))
-        if max_workers is not None
-        else len(functions_with_args)
+    return _run_calls_in_parallel(
+        [(func, args, {}) for func, args in functions_with_args],
+        [f"Function at index {i}" for i in range(len(functions_with_args))],
+        allow_failures=allow_failures,
+        max_workers=max_workers,
+        executor_name=executor,
+        timeout=timeout,
     )
 
-    if workers <= 0:
-        return []
-
-    results = []
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        # The primary reason for propagating contextvars is to allow acquiring a db session
-        # that respects tenant id. Context.run is expected to be low-overhead, but if we later
-        # find that it is increasing latency we can make using it optional.
-        future_to_index = {
-            executor.submit(contextvars.copy_context().run, func, *args): i
-            for i, (func, args) in enumerate(functions_with_args)
-        }
-
-        for future in as_completed(future_to_index):
-            index = future_to_index[future]
-            try:
-                results.append((index, future.result()))
-            except Exception as e:
-                logger.exception(f"Function at index {index} failed due to {e}")
-                results.append((index, None))  # type: ignore
-
-                if not allow_failures:
-                    raise
-
-    results.sort(key=lambda x: x[0])
-    return [result for index, result in results]
-
 
 class FunctionCall(Generic[R]):
     """
@@ -247,36 +509,26 @@ class FunctionCall(Generic[R]):
 def run_functions_in_parallel(
     function_calls: list[FunctionCall],
     allow_failures: bool = False,
+    executor: ExecutorName = ExecutorName.IO,
+    timeout: float | None = None,
 ) -> dict[str, Any]:
     """
     Executes a list of FunctionCalls in parallel and stores the results in a dictionary where the keys
     are the result_id of the FunctionCall and the values are the results of the call.
+    See run_functions_tuples_in_parallel for the executor and timeout.
     """
-    results: dict[str, Any] = {}
-
-    if len(function_calls) == 0:
-        return results
-
-    with ThreadPoolExecutor(max_workers=len(function_calls)) as executor:
-        future_to_id = {
-            executor.submit(
-                contextvars.copy_context().run, func_call.execute
-            ): func_call.result_id
-            for func_call in function_calls
-        }
-
-        for future in as_completed(future_to_id):
-            result_id = future_to_id[future]
-            try:
-                results[result_id] = future.result()
-            except Exception as e:
-                logger.exception(f"Function with ID {result_id} failed due to {e}")
-                results[result_id] = None
-
-                if not allow_failures:
-                    raise
-
-    return results
+    results = _run_calls_in_parallel(
+        [(func_call.execute, (), {}) for func_call in function_calls],
+        [f"Function with ID {func_call.result_id}" for func_call in function_calls],
+        allow_failures=allow_failures,
+        max_workers=None,
+        executor_name=executor,
+        timeout=timeout,
+    )
+    return {
+        func_call.result_id: result
+        for func_call, result in zip(function_calls, results)
+    }
 
 
 class TimeoutThread(threading.Thread, Generic[R]):
@@ -308,6 +560,9 @@ def run_with_timeout(
     """
     Executes a function with a timeout. If the function doesn't complete within the specified
     timeout, raises TimeoutError.
+
+    The function runs on its own thread rather than a shared executor, a function
+    that never returns would otherwise hold one of the executor's threads forever.
     """
     context = contextvars.copy_context()
     task = TimeoutThread(timeout, context.run, func, *args, **kwargs)
@@ -328,29 +583,21 @@ def run_with_timeout(
 # this is only useful for I/O bound tasks.
 def run_in_background(
     func: Callable[..., R], *args: Any, **kwargs: Any
-) -> TimeoutThread[R]:
+) -> ExecutorTask[R]:
     """
-    Runs a function in a background thread. Returns a TimeoutThread object that can be used
-    to wait for the function to finish with wait_on_background.
+    Runs a function on the shared IO executor (use get_executor(...).submit for
+    another executor). Returns an ExecutorTask that can be used to wait for the
+    function to finish with wait_on_background.
     """
-    context = contextvars.copy_context()
-    # Timeout not used in the non-blocking case
-    task = TimeoutThread(-1, context.run, func, *args, **kwargs)  # type: ignore
-    task.start()
-    return cast(TimeoutThread[R], task)
+    return get_executor(ExecutorName.IO).submit(func, *args, **kwargs)
 
 
-def wait_on_background(task: TimeoutThread[R]) -> R:
+def wait_on_background(task: ExecutorTask[R]) -> R:
     """
     Used in conjunction with run_in_background. blocks until the task is finished,
     then returns the result of the task.
     """
-    task.join()
-
-    if task.exception is not None:
-        raise task.exception
-
-    return task.result
+    return task.result()
 
 
 def _next_or_none(ind: int, gen: Iterator[R]) -> tuple[int, R | None]:
@@ -0,0 +1,112 @@
+"""Benchmarks saving the checkpoints of a long running index attempt.
+
+Builds a synthetic checkpoint the way the Google Drive connector grows one, a set of
+retrieved file IDs that reaches --ids IDs over --batches batches plus a few cursors,
+and compares, per batch, serializing the whole checkpoint to JSON (what used to be
+saved after every batch) against the compressed snapshot + delta encoding. Also
+compares the old size check, walking the dumped checkpoint with deep_getsizeof,
+against measuring the serialized checkpoint, and times loading the checkpoint back
+by replaying the deltas onto the snapshot.
+
+Usage (from the backend directory):
+
+PYTHONPATH=. python scripts/checkpoint_store_benchmark.py --ids 1000000 --batches 200
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+
+from onyx.background.indexing.checkpoint_store import CheckpointEncoder
+from onyx.background.indexing.checkpoint_store import decode_checkpoint
+from onyx.connectors.models import ConnectorCheckpoint
+from onyx.utils.object_size_check import deep_getsizeof
+
+
+class SyntheticCheckpoint(ConnectorCheckpoint):
+    retrieved_ids: set[str] = set()
+    completed_cursors: list[str] = []
+    current_cursor: str | None = None
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ids", type=int, default=1_000_000)
+    parser.add_argument("--batches", type=int, default=200)
+    args = parser.parse_args()
+
+    ids_per_batch = args.ids // args.batches
+    checkpoint = SyntheticCheckpoint(has_more=True)
+    encoder = CheckpointEncoder()
+
+    json_times: list[float] = []
+    json_bytes = 0
+    encode_times: list[float] = []
+    encoded_bytes = 0
+    snapshots = 0
+    snapshot = b""
+    delta_log: bytes | None = None
+
+    for batch in range(args.batches):
+        checkpoint.retrieved_ids.update(uuid.uuid4().hex for _ in range(ids_per_batch))
+        checkpoint.completed_cursors.append(f"cursor-{batch}")
+        checkpoint.current_cursor = f"cursor-{batch + 1}"
+
+        start = time.perf_counter()
+        json_bytes += len(checkpoint.model_dump_json().encode())
+        json_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        new_snapshot, new_delta_log = encoder.encode(checkpoint)
+        encode_times.append(time.perf_counter() - start)
+        if new_snapshot is not None:
+            snapshots += 1
+            snapshot = new_snapshot
+            delta_log = None
+            encoded_bytes += len(new_snapshot)
+        if new_delta_log is not None:
+            delta_log = new_delta_log
+            encoded_bytes += len(new_delta_log)
+
+    print(f"{len(checkpoint.retrieved_ids)} IDs over {args.batches} batches")
+    print(
+        f"      json: {json_bytes / 1e6:.1f}MB written, "
+        f"{_ms(statistics.median(json_times))} median / {_ms(max(json_times))} max "
+        "per save"
+    )
+    print(
+        f"   encoded: {encoded_bytes / 1e6:.1f}MB written ({snapshots} snapshots), "
+        f"{_ms(statistics.median(encode_times))} median / {_ms(max(encode_times))} "
+        "max per save"
+    )
+
+    start = time.perf_counter()
+    loaded = SyntheticCheckpoint.model_validate_json(
+        decode_checkpoint(snapshot, delta_log)
+    )
+    load_time = time.perf_counter() - start
+    assert loaded == checkpoint
+    print(
+        f"      load: {_ms(load_time)} to replay {len(delta_log or b'')} bytes of "
+        f"deltas onto a {len(snapshot)} byte snapshot"
+    )
+
+    start = time.perf_counter()
+    deep_size = deep_getsizeof(checkpoint.model_dump())
+    deep_time = time.perf_counter() - start
+    start = time.perf_counter()
+    serialized_size = len(checkpoint.model_dump_json())
+    serialized_time = time.perf_counter() - start
+    print(
+        f"size check: deep_getsizeof {_ms(deep_time)} ({deep_size} bytes), "
+        f"serialized {_ms(serialized_time)} ({serialized_size} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmarks how long it takes a docfetching attempt to start.
+
+Submits --attempts jobs through SimpleJobClient, --concurrency at a time, the way
+docfetching_proxy_task does, and measures the time from submitting a job until the
+job is ready to run docfetching (the docfetching task module is imported and the
+engine initialized) and until its process exited. Compares starting every attempt
+in a fresh interpreter ("spawn") against forking it from a forkserver that preloaded
+the connector stack ("forkserver").
+
+Usage (from the backend directory):
+
+PYTHONPATH=. python scripts/docfetching_start_benchmark.py --attempts 20 --concurrency 4
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from onyx.background.indexing.job_client import SimpleJob
+from onyx.background.indexing.job_client import SimpleJobClient
+from onyx.background.indexing.job_client import start_job_forkserver
+
+
+def _attempt(started_path: str) -> None:
+    # what unpickling docfetching_task imports in the job process
+    import onyx.background.celery.tasks.docfetching.tasks  # noqa: F401
+
+    with open(started_path, "w") as f:
+        f.write(str(time.time()))
+
+
+def _run(args: argparse.Namespace, start_method: str, tmp_dir: str) -> None:
+    client = SimpleJobClient(n_workers=args.concurrency, start_method=start_method)
+    if start_method == "forkserver":
+        # the docfetching worker starts the forkserver when it starts, wait until the
+        # forkserver finished preloading before measuring
+        warm_up_start = time.monotonic()
+        start_job_forkserver()
+        warm_up_job = client.submit(
+            _attempt, os.path.join(tmp_dir, f"{start_method}-warm-up")
+        )
+        while warm_up_job is not None and not warm_up_job.done():
+            time.sleep(0.01)
+        print(f"forkserver warmed up in {time.monotonic() - warm_up_start:.2f}s")
+
+    start_latencies: list[float] = []
+    total_latencies: list[float] = []
+    running: list[tuple[SimpleJob, str, float]] = []
+
+    attempt = 0
+    while attempt < args.attempts or running:
+        while attempt < args.attempts and len(running) < args.concurrency:
+            started_path = os.path.join(tmp_dir, f"{start_method}-{attempt}")
+            submitted_at = time.time()
+            job = client.submit(_attempt, started_path)
+            if job is None:
+                break
+            running.append((job, started_path, submitted_at))
+            attempt += 1
+
+        time.sleep(0.01)
+        for job, started_path, submitted_at in list(running):
+            if not job.done():
+                continue
+            running.remove((job, started_path, submitted_at))
+            if job.status != "finished":
+                raise RuntimeError(f"Attempt failed: {job.exception()}")
+
+            with open(started_path) as f:
+                start_latencies.append(float(f.read()) - submitted_at)
+            total_latencies.append(time.time() - submitted_at)
+
+    start_latencies.sort()
+    p95 = start_latencies[int(len(start_latencies) * 0.95)]
+    print(
+        f"{start_method:>10}: attempt ready after "
+        f"{statistics.median(start_latencies):.2f}s median / {p95:.2f}s p95, "
+        f"process exited after {statistics.median(total_latencies):.2f}s median"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attempts", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _run(args, "spawn", tmp_dir)
+        _run(args, "forkserver", tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Benchmarks KG entity clustering on synthetic entity sets.
+
+Compares clustering staged entities one at a time (one candidate query, merge /
+insert and commit per entity) against the batch planner used by kg_clustering
+(one candidate query and a fixed number of bulk statements per batch).
+
+Postgres is replaced by an in-memory trigram candidate index and every statement
+is charged --round-trip-ms, so the numbers reflect Python side work plus the
+round trips each approach needs. Reports entities/sec for both.
+
+Usage (from the backend directory):
+
+PYTHONPATH=. python scripts/kg_clustering_benchmark.py --entities 20000 --existing 20000
+"""
+
+import argparse
+import random
+import string
+import time
+from collections import defaultdict
+
+from rapidfuzz.fuzz import ratio
+
+from onyx.configs.kg_configs import KG_CLUSTERING_RETRIEVE_THRESHOLD
+from onyx.configs.kg_configs import KG_CLUSTERING_THRESHOLD
+from onyx.db.models import KGEntity
+from onyx.db.models import KGEntityExtractionStaging
+from onyx.kg.clustering.clustering import _plan_entity_clustering
+
+# statements issued per entity by the one at a time approach: SET similarity
+# threshold, candidate query, insert / update, staging update, commit
+_STATEMENTS_PER_ENTITY = 5
+# statements issued per batch: batch fetch, SET similarity threshold, candidate
+# query, insert, entity update, staging update, document update, commit
+_STATEMENTS_PER_BATCH = 8
+
+
+def _trigrams(name: str) -> set[str]:
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Approximates pg_trgm similarity retrieval over the normalized entities"""
+
+    def __init__(self, entities: list[KGEntity]) -> None:
+        self.entities = entities
+        self.trigrams = [_trigrams(entity.name) for entity in entities]
+        self.postings: dict[tuple[str, str], list[int]] = defaultdict(list)
+        for i, (entity, trigrams) in enumerate(zip(entities, self.trigrams)):
+            for trigram in trigrams:
+                self.postings[(entity.entity_type_id_name, trigram)].append(i)
+
+    def search(self, name: str, entity_type: str) -> list[KGEntity]:
+        query_trigrams = _trigrams(name)
+        overlaps: dict[int, int] = defaultdict(int)
+        for trigram in query_trigrams:
+            for i in self.postings.get((entity_type, trigram), []):
+                overlaps[i] += 1
+        return [
+            self.entities[i]
+            for i, overlap in overlaps.items()
+            if overlap / len(query_trigrams | self.trigrams[i])
+            >= KG_CLUSTERING_RETRIEVE_THRESHOLD
+        ]
+
+
+def _random_name(rng: random.Random) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        for _ in range(rng.randint(2, 3))
+    )
+
+
+def make_entity_sets(
+    num_staged: int, num_existing: int, num_types: int, duplicate_ratio: float
+) -> tuple[list[KGEntity], list[KGEntityExtractionStaging]]:
+    rng = random.Random(0)
+    entity_types = [f"TYPE_{i}" for i in range(num_types)]
+
+    existing = [
+        KGEntity(
+            id_name=f"existing_{i}",
+            name=_random_name(rng),
+            entity_type_id_name=rng.choice(entity_types),
+            document_id=None,
+            alternative_names=[],
+            occurrences=1,
+            attributes={},
+        )
+        for i in range(num_existing)
+    ]
+
+    staged: list[KGEntityExtractionStaging] = []
+    for i in range(num_staged):
+        if existing and rng.random() < duplicate_ratio:
+            # near duplicate (punctuation / casing) of an existing entity
+            original = rng.choice(existing)
+            name = original.name.title() + rng.choice(["", ".", ","])
+            entity_type = original.entity_type_id_name
+        else:
+            name = _random_name(rng).title()
+            entity_type = rng.choice(entity_types)
+        staged.append(
+            KGEntityExtractionStaging(
+                id_name=f"staged_{i}",
+                name=name,
+                entity_type_id_name=entity_type,
+                document_id=None,
+                alternative_names=[],
+                occurrences=1,
+                attributes={},
+            )
+        )
+    return existing, staged
+
+
+def run_one_at_a_time(
+    index: TrigramIndex, staged: list[KGEntityExtractionStaging], round_trip: float
+) -> int:
+    merged = 0
+    for entity in staged:
+        name = entity.name.lower()
+        similar = (
+            index.search(name, entity.entity_type_id_name)
+            if not any(char.isdigit() for char in name)
+            else []
+        )
+        best_score = -1.0
+        best_entity = None
+        for candidate in similar:
+            score = ratio(candidate.name, name)
+            if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
+                best_score = score
+                best_entity = candidate
+        merged += best_entity is not None
+        time.sleep(round_trip * _STATEMENTS_PER_ENTITY)
+    return merged
+
+
+def run_batched(
+    index: TrigramIndex,
+    staged: list[KGEntityExtractionStaging],
+    batch_size: int,
+    round_trip: float,
+) -> int:
+    merged = 0
+    for start in range(0, len(staged), batch_size):
+        batch = staged[start : start + batch_size]
+        match_names = [entity.name.lower() for entity in batch]
+        similar_entities = [
+            index.search(name, entity.entity_type_id_name)
+            for entity, name in zip(batch, match_names)
+        ]
+        plan = _plan_entity_clustering(batch, match_names, similar_entities)
+        existing_id_names = {
+            target.id_name for target in plan.targets if not target.is_new
+        }
+        merged += sum(
+            1
+            for id_name in plan.staging_to_target_id_names.values()
+            if id_name in existing_id_names
+        )
+        time.sleep(round_trip * _STATEMENTS_PER_BATCH)
+    return merged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=20_000)
+    parser.add_argument("--existing", type=int, default=20_000)
+    parser.add_argument("--types", type=int, default=10)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--round-trip-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    existing, staged = make_entity_sets(
+        args.entities, args.existing, args.types, args.duplicate_ratio
+    )
+    index = TrigramIndex(existing)
+    round_trip = args.round_trip_ms / 1000
+
+    for label, run in (
+        ("one at a time", lambda: run_one_at_a_time(index, staged, round_trip)),
+        (
+            f"batched (batch size {args.batch_size})",
+            lambda: run_batched(index, staged, args.batch_size, round_trip),
+        ),
+    ):
+        start = time.monotonic()
+        merged = run()
+        elapsed = time.monotonic() - start
+        print(
+            f"{label}: entities={len(staged)} merged_into_existing={merged} "
+            f"elapsed={elapsed:.2f}s entities/sec={len(staged) / elapsed:.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
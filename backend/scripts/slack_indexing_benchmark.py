@@ -0,0 +1,238 @@
+"""Benchmarks the Slack connector against an in-process fake Slack API.
+
+Reports the number of Slack API calls per method and the document throughput
+with and without bulk user hydration (users.list) enabled. Every fake API call
+sleeps for --latency-ms to approximate network round trips.
+
+Usage (from the backend directory):
+
+PYTHONPATH=. python scripts/slack_indexing_benchmark.py --channels 5 --threads 200 --users 300
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+from onyx.connectors.connector_runner import CheckpointOutputWrapper
+from onyx.connectors.models import Document
+from onyx.connectors.slack import utils as slack_utils
+from onyx.connectors.slack.connector import SlackCheckpoint
+from onyx.connectors.slack.connector import SlackConnector
+from onyx.connectors.slack.utils import SlackTextCleaner
+
+
+class FakeSlackResponse(dict):
+    def validate(self) -> "FakeSlackResponse":
+        return self
+
+    @property
+    def data(self) -> dict[str, Any]:
+        return self
+
+
+class FakeSlackClient:
+    """Implements the subset of WebClient used by the connector"""
+
+    token = "xoxb-fake"
+
+    def __init__(
+        self,
+        num_channels: int,
+        threads_per_channel: int,
+        replies_per_thread: int,
+        num_users: int,
+        latency: float,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+        rng = random.Random(seed)
+        self.users = {
+            f"U{i:06d}": {
+                "id": f"U{i:06d}",
+                "real_name": f"User {i}",
+                "profile": {
+                    "display_name": f"user{i}",
+                    "real_name": f"User {i}",
+                    "first_name": "User",
+                    "last_name": str(i),
+                    "email": f"user{i}@example.com",
+                },
+            }
+            for i in range(num_users)
+        }
+        user_ids = list(self.users)
+
+        self.channels: list[dict[str, Any]] = []
+        self.history: dict[str, list[dict[str, Any]]] = {}
+        self.replies: dict[tuple[str, str], list[dict[str, Any]]] = {}
+
+        base_ts = 1_700_000_000
+        for c in range(num_channels):
+            channel_id = f"C{c:06d}"
+            self.channels.append(
+                {
+                    "id": channel_id,
+                    "name": f"channel-{c}",
+                    "is_member": True,
+                    "is_private": False,
+                    "created": base_ts,
+                }
+            )
+            history: list[dict[str, Any]] = []
+            for t in range(threads_per_channel):
+                thread_ts = f"{base_ts + c * 100_000 + t * 10}.000000"
+                author = rng.choice(user_ids)
+                mentioned = rng.choice(user_ids)
+                parent = {
+                    "ts": thread_ts,
+                    "user": author,
+                    "text": f"question {t} for <@{mentioned}>",
+                }
+                thread = [parent]
+                for r in range(replies_per_thread):
+                    thread.append(
+                        {
+                            "ts": f"{base_ts + c * 100_000 + t * 10 + r + 1}.000000",
+                            "thread_ts": thread_ts,
+                            "user": rng.choice(user_ids),
+                            "text": f"reply {r} to <@{author}>",
+                        }
+                    )
+
+                if replies_per_thread:
+                    parent["thread_ts"] = thread_ts
+                    self.replies[(channel_id, thread_ts)] = thread
+                    # "also send to channel" replies show up in the history as well
+                    if rng.random() < 0.2:
+                        history.append(dict(thread[-1]))
+                history.append(parent)
+
+            # conversations.history is newest first
+            history.sort(key=lambda m: float(m["ts"]), reverse=True)
+            self.history[channel_id] = history
+
+    def _record(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+        time.sleep(self.latency)
+
+    def conversations_list(self, **kwargs: Any) -> FakeSlackResponse:
+        self._record("conversations.list")
+        return FakeSlackResponse(channels=self.channels, response_metadata={})
+
+    def conversations_info(self, channel: str, **kwargs: Any) -> FakeSlackResponse:
+        self._record("conversations.info")
+        return FakeSlackResponse(
+            channel=next(c for c in self.channels if c["id"] == channel)
+        )
+
+    def conversations_history(
+        self,
+        channel: str,
+        oldest: str | None = None,
+        latest: str | None = None,
+        limit: int = 100,
+        **kwargs: Any,
+    ) -> FakeSlackResponse:
+        self._record("conversations.history")
+        messages = [
+            m
+            for m in self.history[channel]
+            if (latest is None or float(m["ts"]) < float(latest))
+            and (oldest is None or float(m["ts"]) > float(oldest))
+        ]
+        page = messages[:limit]
+        next_cursor = "more" if len(messages) > limit else ""
+        return FakeSlackResponse(
+            messages=page, response_metadata={"next_cursor": next_cursor}
+        )
+
+    def conversations_replies(
+        self, channel: str, ts: str, **kwargs: Any
+    ) -> FakeSlackResponse:
+        self._record("conversations.replies")
+        return FakeSlackResponse(
+            messages=self.replies[(channel, ts)], response_metadata={}
+        )
+
+    def users_info(self, user: str, **kwargs: Any) -> FakeSlackResponse:
+        self._record("users.info")
+        return FakeSlackResponse(ok=True, user=self.users[user])
+
+    def users_list(
+        self, cursor: str | None = None, limit: int = 200, **kwargs: Any
+    ) -> FakeSlackResponse:
+        self._record("users.list")
+        user_list = list(self.users.values())
+        start = int(cursor) if cursor else 0
+        end = start + limit
+        return FakeSlackResponse(
+            members=user_list[start:end],
+            response_metadata={"next_cursor": str(end) if end < len(user_list) else ""},
+        )
+
+
+def run(args: argparse.Namespace, prefetch_users: bool) -> None:
+    client = FakeSlackClient(
+        num_channels=args.channels,
+        threads_per_channel=args.threads,
+        replies_per_thread=args.replies,
+        num_users=args.users,
+        latency=args.latency_ms / 1000,
+    )
+
+    connector = SlackConnector(use_redis=False, num_threads=args.num_threads)
+    connector.client = client  # type: ignore
+    connector.text_cleaner = SlackTextCleaner(client=client)  # type: ignore
+    connector.prefetch_users = prefetch_users
+
+    start = time.monotonic()
+    num_docs = 0
+    checkpoint: SlackCheckpoint = connector.build_dummy_checkpoint()
+    while checkpoint.has_more:
+        for document, failure, next_checkpoint in CheckpointOutputWrapper[
+            SlackCheckpoint
+        ]()(connector.load_from_checkpoint(0, time.time(), checkpoint)):
+            if failure is not None:
+                raise RuntimeError(failure.failure_message)
+            if isinstance(document, Document):
+                num_docs += 1
+            if next_checkpoint is not None:
+                checkpoint = next_checkpoint
+    elapsed = time.monotonic() - start
+
+    total_calls = sum(client.calls.values())
+    print(f"prefetch_users={prefetch_users}")
+    print(f"  docs={num_docs} elapsed={elapsed:.2f}s docs/sec={num_docs / elapsed:.1f}")
+    print(
+        f"  api_calls={total_calls} api_calls/doc={total_calls / max(num_docs, 1):.2f}"
+    )
+    for method, count in sorted(client.calls.items()):
+        print(f"    {method}: {count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--channels", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=200)
+    parser.add_argument("--replies", type=int, default=3)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--num-threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # avoid the auth.test round trip used to build message links
+    slack_utils.get_base_url = lambda token: "https://fake.slack.com/"  # type: ignore
+
+    for prefetch_users in (False, True):
+        run(args, prefetch_users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Benchmarks how many events/sec the Slack bot listener gets through.
+
+Events are pushed through the listener's Socket Mode request handler with a fake
+client. Slack API calls, Postgres queries and Redis reads are replaced by sleeps
+of --slack-ms, --db-ms and --redis-ms, answering a question (handle_message) by
+a sleep of --handler-ms. Compares the per tenant config cache against looking
+everything up for every event (cache TTLs of 0).
+
+Usage (from the backend directory):
+
+PYTHONPATH=. python scripts/slack_listener_benchmark.py --events 2000 --channels 50
+"""
+
+import argparse
+import logging
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+from slack_sdk.socket_mode.request import SocketModeRequest
+
+from onyx.onyxbot.slack import cache
+from onyx.onyxbot.slack import listener
+from onyx.onyxbot.slack import work_queue
+from onyx.onyxbot.slack.models import SlackMessageInfo
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+_TENANT_ID = "benchmark_tenant"
+_SLACK_BOT_ID = 1
+
+
+class FakeWebClient:
+    def __init__(self, slack_ms: float) -> None:
+        self.slack_ms = slack_ms
+
+    def auth_test(self) -> dict[str, Any]:
+        time.sleep(self.slack_ms / 1000)
+        return {"ok": True, "user_id": "UONYX", "bot_id": "BONYX"}
+
+    def conversations_info(self, channel: str) -> MagicMock:
+        time.sleep(self.slack_ms / 1000)
+        response = MagicMock()
+        response.__getitem__.return_value = {"name": f"name-{channel}"}
+        return response
+
+
+class FakeSocketModeClient:
+    def __init__(self, slack_ms: float) -> None:
+        self.web_client = FakeWebClient(slack_ms)
+        self.slack_bot_id = _SLACK_BOT_ID
+        self.bot_name = "OnyxBot"
+
+    def send_socket_mode_response(self, response: Any) -> None:
+        pass
+
+
+def _build_request(i: int, num_channels: int) -> SocketModeRequest:
+    channel = f"C{random.randrange(num_channels)}"
+    event: dict[str, Any] = {
+        "type": "message",
+        "channel": channel,
+        "channel_type": "channel",
+        "user": f"U{i}",
+        "text": f"question number {i}?",
+        "ts": f"{i}.0",
+    }
+    if i % 10 == 0:
+        event["bot_profile"] = {"name": "another bot"}
+    return SocketModeRequest(
+        type="events_api", envelope_id=f"envelope-{i}", payload={"event": event}
+    )
+
+
+def _run(args: argparse.Namespace, use_cache: bool) -> None:
+    def _sleep_ms(ms: float) -> None:
+        time.sleep(ms / 1000)
+
+    class FakeSession:
+        def get(self, *_: Any) -> MagicMock:
+            _sleep_ms(args.db_ms)
+            return MagicMock()
+
+    @contextmanager
+    def _fake_session() -> Iterator[FakeSession]:
+        yield FakeSession()
+
+    def _fetch_slack_bot(**_: Any) -> MagicMock:
+        _sleep_ms(args.db_ms)
+        return MagicMock(enabled=True)
+
+    def _get_channel_config(**_: Any) -> MagicMock:
+        # channel specific lookup, then the default config
+        _sleep_ms(2 * args.db_ms)
+        return MagicMock(id=1, channel_config={"respond_to_bots": True})
+
+    redis_client = MagicMock()
+    redis_client.get.side_effect = lambda *_: _sleep_ms(args.redis_ms)
+
+    handled = 0
+    handled_lock = threading.Lock()
+
+    def _handle_message(**_: Any) -> bool:
+        nonlocal handled
+        _sleep_ms(args.handler_ms)
+        with handled_lock:
+            handled += 1
+        return False
+
+    def _dropped() -> int:
+        return int(REGISTRY.get_sample_value("slack_bot_dropped_events_total") or 0)
+
+    def _build_request_details(req: SocketModeRequest, _: Any) -> SlackMessageInfo:
+        event = req.payload["event"]
+        return SlackMessageInfo(
+            thread_messages=[],
+            channel_to_respond=event["channel"],
+            msg_to_respond=event["ts"],
+            thread_to_respond=event["ts"],
+            sender_id=event["user"],
+            email=None,
+            bypass_filters=False,
+            is_slash_command=False,
+            is_bot_dm=False,
+        )
+
+    cache.remove_slack_bot_config_cache(_TENANT_ID)
+    config_cache = cache.get_slack_bot_config_cache(_TENANT_ID)
+    if not use_cache:
+        config_cache._bots.ttl = 0
+        config_cache._channel_configs.ttl = 0
+        config_cache._channel_names.ttl = 0
+    work_queue.shutdown_tenant_work_queue(_TENANT_ID)
+    work_queue._tenant_work_queues[_TENANT_ID] = work_queue.TenantWorkQueue(
+        _TENANT_ID, num_workers=args.workers, max_size=args.queue_size
+    )
+
+    client = FakeSocketModeClient(args.slack_ms)
+    requests = [_build_request(i, args.channels) for i in range(args.events)]
+    process_slack_event = listener.create_process_slack_event()
+
+    with (
+        patch.object(cache, "get_session_with_current_tenant", _fake_session),
+        patch.object(listener, "get_session_with_current_tenant", _fake_session),
+        patch.object(cache, "fetch_slack_bot", _fetch_slack_bot),
+        patch.object(
+            cache, "get_slack_channel_config_for_bot_and_channel", _get_channel_config
+        ),
+        patch.object(cache, "get_redis_client", return_value=redis_client),
+        patch.object(listener, "handle_message", _handle_message),
+        patch.object(listener, "build_request_details", _build_request_details),
+        patch.object(listener, "schedule_feedback_reminder", return_value=None),
+        patch.object(listener, "check_message_limit", return_value=True),
+        patch.object(
+            listener, "remove_onyx_bot_tag", side_effect=lambda _, msg, **__: msg
+        ),
+    ):
+        token = CURRENT_TENANT_ID_CONTEXTVAR.set(_TENANT_ID)
+        try:
+            dropped_before = _dropped()
+            start = time.monotonic()
+            dispatch_seconds = []
+            for req in requests:
+                dispatch_start = time.monotonic()
+                process_slack_event(client, req)  # type: ignore[arg-type]
+                dispatch_seconds.append(time.monotonic() - dispatch_start)
+
+            dropped = _dropped() - dropped_before
+            while handled < args.events - dropped:
+                time.sleep(0.001)
+            elapsed = time.monotonic() - start
+        finally:
+            CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+            work_queue.shutdown_tenant_work_queue(_TENANT_ID)
+
+    dispatch_seconds.sort()
+    p99_dispatch_ms = dispatch_seconds[int(len(dispatch_seconds) * 0.99)] * 1000
+    print(
+        f"{'cached' if use_cache else 'uncached':>8}: "
+        f"{handled / elapsed:8.1f} events/sec, {dropped} dropped, "
+        f"p99 acknowledgement {p99_dispatch_ms:.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--queue-size", type=int, default=100_000)
+    parser.add_argument("--slack-ms", type=float, default=50)
+    parser.add_argument("--db-ms", type=float, default=2)
+    parser.add_argument("--redis-ms", type=float, default=0.5)
+    parser.add_argument("--handler-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    # the listener logs every event
+    logging.getLogger("onyx.utils.logger").setLevel(logging.ERROR)
+
+    random.seed(0)
+    _run(args, use_cache=False)
+    _run(args, use_cache=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import datetime
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+from ee.onyx.db import analytics
+from ee.onyx.db.analytics import _IdRanges
+from ee.onyx.db.analytics import _OnyxbotDeltas
+from ee.onyx.db.analytics import fetch_onyxbot_analytics
+from ee.onyx.db.analytics import fetch_per_user_query_analytics
+from ee.onyx.db.analytics import fetch_query_analytics
+
+_START = datetime.datetime(2025, 8, 1, 12)
+_END = datetime.datetime(2025, 8, 3, 12)
+_DAY_1 = datetime.date(2025, 8, 1)
+_DAY_2 = datetime.date(2025, 8, 2)
+_DAY_3 = datetime.date(2025, 8, 3)
+_LIVE_ID_RANGES = _IdRanges(
+    message_after_id=100,
+    message_up_to_id=None,
+    feedback_after_id=10,
+    feedback_up_to_id=None,
+)
+
+
+def test_query_analytics_merges_rollups_with_live_tail() -> None:
+    user = uuid4()
+    db_session = MagicMock()
+    # rolled up rows
+    db_session.execute.return_value = [
+        (_DAY_1, user, 5, 1, 0),
+        (_DAY_1, analytics._NO_USER_ID, 2, 0, 1),
+        (_DAY_2, user, 3, 0, 0),
+    ]
+    live = {
+        (_DAY_3, user): [4, 1, 1],
+        # feedback given today on a message that's already rolled up
+        (_DAY_2, user): [0, 1, 0],
+        # the day before the range
+        (datetime.date(2025, 7, 31), user): [9, 0, 0],
+    }
+
+    with (
+        patch.object(analytics, "_live_id_ranges", return_value=_LIVE_ID_RANGES),
+        patch.object(
+            analytics, "_user_usage_deltas", return_value=live
+        ) as user_usage_deltas,
+    ):
+        assert fetch_query_analytics(_START, _END, db_session) == [
+            (7, 1, 1, _DAY_1),
+            (3, 1, 0, _DAY_2),
+            (4, 1, 1, _DAY_3),
+        ]
+        assert fetch_per_user_query_analytics(_START, _END, db_session) == [
+            (2, 0, 1, _DAY_1, None),
+            (5, 1, 0, _DAY_1, user),
+            (3, 1, 0, _DAY_2, user),
+            (4, 1, 1, _DAY_3, user),
+        ]
+
+    user_usage_deltas.assert_called_with(db_session, _LIVE_ID_RANGES, since=_START)
+
+
+def test_onyxbot_analytics_applies_live_sessions_and_feedback() -> None:
+    rolled_up_session = uuid4()
+    new_session = uuid4()
+    db_session = MagicMock()
+    db_session.execute.side_effect = [
+        # per day sessions and negative answers
+        [(_DAY_1, 3, 1), (_DAY_2, 2, 0)],
+        # rolled up answers with newer feedback
+        [(_DAY_1, 11, True), (_DAY_2, 21, False)],
+    ]
+    db_session.scalars.return_value = [rolled_up_session]
+    live = _OnyxbotDeltas(
+        new_sessions={
+            # the first answer was rolled up, this is a later one
+            rolled_up_session: (_DAY_2, 105, False),
+            new_session: (_DAY_3, 106, True),
+        },
+        feedback={11: False, 21: True, 106: True},
+    )
+
+    with (
+        patch.object(analytics, "_live_id_ranges", return_value=_LIVE_ID_RANGES),
+        patch.object(analytics, "_onyxbot_deltas", return_value=live),
+    ):
+        assert fetch_onyxbot_analytics(_START, _END, db_session) == [
+            (3, 0, _DAY_1),
+            (2, 1, _DAY_2),
+            (1, 1, _DAY_3),
+        ]
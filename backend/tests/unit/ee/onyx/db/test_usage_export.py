@@ -0,0 +1,37 @@
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from ee.onyx.db.usage_export import get_all_empty_chat_message_entries
+from ee.onyx.server.reporting.usage_export_models import FlowType
+
+
+def test_chat_message_entries_are_paged_by_message_id() -> None:
+    time_sent = datetime(2025, 8, 1, tzinfo=timezone.utc)
+    session_id = uuid4()
+    user_id = uuid4()
+    pages = [
+        [
+            (1, session_id, user_id, False, time_sent),
+            (5, session_id, None, True, time_sent),
+        ],
+        [(9, session_id, user_id, False, time_sent)],
+    ]
+    db_session = MagicMock()
+    db_session.execute.return_value.all.side_effect = pages
+
+    batches = list(
+        get_all_empty_chat_message_entries(
+            db_session, (datetime.fromtimestamp(0, tz=timezone.utc), time_sent), 2
+        )
+    )
+
+    assert [[entry.message_id for entry in batch] for batch in batches] == [[1, 5], [9]]
+    assert batches[0][0].user_id == str(user_id)
+    assert batches[0][1].user_id is None
+    assert batches[0][1].flow_type == FlowType.SLACK
+    # the short page ends the export without another query
+    assert db_session.execute.call_count == 2
+    second_query = db_session.execute.call_args_list[1].args[0]
+    assert second_query.compile().params["id_1"] == 5
@@ -237,6 +237,39 @@ class TestExternalStorageFileStore:
                 assert call_args[1]["Key"] == "onyx-files/public/test-file.txt"
                 assert call_args[1]["ContentType"] == "text/plain"
 
+    @patch("boto3.client")
+    def test_s3_save_large_file_mock(
+        self, mock_boto3: MagicMock, sample_file_io: BytesIO
+    ) -> None:
+        """Large files are handed to the managed (multipart) upload as a stream"""
+        mock_s3_client: Mock = Mock()
+        mock_boto3.return_value = mock_s3_client
+        mock_db_session: Mock = Mock()
+
+        with patch("onyx.file_store.file_store.upsert_filerecord") as mock_upsert:
+            file_store = S3BackedFileStore(bucket_name="test-bucket")
+            file_id = file_store.save_large_file(
+                file_id="report.zip",
+                content=sample_file_io,
+                display_name="Report",
+                file_origin=FileOrigin.GENERATED_REPORT,
+                file_type="application/zip",
+                db_session=mock_db_session,
+            )
+
+        assert file_id == "report.zip"
+        mock_s3_client.put_object.assert_not_called()
+        mock_s3_client.upload_fileobj.assert_called_once_with(
+            sample_file_io,
+            "test-bucket",
+            "onyx-files/public/report.zip",
+            ExtraArgs={"ContentType": "application/zip"},
+        )
+        assert mock_upsert.call_args.kwargs["object_key"] == (
+            "onyx-files/public/report.zip"
+        )
+        mock_db_session.commit.assert_called_once()
+
     def test_minio_client_initialization(self) -> None:
         """Test S3 client initialization with MinIO endpoint"""
         with (
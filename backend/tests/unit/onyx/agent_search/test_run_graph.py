@@ -0,0 +1,94 @@
+import operator
+import threading
+import time
+from collections.abc import Hashable
+from typing import Annotated
+from typing import TypedDict
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from langgraph.graph import END
+from langgraph.graph import START
+from langgraph.graph import StateGraph
+from langgraph.types import Send
+from prometheus_client import REGISTRY
+
+from onyx.agents.agent_search import run_graph
+from onyx.agents.agent_search.run_graph import AgentGraph
+from onyx.agents.agent_search.run_graph import get_compiled_graph
+from onyx.agents.agent_search.run_graph import manage_sync_streaming
+
+
+class _FanOutState(TypedDict):
+    branches: int
+    results: Annotated[list[int], operator.add]
+
+
+class _BranchState(TypedDict):
+    branch: int
+
+
+def _build_fan_out_graph(on_branch: MagicMock) -> StateGraph:
+    def _branch(state: _BranchState) -> dict:
+        on_branch(state["branch"])
+        return {"results": [state["branch"]]}
+
+    def _fan_out(state: _FanOutState) -> list[Send | Hashable]:
+        return [Send("branch", {"branch": i}) for i in range(state["branches"])]
+
+    graph = StateGraph(_FanOutState)
+    graph.add_node("branch", _branch)
+    graph.add_conditional_edges(START, _fan_out, ["branch"])
+    graph.add_edge("branch", END)
+    return graph
+
+
+def test_get_compiled_graph_compiles_once() -> None:
+    builder = MagicMock()
+    with (
+        patch.dict(run_graph._GRAPH_BUILDERS, {AgentGraph.BASIC: builder}),
+        patch.dict(run_graph._COMPILED_GRAPHS, clear=True),
+    ):
+        first = get_compiled_graph(AgentGraph.BASIC)
+        second = get_compiled_graph(AgentGraph.BASIC)
+
+    assert first is second
+    builder.assert_called_once()
+    builder.return_value.compile.assert_called_once()
+
+
+def test_branches_are_bounded_and_nodes_timed() -> None:
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def _on_branch(branch: int) -> None:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    compiled_graph = _build_fan_out_graph(MagicMock(side_effect=_on_branch)).compile()
+    labels = {"graph": "fan_out_test", "node": "branch"}
+    runs_before = (
+        REGISTRY.get_sample_value("onyx_agent_graph_node_seconds_count", labels) or 0
+    )
+
+    with patch.object(run_graph, "AGENT_MAX_CONCURRENT_BRANCHES", 2):
+        list(
+            manage_sync_streaming(
+                compiled_graph=compiled_graph,
+                config=MagicMock(persistence=None),
+                graph_input={"branches": 6, "results": []},  # type: ignore[arg-type]
+                graph_name="fan_out_test",
+            )
+        )
+
+    assert max_running == 2
+    assert (
+        REGISTRY.get_sample_value("onyx_agent_graph_node_seconds_count", labels)
+        == runs_before + 6
+    )
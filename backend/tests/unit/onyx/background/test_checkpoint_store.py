@@ -0,0 +1,103 @@
+import json
+
+from onyx.background.indexing.checkpoint_store import CheckpointEncoder
+from onyx.background.indexing.checkpoint_store import decode_checkpoint
+from onyx.connectors.models import ConnectorCheckpoint
+
+
+class _Checkpoint(ConnectorCheckpoint):
+    seen_ids: set[str] = set()
+    cursors: list[str] = []
+    progress: dict[str, dict[str, int]] = {}
+    next_page: str | None = None
+
+
+def _assert_decodes_to(
+    checkpoint: _Checkpoint, snapshot: bytes, deltas: list[bytes]
+) -> None:
+    decoded = _Checkpoint.model_validate_json(decode_checkpoint(snapshot, deltas))
+    assert decoded == checkpoint
+
+
+def test_deltas_replay_onto_snapshot() -> None:
+    encoder = CheckpointEncoder()
+    checkpoint = _Checkpoint(
+        has_more=True, seen_ids={f"id-{i}" for i in range(5000)}, next_page="1"
+    )
+
+    snapshot, delta = encoder.encode(checkpoint)
+    assert snapshot is not None and delta is None
+    _assert_decodes_to(checkpoint, snapshot, [])
+
+    # nothing changed, nothing to save
+    assert encoder.encode(checkpoint) == (None, None)
+
+    deltas: list[bytes] = []
+    for page in range(2, 6):
+        checkpoint = checkpoint.model_copy(deep=True)
+        checkpoint.seen_ids = (checkpoint.seen_ids - {f"id-{page}"}) | {
+            f"id-{page}-{i}" for i in range(20)
+        }
+        checkpoint.cursors.append(f"cursor-{page}")
+        checkpoint.progress.setdefault("channel", {})[str(page)] = page
+        checkpoint.next_page = None if page == 5 else str(page)
+
+        new_snapshot, delta = encoder.encode(checkpoint)
+        assert new_snapshot is None and delta is not None
+        deltas.append(delta)
+        assert encoder.delta_count == len(deltas)
+        _assert_decodes_to(checkpoint, snapshot, deltas)
+
+    # the deltas hold only what changed since the previous save
+    assert sum(len(delta) for delta in deltas) < len(snapshot) // 2
+    assert len(deltas[-1]) < len(deltas[0]) * 2
+
+
+def test_snapshot_taken_after_interval() -> None:
+    encoder = CheckpointEncoder(snapshot_interval=3)
+    checkpoint = _Checkpoint(has_more=True, seen_ids={str(i) for i in range(1000)})
+    snapshot, _ = encoder.encode(checkpoint)
+    deltas: list[bytes] = []
+
+    snapshots_taken = 0
+    for i in range(1000, 1010):
+        checkpoint = checkpoint.model_copy(
+            update={"seen_ids": checkpoint.seen_ids | {str(i)}}
+        )
+        new_snapshot, delta = encoder.encode(checkpoint)
+        if new_snapshot is not None:
+            snapshots_taken += 1
+            snapshot = new_snapshot
+            deltas = []
+        else:
+            assert delta is not None
+            deltas.append(delta)
+        assert snapshot is not None
+        _assert_decodes_to(checkpoint, snapshot, deltas)
+
+    # every 4th save, after 3 deltas
+    assert snapshots_taken == 2
+
+
+def test_stale_deltas_are_ignored() -> None:
+    encoder = CheckpointEncoder(snapshot_interval=2)
+    checkpoint = _Checkpoint(
+        has_more=True, seen_ids={str(i) for i in range(1000)}, next_page="1"
+    )
+    encoder.encode(checkpoint)
+    _, stale_delta_1 = encoder.encode(checkpoint.model_copy(update={"next_page": "2"}))
+    _, stale_delta_2 = encoder.encode(checkpoint.model_copy(update={"next_page": "3"}))
+    assert stale_delta_1 is not None and stale_delta_2 is not None
+
+    # a new snapshot and its first delta were saved over the previous ones, the
+    # second delta of the previous snapshot is left over
+    snapshot, _ = encoder.encode(checkpoint.model_copy(update={"next_page": "4"}))
+    assert snapshot is not None
+    _, delta_1 = encoder.encode(checkpoint.model_copy(update={"next_page": "5"}))
+    assert delta_1 is not None
+
+    assert json.loads(decode_checkpoint(snapshot, [stale_delta_1]))["next_page"] == "4"
+    assert (
+        json.loads(decode_checkpoint(snapshot, [delta_1, stale_delta_2]))["next_page"]
+        == "5"
+    )
@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from onyx.background.indexing import job_client
+from onyx.background.indexing.job_client import SimpleJob
+from onyx.background.indexing.job_client import SimpleJobClient
+from onyx.background.indexing.job_client import SimpleJobException
+
+
+def _succeed(tenant_id: str) -> None:
+    pass
+
+
+def _fail(tenant_id: str) -> None:
+    raise SimpleJobException("connector failed", code=3)
+
+
+def _wait(job: SimpleJob) -> None:
+    deadline = time.monotonic() + 60
+    while not job.done():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+@pytest.mark.parametrize("start_method", ["spawn", "forkserver"])
+def test_job_exit_codes_and_exceptions(
+    start_method: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # the job processes don't need the connector stack
+    monkeypatch.setattr(job_client, "_FORKSERVER_PRELOAD_MODULES", [])
+    client = SimpleJobClient(n_workers=2, start_method=start_method)
+
+    succeeding = client.submit(_succeed, "tenant_1")
+    failing = client.submit(_fail, "tenant_1")
+    assert succeeding is not None and failing is not None
+    assert client.submit(_succeed, "tenant_1") is None
+
+    _wait(succeeding)
+    _wait(failing)
+
+    assert succeeding.status == "finished"
+    assert failing.status == "error"
+    assert failing.process is not None and failing.process.exitcode == 3
+    assert "connector failed" in failing.exception()
@@ -0,0 +1,52 @@
+import random
+import string
+
+from onyx.background.celery.tasks.pruning.utils import iter_ids_missing_from_source
+from onyx.background.celery.tasks.pruning.utils import SortedIdSpiller
+
+
+def _random_ids(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "/:._-é漢\n"
+    return ["".join(rng.choices(alphabet, k=rng.randint(1, 24))) for _ in range(count)]
+
+
+def test_spiller_in_memory_only() -> None:
+    with SortedIdSpiller(max_ids_in_memory=100) as spiller:
+        spiller.add(["b", "a", "c", "a"])
+        assert spiller.num_runs == 0
+        assert list(spiller.iter_sorted()) == ["a", "b", "c"]
+
+
+def test_spiller_spills_and_merges_runs() -> None:
+    ids = _random_ids(5000, seed=1)
+    # add duplicates that will land in different runs
+    ids += ids[:1000]
+
+    with SortedIdSpiller(max_ids_in_memory=250) as spiller:
+        spiller.add(ids)
+        assert spiller.num_runs > 1
+        assert spiller.num_added == len(ids)
+        assert list(spiller.iter_sorted()) == sorted(set(ids))
+
+
+def test_iter_ids_missing_from_source_matches_set_difference() -> None:
+    indexed = _random_ids(3000, seed=2)
+    source = indexed[:2000] + _random_ids(500, seed=3)
+
+    with SortedIdSpiller(max_ids_in_memory=300) as spiller:
+        spiller.add(source)
+        missing = list(
+            iter_ids_missing_from_source(sorted(set(indexed)), spiller.iter_sorted())
+        )
+
+    assert missing == sorted(set(indexed) - set(source))
+
+
+def test_iter_ids_missing_from_source_edge_cases() -> None:
+    assert list(iter_ids_missing_from_source([], ["a"])) == []
+    assert list(iter_ids_missing_from_source(["a", "b"], [])) == ["a", "b"]
+    assert list(iter_ids_missing_from_source(["a", "c", "e"], ["b", "c", "d"])) == [
+        "a",
+        "e",
+    ]
@@ -0,0 +1,97 @@
+import json
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from onyx.agents.agent_search.shared_graph_utils.agent_prompt_ops import (
+    _get_summarized_history,
+)
+from onyx.chat.chat_utils import create_chat_chain
+from onyx.configs.constants import MessageType
+from onyx.db.models import ChatMessage
+
+
+def _message(
+    id: int,
+    parent: int | None,
+    child: int | None,
+    message_type: MessageType = MessageType.USER,
+) -> ChatMessage:
+    return ChatMessage(
+        id=id,
+        parent_message=parent,
+        latest_child_message=child,
+        message=f"message {id}",
+        message_type=message_type,
+        token_count=1,
+        refined_answer_improvement=None,
+    )
+
+
+def test_create_chat_chain_walks_main_chain() -> None:
+    # root -> 1 (user) -> 2 (assistant) -> 3 (user), returned unordered as the
+    # recursive query doesn't order its rows
+    messages = [
+        _message(3, 2, None),
+        _message(1, 0, 2),
+        _message(0, None, 1, MessageType.SYSTEM),
+        _message(2, 1, 3, MessageType.ASSISTANT),
+    ]
+    with patch(
+        "onyx.chat.chat_utils.get_main_chain_chat_messages", return_value=messages
+    ) as get_messages:
+        final_message, history = create_chat_chain(
+            chat_session_id=uuid4(), db_session=MagicMock(), stop_at_message_id=3
+        )
+
+    assert get_messages.call_args.kwargs["stop_at_message_id"] == 3
+    assert final_message.id == 3
+    assert [message.id for message in history] == [1, 2]
+
+
+def test_create_chat_chain_rejects_broken_chain() -> None:
+    messages = [
+        _message(0, None, 1, MessageType.SYSTEM),
+        _message(1, 0, 2),
+    ]
+    with patch(
+        "onyx.chat.chat_utils.get_main_chain_chat_messages", return_value=messages
+    ):
+        with pytest.raises(RuntimeError):
+            create_chat_chain(chat_session_id=uuid4(), db_session=MagicMock())
+
+
+def test_summarized_history_is_cached_per_session() -> None:
+    store: dict[str, Any] = {}
+    redis_client = MagicMock()
+    redis_client.get.side_effect = store.get
+    redis_client.set.side_effect = lambda key, value, ex: store.__setitem__(key, value)
+    config = MagicMock()
+    config.persistence.chat_session_id = uuid4()
+    config.tooling.fast_llm.config.model_name = "fast-model"
+
+    with (
+        patch(
+            "onyx.agents.agent_search.shared_graph_utils.agent_prompt_ops.get_redis_client",
+            return_value=redis_client,
+        ),
+        patch(
+            "onyx.agents.agent_search.shared_graph_utils.agent_prompt_ops.summarize_history",
+            side_effect=lambda history, **kwargs: f"summary of {history}",
+        ) as summarize,
+    ):
+        first = _get_summarized_history(config, "history", "question", "persona")
+        second = _get_summarized_history(config, "history", "question", "persona")
+        assert first == second == "summary of history"
+        assert summarize.call_count == 1
+
+        # new turn, the history changed
+        third = _get_summarized_history(config, "more history", "question", "persona")
+        assert third == "summary of more history"
+        assert summarize.call_count == 2
+
+    (cached,) = store.values()
+    assert json.loads(cached)["summary"] == "summary of more history"
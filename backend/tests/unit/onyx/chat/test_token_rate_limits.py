@@ -0,0 +1,143 @@
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from unittest.mock import MagicMock
+
+from onyx.redis.redis_token_usage import RedisTokenUsage
+from onyx.redis.redis_token_usage import TokenUsageScope
+from onyx.server.query_and_chat.token_limit import _is_rate_limited
+from onyx.server.query_and_chat.token_limit import _is_rate_limited_by_usage_counter
+
+
+class _FakeRedis:
+    """Just enough of redis for the usage counters, pipelines run their commands
+    on execute (transactions once multi is called)"""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    def pipeline(self, transaction: bool = True) -> "_FakePipeline":
+        return _FakePipeline(self)
+
+    def transaction(self, func: Callable[[Any], None], *watches: str) -> list[Any]:
+        pipe = _FakePipeline(self, buffered=False)
+        func(pipe)
+        return pipe.execute()
+
+    def get(self, key: str) -> bytes | None:
+        value = self.data.get(key)
+        return None if value is None else str(value).encode()
+
+    def set(self, key: str, value: Any, ex: Any = None) -> None:
+        self.data[key] = value
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+    def expire(self, key: str, ttl: int) -> None:
+        pass
+
+    def hincrby(self, key: str, field: str, amount: int) -> None:
+        bucket = self.data.setdefault(key, {})
+        bucket[field] = bucket.get(field, 0) + amount
+
+    def hset(self, key: str, mapping: dict[str, int]) -> None:
+        self.data.setdefault(key, {}).update(mapping)
+
+    def hget(self, key: str, field: str) -> bytes | None:
+        value = self.data.get(key, {}).get(field)
+        return None if value is None else str(value).encode()
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return {
+            field.encode(): str(value).encode()
+            for field, value in self.data.get(key, {}).items()
+        }
+
+
+class _FakePipeline:
+    def __init__(self, redis: _FakeRedis, buffered: bool = True) -> None:
+        self.redis = redis
+        self.buffered = buffered
+        self.commands: list[Callable[[], Any]] = []
+
+    def multi(self) -> None:
+        self.buffered = True
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        command = getattr(self.redis, name)
+        if not self.buffered:
+            return command
+        return lambda *args, **kwargs: self.commands.append(
+            lambda: command(*args, **kwargs)
+        )
+
+    def execute(self) -> list[Any]:
+        return [command() for command in self.commands]
+
+
+def _rate_limit(period_hours: int, token_budget: int) -> Any:
+    return MagicMock(period_hours=period_hours, token_budget=token_budget)
+
+
+def _minute(time: datetime) -> datetime:
+    return time.replace(second=0, microsecond=0)
+
+
+def test_usage_counter_matches_postgres_aggregation() -> None:
+    now = datetime.now(tz=timezone.utc)
+    usage = [
+        (_minute(now - timedelta(minutes=minutes_ago)), token_count)
+        for minutes_ago, token_count in [(1, 5), (59, 7), (61, 11), (300, 13)]
+    ]
+    cutoff_times = [now - timedelta(hours=1), now - timedelta(hours=24)]
+
+    counter = RedisTokenUsage(_FakeRedis(), TokenUsageScope.USER, "user")  # type: ignore[arg-type]
+    assert counter.get_usage(cutoff_times) is None
+
+    counter.rebuild(usage, since=cutoff_times[1])
+    assert counter.get_usage(cutoff_times) == [12, 36]
+
+    counter.record(100)
+    assert counter.get_usage(cutoff_times) == [112, 136]
+
+    # the counters don't go back far enough
+    assert counter.get_usage([now - timedelta(hours=48)]) is None
+
+
+def test_rebuild_keeps_usage_recorded_while_aggregating() -> None:
+    now = datetime.now(tz=timezone.utc)
+    aggregated_at = _minute(now)
+    usage = [(_minute(now - timedelta(minutes=59)), 7)]
+    cutoff_times = [now - timedelta(hours=1)]
+
+    counter = RedisTokenUsage(_FakeRedis(), TokenUsageScope.USER, "user")  # type: ignore[arg-type]
+    # recorded before the aggregation, replaced by the aggregated usage
+    counter.record(999, time=now - timedelta(minutes=59))
+    # recorded after the aggregation started, kept
+    counter.record(100, time=aggregated_at)
+
+    counter.rebuild(usage, since=cutoff_times[0], until=aggregated_at)
+    assert counter.get_usage(cutoff_times) == [107]
+
+
+def test_rate_limit_check_rebuilds_counters_once() -> None:
+    now = datetime.now(tz=timezone.utc)
+    usage = [(_minute(now - timedelta(minutes=30)), 1_500)]
+    fetch_usage = MagicMock(return_value=usage)
+    counter = RedisTokenUsage(_FakeRedis(), TokenUsageScope.GLOBAL)  # type: ignore[arg-type]
+
+    within_budget = [_rate_limit(period_hours=1, token_budget=2)]
+    exceeded = [_rate_limit(period_hours=1, token_budget=1)]
+    assert _is_rate_limited(exceeded, usage)
+
+    assert not _is_rate_limited_by_usage_counter(within_budget, counter, fetch_usage)
+    assert _is_rate_limited_by_usage_counter(exceeded, counter, fetch_usage)
+    fetch_usage.assert_called_once()
+
+    counter.record(500)
+    assert _is_rate_limited_by_usage_counter(within_budget, counter, fetch_usage)
+    fetch_usage.assert_called_once()
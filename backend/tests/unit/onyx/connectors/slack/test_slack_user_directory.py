@@ -0,0 +1,105 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+from onyx.connectors.models import BasicExpertInfo
+from onyx.connectors.slack.utils import expert_info_from_slack_id
+from onyx.connectors.slack.utils import SlackTextCleaner
+from onyx.connectors.slack.utils import SlackUserDirectory
+
+
+class _FakeResponse(dict):
+    def validate(self) -> "_FakeResponse":
+        return self
+
+
+def _user(user_id: str) -> dict[str, Any]:
+    return {
+        "id": user_id,
+        "real_name": f"Real {user_id}",
+        "profile": {
+            "display_name": f"display_{user_id}",
+            "real_name": f"Real {user_id}",
+            "email": f"{user_id}@example.com",
+            "image_512": "not persisted",
+        },
+    }
+
+
+def _make_client(num_users: int, page_size: int) -> MagicMock:
+    users = [_user(f"U{i}") for i in range(num_users)]
+
+    def users_list(cursor: str | None = None, limit: int = 200) -> _FakeResponse:
+        start = int(cursor) if cursor else 0
+        end = start + page_size
+        return _FakeResponse(
+            members=users[start:end],
+            response_metadata={"next_cursor": str(end) if end < num_users else ""},
+        )
+
+    client = MagicMock()
+    client.users_list.side_effect = users_list
+    return client
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return self.hashes.get(key, {})
+
+    def pipeline(self) -> "_FakeRedis":
+        return self
+
+    def delete(self, key: str) -> None:
+        self.hashes.pop(key, None)
+
+    def hset(self, key: str, mapping: dict[str, str]) -> None:
+        self.hashes.setdefault(key, {}).update(
+            {k.encode(): v.encode() for k, v in mapping.items()}
+        )
+
+    def expire(self, key: str, ttl: int) -> None:
+        pass
+
+    def execute(self) -> None:
+        pass
+
+
+def test_hydrate_pages_users_and_seeds_caches() -> None:
+    client = _make_client(num_users=5, page_size=2)
+    user_cache: dict[str, BasicExpertInfo | None] = {}
+    text_cleaner = SlackTextCleaner(client=client)
+
+    num_users = SlackUserDirectory(client=client).hydrate(user_cache, text_cleaner)
+
+    assert num_users == 5
+    assert client.users_list.call_count == 3
+    assert set(user_cache) == {f"U{i}" for i in range(5)}
+
+    # resolving a known user no longer hits users.info
+    expert = expert_info_from_slack_id("U3", client, user_cache)
+    assert expert is not None
+    assert expert.email == "U3@example.com"
+    assert text_cleaner.index_clean("hi <@U1>") == "hi @display_U1"
+    client.users_info.assert_not_called()
+
+
+def test_hydrate_reuses_workspace_cache_from_redis() -> None:
+    r = _FakeRedis()
+
+    first_client = _make_client(num_users=3, page_size=10)
+    SlackUserDirectory(client=first_client, r=r, redis_key="users").hydrate(  # type: ignore
+        {}
+    )
+    assert first_client.users_list.call_count == 1
+
+    second_client = _make_client(num_users=3, page_size=10)
+    user_cache: dict[str, BasicExpertInfo | None] = {}
+    SlackUserDirectory(client=second_client, r=r, redis_key="users").hydrate(  # type: ignore
+        user_cache
+    )
+    second_client.users_list.assert_not_called()
+    assert user_cache["U2"] == BasicExpertInfo(
+        display_name="Real U2", email="U2@example.com"
+    )
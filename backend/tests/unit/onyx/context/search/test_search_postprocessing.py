@@ -0,0 +1,100 @@
+from collections.abc import Iterator
+from typing import Any
+from typing import cast
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.chat.models import SectionRelevancePiece
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.enums import LLMEvaluationType
+from onyx.context.search.enums import SearchType
+from onyx.context.search.models import IndexFilters
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import InferenceSection
+from onyx.context.search.models import SearchQuery
+from onyx.context.search.postprocessing.postprocessing import _fall_back_to_ranking
+from onyx.context.search.postprocessing.postprocessing import search_postprocessing
+
+_MODULE = "onyx.context.search.postprocessing.postprocessing"
+
+
+def _section(document_id: str, score: float) -> InferenceSection:
+    chunk = InferenceChunk(
+        chunk_id=0,
+        document_id=document_id,
+        semantic_identifier=document_id,
+        title=document_id,
+        blurb=document_id,
+        content=document_id,
+        source_links=None,
+        section_continuation=False,
+        source_type=DocumentSource.WEB,
+        boost=0,
+        recency_bias=1.0,
+        score=score,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        updated_at=None,
+        image_file_id=None,
+        doc_summary="",
+        chunk_context="",
+    )
+    return InferenceSection(center_chunk=chunk, chunks=[chunk], combined_content="")
+
+
+def _query() -> SearchQuery:
+    return SearchQuery(
+        query="what changed",
+        processed_keywords=["changed"],
+        search_type=SearchType.SEMANTIC,
+        evaluation_type=LLMEvaluationType.BASIC,
+        filters=IndexFilters(access_control_list=["PUBLIC"]),
+        chunks_above=0,
+        chunks_below=0,
+        rerank_settings=None,
+        hybrid_alpha=0.5,
+        recency_bias_multiplier=0.5,
+        max_llm_filter_sections=10,
+        num_hits=10,
+        original_query=None,
+    )
+
+
+def test_section_relevance_is_streamed() -> None:
+    sections = [_section("first", 0.9), _section("second", 0.8), _section("third", 0.3)]
+
+    def _verdicts(**kwargs: Any) -> Iterator[tuple[int, bool]]:
+        # the third section isn't evaluated within the latency budget
+        yield 0, False
+        yield 1, True
+
+    with (
+        patch(f"{_MODULE}.should_rerank", return_value=False),
+        patch(f"{_MODULE}.get_search_time_image_analysis_enabled", return_value=False),
+        patch(f"{_MODULE}.stream_llm_section_usefulness", side_effect=_verdicts),
+    ):
+        results = list(search_postprocessing(_query(), sections, MagicMock()))
+
+    assert results[0] == sections
+    relevance = [
+        [piece.relevant for piece in cast(list[SectionRelevancePiece], pieces)]
+        for pieces in results[1:]
+    ]
+    assert relevance == [
+        [False, False, False],
+        [False, True, False],
+        # the third section scored lower than the approved one
+        [False, True, False],
+    ]
+
+
+def test_unevaluated_sections_fall_back_to_ranking() -> None:
+    sections = [_section("first", 0.9), _section("second", 0.8), _section("third", 0.3)]
+
+    # the LLM approved a section
+    assert _fall_back_to_ranking(sections, [None, True, None]) == [True, True, False]
+    # the LLM rejected the only section it evaluated
+    assert _fall_back_to_ranking(sections, [False, None, None]) == [False, True, False]
+    # the LLM did not get to evaluate any section
+    assert _fall_back_to_ranking(sections, [None, None, None]) == [True, True, True]
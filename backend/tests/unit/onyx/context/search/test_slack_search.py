@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.context.search.federated.models import SlackMessage
+from onyx.context.search.federated.slack_search import build_highlight_pattern
+from onyx.context.search.federated.slack_search import contextualize_slack_messages
+
+_MODULE = "onyx.context.search.federated.slack_search"
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, bytes] = {}
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self) -> "FakeRedis":
+        return self
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self.store[key] = value.encode("utf-8")
+
+    def execute(self) -> None:
+        pass
+
+
+def _slack_message(message_id: str, thread_id: str | None) -> SlackMessage:
+    return SlackMessage(
+        document_id=f"C1_{message_id}",
+        channel_id="C1",
+        message_id=message_id,
+        thread_id=thread_id,
+        link="https://slack.com/archives/C1",
+        metadata={},
+        timestamp=datetime.fromtimestamp(float(message_id)),
+        recency_bias=1.0,
+        semantic_identifier="message",
+        text=f"U1: message {message_id}",
+        highlighted_texts=set(),
+        slack_score=1.0,
+    )
+
+
+def _slack_client(thread: list[dict[str, str]]) -> MagicMock:
+    slack_client = MagicMock()
+    slack_client.conversations_replies.return_value.get.return_value = thread
+
+    def users_profile_get(user: str) -> MagicMock:
+        response = MagicMock()
+        response.get.return_value = {"real_name": f"name of {user}"}
+        return response
+
+    slack_client.users_profile_get.side_effect = users_profile_get
+    return slack_client
+
+
+def _contextualize(
+    slack_messages: list[SlackMessage], slack_client: MagicMock, redis_client: Any
+) -> None:
+    with (
+        patch(f"{_MODULE}.WebClient", return_value=slack_client),
+        patch(f"{_MODULE}.get_redis_client", return_value=redis_client),
+    ):
+        contextualize_slack_messages(slack_messages, "token")
+
+
+def test_threads_are_fetched_once_and_cached() -> None:
+    thread = [
+        {"ts": "100.0", "user": "U1", "text": "question"},
+        {"ts": "101.0", "user": "U2", "text": "answer"},
+    ]
+    redis_client = FakeRedis()
+
+    slack_client = _slack_client(thread)
+    slack_messages = [
+        _slack_message("100.0", "100.0"),
+        _slack_message("101.0", "100.0"),
+    ]
+    _contextualize(slack_messages, slack_client, redis_client)
+
+    assert slack_client.conversations_replies.call_count == 1
+    # each user is only looked up once across all the threads
+    assert slack_client.users_profile_get.call_count == 2
+    assert slack_messages[0].text == (
+        "name of U1: question\n\nReplies:\n\nname of U2: answer"
+    )
+    assert slack_messages[1].text == (
+        "name of U1: question\n\nReplies:\nname of U2: answer"
+    )
+
+    slack_client = _slack_client(thread)
+    slack_messages = [_slack_message("101.0", "100.0")]
+    _contextualize(slack_messages, slack_client, redis_client)
+
+    assert slack_client.conversations_replies.call_count == 0
+    assert slack_client.users_profile_get.call_count == 0
+    assert slack_messages[0].text == (
+        "name of U1: question\n\nReplies:\nname of U2: answer"
+    )
+
+
+def test_cached_thread_older_than_the_message_is_refetched() -> None:
+    redis_client = FakeRedis()
+    _contextualize(
+        [_slack_message("100.0", "100.0")],
+        _slack_client(
+            [
+                {"ts": "100.0", "user": "U1", "text": "question"},
+                {"ts": "101.0", "user": "U2", "text": "answer"},
+            ]
+        ),
+        redis_client,
+    )
+
+    slack_client = _slack_client(
+        [
+            {"ts": "100.0", "user": "U1", "text": "question"},
+            {"ts": "101.0", "user": "U2", "text": "answer"},
+            {"ts": "102.0", "user": "U1", "text": "thanks"},
+        ]
+    )
+    slack_messages = [_slack_message("102.0", "100.0")]
+    _contextualize(slack_messages, slack_client, redis_client)
+
+    assert slack_client.conversations_replies.call_count == 1
+    assert slack_messages[0].text == (
+        "name of U1: question\n\nReplies:\n...\nname of U1: thanks"
+    )
+
+
+def test_highlight_pattern_prefers_longer_texts() -> None:
+    pattern = build_highlight_pattern({"", "slack", "slack search", "a.b"})
+    assert pattern is not None
+
+    assert (
+        pattern.sub(r"<hi>\g<0></hi>", "slack search in slack, not axb but a.b")
+        == "<hi>slack search</hi> in <hi>slack</hi>, not axb but <hi>a.b</hi>"
+    )
+    assert build_highlight_pattern({""}) is None
@@ -0,0 +1,149 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.enums import LLMEvaluationType
+from onyx.context.search.enums import SearchType
+from onyx.context.search.models import IndexFilters
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import SearchQuery
+from onyx.context.search.retrieval.speculative_retrieval import (
+    select_speculative_chunks,
+)
+from onyx.context.search.retrieval.speculative_retrieval import (
+    speculative_retrieval_counter,
+)
+
+_NOW = datetime.now(timezone.utc)
+
+
+def _chunk(
+    document_id: str, source_type: DocumentSource, updated_at: datetime | None
+) -> InferenceChunk:
+    return InferenceChunk(
+        chunk_id=0,
+        document_id=document_id,
+        semantic_identifier=document_id,
+        title=document_id,
+        blurb=document_id,
+        content=document_id,
+        source_links=None,
+        section_continuation=False,
+        source_type=source_type,
+        boost=0,
+        recency_bias=1.0,
+        score=1.0,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        updated_at=updated_at,
+        image_file_id=None,
+        doc_summary="",
+        chunk_context="",
+    )
+
+
+def _query(num_hits: int = 2, **updates: object) -> SearchQuery:
+    filters = IndexFilters(access_control_list=["PUBLIC"])
+    query = SearchQuery(
+        query="what changed",
+        processed_keywords=["changed"],
+        search_type=SearchType.SEMANTIC,
+        evaluation_type=LLMEvaluationType.SKIP,
+        filters=filters,
+        chunks_above=0,
+        chunks_below=0,
+        rerank_settings=None,
+        hybrid_alpha=0.5,
+        recency_bias_multiplier=0.5,
+        max_llm_filter_sections=10,
+        num_hits=num_hits,
+        original_query=None,
+    )
+    filter_updates = {
+        key: updates.pop(key)
+        for key in ("source_type", "time_cutoff")
+        if key in updates
+    }
+    return query.model_copy(
+        update={"filters": filters.model_copy(update=filter_updates), **updates}
+    )
+
+
+_CHUNKS = [
+    _chunk("slack-new", DocumentSource.SLACK, _NOW),
+    _chunk("web-old", DocumentSource.WEB, _NOW - timedelta(days=400)),
+    _chunk("slack-old", DocumentSource.SLACK, _NOW - timedelta(days=400)),
+    _chunk("web-untimed", DocumentSource.WEB, None),
+    _chunk("web-new", DocumentSource.WEB, _NOW),
+]
+
+
+def _result_count(result: str) -> float:
+    return speculative_retrieval_counter.labels(result=result)._value.get()
+
+
+def _ids(chunks: list[InferenceChunk] | None) -> list[str] | None:
+    return None if chunks is None else [chunk.document_id for chunk in chunks]
+
+
+def test_results_used_as_is_without_llm_filters() -> None:
+    hits = _result_count("hit")
+
+    chunks = select_speculative_chunks(_query(), _query(), _CHUNKS)
+
+    assert _ids(chunks) == ["slack-new", "web-old"]
+    assert _result_count("hit") == hits + 1
+
+
+def test_llm_filters_applied_to_results() -> None:
+    filtered_hits = _result_count("filtered_hit")
+
+    source_filtered = select_speculative_chunks(
+        _query(), _query(source_type=[DocumentSource.WEB]), _CHUNKS
+    )
+    time_filtered = select_speculative_chunks(
+        _query(),
+        _query(time_cutoff=_NOW - timedelta(days=30)),
+        _CHUNKS,
+    )
+
+    assert _ids(source_filtered) == ["web-old", "web-untimed"]
+    # recent cutoff, documents without an update time are dropped like by Vespa
+    assert _ids(time_filtered) == ["slack-new", "web-new"]
+    assert _result_count("filtered_hit") == filtered_hits + 2
+
+
+def test_miss_when_too_few_results_left() -> None:
+    misses = _result_count("miss")
+
+    chunks = select_speculative_chunks(
+        _query(),
+        _query(
+            source_type=[DocumentSource.SLACK], time_cutoff=_NOW - timedelta(days=30)
+        ),
+        _CHUNKS,
+    )
+
+    assert chunks is None
+    assert _result_count("miss") == misses + 1
+
+
+def test_miss_when_ranking_changes() -> None:
+    # the LLM asked to favor recent documents, the speculative scores are stale
+    assert (
+        select_speculative_chunks(
+            _query(), _query(recency_bias_multiplier=1.0), _CHUNKS
+        )
+        is None
+    )
+    # results past an offset can't be filtered client side
+    assert (
+        select_speculative_chunks(
+            _query(offset=2),
+            _query(offset=2, source_type=[DocumentSource.WEB]),
+            _CHUNKS,
+        )
+        is None
+    )
@@ -0,0 +1,72 @@
+from contextvars import copy_context
+from pathlib import Path
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy import text
+
+from onyx.background.celery.apps import app_base
+from onyx.db.engine.query_profiler import add_query_profiling_listeners
+from onyx.db.engine.query_profiler import normalize_statement
+from onyx.db.engine.query_profiler import profile_queries
+from onyx.db.engine.query_profiler import ProfiledQueuePool
+
+
+def test_normalize_statement() -> None:
+    assert normalize_statement(
+        "SELECT chat_message.id FROM chat_message\n"
+        "WHERE chat_message.chat_session_id = %(chat_session_id_1)s::UUID "
+        "AND chat_message.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s) "
+        "AND chat_message.message = 'it''s' LIMIT 10"
+    ) == (
+        "SELECT chat_message.id FROM chat_message "
+        "WHERE chat_message.chat_session_id = ?::UUID "
+        "AND chat_message.id IN (?) AND chat_message.message = ? LIMIT ?"
+    )
+
+
+def test_profile_flags_repeated_statements(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'profile.db'}", poolclass=ProfiledQueuePool
+    )
+    add_query_profiling_listeners(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+
+    with profile_queries("test", "n_plus_one") as profile:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT id FROM item"))
+            for item_id in range(12):
+                conn.execute(
+                    text("SELECT id FROM item WHERE id = :id"), {"id": item_id}
+                )
+
+    # statements outside of a profile aren't recorded
+    with engine.connect() as conn:
+        conn.execute(text("SELECT id FROM item"))
+
+    assert profile.statement_count == 13
+    assert profile.checkout_count == 1
+    assert profile.repeated_statements(threshold=10) == [
+        ("SELECT id FROM item WHERE id = ?", 12)
+    ]
+
+
+def _run_celery_tasks() -> list[str]:
+    task = MagicMock()
+    task.name = "some_task"
+    # task_postrun never fires for the first task
+    for task_id in ["stale", "task1", "task2"]:
+        app_base.start_task_query_profile(task_id=task_id, task=task)
+    app_base.report_task_query_profile(task_id="task2")
+    return list(app_base._task_query_profiles)
+
+
+def test_every_celery_task_is_profiled_and_stale_profiles_are_dropped() -> None:
+    with patch("onyx.db.engine.query_profiler.DB_QUERY_PROFILING_ENABLED", True), patch(
+        "onyx.db.engine.query_profiler.DB_QUERY_PROFILING_SAMPLE_RATE", 0.0
+    ), patch.object(app_base, "_MAX_TASK_QUERY_PROFILES", 2), patch.dict(
+        app_base._task_query_profiles, clear=True
+    ):
+        assert copy_context().run(_run_celery_tasks) == ["task1"]
@@ -0,0 +1,68 @@
+import threading
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.vespa.index import VespaIndex
+
+
+def _vespa_index() -> VespaIndex:
+    return VespaIndex(
+        index_name="primary",
+        secondary_index_name="secondary",
+        large_chunks_enabled=False,
+        secondary_large_chunks_enabled=True,
+        httpx_client=MagicMock(),
+    )
+
+
+def test_secondary_index_is_updated_concurrently() -> None:
+    secondary_started = threading.Event()
+    updated_indices: list[str] = []
+
+    def _update_single_chunk(
+        self: VespaIndex, doc_chunk_id: UUID, index_name: str, *args: Any
+    ) -> None:
+        if index_name == "secondary":
+            secondary_started.set()
+        else:
+            # the primary doesn't wait for the secondary to be done first
+            assert secondary_started.wait(5)
+        updated_indices.append(index_name)
+
+    with patch.object(VespaIndex, "_update_single_chunk", _update_single_chunk):
+        chunk_count = _vespa_index().update_single(
+            "doc",
+            chunk_count=2,
+            tenant_id="tenant",
+            fields=VespaDocumentFields(boost=1),
+            user_fields=None,
+        )
+
+    # the secondary has large chunks enabled, so it has more chunks than the primary
+    assert updated_indices.count("primary") == 2
+    assert chunk_count == len(updated_indices)
+
+
+def test_secondary_index_failures_are_raised() -> None:
+    def _update_single_chunk(
+        self: VespaIndex, doc_chunk_id: UUID, index_name: str, *args: Any
+    ) -> None:
+        if index_name == "secondary":
+            raise RuntimeError("secondary is down")
+
+    with (
+        patch.object(VespaIndex, "_update_single_chunk", _update_single_chunk),
+        pytest.raises(RuntimeError, match="secondary is down"),
+    ):
+        _vespa_index().update_single(
+            "doc",
+            chunk_count=2,
+            tenant_id="tenant",
+            fields=VespaDocumentFields(boost=1),
+            user_fields=None,
+        )
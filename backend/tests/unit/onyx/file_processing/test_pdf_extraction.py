@@ -0,0 +1,154 @@
+import multiprocessing
+import subprocess
+from io import BytesIO
+from typing import Any
+
+import pytest
+
+from onyx.file_processing import extract_file_text
+from onyx.file_processing.extract_file_text import read_pdf_file
+
+
+def _make_pdf(num_pages: int) -> bytes:
+    """Builds a minimal PDF where page N contains the text 'page N'"""
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # pages, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids: list[int] = []
+    for page_num in range(num_pages):
+        content = f"BT /F1 12 Tf 72 712 Td (page {page_num}) Tj ET".encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, num_pages)
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for obj_id, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, obj))
+    xref_offset = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref_offset)
+    )
+    return out.getvalue()
+
+
+def _page_numbers(text: str) -> list[int]:
+    return [int(line.split()[1]) for line in text.split("\n\n") if line.strip()]
+
+
+def test_read_pdf_file_serial(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES", 10)
+
+    text, _, _ = read_pdf_file(BytesIO(_make_pdf(5)))
+
+    assert _page_numbers(text) == list(range(5))
+
+
+def test_read_pdf_file_parallel_preserves_page_order(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES", 10)
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_NUM_PROCESSES", 2)
+
+    text, _, _ = read_pdf_file(BytesIO(_make_pdf(37)))
+
+    assert _page_numbers(text) == list(range(37))
+
+
+def test_read_pdf_file_respects_time_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES", 10)
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_TIMEOUT_SECONDS", -1)
+
+    text, _, _ = read_pdf_file(BytesIO(_make_pdf(5)))
+
+    assert text == ""
+
+
+def test_read_pdf_file_parallel_workers_stop_at_deadline(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES", 10)
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_NUM_PROCESSES", 2)
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_TIMEOUT_SECONDS", -1)
+
+    text, _, _ = read_pdf_file(BytesIO(_make_pdf(20)))
+
+    assert text == ""
+
+
+def test_read_pdf_file_parallel_stops_at_failed_shard(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES", 10)
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_NUM_PROCESSES", 3)
+    start_pdf_page_worker = extract_file_text._start_pdf_page_worker
+
+    def _start_failing_worker(
+        pdf_path: str, output_path: str, pdf_pass: str | None, start: int, *args: Any
+    ) -> subprocess.Popen:
+        # the worker of the second shard can't read the PDF
+        if start == 10:
+            pdf_path = f"{pdf_path}.missing"
+        return start_pdf_page_worker(pdf_path, output_path, pdf_pass, start, *args)
+
+    monkeypatch.setattr(
+        extract_file_text, "_start_pdf_page_worker", _start_failing_worker
+    )
+
+    text, _, _ = read_pdf_file(BytesIO(_make_pdf(30)))
+
+    # no gap where the failed shard's pages would be
+    assert _page_numbers(text) == list(range(10))
+    assert extract_file_text._num_extraction_processes == 0
+
+
+def _read_pdf_pages_in_daemon(
+    pdf: bytes, results: "multiprocessing.Queue[tuple[list[int], int]]"
+) -> None:
+    workers_started = 0
+    start_pdf_page_worker = extract_file_text._start_pdf_page_worker
+
+    def _count_workers(*args: Any) -> subprocess.Popen:
+        nonlocal workers_started
+        workers_started += 1
+        return start_pdf_page_worker(*args)
+
+    extract_file_text._start_pdf_page_worker = _count_workers  # type: ignore
+    text, _, _ = read_pdf_file(BytesIO(pdf))
+    results.put((_page_numbers(text), workers_started))
+
+
+def test_read_pdf_file_parallel_in_daemonic_process(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # docfetching runs connectors in daemonic processes
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_PDF_PARALLEL_MIN_PAGES", 10)
+    monkeypatch.setattr(extract_file_text, "FILE_EXTRACTION_NUM_PROCESSES", 2)
+
+    ctx = multiprocessing.get_context("fork")
+    results: "multiprocessing.Queue[tuple[list[int], int]]" = ctx.Queue()
+    process = ctx.Process(
+        target=_read_pdf_pages_in_daemon, args=(_make_pdf(20), results), daemon=True
+    )
+    process.start()
+    page_numbers, workers_started = results.get(timeout=60)
+    process.join()
+
+    assert page_numbers == list(range(20))
+    assert workers_started == 2
@@ -0,0 +1,115 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from onyx.indexing.contextual_rag import run_contextual_rag_calls
+from onyx.llm.chat_llm import LLMRateLimitError
+
+_MODULE = "onyx.indexing.contextual_rag"
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, bytes] = {}
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self) -> "FakeRedis":
+        return self
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self.store[key] = value.encode("utf-8")
+
+    def execute(self) -> None:
+        pass
+
+
+def _llm(model_provider: str = "openai") -> MagicMock:
+    llm = MagicMock()
+    llm.config.model_provider = model_provider
+    llm.config.model_name = "model"
+
+    def invoke(prompt: Any, **kwargs: Any) -> AIMessage:
+        if isinstance(prompt, str):
+            return AIMessage(content=f"summary of {prompt}")
+        return AIMessage(content=f"context of {prompt[0].content[1]['text']}")
+
+    llm.invoke.side_effect = invoke
+    return llm
+
+
+def test_answers_are_cached_and_deduplicated() -> None:
+    redis_client = FakeRedis()
+    calls: list[tuple[str | None, str]] = [
+        (None, "doc"),
+        ("doc", "chunk 1"),
+        ("doc", "chunk 2"),
+        ("doc", "chunk 1"),
+    ]
+
+    llm = _llm()
+    with patch(f"{_MODULE}.get_redis_client", return_value=redis_client):
+        answers = run_contextual_rag_calls(llm, calls)
+
+    assert answers == [
+        "summary of doc",
+        "context of chunk 1",
+        "context of chunk 2",
+        "context of chunk 1",
+    ]
+    assert llm.invoke.call_count == 3
+    assert len(redis_client.store) == 3
+
+    llm = _llm()
+    with patch(f"{_MODULE}.get_redis_client", return_value=redis_client):
+        assert run_contextual_rag_calls(llm, calls) == answers
+    assert llm.invoke.call_count == 0
+
+
+def test_rate_limited_calls_are_retried() -> None:
+    llm = _llm()
+    invoke = llm.invoke.side_effect
+
+    def rate_limited_invoke(prompt: Any, **kwargs: Any) -> AIMessage:
+        if llm.invoke.call_count == 1:
+            raise LLMRateLimitError("slow down")
+        return invoke(prompt, **kwargs)
+
+    llm.invoke.side_effect = rate_limited_invoke
+
+    with patch(f"{_MODULE}.get_redis_client", return_value=FakeRedis()):
+        answers = run_contextual_rag_calls(llm, [("doc", "chunk")])
+
+    assert answers == ["context of chunk"]
+    assert llm.invoke.call_count == 2
+
+
+def test_failed_calls_answer_empty_and_are_not_cached() -> None:
+    redis_client = FakeRedis()
+    llm = _llm()
+    llm.invoke.side_effect = ValueError("bad response")
+
+    with patch(f"{_MODULE}.get_redis_client", return_value=redis_client):
+        answers = run_contextual_rag_calls(llm, [("doc", "chunk")])
+
+    assert answers == [""]
+    assert redis_client.store == {}
+
+
+def test_document_prefix_is_marked_for_prompt_caching() -> None:
+    llm = _llm(model_provider="anthropic")
+
+    with patch(f"{_MODULE}.get_redis_client", return_value=FakeRedis()):
+        run_contextual_rag_calls(llm, [("doc", "chunk")])
+
+    prompt = llm.invoke.call_args.args[0]
+    document_block, chunk_block = prompt[0].content
+    assert document_block == {
+        "type": "text",
+        "text": "doc",
+        "cache_control": {"type": "ephemeral"},
+    }
+    assert chunk_block == {"type": "text", "text": "chunk"}
@@ -1,3 +1,5 @@
+from datetime import datetime
+from datetime import timezone
 from typing import Any
 from typing import cast
 from typing import List
@@ -10,23 +12,34 @@ from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.connectors.models import Document
 from onyx.connectors.models import DocumentSource
 from onyx.connectors.models import ImageSection
+from onyx.connectors.models import IndexAttemptMetadata
 from onyx.connectors.models import TextSection
+from onyx.db.document import update_docs_content_hash__no_commit
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.content_hash import compute_document_content_hash
+from onyx.indexing.contextual_rag import add_contextual_summaries
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import _get_aggregated_chunk_boost_factor
-from onyx.indexing.indexing_pipeline import add_contextual_summaries
+from onyx.indexing.indexing_pipeline import diff_chunks_against_stored_hashes
 from onyx.indexing.indexing_pipeline import filter_documents
+from onyx.indexing.indexing_pipeline import get_docs_with_changed_content
+from onyx.indexing.indexing_pipeline import index_doc_batch_prepare
 from onyx.indexing.indexing_pipeline import process_image_sections
+from onyx.indexing.indexing_pipeline import update_doc_updated_at_of_reused_chunks
 from onyx.indexing.models import ChunkEmbedding
+from onyx.indexing.models import DocAwareChunk
 from onyx.indexing.models import IndexChunk
 from onyx.llm.utils import get_max_input_tokens
 from onyx.natural_language_processing.search_nlp_models import (
     ContentClassificationPrediction,
 )
+from onyx.prompts.chat_prompts import CONTEXTUAL_RAG_PROMPT2
 from shared_configs.configs import (
     INDEXING_INFORMATION_CONTENT_CLASSIFICATION_CUTOFF_LENGTH,
 )
 
+_PIPELINE_MODULE = "onyx.indexing.indexing_pipeline"
+
 
 def create_test_document(
     doc_id: str = "test_id",
@@ -291,13 +304,21 @@ def test_contextual_rag(
     )
     indexing_documents = process_image_sections([document])
 
-    mock_llm_invoke_count = 0
-
-    def mock_llm_invoke(self: Any, *args: Any, **kwargs: Any) -> Mock:
-        nonlocal mock_llm_invoke_count
-        mock_llm_invoke_count += 1
+    def mock_llm_invoke(prompt: Any, *args: Any, **kwargs: Any) -> Mock:
+        # the document summary is "Test1", the chunk contexts "Test2", "Test3", ...
+        # in the order of the chunks, whatever order the calls are made in. Chunks
+        # with the same content share a context.
         m = Mock()
-        m.content = f"Test{mock_llm_invoke_count}"
+        if isinstance(prompt, str):
+            m.content = "Test1"
+        else:
+            chunk_prompt = prompt[0].content[1]["text"]
+            chunk_index = next(
+                i
+                for i, chunk in enumerate(chunks)
+                if CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content) == chunk_prompt
+            )
+            m.content = f"Test{chunk_index + 2}"
         return m
 
     llm_tokenizer = embedder.embedding_model.tokenizer
@@ -331,10 +352,259 @@ def test_contextual_rag(
 
     doc_summary = "Test1" if enable_contextual_rag else ""
     chunk_context = ""
-    count = 2
     for chunk in chunks:
         if enable_contextual_rag:
-            chunk_context = f"Test{count}"
-            count += 1
+            first_index = next(
+                i for i, other in enumerate(chunks) if other.content == chunk.content
+            )
+            chunk_context = f"Test{first_index + 2}"
         assert chunk.doc_summary == doc_summary
         assert chunk.chunk_context == chunk_context
+
+
+def _make_db_doc(
+    doc_id: str,
+    content_hash: str | None,
+    chunk_count: int | None = 1,
+    search_settings_id: int | None = 1,
+) -> Mock:
+    db_doc = Mock()
+    db_doc.id = doc_id
+    db_doc.content_hash = content_hash
+    db_doc.content_hash_search_settings_id = search_settings_id
+    db_doc.chunk_count = chunk_count
+    return db_doc
+
+
+def test_content_hash_ignores_doc_updated_at() -> None:
+    doc = create_test_document()
+    touched_doc = create_test_document()
+    touched_doc.doc_updated_at = datetime.now(timezone.utc)
+    assert compute_document_content_hash(doc) == compute_document_content_hash(
+        touched_doc
+    )
+
+    edited_doc = create_test_document(
+        sections=[TextSection(text="Edited content", link="test_link")]
+    )
+    assert compute_document_content_hash(doc) != compute_document_content_hash(
+        edited_doc
+    )
+
+
+def test_get_docs_with_changed_content() -> None:
+    unchanged = create_test_document(doc_id="unchanged")
+    changed = create_test_document(doc_id="changed")
+    new = create_test_document(doc_id="new")
+    never_finished = create_test_document(doc_id="never_finished")
+    documents = [unchanged, changed, new, never_finished]
+    id_to_content_hash = {
+        doc.id: compute_document_content_hash(doc) for doc in documents
+    }
+
+    db_docs = [
+        _make_db_doc("unchanged", id_to_content_hash["unchanged"]),
+        _make_db_doc("changed", "stale_hash"),
+        _make_db_doc(
+            "never_finished", id_to_content_hash["never_finished"], chunk_count=None
+        ),
+    ]
+
+    result = get_docs_with_changed_content(
+        documents=documents,
+        db_docs=cast(list[Any], db_docs),
+        id_to_content_hash=id_to_content_hash,
+        search_settings_id=1,
+    )
+    assert [doc.id for doc in result] == ["changed", "new", "never_finished"]
+
+
+def test_content_hash_recorded_by_secondary_index_run() -> None:
+    old_doc = create_test_document(doc_id="doc")
+    new_doc = create_test_document(
+        doc_id="doc", sections=[TextSection(text="Edited content", link="test_link")]
+    )
+    # last indexed into the primary index (search settings 1)
+    db_doc = _make_db_doc("doc", compute_document_content_hash(old_doc))
+
+    # the secondary index (search settings 2) sees the edit first
+    db_session = Mock()
+    db_session.query.return_value.filter.return_value.all.return_value = [db_doc]
+    update_docs_content_hash__no_commit(
+        ids_to_content_hash={"doc": compute_document_content_hash(new_doc)},
+        search_settings_id=2,
+        db_session=db_session,
+    )
+
+    # the primary index still gets the edit
+    for search_settings_id, expected_doc_ids in [(1, ["doc"]), (2, [])]:
+        result = get_docs_with_changed_content(
+            documents=[new_doc],
+            db_docs=[db_doc],
+            id_to_content_hash={"doc": compute_document_content_hash(new_doc)},
+            search_settings_id=search_settings_id,
+        )
+        assert [doc.id for doc in result] == expected_doc_ids
+
+
+def test_unchanged_docs_new_to_cc_pair_are_synced() -> None:
+    documents = [
+        create_test_document(doc_id="known"),
+        create_test_document(doc_id="newly_paired"),
+    ]
+    db_docs = [
+        _make_db_doc(doc.id, compute_document_content_hash(doc)) for doc in documents
+    ]
+    with (
+        patch(f"{_PIPELINE_MODULE}.get_documents_by_ids", return_value=db_docs),
+        patch(f"{_PIPELINE_MODULE}.get_doc_ids_to_update", return_value=documents),
+        patch(f"{_PIPELINE_MODULE}.update_docs_updated_at__no_commit"),
+        patch(
+            f"{_PIPELINE_MODULE}.upsert_document_by_connector_credential_pair",
+            return_value=["newly_paired"],
+        ),
+        patch(
+            f"{_PIPELINE_MODULE}.update_docs_last_modified__no_commit"
+        ) as mock_update_last_modified,
+    ):
+        ctx = index_doc_batch_prepare(
+            documents=documents,
+            index_attempt_metadata=IndexAttemptMetadata(
+                connector_id=1, credential_id=1, search_settings_id=1
+            ),
+            db_session=Mock(),
+            skip_unchanged_content=True,
+        )
+
+    # nothing to reindex, but the doc needs the access of its new cc pair
+    assert ctx is None
+    mock_update_last_modified.assert_called_once()
+    assert mock_update_last_modified.call_args.kwargs["document_ids"] == [
+        "newly_paired"
+    ]
+
+
+def _make_chunk(document: Document, chunk_id: int, content: str) -> DocAwareChunk:
+    return DocAwareChunk(
+        source_document=document,
+        chunk_id=chunk_id,
+        blurb=content,
+        content=content,
+        source_links={0: "test_link"},
+        image_file_id=None,
+        section_continuation=False,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        contextual_rag_reserved_tokens=0,
+        doc_summary="",
+        chunk_context="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+    )
+
+
+def test_diff_chunks_against_stored_hashes() -> None:
+    doc = create_test_document(doc_id="doc")
+    old_chunks = [_make_chunk(doc, i, f"chunk {i}") for i in range(4)]
+    stored_hashes = diff_chunks_against_stored_hashes(
+        chunks=old_chunks,
+        id_to_db_doc_map={},
+        reuse_unchanged_chunks=True,
+        search_settings_id=1,
+    ).doc_id_to_chunk_hashes["doc"]
+
+    # edit the second chunk and drop the last one
+    new_chunks = [
+        _make_chunk(doc, 0, "chunk 0"),
+        _make_chunk(doc, 1, "edited chunk 1"),
+        _make_chunk(doc, 2, "chunk 2"),
+    ]
+    db_doc = _make_db_doc("doc", "old_content_hash", chunk_count=4)
+    db_doc.chunk_hashes = stored_hashes
+
+    chunk_diff = diff_chunks_against_stored_hashes(
+        chunks=new_chunks,
+        id_to_db_doc_map={"doc": db_doc},
+        reuse_unchanged_chunks=True,
+        search_settings_id=1,
+    )
+    assert [chunk.chunk_id for chunk in chunk_diff.reused_chunks] == [0, 2]
+    assert [chunk.chunk_id for chunk in chunk_diff.chunks_to_embed] == [1]
+    assert set(chunk_diff.doc_id_to_chunk_hashes["doc"]) == {"0", "1", "2"}
+
+    # document level fields are written with every chunk
+    renamed_doc = create_test_document(doc_id="doc", title="New Title")
+    chunk_diff = diff_chunks_against_stored_hashes(
+        chunks=[_make_chunk(renamed_doc, 0, "chunk 0")],
+        id_to_db_doc_map={"doc": db_doc},
+        reuse_unchanged_chunks=True,
+        search_settings_id=1,
+    )
+    assert not chunk_diff.reused_chunks
+
+    chunk_diff = diff_chunks_against_stored_hashes(
+        chunks=new_chunks,
+        id_to_db_doc_map={"doc": db_doc},
+        reuse_unchanged_chunks=False,
+        search_settings_id=1,
+    )
+    assert not chunk_diff.reused_chunks
+
+    # the hashes were recorded for the index of other search settings, whose
+    # chunks don't necessarily match these
+    chunk_diff = diff_chunks_against_stored_hashes(
+        chunks=new_chunks,
+        id_to_db_doc_map={"doc": db_doc},
+        reuse_unchanged_chunks=True,
+        search_settings_id=2,
+    )
+    assert not chunk_diff.reused_chunks
+
+
+def test_update_doc_updated_at_of_reused_chunks() -> None:
+    previous_updated_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    touched_doc = create_test_document(doc_id="touched")
+    touched_doc.doc_updated_at = datetime(2025, 2, 1, tzinfo=timezone.utc)
+    untouched_doc = create_test_document(doc_id="untouched")
+    untouched_doc.doc_updated_at = previous_updated_at
+    failing_doc = create_test_document(doc_id="failing")
+    failing_doc.doc_updated_at = touched_doc.doc_updated_at
+
+    id_to_db_doc_map = {}
+    for doc in [touched_doc, untouched_doc, failing_doc]:
+        id_to_db_doc_map[doc.id] = _make_db_doc(doc.id, "content_hash")
+        id_to_db_doc_map[doc.id].doc_updated_at = previous_updated_at
+
+    def _update_single(doc_id: str, **kwargs: Any) -> int:
+        if doc_id == "failing":
+            raise RuntimeError("Vespa is down")
+        return kwargs["chunk_count"]
+
+    document_index = Mock()
+    document_index.update_single.side_effect = _update_single
+    failures = update_doc_updated_at_of_reused_chunks(
+        document_index=document_index,
+        reused_chunks=[
+            _make_chunk(doc, 0, "chunk 0")
+            for doc in [touched_doc, untouched_doc, failing_doc]
+        ],
+        id_to_db_doc_map=cast(dict[str, Any], id_to_db_doc_map),
+        doc_id_to_new_chunk_cnt={"touched": 2, "untouched": 1, "failing": 1},
+        tenant_id="tenant",
+    )
+
+    updated_doc_ids = [
+        call.args[0] for call in document_index.update_single.call_args_list
+    ]
+    assert updated_doc_ids == ["touched", "failing"]
+    touched_call = document_index.update_single.call_args_list[0]
+    assert touched_call.kwargs["chunk_count"] == 2
+    assert touched_call.kwargs["fields"].doc_updated_at == touched_doc.doc_updated_at
+
+    # the failed doc is retried in full next time
+    assert [
+        failure.failed_document.document_id
+        for failure in failures
+        if failure.failed_document
+    ] == ["failing"]
@@ -0,0 +1,132 @@
+from onyx.db.models import KGEntity
+from onyx.db.models import KGEntityExtractionStaging
+from onyx.kg.clustering.clustering import _plan_entity_clustering
+from onyx.kg.clustering.clustering import _resolved_target_update_values
+
+
+def _staging_entity(
+    name: str,
+    entity_type: str = "ACCOUNT",
+    document_id: str | None = None,
+    occurrences: int = 1,
+) -> KGEntityExtractionStaging:
+    return KGEntityExtractionStaging(
+        id_name=f"{entity_type}::{name}::{document_id}",
+        name=name,
+        entity_type_id_name=entity_type,
+        document_id=document_id,
+        alternative_names=[],
+        occurrences=occurrences,
+        attributes={},
+    )
+
+
+def _entity(
+    id_name: str,
+    name: str,
+    entity_type: str = "ACCOUNT",
+    document_id: str | None = None,
+) -> KGEntity:
+    return KGEntity(
+        id_name=id_name,
+        name=name,
+        entity_type_id_name=entity_type,
+        document_id=document_id,
+        alternative_names=[],
+        occurrences=3,
+        attributes={"region": "emea"},
+    )
+
+
+def test_plan_merges_into_existing_entity() -> None:
+    existing = _entity("ACCOUNT::existing", "acme corporation")
+    staged = _staging_entity("Acme Corporation.", occurrences=2)
+
+    plan = _plan_entity_clustering(
+        entities=[staged],
+        match_names=["acme corporation."],
+        similar_entities=[[existing]],
+    )
+
+    assert plan.staging_to_target_id_names == {staged.id_name: existing.id_name}
+    (target,) = plan.targets
+    assert not target.is_new and target.is_modified
+    assert target.occurrences == 5
+    assert target.attributes == {"region": "emea"}
+    assert target.alternative_names == ["acme corporation."]
+
+
+def test_plan_matches_entities_created_earlier_in_batch() -> None:
+    first = _staging_entity("Globex Corporation")
+    second = _staging_entity("Globex Corporation.")
+    # numbers are never clustered
+    versioned = _staging_entity("Globex Corporation 2")
+
+    plan = _plan_entity_clustering(
+        entities=[first, second, versioned],
+        match_names=[
+            "globex corporation",
+            "globex corporation.",
+            "globex corporation 2",
+        ],
+        similar_entities=[[], [], []],
+    )
+
+    new_targets = [target for target in plan.targets if target.is_new]
+    assert len(new_targets) == 2
+    assert (
+        plan.staging_to_target_id_names[first.id_name]
+        == plan.staging_to_target_id_names[second.id_name]
+    )
+    assert (
+        plan.staging_to_target_id_names[versioned.id_name]
+        != plan.staging_to_target_id_names[first.id_name]
+    )
+
+
+def test_plan_document_entities() -> None:
+    docless = _entity("ACCOUNT::docless", "initech")
+    with_doc = _entity("ACCOUNT::with_doc", "initech", document_id="doc_0")
+
+    staged_1 = _staging_entity("Initech", document_id="doc_1")
+    staged_2 = _staging_entity("Initech", document_id="doc_2")
+
+    plan = _plan_entity_clustering(
+        entities=[staged_1, staged_2],
+        match_names=["initech", "initech"],
+        similar_entities=[[docless, with_doc], [docless, with_doc]],
+    )
+
+    # the first document entity claims the entity without a document, the
+    # second one can't be merged into it anymore
+    assert plan.staging_to_target_id_names[staged_1.id_name] == docless.id_name
+    assert plan.staging_to_target_id_names[staged_2.id_name] not in (
+        docless.id_name,
+        with_doc.id_name,
+    )
+    assert plan.normalized_document_ids == {"doc_1", "doc_2"}
+
+
+def test_resolved_target_keeps_planned_merges() -> None:
+    staged_doc = _staging_entity("Initech Corp", document_id="doc_1", occurrences=2)
+    staged_docless = _staging_entity("Initech Corp.", occurrences=4)
+
+    plan = _plan_entity_clustering(
+        entities=[staged_doc, staged_docless],
+        match_names=["initech corp", "initech corp."],
+        similar_entities=[[], []],
+    )
+    (target,) = plan.targets
+    assert target.is_new and target.is_modified
+
+    # the insert conflicted with an entity of the same document, whose row the
+    # conflict clause already added the insert values to
+    stored = _entity("ACCOUNT::stored", "initech corp", document_id="doc_1")
+    stored.occurrences += 2
+    stored.alternative_names = ["initech co"]
+
+    update_values = _resolved_target_update_values(target, stored)
+    assert update_values["id_name"] == stored.id_name
+    assert update_values["occurrences"] == 9
+    assert update_values["alternative_names"] == ["initech co", "initech corp."]
+    assert update_values["attributes"] == {"region": "emea"}
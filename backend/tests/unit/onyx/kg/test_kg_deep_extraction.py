@@ -0,0 +1,135 @@
+import json
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+import onyx.db.document  # noqa: F401 must be imported before onyx.db.entities
+from onyx.kg.models import KGChunkFormat
+from onyx.kg.models import KGEnhancedDocumentMetadata
+from onyx.kg.models import KGImpliedExtractionResults
+from onyx.kg.utils.extraction_utils import kg_deep_extraction
+
+_MODULE = "onyx.kg.utils.extraction_utils"
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, bytes] = {}
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self) -> "FakeRedis":
+        return self
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self.store[key] = value.encode("utf-8")
+
+    def execute(self) -> None:
+        pass
+
+
+def _document(
+    document_id: str,
+) -> tuple[str, KGEnhancedDocumentMetadata, KGImpliedExtractionResults]:
+    metadata = KGEnhancedDocumentMetadata(
+        entity_type="JIRA",
+        metadata_attribute_conversion=None,
+        document_metadata=None,
+        deep_extraction=True,
+        classification_enabled=False,
+        classification_instructions=None,
+        skip=False,
+    )
+    implied_extraction = KGImpliedExtractionResults(
+        document_entity=f"JIRA::{document_id}",
+        implied_entities=set(),
+        implied_relationships=set(),
+        company_participant_emails=set(),
+        account_participant_emails=set(),
+    )
+    return document_id, metadata, implied_extraction
+
+
+def _chunk_batches(document_id: str, *_: Any) -> list[list[KGChunkFormat]]:
+    return [
+        [
+            KGChunkFormat(
+                document_id=document_id,
+                chunk_id=0,
+                title=document_id,
+                content=f"{document_id} is about ACCOUNT {document_id.upper()}",
+                primary_owners=[],
+                secondary_owners=[],
+                source_type="jira",
+            )
+        ]
+    ]
+
+
+def _extraction(document_id: str) -> dict[str, list[str]]:
+    return {
+        "entities": [f"ACCOUNT::{document_id}"],
+        "relationships": [f"JIRA::{document_id}__is about__ACCOUNT::{document_id}"],
+    }
+
+
+def _run(
+    redis_client: FakeRedis, answers: list[str]
+) -> tuple[dict[str, Any], MagicMock]:
+    fast_llm = MagicMock()
+    fast_llm.config.model_provider = "openai"
+    fast_llm.config.model_name = "gpt-4o-mini"
+    fast_llm.invoke.side_effect = [AIMessage(content=answer) for answer in answers]
+
+    with (
+        patch(f"{_MODULE}.get_entity_types_str", return_value="ACCOUNT, JIRA"),
+        patch(f"{_MODULE}.get_relationship_types_str", return_value="is about"),
+        patch(f"{_MODULE}.get_default_llms", return_value=(MagicMock(), fast_llm)),
+        patch(f"{_MODULE}._get_chunk_batches", side_effect=_chunk_batches),
+        patch(f"{_MODULE}.get_redis_client", return_value=redis_client),
+    ):
+        results = kg_deep_extraction(
+            [_document("doc1"), _document("doc2")],
+            tenant_id="tenant",
+            index_name="index",
+            kg_config_settings=MagicMock(KG_VENDOR="Onyx"),
+        )
+    return results, fast_llm
+
+
+def test_short_documents_are_packed_and_cached() -> None:
+    redis_client = FakeRedis()
+    packed_answer = json.dumps({"1": _extraction("doc1"), "2": _extraction("doc2")})
+
+    results, fast_llm = _run(redis_client, [packed_answer])
+
+    assert fast_llm.invoke.call_count == 1
+    prompt = fast_llm.invoke.call_args.args[0][0].content
+    assert "DOCUMENT 1" in prompt and "DOCUMENT 2" in prompt
+    for document_id in ("doc1", "doc2"):
+        assert results[document_id].deep_extracted_entities == {
+            f"ACCOUNT::{document_id}"
+        }
+        assert results[document_id].deep_extracted_relationships == {
+            f"JIRA::{document_id}__is_about__ACCOUNT::{document_id}"
+        }
+    assert len(redis_client.store) == 2
+
+    # unchanged documents are not sent to the LLM again
+    cached_results, fast_llm = _run(redis_client, [])
+
+    assert fast_llm.invoke.call_count == 0
+    assert cached_results == results
+
+
+def test_documents_missing_from_packed_answer_are_extracted_alone() -> None:
+    packed_answer = json.dumps({"1": _extraction("doc1")})
+    single_answer = json.dumps(_extraction("doc2"))
+
+    results, fast_llm = _run(FakeRedis(), [packed_answer, single_answer])
+
+    assert fast_llm.invoke.call_count == 2
+    assert results["doc2"].deep_extracted_entities == {"ACCOUNT::doc2"}
@@ -0,0 +1,53 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.kg.extractions.extraction_processing import _upsert_staging_entities
+from onyx.kg.extractions.extraction_processing import _upsert_staging_relationships
+
+_MODULE = "onyx.kg.extractions.extraction_processing"
+
+
+def _upsert_entity(db_session: Any, name: str, entity_type: str, **_: Any) -> Any:
+    if name == "bad":
+        raise ValueError("bad entity")
+    return MagicMock(id_name=f"{entity_type}::{name}", attributes={"name": name})
+
+
+def test_failed_entity_batch_falls_back_to_row_by_row() -> None:
+    staging_entities = [
+        {"name": "good", "entity_type": "ACCOUNT"},
+        {"name": "bad", "entity_type": "ACCOUNT"},
+        {"name": "other", "entity_type": "JIRA"},
+    ]
+
+    with patch(f"{_MODULE}.get_session_with_current_tenant"), patch(
+        f"{_MODULE}.upsert_staging_entities_batch", side_effect=ValueError("batch")
+    ), patch(
+        f"{_MODULE}.upsert_staging_entity", side_effect=_upsert_entity
+    ) as upsert_entity:
+        upserted = _upsert_staging_entities(staging_entities)
+
+    assert upsert_entity.call_count == 3
+    assert upserted == {
+        "ACCOUNT::good": {"name": "good"},
+        "JIRA::other": {"name": "other"},
+    }
+
+
+def test_failed_relationship_batch_falls_back_to_row_by_row() -> None:
+    staging_relationships: list[tuple[str, str | None]] = [
+        ("ACCOUNT::a__owns__JIRA::b", "doc1"),
+        ("ACCOUNT::c__owns__JIRA::d", "doc2"),
+    ]
+
+    with patch(f"{_MODULE}.get_session_with_current_tenant"), patch(
+        f"{_MODULE}.upsert_staging_relationships_batch",
+        side_effect=ValueError("batch"),
+    ), patch(f"{_MODULE}.upsert_staging_relationship") as upsert_relationship:
+        _upsert_staging_relationships(staging_relationships)
+
+    assert [
+        (call.kwargs["relationship_id_name"], call.kwargs["source_document_id"])
+        for call in upsert_relationship.call_args_list
+    ] == staging_relationships
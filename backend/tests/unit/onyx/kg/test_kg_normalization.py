@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from datetime import datetime
+from datetime import timezone
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import onyx.db.document  # noqa: F401 must be imported before onyx.db.entities
+from onyx.kg.clustering.entity_name_index import get_kg_entity_name_index
+from onyx.kg.clustering.entity_name_index import get_name_trigrams
+from onyx.kg.clustering.entity_name_index import IndexedEntity
+from onyx.kg.clustering.entity_name_index import KGEntityNameIndex
+from onyx.kg.clustering.normalizations import _filter_allowed_candidates
+
+_MODULE = "onyx.kg.clustering.entity_name_index"
+
+
+def _row(
+    id_name: str,
+    name: str,
+    entity_type: str = "ACCOUNT",
+    document_id: str | None = None,
+    subtype: str | None = None,
+) -> Any:
+    return SimpleNamespace(
+        id_name=id_name,
+        name=name,
+        name_trigrams=sorted(get_name_trigrams(name.replace(" ", ""))),
+        entity_type_id_name=entity_type,
+        document_id=document_id,
+        subtype=subtype,
+        time_updated=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _candidate(id_name: str, document_id: str | None = None) -> IndexedEntity:
+    return IndexedEntity(
+        id_name=id_name,
+        name=id_name,
+        document_id=document_id,
+        subtype=None,
+        trigrams=frozenset(),
+    )
+
+
+def test_get_name_trigrams_matches_pg_trgm() -> None:
+    # SELECT show_trgm('acme') -> {"  a"," ac","acm","cme","me "}
+    assert get_name_trigrams("acme") == {"  a", " ac", "acm", "cme", "me "}
+    assert get_name_trigrams("") == set()
+
+
+def test_entity_name_index_search_and_refresh() -> None:
+    rows = [
+        _row("ACCOUNT::acme", "acme corp"),
+        _row("ACCOUNT::acme_eu", "acme corp eu", subtype="reseller"),
+        _row("ACCOUNT::globex", "globex"),
+        _row("TICKET::acme", "acme corp", entity_type="TICKET", document_id="doc"),
+    ]
+    index = KGEntityNameIndex()
+    with patch(f"{_MODULE}.get_entities_for_name_index", return_value=rows):
+        index.refresh(MagicMock())
+
+    results = index.search("ACCOUNT", "acmecorp")
+    assert [entity.id_name for entity, _ in results] == [
+        "ACCOUNT::acme",
+        "ACCOUNT::acme_eu",
+    ]
+    assert results[0][1] == 1.0
+    assert [
+        entity.id_name
+        for entity, _ in index.search("ACCOUNT", "acmecorp", subtype="reseller")
+    ] == ["ACCOUNT::acme_eu"]
+    assert index.search("PERSON", "acmecorp") == []
+
+    # a refresh within the interval is a no-op, a forced one applies updated
+    # entities and reloads types whose entity counts no longer match
+    renamed = _row("ACCOUNT::globex", "initech")
+    with (
+        patch(
+            f"{_MODULE}.get_entities_for_name_index",
+            side_effect=[[renamed], [rows[1], renamed]],
+        ) as get_entities,
+        patch(
+            f"{_MODULE}.get_entity_counts_by_type",
+            return_value={"ACCOUNT": 2, "TICKET": 1},
+        ),
+    ):
+        index.refresh(MagicMock())
+        get_entities.assert_not_called()
+        index.refresh(MagicMock(), force=True)
+
+    assert [entity.id_name for entity, _ in index.search("ACCOUNT", "acmecorp")] == [
+        "ACCOUNT::acme_eu"
+    ]
+    assert [entity.id_name for entity, _ in index.search("ACCOUNT", "initech")] == [
+        "ACCOUNT::globex"
+    ]
+
+
+def test_filter_allowed_candidates() -> None:
+    candidate_lists = [
+        [
+            _candidate("a1", "doc_denied"),
+            _candidate("a2"),
+            _candidate("a3", "doc_allowed"),
+            _candidate("a4", "doc_late"),
+        ],
+        [_candidate("b1", "doc_allowed"), _candidate("b2", "doc_denied")],
+        [],
+    ]
+
+    def _get_allowed_document_ids(
+        db_session: Any, view_name: str, document_ids: list[str]
+    ) -> set[str]:
+        return {doc_id for doc_id in document_ids if doc_id != "doc_denied"}
+
+    with (
+        patch("onyx.kg.clustering.normalizations.get_session_with_current_tenant"),
+        patch(
+            "onyx.kg.clustering.normalizations.get_allowed_document_ids",
+            side_effect=_get_allowed_document_ids,
+        ) as get_allowed,
+    ):
+        allowed = _filter_allowed_candidates(candidate_lists, "view", limit=2)
+
+    assert [[c.id_name for c in candidates] for candidates in allowed] == [
+        ["a2", "a3"],
+        ["b1"],
+        [],
+    ]
+    # the allowed documents of the first window of every list are looked up
+    # together, "doc_late" is never needed
+    get_allowed.assert_called_once()
+    assert set(get_allowed.call_args.args[2]) == {"doc_denied", "doc_allowed"}
+
+
+def test_get_kg_entity_name_index_refreshes_in_background_and_evicts() -> None:
+    tenant_indexes: OrderedDict[str, KGEntityNameIndex] = OrderedDict()
+    with (
+        patch(f"{_MODULE}._tenant_indexes", tenant_indexes),
+        patch(f"{_MODULE}.KG_NORMALIZATION_INDEX_MAX_TENANTS", 2),
+        patch(f"{_MODULE}.get_session_with_tenant"),
+        patch(f"{_MODULE}.get_entities_for_name_index", return_value=[]),
+        patch(f"{_MODULE}.get_executor") as get_executor,
+    ):
+        # the first lookup of a tenant loads its index in the calling thread
+        index = get_kg_entity_name_index("tenant1")
+        assert index.is_loaded()
+        get_executor.assert_not_called()
+
+        # a due refresh is handed off to the executor once
+        with patch(f"{_MODULE}.KG_NORMALIZATION_INDEX_REFRESH_INTERVAL", 0):
+            assert get_kg_entity_name_index("tenant1") is index
+            assert get_kg_entity_name_index("tenant1") is index
+        get_executor.return_value.submit.assert_called_once()
+        assert index.refresh_pending
+
+        get_kg_entity_name_index("tenant2")
+        get_kg_entity_name_index("tenant1")
+        get_kg_entity_name_index("tenant3")
+        assert list(tenant_indexes) == ["tenant1", "tenant3"]
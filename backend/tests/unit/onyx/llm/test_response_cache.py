@@ -0,0 +1,166 @@
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+from unittest.mock import patch
+
+import litellm
+import pytest
+from langchain_core.messages import HumanMessage
+
+from onyx.llm.chat_llm import DefaultMultiLLM
+from onyx.llm.response_cache import cache_llm_response
+from onyx.llm.response_cache import llm_response_cache_flow
+from onyx.secondary_llm_flows.time_filter import extract_time_filter
+
+_MODULE = "onyx.llm.response_cache"
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.store: dict[str, bytes] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self._results: list[Any] = []
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self) -> "FakeRedis":
+        self._results = []
+        return self
+
+    def execute(self) -> list[Any]:
+        return self._results
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self.store[key] = value.encode("utf-8")
+        self._results.append(True)
+
+    def delete(self, *keys: bytes) -> None:
+        for key in keys:
+            self.store.pop(key.decode("utf-8"), None)
+        self._results.append(len(keys))
+
+    def expire(self, key: str, seconds: int) -> None:
+        self._results.append(True)
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+        self._results.append(len(mapping))
+
+    def zremrangebyscore(self, key: str, min: str, max: float) -> None:
+        sorted_set = self.sorted_sets.get(key, {})
+        for member, score in list(sorted_set.items()):
+            if score <= max:
+                del sorted_set[member]
+        self._results.append(0)
+
+    def zcard(self, key: str) -> None:
+        self._results.append(len(self.sorted_sets.get(key, {})))
+
+    def zpopmin(self, key: str, count: int) -> list[tuple[bytes, float]]:
+        sorted_set = self.sorted_sets.get(key, {})
+        popped = sorted(sorted_set.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del sorted_set[member]
+        return [(member.encode("utf-8"), score) for member, score in popped]
+
+
+def _llm(temperature: float = 0) -> DefaultMultiLLM:
+    return DefaultMultiLLM(
+        api_key="test_key",
+        timeout=30,
+        model_provider="openai",
+        model_name="gpt-4o",
+        max_input_tokens=4096,
+        temperature=temperature,
+    )
+
+
+def _response(content: str) -> litellm.ModelResponse:
+    return litellm.ModelResponse(
+        id="chatcmpl-123",
+        choices=[
+            litellm.Choices(
+                finish_reason="stop",
+                index=0,
+                message=litellm.Message(content=content, role="assistant"),
+            )
+        ],
+        model="gpt-4o",
+    )
+
+
+@llm_response_cache_flow("test_flow")
+def _cached_flow(llm: DefaultMultiLLM, prompt: str) -> str:
+    return str(llm.invoke([HumanMessage(content=prompt)]).content)
+
+
+@pytest.fixture
+def redis_client() -> Iterator[FakeRedis]:
+    redis_client = FakeRedis()
+    with (
+        patch(f"{_MODULE}.LLM_RESPONSE_CACHE_ENABLED", True),
+        patch(f"{_MODULE}.get_redis_client", return_value=redis_client),
+    ):
+        yield redis_client
+
+
+def test_flow_responses_are_cached(redis_client: FakeRedis) -> None:
+    llm = _llm()
+    with patch("onyx.llm.chat_llm.litellm.completion") as mock_completion:
+        mock_completion.return_value = _response("rephrased")
+
+        assert _cached_flow(llm, "question") == "rephrased"
+        # surrounding whitespace doesn't change the prompt
+        assert _cached_flow(llm, " question\n") == "rephrased"
+        assert mock_completion.call_count == 1
+
+        assert _cached_flow(llm, "other question") == "rephrased"
+        assert mock_completion.call_count == 2
+
+        # calls outside of a flow are not cached
+        llm.invoke([HumanMessage(content="question")])
+        assert mock_completion.call_count == 3
+
+
+def test_nonzero_temperature_is_not_cached(redis_client: FakeRedis) -> None:
+    llm = _llm(temperature=0.5)
+    with patch("onyx.llm.chat_llm.litellm.completion") as mock_completion:
+        mock_completion.return_value = _response("rephrased")
+
+        _cached_flow(llm, "question")
+        _cached_flow(llm, "question")
+        assert mock_completion.call_count == 2
+    assert redis_client.store == {}
+
+
+def test_oldest_responses_are_evicted(redis_client: FakeRedis) -> None:
+    with (
+        patch(f"{_MODULE}.LLM_RESPONSE_CACHE_MAX_ENTRIES", 2),
+        patch(f"{_MODULE}.time.time", side_effect=[1.0, 2.0, 3.0]),
+    ):
+        for key in ["first", "second", "third"]:
+            cache_llm_response(key, f"response {key}")
+
+    assert set(redis_client.store) == {"second", "third"}
+
+
+def test_time_filter_is_cached_within_a_day(redis_client: FakeRedis) -> None:
+    llm = _llm()
+    with (
+        patch("onyx.llm.chat_llm.litellm.completion") as mock_completion,
+        patch("onyx.prompts.prompt_utils.datetime") as mock_datetime,
+    ):
+        mock_completion.return_value = _response('{"filter_type": "favor recent"}')
+        mock_datetime.now.side_effect = [
+            datetime(2025, 3, 4, 9, 15),
+            datetime(2025, 3, 4, 17, 40),
+            datetime(2025, 3, 5, 9, 15),
+        ]
+
+        assert extract_time_filter("latest news", llm) == (None, True)
+        assert extract_time_filter("latest news", llm) == (None, True)
+        assert mock_completion.call_count == 1
+
+        extract_time_filter("latest news", llm)
+        assert mock_completion.call_count == 2
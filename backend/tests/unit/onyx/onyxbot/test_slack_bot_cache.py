@@ -0,0 +1,121 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.onyxbot.slack import cache
+from onyx.onyxbot.slack import listener
+from onyx.onyxbot.slack.cache import SlackBotConfigCache
+from onyx.onyxbot.slack.work_queue import TenantWorkQueue
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+
+@contextmanager
+def _fake_session() -> Iterator[MagicMock]:
+    yield MagicMock()
+
+
+def test_config_cache_is_invalidated_by_admin_edits() -> None:
+    version: bytes | None = None
+    redis_client = MagicMock()
+    redis_client.get.side_effect = lambda key: version
+    channel_config = MagicMock(id=1, channel_config={"respond_to_bots": True})
+
+    with (
+        patch.object(cache, "get_redis_client", return_value=redis_client),
+        patch.object(cache, "get_session_with_current_tenant", _fake_session),
+        patch.object(cache, "_VERSION_CHECK_INTERVAL", 0),
+        patch.object(
+            cache, "fetch_slack_bot", return_value=MagicMock(enabled=True)
+        ) as fetch_slack_bot,
+        patch.object(
+            cache,
+            "get_slack_channel_config_for_bot_and_channel",
+            return_value=channel_config,
+        ) as get_channel_config,
+        patch.object(
+            cache, "get_channel_name_from_id", return_value=("general", False)
+        ) as get_channel_name,
+    ):
+        config_cache = SlackBotConfigCache()
+        for _ in range(3):
+            assert config_cache.is_slack_bot_enabled(1) is True
+            assert config_cache.get_slack_channel_config(1, "general").id == 1
+            assert config_cache.get_channel_name(MagicMock(), 1, "C1") == (
+                "general",
+                False,
+            )
+        assert fetch_slack_bot.call_count == 1
+        assert get_channel_config.call_count == 1
+        assert get_channel_name.call_count == 1
+
+        # an admin disabled the bot
+        version = b"1"
+        fetch_slack_bot.return_value = MagicMock(enabled=False)
+        assert config_cache.is_slack_bot_enabled(1) is False
+        config_cache.get_slack_channel_config(1, "general")
+        assert get_channel_config.call_count == 2
+        # channel names come from Slack and aren't affected by admin edits
+        config_cache.get_channel_name(MagicMock(), 1, "C1")
+        assert get_channel_name.call_count == 1
+
+
+def test_tenant_work_queue_is_bounded() -> None:
+    started = threading.Event()
+    release = threading.Event()
+    done = threading.Semaphore(0)
+    tenant_ids: list[str | None] = []
+
+    def _handle_event() -> None:
+        started.set()
+        release.wait()
+        tenant_ids.append(CURRENT_TENANT_ID_CONTEXTVAR.get())
+        done.release()
+
+    work_queue = TenantWorkQueue("tenant", num_workers=1, max_size=2)
+    token = CURRENT_TENANT_ID_CONTEXTVAR.set("tenant")
+    try:
+        # one event is picked up by the worker, two more fit in the queue
+        assert work_queue.submit(_handle_event)
+        assert started.wait(timeout=5)
+        assert work_queue.submit(_handle_event)
+        assert work_queue.submit(_handle_event)
+        assert not work_queue.submit(_handle_event)
+    finally:
+        CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+
+    release.set()
+    for _ in range(3):
+        assert done.acquire(timeout=5)
+    work_queue.shutdown()
+    assert tenant_ids == ["tenant"] * 3
+
+
+def test_dropped_questions_get_a_busy_reply() -> None:
+    client = MagicMock()
+    question = MagicMock(type="events_api")
+    with (
+        patch.object(listener, "acknowledge_message"),
+        patch.object(listener, "get_current_tenant_id", return_value="tenant"),
+        patch.object(listener, "get_tenant_work_queue") as get_tenant_work_queue,
+        patch.object(listener, "prefilter_requests", return_value=True),
+        patch.object(listener, "build_request_details") as build_request_details,
+        patch.object(listener, "respond_in_thread_or_channel") as respond,
+    ):
+        get_tenant_work_queue.return_value.submit.return_value = False
+        process_slack_event = listener.create_process_slack_event()
+
+        # messages that aren't aimed at the bot are dropped quietly
+        build_request_details.return_value = MagicMock(
+            bypass_filters=False, is_bot_dm=False
+        )
+        process_slack_event(client, question)
+        respond.assert_not_called()
+
+        build_request_details.return_value = MagicMock(
+            bypass_filters=True, is_slash_command=False, msg_to_respond="ts"
+        )
+        process_slack_event(client, question)
+        respond.assert_called_once()
+        assert respond.call_args.kwargs["thread_ts"] == "ts"
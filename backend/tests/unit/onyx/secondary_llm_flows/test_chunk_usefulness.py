@@ -0,0 +1,74 @@
+import threading
+from unittest.mock import MagicMock
+
+from langchain_core.messages import AIMessage
+
+from onyx.secondary_llm_flows.chunk_usefulness import llm_batch_eval_sections
+from onyx.secondary_llm_flows.chunk_usefulness import llm_eval_sections
+from onyx.secondary_llm_flows.chunk_usefulness import stream_llm_section_usefulness
+
+
+def _llm(*responses: str) -> MagicMock:
+    llm = MagicMock()
+    llm.invoke.side_effect = [AIMessage(content=response) for response in responses]
+    return llm
+
+
+def _sections(num_sections: int) -> dict:
+    return {
+        "section_contents": [f"content {i}" for i in range(num_sections)],
+        "titles": [f"title {i}" for i in range(num_sections)],
+        "metadata_list": [{} for _ in range(num_sections)],
+    }
+
+
+def test_sections_are_evaluated_in_one_call() -> None:
+    llm = _llm("The useful sections are [1, 3]")
+    assert llm_eval_sections(query="query", llm=llm, **_sections(3)) == [
+        True,
+        False,
+        True,
+    ]
+    assert llm.invoke.call_count == 1
+
+    # the ranking is trusted if the LLM doesn't answer with a list
+    llm = _llm("I don't know")
+    assert llm_eval_sections(query="query", llm=llm, **_sections(2)) == [True, True]
+
+
+def test_sections_are_evaluated_in_batches() -> None:
+    def _invoke(prompt: list, *args: object, **kwargs: object) -> AIMessage:
+        # only the section with content 0 is useful
+        if "Section 1" not in str(prompt[0].content):
+            return AIMessage(content="Not useful")
+        return AIMessage(
+            content="[1]" if "content 0" in str(prompt[0].content) else "[]"
+        )
+
+    llm = MagicMock()
+    llm.invoke.side_effect = _invoke
+    verdicts = dict(
+        stream_llm_section_usefulness(
+            query="query", llm=llm, batch_size=2, timeout=None, **_sections(5)
+        )
+    )
+
+    assert llm.invoke.call_count == 3
+    assert verdicts == {0: True, 1: False, 2: False, 3: False, 4: False}
+
+
+def test_unevaluated_sections_past_the_timeout() -> None:
+    release = threading.Event()
+
+    def _invoke(*args: object, **kwargs: object) -> AIMessage:
+        release.wait(5)
+        return AIMessage(content="[1]")
+
+    llm = MagicMock()
+    llm.invoke.side_effect = _invoke
+    try:
+        assert llm_batch_eval_sections(
+            query="query", llm=llm, timeout=0.1, **_sections(2)
+        ) == [None, None]
+    finally:
+        release.set()
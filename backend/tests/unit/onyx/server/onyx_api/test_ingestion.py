@@ -0,0 +1,86 @@
+import gzip
+import io
+import json
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from fastapi import UploadFile
+
+from onyx.server.onyx_api.ingestion import bulk_ingest_docs
+
+_MODULE = "onyx.server.onyx_api.ingestion"
+
+
+def _ndjson(num_docs: int) -> bytes:
+    lines = [
+        json.dumps(
+            {
+                "id": f"doc_{i}",
+                "semantic_identifier": f"Document {i}",
+                "sections": [{"text": f"content {i}"}],
+                "metadata": {},
+            }
+        )
+        for i in range(num_docs)
+    ]
+    # invalid documents are skipped
+    lines.insert(1, '{"id": "missing fields"}')
+    lines.insert(2, "not json")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@pytest.fixture
+def queued_batches() -> Iterator[dict[int, list[Any]]]:
+    queued_batches: dict[int, list[Any]] = {}
+    storage = MagicMock()
+    storage.store_batch.side_effect = (
+        lambda batch_num, documents: queued_batches.update({batch_num: documents})
+    )
+
+    with (
+        patch(f"{_MODULE}.get_connector_credential_pair_from_id") as mock_cc_pair,
+        patch(
+            f"{_MODULE}.get_active_search_settings_list",
+            return_value=[MagicMock(id=1)],
+        ),
+        patch(f"{_MODULE}.IndexingCoordination") as mock_coordination,
+        patch(f"{_MODULE}.get_index_attempt"),
+        patch(f"{_MODULE}.mark_attempt_in_progress"),
+        patch(f"{_MODULE}.get_document_batch_storage", return_value=storage),
+        patch(f"{_MODULE}.client_app"),
+        patch(f"{_MODULE}.start_heartbeat", return_value=(MagicMock(), MagicMock())),
+        patch(f"{_MODULE}.stop_heartbeat"),
+        patch(f"{_MODULE}.INDEX_BATCH_SIZE", 2),
+    ):
+        mock_cc_pair.return_value.id = 5
+        mock_coordination.try_create_index_attempt.return_value = 10
+        yield queued_batches
+
+        mock_coordination.set_total_batches.assert_called_once_with(
+            db_session=None, index_attempt_id=10, total_batches=len(queued_batches)
+        )
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_bulk_ingestion_queues_batches(
+    queued_batches: dict[int, list[Any]], compress: bool
+) -> None:
+    content = _ndjson(5)
+    if compress:
+        content = gzip.compress(content)
+
+    job = bulk_ingest_docs(
+        file=UploadFile(io.BytesIO(content)), cc_pair_id=5, db_session=None  # type: ignore
+    )
+
+    assert job.job_id == 10
+    assert job.documents_queued == 5
+    assert job.batches_queued == 3
+    assert [error.line_num for error in job.invalid_documents] == [2, 3]
+    assert [
+        [document.id for document in documents]
+        for _, documents in sorted(queued_batches.items())
+    ] == [["doc_0", "doc_1"], ["doc_2", "doc_3"], ["doc_4"]]
@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock
+
+from redis.exceptions import RedisError
+
+from onyx.utils.call_cache import cache_values
+from onyx.utils.call_cache import get_cached_values
+from onyx.utils.call_cache import get_llm_call_semaphore
+
+
+def _llm(provider: str) -> MagicMock:
+    llm = MagicMock()
+    llm.config.model_provider = provider
+    return llm
+
+
+def test_llm_call_semaphore_per_flow_and_provider() -> None:
+    semaphore = get_llm_call_semaphore("flow", _llm("openai"), 2)
+    assert get_llm_call_semaphore("flow", _llm("openai"), 2) is semaphore
+    assert get_llm_call_semaphore("flow", _llm("anthropic"), 2) is not semaphore
+    assert get_llm_call_semaphore("other_flow", _llm("openai"), 2) is not semaphore
+
+
+def test_cached_values_round_trip_and_redis_errors() -> None:
+    redis_client = MagicMock()
+    redis_client.mget.return_value = [b"cached", None]
+    assert get_cached_values(redis_client, ["a", "b"], "values") == ["cached", None]
+
+    cache_values(redis_client, {"b": "value"}, 60, "values")
+    redis_client.pipeline.return_value.set.assert_called_once_with("b", "value", ex=60)
+    redis_client.pipeline.return_value.execute.assert_called_once()
+
+    # a Redis outage is a cache miss, not an error
+    redis_client.mget.side_effect = RedisError()
+    redis_client.pipeline.return_value.execute.side_effect = RedisError()
+    assert get_cached_values(redis_client, ["a", "b"], "values") == [None, None]
+    cache_values(redis_client, {"b": "value"}, 60, "values")
+
+    # nothing to look up, no round trip
+    redis_client.reset_mock()
+    assert get_cached_values(redis_client, [], "values") == []
+    cache_values(redis_client, {}, 60, "values")
+    redis_client.mget.assert_not_called()
+    redis_client.pipeline.assert_not_called()
@@ -7,7 +7,11 @@ from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from onyx.utils import threadpool_concurrency
+from onyx.utils.threadpool_concurrency import BoundedExecutor
+from onyx.utils.threadpool_concurrency import ExecutorName
 from onyx.utils.threadpool_concurrency import parallel_yield
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from onyx.utils.threadpool_concurrency import run_in_background
 from onyx.utils.threadpool_concurrency import run_with_timeout
 from onyx.utils.threadpool_concurrency import ThreadSafeDict
@@ -389,3 +393,80 @@ def test_parallel_yield_non_blocking() -> None:
     # Verify no values are missing
     assert len(results) == 300  # Should have all values from 0 to 299
     assert sorted(results) == list(range(300))
+
+
+@pytest.fixture
+def small_executor(monkeypatch: pytest.MonkeyPatch) -> BoundedExecutor:
+    executor = BoundedExecutor(ExecutorName.IO, max_workers=2)
+    monkeypatch.setitem(threadpool_concurrency._executors, ExecutorName.IO, executor)
+    return executor
+
+
+def test_nested_parallel_calls_do_not_deadlock(small_executor: BoundedExecutor) -> None:
+    """Test that functions waiting on other functions of the same (busy) executor
+    still finish"""
+
+    def inner(x: int) -> int:
+        time.sleep(0.01)
+        return x
+
+    def outer(x: int) -> list[int]:
+        return run_functions_tuples_in_parallel(
+            [(inner, (x * 10 + i,)) for i in range(3)]
+        )
+
+    results = run_functions_tuples_in_parallel([(outer, (x,)) for x in range(4)])
+
+    assert results == [[x * 10 + i for i in range(3)] for x in range(4)]
+
+
+def test_parallel_calls_respect_max_workers(small_executor: BoundedExecutor) -> None:
+    """Test that no more than max_workers functions of a call run at once, and never
+    more than the executor's threads plus the calling thread"""
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def track() -> None:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    run_functions_tuples_in_parallel([(track, ()) for _ in range(10)], max_workers=2)
+    assert max_running == 2
+
+    max_running = 0
+    run_functions_tuples_in_parallel([(track, ()) for _ in range(10)])
+    assert max_running <= small_executor.max_workers + 1
+
+
+def test_parallel_calls_timeout(small_executor: BoundedExecutor) -> None:
+    """Test that functions that haven't started by the deadline are skipped"""
+    started: list[int] = []
+
+    def slow(x: int) -> int:
+        started.append(x)
+        time.sleep(0.2)
+        return x
+
+    functions_with_args = [(slow, (x,)) for x in range(6)]
+    start_time = time.time()
+    with pytest.raises(TimeoutError):
+        run_functions_tuples_in_parallel(
+            functions_with_args, max_workers=2, timeout=0.1
+        )
+    assert time.time() - start_time < 0.2
+
+    time.sleep(0.3)
+    assert len(started) == 2
+
+    started.clear()
+    results = run_functions_tuples_in_parallel(
+        functions_with_args, allow_failures=True, max_workers=2, timeout=0.3
+    )
+    assert results[:2] == [0, 1]
+    assert results[4:] == [None, None]